@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+FAISS 근사 최근접 이웃 인덱스(IVF-Flat, HNSW, IVF-PQ) 재현율/처리량 벤치마크.
+
+카드 카탈로그가 커졌을 때를 가정해 클러스터 구조를 가진 합성 임베딩(기본 100만 개, 384차원,
+L2 정규화)을 만들고, 정확 검색(Flat) 결과를 기준으로 인덱스 종류별 생성 시간, recall@10,
+일괄 검색 QPS, 단건 검색 지연시간(p50/p95), 인덱스 크기를 비교합니다.
+인덱스 파라미터는 서비스와 같은 vector_index.build_index 로 적용됩니다.
+
+    python benchmarks/bench_ann_index.py --vectors 1000000 --nprobe 8 16 32 --ef-search 32 64 128
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+from datetime import datetime
+
+import faiss
+import numpy as np
+
+# 프로젝트 루트 모듈 임포트를 위한 경로 추가
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+sys.path.append(BENCH_DIR)
+
+from vector_index import (
+    build_index,
+    set_search_params,
+    REDUCTION_NONE,
+    INDEX_FLAT,
+    INDEX_IVF_FLAT,
+    INDEX_HNSW,
+    INDEX_IVF_PQ,
+    INDEX_TYPES,
+)
+from bench_pipeline import summarize, git_commit
+
+
+def make_vectors(rng: np.random.Generator, n: int, dim: int, n_clusters: int, noise: float):
+    """클러스터 중심 주변에 분포한 L2 정규화 임베딩 생성 (실제 문장 임베딩처럼 군집 구조를 가짐)"""
+    centers = rng.standard_normal((n_clusters, dim), dtype=np.float32)
+    vectors = np.empty((n, dim), dtype=np.float32)
+    # 메모리 사용량을 줄이기 위해 나눠서 생성
+    for start in range(0, n, 100_000):
+        end = min(start + 100_000, n)
+        labels = rng.integers(0, n_clusters, size=end - start)
+        vectors[start:end] = centers[labels] + noise * rng.standard_normal((end - start, dim), dtype=np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def evaluate(index: faiss.Index, queries: np.ndarray, truth: np.ndarray, k: int, single_queries: int):
+    """recall@k, 일괄 검색 QPS, 단건 검색 지연시간 측정"""
+    start = time.perf_counter()
+    _, found = index.search(queries, k)
+    batch_seconds = time.perf_counter() - start
+
+    timings = []
+    for i in range(min(single_queries, len(queries))):
+        start = time.perf_counter()
+        index.search(queries[i:i + 1], k)
+        timings.append(time.perf_counter() - start)
+
+    hits = sum(len(set(found[i]) & set(truth[i])) for i in range(len(queries)))
+    return {
+        "recall_at_k": round(hits / truth.size, 4),
+        "qps": round(len(queries) / batch_seconds, 1),
+        "search": summarize(timings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='FAISS 근사 최근접 이웃 인덱스 재현율/처리량 벤치마크')
+    parser.add_argument('--vectors', type=int, default=1_000_000, help='합성 임베딩 수 (기본값: 1000000)')
+    parser.add_argument('--dim', type=int, default=384, help='임베딩 차원 (기본값: 384, MiniLM)')
+    parser.add_argument('--clusters', type=int, default=2000, help='합성 임베딩 군집 수 (기본값: 2000)')
+    parser.add_argument('--noise', type=float, default=1.0, help='군집 내 표준편차 (군집 중심 대비, 기본값: 1.0)')
+    parser.add_argument('--queries', type=int, default=1000, help='검색 질의 수 (기본값: 1000)')
+    parser.add_argument('--single-queries', type=int, default=200,
+                        help='단건 지연시간 측정 질의 수 (기본값: 200)')
+    parser.add_argument('--k', type=int, default=10, help='검색 결과 수 (기본값: 10)')
+    parser.add_argument('--index-types', nargs='+', choices=INDEX_TYPES,
+                        default=[INDEX_IVF_FLAT, INDEX_HNSW, INDEX_IVF_PQ],
+                        help='비교할 인덱스 종류 (기본값: ivf_flat hnsw ivf_pq)')
+    parser.add_argument('--nlist', type=int, default=None, help='IVF 클러스터 수 (기본값: 4*sqrt(벡터 수))')
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[8, 16, 32],
+                        help='IVF 탐색 클러스터 수 목록 (기본값: 8 16 32)')
+    parser.add_argument('--hnsw-m', type=int, default=32, help='HNSW 이웃 수 (기본값: 32)')
+    parser.add_argument('--ef-construction', type=int, default=200, help='HNSW 생성 후보 수 (기본값: 200)')
+    parser.add_argument('--ef-search', type=int, nargs='+', default=[32, 64, 128],
+                        help='HNSW 검색 후보 수 목록 (기본값: 32 64 128)')
+    parser.add_argument('--pq-m', type=int, default=48, help='IVF-PQ 서브 양자화기 수 (기본값: 48)')
+    parser.add_argument('--threads', type=int, default=None, help='FAISS OpenMP 스레드 수')
+    parser.add_argument('--seed', type=int, default=42, help='난수 시드 (기본값: 42)')
+    parser.add_argument('--output', default='ann_index_results.json', help='결과 JSON 경로')
+    args = parser.parse_args()
+
+    if args.threads:
+        faiss.omp_set_num_threads(args.threads)
+    nlist = args.nlist or int(4 * np.sqrt(args.vectors))
+
+    rng = np.random.default_rng(args.seed)
+    print(f"합성 임베딩 생성 중: {args.vectors}개, {args.dim}차원")
+    vectors = make_vectors(rng, args.vectors + args.queries, args.dim, args.clusters, args.noise)
+    vectors, queries = vectors[:args.vectors], vectors[args.vectors:]
+
+    # 기준: 정확 검색
+    start = time.perf_counter()
+    exact = build_index(vectors, REDUCTION_NONE, index_type=INDEX_FLAT)
+    flat_build = time.perf_counter() - start
+    start = time.perf_counter()
+    _, truth = exact.search(queries, args.k)
+    flat_seconds = time.perf_counter() - start
+
+    results = [{
+        "index_type": INDEX_FLAT,
+        "params": {},
+        "build_seconds": round(flat_build, 2),
+        "index_bytes": int(exact.ntotal * exact.d * 4),
+        "recall_at_k": 1.0,
+        "qps": round(len(queries) / flat_seconds, 1),
+        "search": evaluate(exact, queries, truth, args.k, args.single_queries)["search"],
+    }]
+    del exact
+
+    for index_type in args.index_types:
+        if index_type == INDEX_FLAT:
+            continue
+        index_params = {
+            "nlist": nlist,
+            "hnsw_m": args.hnsw_m,
+            "ef_construction": args.ef_construction,
+            "pq_m": args.pq_m,
+        }
+        print(f"{index_type} 인덱스 생성 중")
+        start = time.perf_counter()
+        index = build_index(vectors, REDUCTION_NONE, index_type=index_type, index_params=index_params)
+        build_seconds = time.perf_counter() - start
+        index_bytes = int(faiss.serialize_index(index).size)
+
+        # 인덱스 한 번 생성 후 검색 파라미터만 바꿔 측정
+        if index_type == INDEX_HNSW:
+            sweep = [{"ef_search": ef} for ef in args.ef_search]
+        else:
+            sweep = [{"nprobe": nprobe} for nprobe in args.nprobe]
+        for search_params in sweep:
+            set_search_params(index, search_params)
+            result = {
+                "index_type": index_type,
+                "params": dict(index_params, **search_params),
+                "build_seconds": round(build_seconds, 2),
+                "index_bytes": index_bytes,
+            }
+            result.update(evaluate(index, queries, truth, args.k, args.single_queries))
+            results.append(result)
+        del index
+
+    output = {
+        "benchmark": "ann_index",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "faiss": faiss.__version__,
+        "config": vars(args),
+        "vectors": {"count": int(vectors.shape[0]), "dim": int(vectors.shape[1])},
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+
+    print(f"\n{'인덱스':<10}{'파라미터':<16}{'recall@' + str(args.k):>10}{'QPS':>10}"
+          f"{'p50(ms)':>10}{'p95(ms)':>10}{'크기(MB)':>10}{'생성(s)':>9}")
+    for result in results:
+        if result['index_type'] == INDEX_FLAT:
+            param = ""
+        elif result['index_type'] == INDEX_HNSW:
+            param = f"ef_search={result['params']['ef_search']}"
+        else:
+            param = f"nprobe={result['params']['nprobe']}"
+        print(f"{result['index_type']:<10}{param:<16}{result['recall_at_k']:>10.4f}{result['qps']:>10.1f}"
+              f"{result['search']['p50_ms']:>10.4f}{result['search']['p95_ms']:>10.4f}"
+              f"{result['index_bytes'] / 1024 / 1024:>10.1f}{result['build_seconds']:>9.1f}")
+    print(f"\n결과 저장 완료: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
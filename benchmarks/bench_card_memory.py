@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+카드 텍스트 저장 방식별 메모리 사용량 벤치마크.
+
+긴 상세 혜택(카드고릴라 크롤링 텍스트)을 가진 대규모 합성 카드 카탈로그로 두 저장 방식의
+파이썬 힙 사용량(tracemalloc)을 비교합니다. FAISS 인덱스 자체(C++ 메모리)는 두 방식이
+같으므로 측정에서 제외됩니다.
+
+- before: cards_df + 카드 Document(이어 붙인 page_content, 전체 메타데이터) + 본문을 저장한
+  FAISS docstore
+- after : cards_df + CardTextStore(열 참조) + 카드 ID 만 저장한 FAISS docstore
+
+워커는 부모 프로세스가 만든 캐시를 읽으므로 docstore 는 생성 직후(built)와 캐시 로드 후
+(loaded, pickle 로 문자열이 별도 사본이 됨)를 모두 측정합니다.
+
+    python benchmarks/bench_card_memory.py --cards 20000 --detail-chars 4000
+"""
+
+import os
+import gc
+import sys
+import json
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from langchain.schema import Document
+from langchain_community.vectorstores import FAISS
+
+# 프로젝트 루트 모듈 임포트를 위한 경로 추가
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+sys.path.append(BENCH_DIR)
+
+from card_text_store import CardTextStore
+from bench_pipeline import git_commit
+from standins import CORPORATE_NAMES, CARD_TYPES, FakeEmbeddings, make_card_benefits
+
+
+def make_catalog(rng: np.random.Generator, n_cards: int, detail_chars: int) -> pd.DataFrame:
+    """상세 혜택이 detail_chars 글자 안팎인 합성 카드 카탈로그 (load_card_data 결과와 같은 열)"""
+    rows = []
+    for i in range(n_cards):
+        card_id = f"CARD{str(i + 1).zfill(6)}"
+        benefits, detailed = make_card_benefits(rng, n_benefits=6)
+        # 크롤링 텍스트처럼 유의사항 문단이 반복되는 긴 상세 혜택 (카드마다 다른 문자열)
+        while len(detailed) < detail_chars:
+            _, more = make_card_benefits(rng, n_benefits=6)
+            detailed += f"\n{more}"
+        rows.append({
+            "card_id": card_id,
+            "card_name": f"합성카드 {i + 1}",
+            "corporate_name": CORPORATE_NAMES[rng.integers(len(CORPORATE_NAMES))],
+            "benefits": benefits,
+            "image_url": f"https://example.com/cards/{card_id}.png",
+            "card_type": CARD_TYPES[rng.integers(len(CARD_TYPES))],
+            "detailed_benefits": detailed,
+        })
+    return pd.DataFrame(rows)
+
+
+def legacy_documents(cards_df: pd.DataFrame):
+    """이전 create_card_documents 와 같은 카드 Document 목록 (본문 + 전체 메타데이터)"""
+    documents = []
+    for _, card in cards_df.iterrows():
+        card_text = f"카드명: {card.get('card_name', '')}\n"
+        card_text += f"카드사: {card.get('corporate_name', '')}\n"
+        card_text += f"카드 타입: {card.get('card_type', '')}\n"
+        card_text += f"혜택: {card.get('benefits', '')}\n"
+        if card['detailed_benefits']:
+            card_text += f"상세 혜택: {card.get('detailed_benefits', '')}\n"
+        metadata = {
+            'card_id': card.get('card_id'),
+            'card_name': card.get('card_name', ''),
+            'corporate_name': card.get('corporate_name', ''),
+            'card_type': card.get('card_type', ''),
+            'benefits': card.get('benefits', ''),
+            'detailed_benefits': card.get('detailed_benefits', ''),
+            'image_url': card.get('image_url', '')
+        }
+        documents.append(Document(page_content=card_text, metadata=metadata))
+    return documents
+
+
+def measure(build):
+    """build() 가 반환한 객체가 유지하는 파이썬 힙 크기 (바이트)"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = build()
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return kept, int(size)
+
+
+def vector_store_sizes(texts, metadatas, vectors, embedding, cache_dir: str, name: str):
+    """FAISS 벡터 저장소를 생성(built)했을 때와 캐시에서 로드(loaded)했을 때의 docstore 크기"""
+    store, built = measure(lambda: FAISS.from_embeddings(
+        text_embeddings=list(zip(texts, vectors)), embedding=embedding, metadatas=metadatas
+    ))
+    store.save_local(folder_path=cache_dir, index_name=name)
+    del store
+
+    loaded_store, loaded = measure(lambda: FAISS.load_local(
+        folder_path=cache_dir, index_name=name, embeddings=embedding,
+        allow_dangerous_deserialization=True
+    ))
+    del loaded_store
+    return built, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description='카드 텍스트 저장 방식별 메모리 사용량 벤치마크')
+    parser.add_argument('--cards', type=int, default=20000, help='합성 카드 수 (기본값: 20000)')
+    parser.add_argument('--detail-chars', type=int, default=4000,
+                        help='카드별 상세 혜택 글자 수 (기본값: 4000)')
+    parser.add_argument('--dim', type=int, default=384, help='임베딩 차원 (기본값: 384)')
+    parser.add_argument('--seed', type=int, default=42, help='난수 시드 (기본값: 42)')
+    parser.add_argument('--output', default='card_memory_results.json', help='결과 JSON 경로')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"합성 카드 카탈로그 생성 중: {args.cards}개, 상세 혜택 {args.detail_chars}자")
+    cards_df, frame_bytes = measure(lambda: make_catalog(rng, args.cards, args.detail_chars))
+
+    embedding = FakeEmbeddings(dimension=args.dim)
+    vectors = rng.standard_normal((args.cards, args.dim), dtype=np.float32).tolist()
+    card_ids = cards_df["card_id"].tolist()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # before: 본문/전체 메타데이터 Document + 본문 docstore
+        documents, before_docs = measure(lambda: legacy_documents(cards_df))
+        before_built, before_loaded = vector_store_sizes(
+            [doc.page_content for doc in documents], [doc.metadata for doc in documents],
+            vectors, embedding, cache_dir, "before"
+        )
+        del documents
+
+        # after: 카드 텍스트 저장소 + 카드 ID docstore
+        store, after_docs = measure(lambda: CardTextStore(cards_df))
+        after_built, after_loaded = vector_store_sizes(
+            [""] * len(card_ids), [{'card_id': card_id} for card_id in card_ids],
+            vectors, embedding, cache_dir, "after"
+        )
+        del store
+
+    results = {
+        layout: {
+            "cards_df_bytes": frame_bytes,
+            "documents_bytes": docs,
+            "docstore_built_bytes": built,
+            "docstore_loaded_bytes": loaded,
+            # 캐시를 읽는 워커 기준 합계
+            "worker_total_bytes": frame_bytes + docs + loaded,
+        }
+        for layout, docs, built, loaded in (
+            ("before", before_docs, before_built, before_loaded),
+            ("after", after_docs, after_built, after_loaded),
+        )
+    }
+
+    output = {
+        "benchmark": "card_memory",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "config": vars(args),
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+
+    mb = 1024 * 1024
+    print(f"\n{'저장 방식':<10}{'cards_df(MB)':>14}{'문서(MB)':>12}{'docstore 생성(MB)':>20}"
+          f"{'docstore 로드(MB)':>20}{'워커 합계(MB)':>16}")
+    for layout, result in results.items():
+        print(f"{layout:<10}{result['cards_df_bytes'] / mb:>14.1f}{result['documents_bytes'] / mb:>12.1f}"
+              f"{result['docstore_built_bytes'] / mb:>20.1f}{result['docstore_loaded_bytes'] / mb:>20.1f}"
+              f"{result['worker_total_bytes'] / mb:>16.1f}")
+    saved = results["before"]["worker_total_bytes"] - results["after"]["worker_total_bytes"]
+    print(f"\n워커당 절감: {saved / mb:.1f}MB "
+          f"({saved / max(results['before']['worker_total_bytes'], 1) * 100:.0f}%)")
+    print(f"결과 저장 완료: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+FAISS 인덱스 설정별 재현율/메모리/검색 지연시간 벤치마크.
+
+합성 카드 카탈로그를 임베딩한 뒤 전체 차원 정확 검색(Flat L2) 결과를 기준으로
+차원 축소 인덱스(PCA, 랜덤 투영)의 recall@k, 인덱스 크기, 질의당 검색 시간을 비교합니다.
+기본 임베딩은 가짜 임베딩 모델(문자 바이그램 해싱)이며, --hf-model 로 실제 모델을 지정할 수 있습니다.
+
+    python benchmarks/bench_index_recall.py --cards 5000 --dims 64 128 192 --output index_recall.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+from datetime import datetime
+
+import faiss
+import numpy as np
+
+# 프로젝트 루트 모듈 임포트를 위한 경로 추가
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+sys.path.append(BENCH_DIR)
+
+from vector_index import build_index, REDUCTION_NONE, REDUCTION_PCA, REDUCTION_RANDOM
+from bench_pipeline import BenchmarkCardRecommendationRAG, BENCH_QUERIES, summarize, git_commit
+from standins import FakeEmbeddings, BENCHMARK_MERCHANTS, make_fake_llm, seed_synthetic_database
+
+
+def make_queries(rng: np.random.Generator, n_queries: int):
+    """가맹점 이름 조합과 벤치마크 질의로 검색 질의 생성"""
+    queries = list(BENCH_QUERIES)
+    while len(queries) < n_queries:
+        merchants = rng.choice(BENCHMARK_MERCHANTS, size=rng.integers(1, 3), replace=False)
+        queries.append(" ".join(merchants) + " 할인 혜택 카드")
+    return queries[:n_queries]
+
+
+def evaluate(index: faiss.Index, queries: np.ndarray, truth: np.ndarray, k: int):
+    """recall@k, 인덱스 크기, 질의당 검색 시간 측정 (질의는 한 건씩 검색)"""
+    found = np.empty((len(queries), k), dtype=np.int64)
+    timings = []
+    for i in range(len(queries)):
+        start = time.perf_counter()
+        _, indices = index.search(queries[i:i + 1], k)
+        timings.append(time.perf_counter() - start)
+        found[i] = indices[0]
+
+    hits = sum(len(set(found[i]) & set(truth[i])) for i in range(len(queries)))
+    return {
+        "recall_at_k": round(hits / truth.size, 4),
+        "index_bytes": int(faiss.serialize_index(index).size),
+        "search": summarize(timings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='FAISS 인덱스 재현율/메모리/지연시간 벤치마크')
+    parser.add_argument('--cards', type=int, default=2000, help='합성 카드 수 (기본값: 2000)')
+    parser.add_argument('--queries', type=int, default=300, help='검색 질의 수 (기본값: 300)')
+    parser.add_argument('--k', type=int, default=10, help='검색 결과 수 (기본값: 10)')
+    parser.add_argument('--dims', type=int, nargs='+', default=[64, 128, 192],
+                        help='차원 축소 후 차원 목록 (기본값: 64 128 192)')
+    parser.add_argument('--hf-model', default=None,
+                        help='HuggingFace 임베딩 모델 이름 (기본값: 가짜 임베딩 모델)')
+    parser.add_argument('--seed', type=int, default=42, help='난수 시드 (기본값: 42)')
+    parser.add_argument('--output', default='index_recall_results.json', help='결과 JSON 경로')
+    args = parser.parse_args()
+
+    if args.hf_model:
+        from langchain_huggingface import HuggingFaceEmbeddings
+        embedding_model = HuggingFaceEmbeddings(model_name=args.hf_model)
+    else:
+        embedding_model = FakeEmbeddings()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        db_path = os.path.join(work_dir, "bench.sqlite3")
+        print(f"합성 카드 {args.cards}개 임베딩 중")
+        seed_synthetic_database(db_path, n_users=1, n_cards=args.cards, seed=args.seed)
+        rag = BenchmarkCardRecommendationRAG(
+            db_path,
+            embedding_model=embedding_model,
+            llm=make_fake_llm(),
+            index_cache_dir=work_dir
+        )
+        vectors = rag.vector_store.index.reconstruct_n(0, rag.vector_store.index.ntotal)
+        rag.close()
+
+    rng = np.random.default_rng(args.seed)
+    queries = np.asarray(
+        embedding_model.embed_documents(make_queries(rng, args.queries)), dtype=np.float32
+    )
+
+    # 기준: 전체 차원 정확 검색
+    exact = build_index(vectors)
+    _, truth = exact.search(queries, args.k)
+
+    configs = [(REDUCTION_NONE, vectors.shape[1])]
+    configs += [(method, dim) for method in (REDUCTION_PCA, REDUCTION_RANDOM) for dim in args.dims]
+
+    results = []
+    for method, dim in configs:
+        start = time.perf_counter()
+        index = build_index(vectors, method, dim)
+        build_seconds = time.perf_counter() - start
+        result = {"reduction": method, "dim": dim, "build_seconds": round(build_seconds, 4)}
+        result.update(evaluate(index, queries, truth, args.k))
+        results.append(result)
+
+    output = {
+        "benchmark": "index_recall",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "faiss": faiss.__version__,
+        "config": vars(args),
+        "vectors": {"count": int(vectors.shape[0]), "dim": int(vectors.shape[1])},
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+
+    print(f"\n{'설정':<14}{'recall@' + str(args.k):>10}{'크기(KB)':>12}{'p50(ms)':>10}{'p95(ms)':>10}")
+    for result in results:
+        name = f"{result['reduction']}{result['dim'] if result['reduction'] != REDUCTION_NONE else ''}"
+        print(f"{name:<14}{result['recall_at_k']:>10.4f}{result['index_bytes'] / 1024:>12.1f}"
+              f"{result['search']['p50_ms']:>10.4f}{result['search']['p95_ms']:>10.4f}")
+    print(f"\n결과 저장 완료: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+CardRecommendationRAG 단계별 지연시간 벤치마크.
+
+SQLite 대체 DB(합성 user_transactions / cards), 가짜 임베딩 모델, 가짜 LLM 으로
+추천 경로 전체를 실행하고 단계별 p50/p95/p99 를 JSON 으로 저장합니다.
+단계별 시간은 서비스 진입점(process_user_query) 한 번을 실행하는 동안 기록된 트레이스 스팬에서
+가져오므로, 세션/프로필 캐시/요청 병합 등 실제 경로의 변경이 그대로 반영됩니다.
+커밋 간 비교를 위해 결과 파일에 git 커밋 해시를 함께 기록합니다.
+
+    python benchmarks/bench_pipeline.py --iterations 500 --output bench_results.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# 프로젝트 루트 모듈 임포트를 위한 경로 추가
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+sys.path.append(BENCH_DIR)
+
+from card_recommendation import CardRecommendationRAG
+from feature_store import UserFeatureStore, write_feature_store
+from lexical_index import RETRIEVAL_MODES, RETRIEVAL_HYBRID
+from vector_index import (
+    REDUCTION_METHODS,
+    REDUCTION_NONE,
+    DEFAULT_REDUCED_DIM,
+    INDEX_TYPES,
+    INDEX_FLAT,
+    INDEX_GRANULARITIES,
+    GRANULARITY_CARD,
+)
+from chunk_index import CHUNK_AGGREGATIONS, AGGREGATE_MAX
+from profile_features import SOURCE_COLUMNS, build_profile_cache_frame
+from recommendation_metrics import collect_spans
+from standins import SQLiteMySQLConnection, FakeEmbeddings, make_fake_llm, seed_synthetic_database
+
+# 벤치마크 질의
+BENCH_QUERIES = [
+    "식당과 카페에서 사용할 때 혜택이 좋은 카드 추천해주세요",
+    "쇼핑할 때 유용한 카드 알려주세요",
+    "여행과 주유 혜택이 좋은 카드 있나요?",
+    "스타벅스 할인 카드",
+    "GS25 편의점 혜택",
+]
+
+# 보고 대상 단계 (출력 순서) -> 트레이스 스팬 이름
+STAGE_SPANS = {
+    "profile": "user_profile",
+    "insights": "spending_insights",
+    "model_recs": "model_recommendations",
+    "semantic_search": "semantic_search",
+    "fusion": "merge",
+    "prompt_build": "prompt_build",
+    "llm": "llm",
+    "end_to_end": "process_user_query",
+}
+STAGES = list(STAGE_SPANS)
+
+
+class BenchmarkCardRecommendationRAG(CardRecommendationRAG):
+    """MySQL 대신 SQLite 대체 DB에 연결하는 벤치마크용 추천 시스템"""
+
+    def __init__(self, db_path: str, **kwargs):
+        self.db_path = db_path
+        super().__init__(mysql_config={}, **kwargs)
+
+    def _get_connection(self):
+        return SQLiteMySQLConnection(self.db_path)
+
+
+def summarize(samples):
+    """지연시간 표본(초)을 밀리초 백분위 요약으로 변환 (표본이 없으면 count 만 기록)"""
+    values = np.asarray(samples) * 1000.0
+    if values.size == 0:
+        return {"count": 0}
+    return {
+        "count": int(values.size),
+        "mean_ms": round(float(values.mean()), 4),
+        "p50_ms": round(float(np.percentile(values, 50)), 4),
+        "p95_ms": round(float(np.percentile(values, 95)), 4),
+        "p99_ms": round(float(np.percentile(values, 99)), 4),
+        "max_ms": round(float(values.max()), 4),
+    }
+
+
+def git_commit():
+    """현재 git 커밋 해시 (확인할 수 없으면 None)"""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=BENCH_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def run_iteration(rag, user_id, query, timings, span_timings):
+    """
+    서비스 진입점을 한 번 실행하고 기록된 스팬으로 단계별 소요 시간 수집
+
+    같은 단계가 요청 안에서 여러 번 실행되면(예: db.connect) 합계를 한 표본으로 기록합니다.
+    """
+    with collect_spans() as spans:
+        rag.process_user_query(user_id, query)
+
+    totals = {}
+    for name, duration in spans:
+        totals[name] = totals.get(name, 0.0) + duration
+
+    for stage, span_name in STAGE_SPANS.items():
+        if span_name in totals:
+            timings[stage].append(totals[span_name])
+    for name, duration in totals.items():
+        span_timings.setdefault(name, []).append(duration)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='추천 경로 단계별 지연시간 벤치마크')
+    parser.add_argument('--users', type=int, default=1000, help='합성 사용자 수 (기본값: 1000)')
+    parser.add_argument('--cards', type=int, default=200, help='합성 카드 수 (기본값: 200)')
+    parser.add_argument('--iterations', type=int, default=200, help='측정 반복 횟수 (기본값: 200)')
+    parser.add_argument('--warmup', type=int, default=10, help='워밍업 반복 횟수 (기본값: 10)')
+    parser.add_argument('--llm-latency-ms', type=float, default=0.0,
+                        help='가짜 LLM 응답 지연 (기본값: 0)')
+    parser.add_argument('--feature-store', action='store_true',
+                        help='프로필/소비 인사이트를 메모리 맵 피처 스토어에서 조회')
+    parser.add_argument('--retrieval-mode', choices=RETRIEVAL_MODES, default=RETRIEVAL_HYBRID,
+                        help='카드 검색 방식 (기본값: hybrid)')
+    parser.add_argument('--index-reduction', choices=REDUCTION_METHODS, default=REDUCTION_NONE,
+                        help='FAISS 인덱스 차원 축소 방식 (기본값: none)')
+    parser.add_argument('--index-dim', type=int, default=DEFAULT_REDUCED_DIM,
+                        help=f'차원 축소 후 차원 (기본값: {DEFAULT_REDUCED_DIM})')
+    parser.add_argument('--index-type', choices=INDEX_TYPES, default=INDEX_FLAT,
+                        help='FAISS 인덱스 종류 (기본값: flat)')
+    parser.add_argument('--index-granularity', choices=INDEX_GRANULARITIES, default=GRANULARITY_CARD,
+                        help='FAISS 색인 단위 (기본값: card)')
+    parser.add_argument('--chunk-aggregation', choices=CHUNK_AGGREGATIONS, default=AGGREGATE_MAX,
+                        help='chunk 색인의 카드 점수 집계 방식 (기본값: max)')
+    parser.add_argument('--seed', type=int, default=42, help='난수 시드 (기본값: 42)')
+    parser.add_argument('--output', default='bench_results.json', help='결과 JSON 경로')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        db_path = os.path.join(work_dir, "bench.sqlite3")
+        print(f"합성 데이터 생성 중: 사용자 {args.users}명, 카드 {args.cards}개")
+        user_ids = seed_synthetic_database(db_path, n_users=args.users, n_cards=args.cards, seed=args.seed)
+
+        feature_store = None
+        if args.feature_store:
+            store_dir = os.path.join(work_dir, "feature_store")
+            connection = SQLiteMySQLConnection(db_path)
+            cursor = connection.cursor()
+            cursor.execute(f"SELECT {', '.join(SOURCE_COLUMNS)} FROM user_transactions")
+            transactions = pd.DataFrame(cursor.fetchall(), columns=SOURCE_COLUMNS)
+            connection.close()
+            write_feature_store(build_profile_cache_frame(transactions), store_dir)
+            feature_store = UserFeatureStore(store_dir)
+
+        build_start = time.perf_counter()
+        rag = BenchmarkCardRecommendationRAG(
+            db_path,
+            embedding_model=FakeEmbeddings(),
+            llm=make_fake_llm(args.llm_latency_ms / 1000.0),
+            index_cache_dir=work_dir,
+            feature_store=feature_store,
+            retrieval_mode=args.retrieval_mode,
+            index_reduction=args.index_reduction,
+            index_dim=args.index_dim,
+            index_type=args.index_type,
+            index_granularity=args.index_granularity,
+            chunk_aggregation=args.chunk_aggregation
+        )
+        build_seconds = time.perf_counter() - build_start
+
+        rng = np.random.default_rng(args.seed)
+        timings = {stage: [] for stage in STAGES}
+        span_timings = {}
+
+        for i in range(args.warmup + args.iterations):
+            user_id = user_ids[rng.integers(len(user_ids))]
+            query = BENCH_QUERIES[i % len(BENCH_QUERIES)]
+            if i < args.warmup:
+                run_iteration(rag, user_id, query, {stage: [] for stage in STAGES}, {})
+            else:
+                run_iteration(rag, user_id, query, timings, span_timings)
+
+        rag.close()
+
+    result = {
+        "benchmark": "pipeline_stage_latency",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "config": vars(args),
+        "init_seconds": round(build_seconds, 4),
+        "stages": {stage: summarize(timings[stage]) for stage in STAGES},
+        # 요청 안에서 기록된 모든 스팬 (db.*, embedding, faiss_search 등 세부 단계 포함)
+        "spans": {name: summarize(span_timings[name]) for name in sorted(span_timings)},
+    }
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+    print(f"\n{'단계':<16}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}")
+    for stage in STAGES:
+        stats = result["stages"][stage]
+        if not stats["count"]:
+            print(f"{stage:<16}{'-':>10}{'-':>10}{'-':>10}")
+            continue
+        print(f"{stage:<16}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}{stats['p99_ms']:>10.3f}")
+    print(f"\n결과 저장 완료: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+벤치마크용 로컬 대체 구성요소.
+
+- SQLite 기반 MySQL 호환 연결 (mysql.connector 의 cursor(dictionary=True) / %s 파라미터 흉내)
+- 합성 user_transactions / recommendations / cards 데이터 생성
+- 결정적인 가짜 임베딩 모델과 가짜 LLM
+
+실제 MySQL, HuggingFace 모델, OpenAI 없이 CardRecommendationRAG 전체 경로를
+재현 가능하게 실행하기 위한 용도입니다.
+"""
+
+import sqlite3
+import zlib
+from typing import List
+
+import numpy as np
+import pandas as pd
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from code_mappings import DEFAULT_CODE_LABELS, category_id_offset
+from profile_features import (
+    SOURCE_COLUMNS,
+    PROFILE_CACHE_COLUMNS,
+    build_profile_cache_frame,
+    cache_frame_to_rows,
+)
+
+
+# 합성 데이터에 사용할 카드사 / 혜택 카테고리 / 가맹점
+CORPORATE_NAMES = ["KB국민카드", "신한카드", "삼성카드", "현대카드", "롯데카드", "하나카드", "우리카드", "NH농협카드"]
+CARD_TYPES = ["신용카드", "체크카드"]
+BENEFIT_TEMPLATES = [
+    ("카페", ["스타벅스", "투썸플레이스", "이디야", "메가커피"]),
+    ("외식", ["아웃백", "빕스", "배달의민족", "요기요"]),
+    ("편의점", ["GS25", "CU", "세븐일레븐", "이마트24"]),
+    ("쇼핑", ["쿠팡", "11번가", "G마켓", "무신사"]),
+    ("주유", ["GS칼텍스", "SK에너지", "S-OIL", "현대오일뱅크"]),
+    ("여행", ["대한항공", "아시아나", "호텔스닷컴", "야놀자"]),
+    ("대중교통", ["버스", "지하철", "택시", "KTX"]),
+    ("통신", ["SKT", "KT", "LG U+", "알뜰폰"]),
+    ("마트", ["이마트", "홈플러스", "롯데마트", "코스트코"]),
+    ("문화", ["CGV", "메가박스", "롯데시네마", "인터파크"]),
+]
+BENCHMARK_MERCHANTS = [merchant for _, merchants in BENEFIT_TEMPLATES for merchant in merchants]
+
+# user_transactions 중 추천 경로에서 사용하는 금액 컬럼
+AMOUNT_COLUMNS = [
+    "total_usage_amount", "card_sales_amount", "interior_amount", "travel_amount",
+    "clothing_amount", "auto_amount", "furniture_amount", "appliance_amount",
+    "culture_amount", "hotel_amount", "travel_general_amount", "grocery_amount",
+    "clothing_general_amount", "restaurant_amount", "automaint_amount", "autosl_amount",
+]
+
+SCHEMA_SQL = f"""
+CREATE TABLE users (
+  user_id TEXT PRIMARY KEY, age INTEGER, gender TEXT, income_level TEXT, job_category TEXT
+);
+CREATE TABLE consumption_patterns (
+  id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT, category TEXT, amount REAL, frequency TEXT
+);
+CREATE INDEX idx_consumption_patterns_user_amount ON consumption_patterns (user_id, amount, category, frequency);
+CREATE TABLE cards (
+  card_id TEXT PRIMARY KEY, card_name TEXT, corporate_name TEXT, benefits TEXT, image_url TEXT, card_type TEXT
+);
+CREATE TABLE card_gorilla_data (card_id TEXT PRIMARY KEY, detailed_benefits TEXT);
+CREATE TABLE recommendations (
+  id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT, card_id TEXT, score REAL, ranking INTEGER
+);
+CREATE INDEX idx_recommendations_user_ranking ON recommendations (user_id, ranking, card_id, score);
+CREATE TABLE user_recommendations (
+  id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT, card_id TEXT,
+  recommendation_score REAL, recommendation_reason TEXT, created_at TEXT
+);
+CREATE TABLE user_transactions (
+  seq_id TEXT PRIMARY KEY, age_group INTEGER, gender INTEGER, member_rank INTEGER,
+  region_code INTEGER, life_stage INTEGER, top_spending_category INTEGER,
+  {", ".join(f"{col} REAL" for col in AMOUNT_COLUMNS)}
+);
+CREATE TABLE category_mappings (
+  category_id INTEGER PRIMARY KEY, category_name TEXT, category_type TEXT
+);
+CREATE TABLE user_profile_cache (
+  user_id TEXT PRIMARY KEY, {", ".join(PROFILE_CACHE_COLUMNS[1:])}, updated_at TEXT
+);
+"""
+
+
+class _SQLiteDictCursor:
+    """mysql.connector 커서 인터페이스 일부를 흉내내는 SQLite 커서"""
+
+    def __init__(self, connection: sqlite3.Connection, dictionary: bool):
+        self._cursor = connection.cursor()
+        self._dictionary = dictionary
+
+    def execute(self, query, params=()):
+        self._cursor.execute(query.replace("%s", "?"), tuple(params or ()))
+
+    def executemany(self, query, rows):
+        self._cursor.executemany(query.replace("%s", "?"), rows)
+
+    def _convert(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return {desc[0]: value for desc, value in zip(self._cursor.description, row)}
+
+    def fetchone(self):
+        return self._convert(self._cursor.fetchone())
+
+    def fetchall(self):
+        return [self._convert(row) for row in self._cursor.fetchall()]
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteMySQLConnection:
+    """CardRecommendationRAG._get_connection 대체용 SQLite 연결"""
+
+    def __init__(self, db_path: str):
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+
+    def cursor(self, dictionary: bool = False):
+        return _SQLiteDictCursor(self._connection, dictionary)
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def close(self):
+        self._connection.close()
+
+
+def make_seq_id(rng: np.random.Generator) -> str:
+    """트랜잭션 데이터 형식(20자 초과)의 사용자 ID 생성"""
+    alphabet = np.array(list("0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+    return "".join(rng.choice(alphabet, 24))
+
+
+def make_card_benefits(rng: np.random.Generator, n_benefits: int = 4):
+    """합성 카드 혜택 문자열과 상세 혜택 문자열 생성"""
+    chosen = rng.choice(len(BENEFIT_TEMPLATES), n_benefits, replace=False)
+    items = []
+    details = []
+    for idx in chosen:
+        category, merchants = BENEFIT_TEMPLATES[idx]
+        merchant = merchants[rng.integers(len(merchants))]
+        rate = int(rng.choice([5, 10, 20, 30, 50]))
+        items.append(f"{category}: {merchant} {rate}% 청구할인")
+        details.append(
+            f"{category} - {merchant} 이용 시 {rate}% 청구할인 (전월 실적 30만원 이상, "
+            f"월 최대 {int(rng.integers(1, 5))}만원 할인, 건당 1만원 이상 결제 시 적용)"
+        )
+    return "; ".join(items), "; ".join(details)
+
+
+def seed_synthetic_database(db_path: str, n_users: int = 1000, n_cards: int = 200,
+                            recs_per_user: int = 5, seed: int = 42) -> List[str]:
+    """
+    합성 데이터로 SQLite 데이터베이스 생성
+
+    Args:
+        db_path: SQLite 파일 경로
+        n_users: 트랜잭션 사용자 수
+        n_cards: 카드 수
+        recs_per_user: 사용자별 모델 추천 카드 수
+        seed: 난수 시드
+
+    Returns:
+        List: 생성된 사용자 seq_id 목록
+    """
+    rng = np.random.default_rng(seed)
+    connection = sqlite3.connect(db_path)
+    connection.executescript(SCHEMA_SQL)
+
+    # 카드 데이터
+    card_rows = []
+    gorilla_rows = []
+    for i in range(n_cards):
+        card_id = f"CARD{str(i + 1).zfill(3)}"
+        corporate_name = CORPORATE_NAMES[rng.integers(len(CORPORATE_NAMES))]
+        benefits, detailed = make_card_benefits(rng)
+        card_rows.append((
+            card_id, f"합성카드 {i + 1}", corporate_name, benefits,
+            f"https://example.com/cards/{card_id}.png", CARD_TYPES[rng.integers(len(CARD_TYPES))]
+        ))
+        gorilla_rows.append((card_id, detailed))
+    connection.executemany("INSERT INTO cards VALUES (?, ?, ?, ?, ?, ?)", card_rows)
+    connection.executemany("INSERT INTO card_gorilla_data VALUES (?, ?)", gorilla_rows)
+
+    # 코드 -> 라벨 매핑 (category_mapping.py 가 저장하는 내용)
+    connection.executemany("INSERT INTO category_mappings VALUES (?, ?, ?)", [
+        (category_id_offset(mapping_type) + code, name, mapping_type)
+        for mapping_type, labels in DEFAULT_CODE_LABELS.items() for code, name in labels.items()
+    ])
+
+    # 트랜잭션 사용자 데이터
+    seq_ids = [make_seq_id(rng) for _ in range(n_users)]
+    amounts = rng.gamma(2.0, 20.0, size=(n_users, len(AMOUNT_COLUMNS))).round(2)
+    amounts[:, 0] = amounts[:, 1:].sum(axis=1)  # 총 사용 금액 = 카테고리 합
+    codes = np.column_stack([
+        rng.integers(0, 6, n_users), rng.integers(0, 2, n_users), rng.integers(0, 5, n_users),
+        rng.integers(1, 17, n_users), rng.integers(8, 13, n_users), rng.integers(1, 18, n_users),
+    ])
+    transaction_rows = [
+        (seq_id, *map(int, code_row), *map(float, amount_row))
+        for seq_id, code_row, amount_row in zip(seq_ids, codes, amounts)
+    ]
+    placeholders = ", ".join(["?"] * (7 + len(AMOUNT_COLUMNS)))
+    connection.executemany(
+        f"INSERT INTO user_transactions (seq_id, age_group, gender, member_rank, region_code, "
+        f"life_stage, top_spending_category, {', '.join(AMOUNT_COLUMNS)}) VALUES ({placeholders})",
+        transaction_rows
+    )
+
+    # 사용자 프로필 캐시 (transaction_data_loader.materialize_user_profile_cache 와 동일한 계산)
+    transactions = pd.read_sql_query(
+        f"SELECT {', '.join(SOURCE_COLUMNS)} FROM user_transactions", connection
+    )
+    connection.executemany(
+        f"INSERT INTO user_profile_cache ({', '.join(PROFILE_CACHE_COLUMNS)}) "
+        f"VALUES ({', '.join(['?'] * len(PROFILE_CACHE_COLUMNS))})",
+        cache_frame_to_rows(build_profile_cache_frame(transactions))
+    )
+
+    # users / 모델 추천 결과
+    connection.executemany(
+        "INSERT INTO users VALUES (?, ?, ?, ?, ?)",
+        [(seq_id, 30, "여성", "중간", "직장인") for seq_id in seq_ids]
+    )
+    rec_rows = []
+    for seq_id in seq_ids:
+        selected = rng.choice(n_cards, min(recs_per_user, n_cards), replace=False)
+        for rank, card_idx in enumerate(selected, 1):
+            score = round(0.7 + 0.25 * (recs_per_user - rank) / recs_per_user, 2)
+            rec_rows.append((seq_id, f"CARD{str(card_idx + 1).zfill(3)}", score, rank))
+    connection.executemany(
+        "INSERT INTO recommendations (user_id, card_id, score, ranking) VALUES (?, ?, ?, ?)",
+        rec_rows
+    )
+
+    connection.commit()
+    connection.close()
+    return seq_ids
+
+
+class FakeEmbeddings(Embeddings):
+    """문자 바이그램 해싱 기반의 결정적인 가짜 임베딩 모델"""
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for i in range(len(text) - 1):
+            vector[zlib.crc32(text[i:i + 2].encode("utf-8")) % self.dimension] += 1.0
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+FAKE_LLM_RESPONSE = """1. 사용자의 소비 패턴 요약
+외식과 쇼핑 중심의 소비 습관을 가지고 계십니다.
+
+2. 추천 카드 목록
+- 카드명: 합성카드 1
+- 카드사: KB국민카드
+- 추천 이유: 주요 소비 카테고리 혜택이 많습니다.
+- 주요 혜택:
+  * 카페: 스타벅스 50% 청구할인
+
+3. 종합 추천 의견
+소비 패턴에 맞는 카드를 사용하시면 혜택을 극대화할 수 있습니다."""
+
+
+def make_fake_llm(latency_seconds: float = 0.0) -> FakeListChatModel:
+    """항상 같은 응답을 반환하는 가짜 채팅 모델 (latency_seconds 만큼 지연)"""
+    return FakeListChatModel(responses=[FAKE_LLM_RESPONSE], sleep=latency_seconds or None)
@@ -1,78 +1,344 @@
 import os
+import threading
+import functools
+from contextlib import contextmanager
 import pandas as pd
 import numpy as np
 import json
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from dotenv import load_dotenv
 import mysql.connector
+from mysql.connector import errorcode
 
 # LangChain 관련 임포트 - 
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
 from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate
-from langchain.schema import Document
 from langchain.output_parsers import PydanticOutputParser
-from pydantic import BaseModel, Field
+
+from recommendation_queries import (
+    USER_PROFILE_CACHE_QUERY,
+    USER_TRANSACTION_PROFILE_QUERY,
+    USER_SPENDING_PATTERN_QUERY,
+    USER_BASIC_QUERY,
+    USER_CONSUMPTION_PATTERNS_QUERY,
+    USER_SPENDING_INSIGHTS_QUERY,
+    MODEL_RECOMMENDATIONS_QUERY,
+    DELETE_USER_RECOMMENDATIONS_QUERY,
+    INSERT_USER_RECOMMENDATION_QUERY,
+    USER_TRANSACTIONS_BATCH_QUERY,
+    MODEL_RECOMMENDATIONS_BATCH_QUERY,
+    MODEL_RECOMMENDATIONS_LIMIT,
+)
+from recommendation_writer import RecommendationWriteBehind
+from feature_store import UserFeatureStore
+from prompt_compactor import PromptCompactor, DEFAULT_CONTEXT_TOKEN_BUDGET
+from lexical_index import (
+    build_lexical_index,
+    fuse_scores,
+    is_keyword_query,
+    RETRIEVAL_MODES,
+    RETRIEVAL_DENSE,
+    RETRIEVAL_HYBRID,
+    RETRIEVAL_LEXICAL,
+)
+from vector_index import (
+    CardFilterIndex,
+    extract_filters_from_query,
+    filters_key,
+    index_cache_name,
+    rebuild_vector_store_index,
+    set_search_params,
+    read_index_settings,
+    write_index_settings,
+    same_build_settings,
+    REDUCTION_METHODS,
+    REDUCTION_NONE,
+    DEFAULT_REDUCED_DIM,
+    INDEX_TYPES,
+    INDEX_FLAT,
+    INDEX_GRANULARITIES,
+    GRANULARITY_CARD,
+    GRANULARITY_CHUNK,
+)
+from chunk_index import (
+    build_chunk_documents,
+    aggregate_chunk_scores,
+    CHUNK_AGGREGATIONS,
+    AGGREGATE_MAX,
+    DEFAULT_CHUNK_OVERSAMPLE,
+)
+from llm_guard import LLMGuard, LLMDeadlineExceeded, LLMPoolExhausted, CircuitOpenError, DEFAULT_LLM_DEADLINE
+from response_renderer import (
+    CardRecommendation,
+    CardRecommendationResponse,
+    LLMAdmission,
+    RESPONSE_MODES,
+    RESPONSE_MODE_AUTO,
+    RESPONSE_MODE_LLM,
+    RESPONSE_MODE_TEMPLATE,
+    render_templated_response,
+    format_response_text,
+)
+from code_mappings import get_code_mappings
+from profile_features import (
+    DEFAULT_JOB_CATEGORY,
+    DEFAULT_SPENDING_PATTERN,
+    SOURCE_COLUMNS,
+    build_profile_cache_frame,
+    profile_from_cache_row,
+    insights_from_cache_row,
+    build_spending_insights,
+)
+from request_coalescing import SingleFlight, request_key
+from user_session import UserSession, SessionStore, DEFAULT_SESSION_TTL
+from card_text_store import CardTextStore, build_id_vector_store, DOCSTORE_IDS_ONLY
+from recommendation_record import RecommendationRecord
+from catalog_snapshot import (
+    CatalogSnapshot,
+    CatalogRefresher,
+    catalog_fingerprint,
+    DEFAULT_CATALOG_REFRESH_INTERVAL,
+)
+from recommendation_metrics import (
+    REGISTRY,
+    trace_span,
+    trace_request,
+    configure_trace_log,
+    start_metrics_server,
+)
 
 # 환경 변수 로드
 load_dotenv()
 
-# API 키 설정
+# API 키 설정 (로컬 벤치마크처럼 LLM을 주입하는 경우 키가 없을 수 있음)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-os.environ["OPENAI_API_KEY"] = OPENAI_API_KEY
+if OPENAI_API_KEY:
+    os.environ["OPENAI_API_KEY"] = OPENAI_API_KEY
+
+# 사용자 안내 메시지
+USER_NOT_FOUND_MESSAGE = "사용자 정보를 찾을 수 없습니다. 올바른 사용자 ID를 입력해주세요."
+NO_RECOMMENDATION_MESSAGE = "죄송합니다. 조건에 맞는 추천 카드를 찾을 수 없습니다. 다른 조건으로 다시 시도해주세요."
+LLM_ERROR_MESSAGE = "죄송합니다. 응답 생성 중 오류가 발생했습니다. 다시 질문해 주세요."
+
+
+def _catalog_attribute(name: str) -> property:
+    """현재 스레드가 보는 카탈로그 스냅샷의 속성 (생성 중 또는 요청에 고정된 스냅샷, 없으면 현재 스냅샷)"""
+    def fget(self):
+        return getattr(self._catalog_view(), name)
+    
+    def fset(self, value):
+        setattr(self._catalog_view(), name, value)
+    
+    return property(fget, fset)
+
 
-class CardRecommendation(BaseModel):
-    """카드 추천 결과를 위한 Pydantic 모델"""
-    card_name: str = Field(description="추천 카드 이름")
-    corporate_name: str = Field(description="카드사 이름")
-    recommendation_reason: str = Field(description="추천 이유")
-    benefits: List[Dict[str, str]] = Field(description="카드 혜택 목록")
+def pinned_catalog(method):
+    """메서드 실행 동안 카탈로그 스냅샷 고정 (실행 중 교체되어도 같은 스냅샷으로 계산)"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.pin_catalog():
+            return method(self, *args, **kwargs)
+    return wrapper
 
-class CardRecommendationResponse(BaseModel):
-    """최종 추천 응답을 위한 Pydantic 모델"""
-    user_summary: str = Field(description="사용자 소비 패턴 요약")
-    recommendations: List[CardRecommendation] = Field(description="추천 카드 목록")
-    summary_opinion: str = Field(description="종합 추천 의견")
 
 class CardRecommendationRAG:
-    def __init__(self, mysql_config: Dict[str, Any]):
+    # 카드 카탈로그와 검색 색인 (CatalogSnapshot 에 저장, 백그라운드 갱신 시 통째로 교체)
+    cards_df = _catalog_attribute("cards_df")
+    card_store = _catalog_attribute("card_store")
+    card_ids = _catalog_attribute("card_ids")
+    lexical_index = _catalog_attribute("lexical_index")
+    card_filters = _catalog_attribute("card_filters")
+    vector_store = _catalog_attribute("vector_store")
+    retriever = _catalog_attribute("retriever")
+    
+    def __init__(self, mysql_config: Dict[str, Any],
+                 recommendation_writer: Optional[RecommendationWriteBehind] = None,
+                 embedding_model=None,
+                 llm=None,
+                 index_cache_dir: str = ".",
+                 feature_store: Optional[UserFeatureStore] = None,
+                 context_token_budget: int = DEFAULT_CONTEXT_TOKEN_BUDGET,
+                 response_mode: str = RESPONSE_MODE_AUTO,
+                 llm_max_concurrency: Optional[int] = None,
+                 llm_latency_budget: Optional[float] = None,
+                 llm_guard: Optional[LLMGuard] = None,
+                 retrieval_mode: str = RETRIEVAL_HYBRID,
+                 lexical_weight: float = 0.5,
+                 query_filters: bool = False,
+                 index_reduction: str = REDUCTION_NONE,
+                 index_dim: int = DEFAULT_REDUCED_DIM,
+                 index_type: str = INDEX_FLAT,
+                 index_params: Optional[Dict[str, Any]] = None,
+                 index_granularity: str = GRANULARITY_CARD,
+                 chunk_aggregation: str = AGGREGATE_MAX,
+                 chunk_oversample: int = DEFAULT_CHUNK_OVERSAMPLE,
+                 session_ttl: float = DEFAULT_SESSION_TTL,
+                 catalog_refresh_interval: float = DEFAULT_CATALOG_REFRESH_INTERVAL):
         """
         LangChain 기반 카드 추천 RAG 시스템 초기화
         
         Args:
             mysql_config: MySQL 연결 설정 (host, user, password, database 등)
+            recommendation_writer: 제공된 추천 결과를 비동기로 저장할 write-behind 저장기 (선택)
+            embedding_model: LangChain 임베딩 모델 (기본값: all-MiniLM-L6-v2)
+            llm: LangChain 채팅 모델 (기본값: gpt-3.5-turbo)
+            index_cache_dir: FAISS 인덱스 캐시 디렉터리
+            feature_store: 사용자 프로필/소비 인사이트 메모리 맵 피처 스토어 (선택, 없으면 MySQL 조회)
+            context_token_budget: LLM 컨텍스트(사용자 정보 + 추천 카드) 최대 토큰 수
+            response_mode: 기본 응답 모드 (llm: 항상 LLM, template: LLM 없이 템플릿,
+                           auto: LLM 동시 호출 수/지연시간 예산을 넘으면 템플릿)
+            llm_max_concurrency: auto 모드의 LLM 동시 호출 수 상한 (None 이면 제한 없음)
+            llm_latency_budget: auto 모드의 LLM 지연시간 예산 (초, None 이면 제한 없음)
+            llm_guard: LLM 호출 제한 시간/헤지 요청/서킷 브레이커 (기본값: LLMGuard())
+            retrieval_mode: 카드 검색 방식 (dense: FAISS 만, hybrid: BM25 + FAISS 결합이며
+                            키워드형 질의는 BM25 만, lexical: BM25 만)
+            lexical_weight: hybrid 검색의 BM25 점수 가중치 (FAISS 점수는 1 - lexical_weight)
+            query_filters: 요청에 filters 가 없을 때 질의의 "국민카드", "체크카드" 같은 표현을
+                           카드사/카드 타입 필터로 적용할지 여부 (기본값: 사용 안 함)
+            index_reduction: FAISS 인덱스 임베딩 차원 축소 방식 (none, pca, random)
+            index_dim: 차원 축소 후 차원
+            index_type: FAISS 인덱스 종류 (flat: 정확 검색, ivf_flat / hnsw / ivf_pq: 근사 검색)
+            index_params: 인덱스 파라미터 (nlist, nprobe, hnsw_m, ef_construction, ef_search,
+                          pq_m, pq_nbits 중 기본값에서 바꿀 값)
+            index_granularity: FAISS 색인 단위 (card: 카드당 문서 1개, chunk: 혜택별 청크)
+            chunk_aggregation: chunk 색인의 카드 점수 집계 방식 (max: 최고 청크 유사도, sum: 합계)
+            chunk_oversample: chunk 색인에서 카드 수 대비 검색할 청크 수 배율
+            session_ttl: 대화형 세션(프로필/소비 인사이트/모델 추천 고정) 유지 시간 (초)
+            catalog_refresh_interval: 카드 카탈로그 변경 확인 주기 (초, 0 이하이면 시작 시 한 번만 로드)
         """
         # MySQL 연결 설정
         self.mysql_config = mysql_config
         
+        # 추천 결과 write-behind 저장기 (없으면 저장하지 않음)
+        self.recommendation_writer = recommendation_writer
+        
         # LangChain 임베딩 모델 초기화
-        self.embedding_model = HuggingFaceEmbeddings(
+        self.embedding_model = embedding_model or HuggingFaceEmbeddings(
             model_name="sentence-transformers/all-MiniLM-L6-v2"
         )
         
-        # LangChain LLM 초기화
-        self.llm = ChatOpenAI(
+        # LLM 호출 보호기 (제한 시간 초과/서킷 브레이커 개방 시 템플릿 응답으로 대체)
+        self.llm_guard = llm_guard or LLMGuard()
+        
+        # LangChain LLM 초기화 (클라이언트 재시도가 호출 제한 시간을 넘기지 않도록 재시도 1회)
+        self.llm = llm or ChatOpenAI(
             temperature=0.7,
             model_name="gpt-3.5-turbo",
-            max_tokens=1500
+            max_tokens=1500,
+            request_timeout=self.llm_guard.deadline,
+            max_retries=1
+        )
+        
+        # LLM 컨텍스트 압축기 (모델 토크나이저로 토큰 수를 세어 예산 안으로 압축)
+        self.prompt_compactor = PromptCompactor(
+            self.parse_benefits,
+            token_budget=context_token_budget,
+            model_name=getattr(self.llm, "model_name", "gpt-3.5-turbo")
+        )
+        
+        # 응답 모드 및 LLM 호출 허용 여부 판단기
+        if response_mode not in RESPONSE_MODES:
+            raise ValueError(f"지원하지 않는 응답 모드: {response_mode}")
+        self.response_mode = response_mode
+        self.llm_admission = LLMAdmission(
+            max_concurrency=llm_max_concurrency,
+            latency_budget=llm_latency_budget
         )
         
-        # 벡터 저장소 초기화
-        self.vector_store = None
-        self.retriever = None
+        # 카드 검색 방식 (BM25 어휘 색인은 카드 문서 생성 시 함께 생성)
+        if retrieval_mode not in RETRIEVAL_MODES:
+            raise ValueError(f"지원하지 않는 검색 방식: {retrieval_mode}")
+        self.retrieval_mode = retrieval_mode
+        self.lexical_weight = lexical_weight
+        
+        # 질의 기반 카드사/카드 타입 필터 추출 여부 (기본값은 요청의 filters 만 적용)
+        self.query_filters = query_filters
+        
+        # 카드 카탈로그 스냅샷 (카드 데이터, 문서, BM25 색인, 필터 비트맵, 벡터 저장소)
+        # 요청은 시작 시 스냅샷을 스레드별로 고정하고, 갱신은 새 스냅샷을 만든 뒤 참조만 교체
+        self._catalog = CatalogSnapshot()
+        self._catalog_local = threading.local()
+        self._reload_lock = threading.Lock()
+        
+        # FAISS 인덱스 캐시 위치 및 차원 축소 설정 (설정별로 캐시 파일 분리)
+        if index_reduction not in REDUCTION_METHODS:
+            raise ValueError(f"지원하지 않는 차원 축소 방식: {index_reduction}")
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"지원하지 않는 인덱스 종류: {index_type}")
+        self.index_cache_dir = index_cache_dir
+        self.index_reduction = index_reduction
+        self.index_dim = index_dim
+        self.index_type = index_type
+        self.index_params = dict(index_params or {})
+        
+        # 색인 단위 (chunk 이면 혜택별 청크를 색인하고 검색 결과를 카드별로 집계)
+        if index_granularity not in INDEX_GRANULARITIES:
+            raise ValueError(f"지원하지 않는 색인 단위: {index_granularity}")
+        if chunk_aggregation not in CHUNK_AGGREGATIONS:
+            raise ValueError(f"지원하지 않는 청크 집계 방식: {chunk_aggregation}")
+        self.index_granularity = index_granularity
+        self.chunk_aggregation = chunk_aggregation
+        self.chunk_oversample = max(1, chunk_oversample)
+        
+        # 메모리 맵 피처 스토어 (트랜잭션 사용자 조회 시 MySQL 보다 먼저 확인)
+        self.feature_store = feature_store
+        
+        # 사용자 프로필 캐시 테이블 사용 여부 (테이블이 없으면(ER_NO_SUCH_TABLE) 사용하지 않음)
+        self.profile_cache_enabled = True
+        
+        # 동일한 동시 요청 병합 (같은 사용자 + 같은 질의는 한 번만 계산)
+        self._query_flight = SingleFlight("process_user_query")
+        self._inputs_flight = SingleFlight("prepare_recommendation_inputs")
+        
+        # 대화형 세션 (후속 질문에서 질의와 무관한 조회 생략)
+        self.sessions = SessionStore(ttl=session_ttl)
         
         # 카드 데이터 로드 및 벡터 저장소 생성
         self.load_card_data()
-        self.create_vector_store()
+        self._index_catalog()
+        
+        # 카탈로그 변경 시 백그라운드에서 다시 만들어 교체
+        self.catalog_refresher = None
+        if catalog_refresh_interval > 0:
+            self.catalog_refresher = CatalogRefresher(self.reload_catalog, catalog_refresh_interval)
     
-    def load_card_data(self):
-        """MySQL에서 카드 데이터 로드"""
+    def _get_connection(self):
+        """MySQL 연결 생성 (벤치마크 등에서 대체 가능한 연결 지점)"""
+        with trace_span("db.connect"):
+            return mysql.connector.connect(**self.mysql_config)
+    
+    def _catalog_view(self) -> CatalogSnapshot:
+        """현재 스레드가 사용할 카탈로그 스냅샷 (생성 중 또는 요청에 고정된 스냅샷, 없으면 현재 스냅샷)"""
+        return getattr(self._catalog_local, "snapshot", None) or self._catalog
+    
+    @contextmanager
+    def pin_catalog(self):
+        """
+        현재 카탈로그 스냅샷을 이 스레드에 고정 (중첩 호출은 바깥에서 고정한 스냅샷 유지)
+        
+        Returns:
+            CatalogSnapshot: 고정된 스냅샷
+        """
+        pinned = getattr(self._catalog_local, "snapshot", None)
+        if pinned is not None:
+            yield pinned
+            return
+        
+        self._catalog_local.snapshot = self._catalog
+        try:
+            yield self._catalog_local.snapshot
+        finally:
+            self._catalog_local.snapshot = None
+    
+    def _fetch_card_data(self) -> pd.DataFrame:
+        """MySQL에서 카드 데이터 조회 (cards + card_gorilla_data 병합)"""
+        # MySQL 연결
+        connection = self._get_connection()
+        cursor = connection.cursor(dictionary=True)
+        
         try:
-            # MySQL 연결
-            connection = mysql.connector.connect(**self.mysql_config)
-            cursor = connection.cursor(dictionary=True)
-            
             # 카드 정보 쿼리
             query = """
             SELECT c.card_id, c.card_name, c.corporate_name, c.benefits, c.image_url, 
@@ -82,7 +348,7 @@ class CardRecommendationRAG:
             cursor.execute(query)
             
             # 결과를 DataFrame으로 변환
-            self.cards_df = pd.DataFrame(cursor.fetchall())
+            cards_df = pd.DataFrame(cursor.fetchall())
             
             # 카드고릴라 크롤링 데이터 로드 (상세 정보용)
             query_gorilla = """
@@ -91,105 +357,191 @@ class CardRecommendationRAG:
             """
             cursor.execute(query_gorilla)
             gorilla_df = pd.DataFrame(cursor.fetchall())
-            
-            # 두 데이터 합치기
-            if not gorilla_df.empty:
-                self.cards_df = pd.merge(
-                    self.cards_df, 
-                    gorilla_df, 
-                    on='card_id', 
-                    how='left'
-                )
-            
-            # 필요시 NaN 처리
-            self.cards_df.fillna('', inplace=True)
-            
-            print(f"카드 데이터 로드 완료: {len(self.cards_df)}개 카드")
-            
+        finally:
             # 연결 종료
             cursor.close()
             connection.close()
+        
+        # 두 데이터 합치기
+        if not gorilla_df.empty:
+            cards_df = pd.merge(
+                cards_df, 
+                gorilla_df, 
+                on='card_id', 
+                how='left'
+            )
+        
+        # 필요시 NaN 처리
+        cards_df.fillna('', inplace=True)
+        return cards_df
+    
+    def load_card_data(self):
+        """MySQL에서 카드 데이터 로드"""
+        try:
+            self.cards_df = self._fetch_card_data()
+            self._catalog_view().fingerprint = catalog_fingerprint(self.cards_df)
             
-            # 카드 문서 생성 (LangChain Document 형식)
+            print(f"카드 데이터 로드 완료: {len(self.cards_df)}개 카드")
+            
+            # 카드 텍스트 저장소 및 어휘 색인/필터 생성
             self.create_card_documents()
             
         except Exception as e:
             print(f"카드 데이터 로드 중 오류 발생: {str(e)}")
             self.cards_df = pd.DataFrame()  # 빈 DataFrame 생성
     
-    def create_card_documents(self):
-        """카드 데이터를 LangChain Document 형식으로 변환"""
-        self.card_documents = []
-        self.card_ids = []
-        
-        for idx, card in self.cards_df.iterrows():
-            # 카드 정보를 하나의 텍스트로 결합
-            card_text = f"카드명: {card.get('card_name', '')}\n"
-            card_text += f"카드사: {card.get('corporate_name', '')}\n"
-            card_text += f"카드 타입: {card.get('card_type', '')}\n"
-            card_text += f"혜택: {card.get('benefits', '')}\n"
-            
-            # 카드고릴라 상세 정보가 있으면 추가
-            if 'detailed_benefits' in card and card['detailed_benefits']:
-                card_text += f"상세 혜택: {card.get('detailed_benefits', '')}\n"
-            
-            # 메타데이터 구성
-            metadata = {
-                'card_id': card.get('card_id'),
-                'card_name': card.get('card_name', ''),
-                'corporate_name': card.get('corporate_name', ''),
-                'card_type': card.get('card_type', ''),
-                'benefits': card.get('benefits', ''),
-                'detailed_benefits': card.get('detailed_benefits', '') if 'detailed_benefits' in card else '',
-                'image_url': card.get('image_url', '')
-            }
-            
-            # LangChain Document 생성
-            self.card_documents.append(
-                Document(
-                    page_content=card_text,
-                    metadata=metadata
-                )
-            )
+    def _index_catalog(self):
+        """벡터 저장소 생성 및 필터 비트맵 연결 (카드 문서 생성 이후)"""
+        self.create_vector_store()
+        if self.card_filters is not None and self.vector_store is not None:
+            self.card_filters.bind_vector_store(self.vector_store)
+    
+    def reload_catalog(self, force: bool = False) -> bool:
+        """
+        카드 카탈로그가 바뀌었으면 새 스냅샷(카드 데이터, 문서, 색인, 벡터 저장소)을 만들어 교체
+        
+        새 스냅샷은 호출 스레드(CatalogRefresher)에서 모두 만든 뒤 참조만 바꾸므로 요청 처리를
+        막지 않으며, 처리 중인 요청은 고정한 이전 스냅샷으로 끝까지 계산합니다.
+        
+        Args:
+            force: 내용 지문이 같아도 다시 생성
             
-            self.card_ids.append(card.get('card_id'))
+        Returns:
+            bool: 스냅샷을 교체했으면 True
+        """
+        with self._reload_lock, trace_span("catalog_reload") as span:
+            try:
+                cards_df = self._fetch_card_data()
+            except Exception as e:
+                REGISTRY.inc("card_rec_catalog_reloads_total", labels={"result": "failed"})
+                print(f"카드 카탈로그 변경 확인 중 오류 발생: {str(e)}")
+                return False
+            
+            fingerprint = catalog_fingerprint(cards_df)
+            if not force and fingerprint == self._catalog.fingerprint:
+                REGISTRY.inc("card_rec_catalog_reloads_total", labels={"result": "unchanged"})
+                return False
+            
+            # 새 스냅샷 생성 (이 스레드의 카탈로그 속성이 새 스냅샷을 가리키도록 설정)
+            snapshot = CatalogSnapshot(cards_df, fingerprint)
+            previous = getattr(self._catalog_local, "snapshot", None)
+            self._catalog_local.snapshot = snapshot
+            try:
+                self.create_card_documents()
+                self._index_catalog()
+            finally:
+                self._catalog_local.snapshot = previous
+            
+            # 벡터 저장소 생성에 실패한 스냅샷으로는 교체하지 않음
+            if snapshot.retriever is None and not cards_df.empty:
+                REGISTRY.inc("card_rec_catalog_reloads_total", labels={"result": "failed"})
+                print("새 카드 카탈로그 색인 생성 실패, 기존 카탈로그 유지")
+                return False
+            
+            # 참조 교체 (이후 시작하는 요청부터 새 스냅샷 사용)
+            self._catalog = snapshot
+            span.set_attribute("cards", len(cards_df))
+            
+            # 세션의 모델 추천에는 이전 카탈로그의 카드 상세가 들어 있으므로 비움
+            self.sessions.clear()
+            REGISTRY.inc("card_rec_catalog_reloads_total", labels={"result": "swapped"})
+            print(f"카드 카탈로그 교체 완료: {len(cards_df)}개 카드")
+            return True
+    
+    def create_card_documents(self):
+        """카드 텍스트 저장소 및 BM25 어휘 색인, 카드사/카드 타입 필터 생성"""
+        # 카드 텍스트는 cards_df 한 곳에만 두고, 검색용 텍스트/Document 는 필요할 때 생성
+        self.card_store = CardTextStore(self.cards_df)
+        self.card_ids = self.card_store.card_ids
+        
+        # 가맹점/키워드 질의용 BM25 어휘 색인 (카드 텍스트 기준)
+        self.lexical_index = build_lexical_index(self.card_store)
+        
+        # 카드사/카드 타입 비트맵 (카드 순서)
+        self.card_filters = CardFilterIndex([self.card_store.metadata(pos) for pos in range(len(self.card_store))])
+    
+    def _index_settings(self) -> Dict[str, Any]:
+        """인덱스 파일과 함께 저장하는 인덱스 설정"""
+        return {
+            "index_type": self.index_type,
+            "reduction": self.index_reduction,
+            "reduced_dim": self.index_dim,
+            "index_params": self.index_params,
+            "granularity": self.index_granularity,
+            "catalog": self._catalog_view().fingerprint,
+            "docstore": DOCSTORE_IDS_ONLY,
+        }
+    
+    def _build_vector_store(self):
+        """
+        카드(또는 혜택 청크) 텍스트를 임베딩해 FAISS 벡터 저장소 생성 (설정한 인덱스 종류/차원 축소 인덱스로 교체)
+        
+        docstore 에는 카드 ID(청크는 청크 번호 포함)만 저장하고, 텍스트는 임베딩하는 동안만 생성합니다.
+        """
+        if self.index_granularity == GRANULARITY_CHUNK:
+            # 혜택별 청크 문서 (벡터 저장소 생성 시에만 생성)
+            chunk_documents = build_chunk_documents(self.card_store, self.parse_benefits)
+            print(f"혜택 청크 생성 완료: {len(chunk_documents)}개 청크")
+            texts = [doc.page_content for doc in chunk_documents]
+            metadatas = [doc.metadata for doc in chunk_documents]
+            del chunk_documents
+        else:
+            texts = self.card_store.iter_texts()
+            metadatas = [{'card_id': card_id} for card_id in self.card_store.card_ids]
+        
+        vector_store = build_id_vector_store(texts, metadatas, self.embedding_model)
+        rebuild_vector_store_index(
+            vector_store, self.index_reduction, self.index_dim, self.index_type, self.index_params
+        )
+        return vector_store
+    
+    def _save_vector_store(self, cache_file: str):
+        """벡터 저장소와 인덱스 설정 캐싱"""
+        self.vector_store.save_local(folder_path=self.index_cache_dir, index_name=cache_file)
+        write_index_settings(
+            os.path.join(self.index_cache_dir, f"{cache_file}.json"), self._index_settings()
+        )
     
     def create_vector_store(self):
         """LangChain FAISS 벡터 저장소 생성"""
         try:
-            # 캐시 파일 경로
-            cache_file = 'faiss_index'
+            # 캐시 파일 경로 (색인 단위/인덱스 종류/차원 축소 설정별)
+            cache_file = index_cache_name(
+                self.index_type, self.index_reduction, self.index_dim, self.index_granularity
+            )
+            cache_path = os.path.join(self.index_cache_dir, cache_file)
             
-            # 캐시된 벡터 저장소가 있는지 확인
-            if os.path.exists(f"{cache_file}.faiss") and os.path.exists(f"{cache_file}.pkl"):
+            # 캐시된 벡터 저장소가 있고 인덱스 구성 설정(nlist, M 등)이 같은지 확인
+            cached = os.path.exists(f"{cache_path}.faiss") and os.path.exists(f"{cache_path}.pkl")
+            if cached and not same_build_settings(read_index_settings(f"{cache_path}.json"), self._index_settings()):
+                print("인덱스 설정 또는 카드 카탈로그가 변경되어 벡터 저장소를 다시 생성합니다.")
+                cached = False
+            
+            if cached:
                 try:
                     # 캐시된 벡터 저장소 로드
                     self.vector_store = FAISS.load_local(
-                        folder_path=".",
+                        folder_path=self.index_cache_dir,
                         index_name=cache_file,
                         embeddings=self.embedding_model,
                         allow_dangerous_deserialization=True  # 안전한 환경에서만 사용
                     )
+                    # 검색 파라미터(nprobe, efSearch)는 인덱스를 다시 만들지 않고 현재 설정 적용
+                    set_search_params(self.vector_store.index, self.index_params)
                     print(f"캐시된 벡터 저장소 로드 완료")
                 except Exception as e:
                     print(f"캐시된 벡터 저장소 로드 실패, 새 저장소 생성: {str(e)}")
                     # 새 벡터 저장소 생성
-                    self.vector_store = FAISS.from_documents(
-                        documents=self.card_documents,
-                        embedding=self.embedding_model
-                    )
+                    self.vector_store = self._build_vector_store()
                     
                     # 새로 생성한 벡터 저장소 캐싱
-                    self.vector_store.save_local(folder_path=".", index_name=cache_file)
+                    self._save_vector_store(cache_file)
             else:
                 # 새 벡터 저장소 생성
-                self.vector_store = FAISS.from_documents(
-                    documents=self.card_documents,
-                    embedding=self.embedding_model
-                )
+                self.vector_store = self._build_vector_store()
                 
                 # 벡터 저장소 캐싱
-                self.vector_store.save_local(folder_path=".", index_name=cache_file)
+                self._save_vector_store(cache_file)
                 print(f"카드 벡터 저장소 생성 완료")
             
             # 검색기(Retriever) 생성 - 항상 실행되도록 함
@@ -202,13 +554,10 @@ class CardRecommendationRAG:
         except Exception as e:
             print(f"벡터 저장소 생성 중 오류 발생: {str(e)}")
             # 벡터 저장소 생성 실패 시 백업 처리
-            if not self.vector_store and self.card_documents:
+            if not self.vector_store and self.card_store:
                 try:
                     print("백업 벡터 저장소 생성 시도...")
-                    self.vector_store = FAISS.from_documents(
-                        documents=self.card_documents,
-                        embedding=self.embedding_model
-                    )
+                    self.vector_store = self._build_vector_store()
                     self.retriever = self.vector_store.as_retriever(
                         search_type="similarity",
                         search_kwargs={"k": 10}
@@ -216,6 +565,34 @@ class CardRecommendationRAG:
                 except Exception as backup_error:
                     print(f"백업 벡터 저장소 생성 실패: {str(backup_error)}")
     
+    def _fetch_profile_cache_row(self, cursor, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        적재 시 미리 계산된 사용자 프로필 캐시 행 조회
+        
+        Args:
+            cursor: 딕셔너리 커서
+            user_id: 사용자 ID
+            
+        Returns:
+            Dict: user_profile_cache 행 (캐시가 없거나 비활성화된 경우 None)
+        """
+        if not self.profile_cache_enabled:
+            return None
+        
+        try:
+            with trace_span("db.user_profile_cache"):
+                cursor.execute(USER_PROFILE_CACHE_QUERY, (user_id,))
+                return cursor.fetchone()
+        except Exception as e:
+            # 마이그레이션 전 데이터베이스(테이블 없음): 이후 요청은 기존 계산 방식만 사용
+            if getattr(e, "errno", None) == errorcode.ER_NO_SUCH_TABLE:
+                print(f"사용자 프로필 캐시 테이블이 없어 캐시 사용 중지: {str(e)}")
+                self.profile_cache_enabled = False
+            else:
+                # 일시적 오류는 이번 요청만 기존 계산 방식으로 처리
+                print(f"사용자 프로필 캐시 조회 중 오류 발생: {str(e)}")
+            return None
+    
     def get_user_profile(self, user_id: str) -> Dict[str, Any]:
         """
         사용자 프로필 정보 조회
@@ -226,88 +603,67 @@ class CardRecommendationRAG:
         Returns:
             Dict: 사용자 프로필 정보
         """
+        # 피처 스토어에 있는 트랜잭션 사용자는 DB 조회 없이 반환
+        if self.feature_store is not None and len(user_id) > 20:
+            with trace_span("feature_store.user_profile"):
+                user_profile = self.feature_store.get_profile(user_id)
+            if user_profile:
+                return user_profile
+        
         try:
             # MySQL 연결
-            connection = mysql.connector.connect(**self.mysql_config)
+            connection = self._get_connection()
             cursor = connection.cursor(dictionary=True)
             
             # 두 가지 접근 방식 - 새로운 트랜잭션 데이터 형식 또는 기존 형식
             # 1. 새로운 트랜잭션 데이터 형식(SEQ 기반 사용자 ID)
             if len(user_id) > 20:  # 긴 ID는 트랜잭션 데이터 형식
-                query = """
-                SELECT 
-                    t.seq_id as user_id,
-                    t.age_group as age,
-                    t.gender,
-                    t.member_rank,
-                    t.life_stage,
-                    t.region_code,
-                    t.total_usage_amount,
-                    t.card_sales_amount,
-                    t.restaurant_amount,
-                    t.clothing_amount + t.clothing_general_amount as shopping_amount,
-                    t.travel_amount + t.travel_general_amount as travel_amount,
-                    t.top_spending_category
-                FROM user_transactions t
-                WHERE t.seq_id = %s
-                """
-                cursor.execute(query, (user_id,))
-                user_trans = cursor.fetchone()
+                # 적재 시 미리 계산된 캐시 행이 있으면 그대로 사용
+                cached = self._fetch_profile_cache_row(cursor, user_id)
+                if cached:
+                    cursor.close()
+                    connection.close()
+                    return profile_from_cache_row(cached)
+                
+                with trace_span("db.user_transaction_profile"):
+                    cursor.execute(USER_TRANSACTION_PROFILE_QUERY, (user_id,))
+                    user_trans = cursor.fetchone()
                 
                 if user_trans:
-                    # 인코딩된 값을 사람이 읽을 수 있는 형식으로 매핑
-                    gender_str = "남성" if user_trans["gender"] == 1 else "여성"
+                    # 인코딩된 값을 사람이 읽을 수 있는 형식으로 매핑 (적재 시 캐시와 같은 조회 테이블)
+                    mappings = get_code_mappings(connection)
+                    gender_str = mappings.gender.get(user_trans["gender"])
                     
                     # 연령대 매핑
-                    age_mapping = {0: 20, 1: 30, 2: 40, 3: 50, 4: 60, 5: 70}
-                    age_value = age_mapping.get(user_trans["age"], 35)
+                    age_label = mappings.age_label.get(user_trans["age"])
                     
                     # 회원등급에 따른 소득수준
-                    income_level = "상위" if user_trans["member_rank"] <= 2 else "중간" if user_trans["member_rank"] == 3 else "낮음"
+                    income_level = mappings.income_level.get(user_trans["member_rank"])
                     
                     # 트랜잭션 데이터에서 소비 패턴 가져오기
-                    spending_query = """
-                    SELECT
-                        CASE 
-                            WHEN restaurant_amount > 50 THEN '외식' 
-                            WHEN restaurant_amount > 20 THEN '카페' 
-                            ELSE NULL 
-                        END as category1,
-                        CASE 
-                            WHEN clothing_amount + clothing_general_amount > 50 THEN '의류쇼핑'
-                            WHEN furniture_amount + appliance_amount > 50 THEN '가전/가구'
-                            ELSE NULL 
-                        END as category2,
-                        CASE 
-                            WHEN travel_amount + travel_general_amount > 30 THEN '여행'
-                            WHEN auto_amount + automaint_amount > 30 THEN '자동차'
-                            ELSE NULL 
-                        END as category3
-                    FROM user_transactions
-                    WHERE seq_id = %s
-                    """
-                    cursor.execute(spending_query, (user_id,))
-                    spending_result = cursor.fetchone()
+                    with trace_span("db.user_spending_pattern"):
+                        cursor.execute(USER_SPENDING_PATTERN_QUERY, (user_id,))
+                        spending_result = cursor.fetchone()
                     
                     # None 값 필터링하고 소비 패턴 문자열 형성
                     if spending_result:
                         categories = [cat for cat in spending_result.values() if cat]
                         if not categories:
                             # 유의미한 카테고리가 없으면 기본값 사용
-                            spending_pattern = "일반적인 소비 습관"
+                            spending_pattern = DEFAULT_SPENDING_PATTERN
                         else:
                             # 감지된 카테고리 합치기
                             spending_pattern = ", ".join(categories) + "을 중심으로 하는 소비 습관"
                     else:
-                        spending_pattern = "일반적인 소비 습관"
+                        spending_pattern = DEFAULT_SPENDING_PATTERN
                     
                     # 사용자 프로필 구성
                     user_profile = {
                         "user_id": user_id,
-                        "연령대": f"{age_value}대",
+                        "연령대": age_label,
                         "성별": gender_str,
                         "소득 수준": income_level,
-                        "직업": "직장인",  # 기본값, 후에 정제 가능
+                        "직업": DEFAULT_JOB_CATEGORY,  # 기본값, 후에 정제 가능
                         "소비 패턴": spending_pattern,
                         "총 지출액": user_trans["total_usage_amount"]
                     }
@@ -316,13 +672,9 @@ class CardRecommendationRAG:
                     return user_profile
             
             # 2. 기존 사용자 데이터 형식 처리
-            query = """
-            SELECT u.user_id, u.age, u.gender, u.income_level, u.job_category 
-            FROM users u 
-            WHERE u.user_id = %s
-            """
-            cursor.execute(query, (user_id,))
-            user_basic = cursor.fetchone()
+            with trace_span("db.user_basic"):
+                cursor.execute(USER_BASIC_QUERY, (user_id,))
+                user_basic = cursor.fetchone()
             
             if not user_basic:
                 cursor.close()
@@ -330,14 +682,9 @@ class CardRecommendationRAG:
                 return {}
             
             # 사용자 소비 패턴 조회
-            query_consumption = """
-            SELECT cp.category, cp.amount, cp.frequency
-            FROM consumption_patterns cp
-            WHERE cp.user_id = %s
-            ORDER BY cp.amount DESC
-            """
-            cursor.execute(query_consumption, (user_id,))
-            consumption_patterns = cursor.fetchall()
+            with trace_span("db.user_consumption_patterns"):
+                cursor.execute(USER_CONSUMPTION_PATTERNS_QUERY, (user_id,))
+                consumption_patterns = cursor.fetchall()
             
             # 프로필 정보 구성
             user_profile = {
@@ -384,157 +731,122 @@ class CardRecommendationRAG:
         if not len(user_id) > 20:
             return {}
         
+        # 피처 스토어에 있는 사용자는 DB 조회 없이 반환
+        if self.feature_store is not None:
+            with trace_span("feature_store.spending_insights"):
+                insights = self.feature_store.get_spending_insights(user_id)
+            if insights:
+                return insights
+        
         try:
             # MySQL 연결
-            connection = mysql.connector.connect(**self.mysql_config)
+            connection = self._get_connection()
             cursor = connection.cursor(dictionary=True)
             
-            # 카테고리별 지출 조회 쿼리
-            query = """
-            SELECT 
-                restaurant_amount,
-                clothing_amount + clothing_general_amount as clothing_total,
-                travel_amount + travel_general_amount as travel_total,
-                grocery_amount,
-                auto_amount + automaint_amount + autosl_amount as auto_total,
-                hotel_amount,
-                culture_amount,
-                interior_amount + furniture_amount as home_total,
-                total_usage_amount
-            FROM user_transactions
-            WHERE seq_id = %s
-            """
-            cursor.execute(query, (user_id,))
-            spending = cursor.fetchone()
-            
-            if not spending:
+            # 적재 시 미리 계산된 캐시 행이 있으면 그대로 사용
+            cached = self._fetch_profile_cache_row(cursor, user_id)
+            if cached:
                 cursor.close()
                 connection.close()
-                return {}
-            
-            # 각 카테고리의 총 지출 대비 비율 계산
-            total = spending["total_usage_amount"] or 1  # 0으로 나누기 방지
-            
-            insights = {
-                "외식/카페": {
-                    "금액": spending["restaurant_amount"],
-                    "비율": round(spending["restaurant_amount"] / total * 100, 1)
-                },
-                "쇼핑/의류": {
-                    "금액": spending["clothing_total"],
-                    "비율": round(spending["clothing_total"] / total * 100, 1)
-                },
-                "여행/교통": {
-                    "금액": spending["travel_total"],
-                    "비율": round(spending["travel_total"] / total * 100, 1)
-                },
-                "식료품": {
-                    "금액": spending["grocery_amount"],
-                    "비율": round(spending["grocery_amount"] / total * 100, 1)
-                },
-                "자동차": {
-                    "금액": spending["auto_total"],
-                    "비율": round(spending["auto_total"] / total * 100, 1)
-                },
-                "숙박": {
-                    "금액": spending["hotel_amount"],
-                    "비율": round(spending["hotel_amount"] / total * 100, 1)
-                },
-                "문화/여가": {
-                    "금액": spending["culture_amount"],
-                    "비율": round(spending["culture_amount"] / total * 100, 1)
-                },
-                "가정/인테리어": {
-                    "금액": spending["home_total"],
-                    "비율": round(spending["home_total"] / total * 100, 1)
-                }
-            }
-            
-            # 금액으로 정렬하고 상위 카테고리 가져오기
-            sorted_categories = sorted(
-                insights.items(),
-                key=lambda x: x[1]["금액"],
-                reverse=True
-            )
-            
-            # 상위 3개 카테고리
-            top_categories = sorted_categories[:3]
+                return insights_from_cache_row(cached)
             
-            result = {
-                "총 지출": total,
-                "주요 카테고리": {cat[0]: cat[1] for cat in top_categories},
-                "모든 카테고리": insights
-            }
+            # 카테고리별 지출 조회
+            with trace_span("db.user_spending_insights"):
+                cursor.execute(USER_SPENDING_INSIGHTS_QUERY, (user_id,))
+                spending = cursor.fetchone()
             
             cursor.close()
             connection.close()
-            return result
+            
+            if not spending:
+                return {}
+            
+            # 각 카테고리의 총 지출 대비 비율 계산 및 상위 3개 카테고리 추출
+            return build_spending_insights(
+                spending["total_usage_amount"],
+                {
+                    "restaurant": spending["restaurant_amount"],
+                    "clothing": spending["clothing_total"],
+                    "travel": spending["travel_total"],
+                    "grocery": spending["grocery_amount"],
+                    "auto": spending["auto_total"],
+                    "hotel": spending["hotel_amount"],
+                    "culture": spending["culture_amount"],
+                    "home": spending["home_total"]
+                }
+            )
             
         except Exception as e:
             print(f"소비 인사이트 추출 중 오류 발생: {str(e)}")
             return {}
     
+    @pinned_catalog
     def semantic_search(self, query: str, user_profile: Dict[str, Any], 
                        spending_insights: Dict[str, Any] = None, 
-                       top_k: int = 10) -> List[Dict[str, Any]]:
+                       top_k: int = 10,
+                       filters: Optional[Dict[str, List[str]]] = None) -> List[RecommendationRecord]:
         """
-        LangChain 기반 의미론적 검색 수행
+        BM25 어휘 검색과 LangChain FAISS 의미론적 검색을 결합한 카드 검색
+        
+        retrieval_mode 가 hybrid 이면 두 점수를 가중 합산하고, 키워드형 질의(가맹점 이름 등)는
+        질의 임베딩 없이 어휘 검색 결과만 사용합니다. 카드사/카드 타입 필터는 두 검색 모두
+        검색 안에서 적용되어 조건에 맞는 카드만 top_k 개까지 반환합니다.
         
         Args:
             query: 검색 쿼리
             user_profile: 사용자 프로필
             spending_insights: 소비 인사이트
             top_k: 상위 k개 결과 반환
+            filters: 속성(corporate_name, card_type) -> 허용 값 목록
+                     (None 이면 query_filters 설정 시 질의에서 추출, 빈 딕셔너리면 필터 없음)
             
         Returns:
-            List: 검색 결과 (카드 정보)
+            List: 검색 결과 (RecommendationRecord, 카드 상세는 details 조회 시 생성)
         """
         try:
-            # 검색기가 없으면 빈 리스트 반환
-            if not self.retriever:
-                print("retriever가 초기화되지 않았습니다. 모델 기반 추천으로 대체합니다.")
+            # 카드사/카드 타입 필터 비트맵 (조건에 맞는 카드가 없으면 빈 결과)
+            mask = self.card_filters.mask(self.resolve_filters(query, filters)) if self.card_filters else None
+            if mask is not None and not mask.any():
                 return []
             
-            # 사용자 프로필 정보를 쿼리에 추가하여 맥락화
-            contextualized_query = query
-            if user_profile:
-                user_context = f"사용자는 {user_profile.get('연령대', '')} {user_profile.get('성별', '')}이고, "
-                user_context += f"{user_profile.get('직업', '')}이며, {user_profile.get('소비 패턴', '')}입니다. "
-                contextualized_query = user_context + query
-            
-            # 소비인사이트가 있으면 추가
-            if spending_insights and spending_insights.get("주요 카테고리"):
-                top_categories = spending_insights["주요 카테고리"]
-                categories_context = "주요 소비 카테고리: "
-                for cat_name, cat_data in top_categories.items():
-                    categories_context += f"{cat_name}({cat_data['비율']}%), "
-                contextualized_query += " " + categories_context
-            
-            # LangChain 검색기로 관련 문서 검색
-            relevant_docs = self.retriever.invoke(contextualized_query)
-            
-            # 결과 구성
+            # 어휘 검색 (질의 원문 기준, 임베딩 불필요)
+            lexical_scores = {}
+            if self.retrieval_mode != RETRIEVAL_DENSE and self.lexical_index is not None:
+                with trace_span("lexical_search") as span:
+                    lexical_scores = dict(self.lexical_index.search(query, top_k=max(top_k, 10), mask=mask))
+                    span.set_attribute("hits", len(lexical_scores))
+            
+            # 키워드형 질의(가맹점 이름 등)는 어휘 검색 결과만 사용 (일치하는 카드가 없으면 FAISS 검색)
+            lexical_only = bool(lexical_scores) and (
+                self.retrieval_mode == RETRIEVAL_LEXICAL
+                or (self.retrieval_mode == RETRIEVAL_HYBRID and is_keyword_query(query))
+            )
+            
+            dense_scores = {}
+            if not lexical_only:
+                dense_scores = self._dense_search(query, user_profile, spending_insights, mask)
+            
+            if not lexical_scores and not dense_scores:
+                return []
+            
+            # 결과 구성 (각 점수를 최고점 1로 정규화한 뒤 가중 합산)
+            fused = fuse_scores(lexical_scores, dense_scores, self.lexical_weight)
             results = []
-            for i, doc in enumerate(relevant_docs[:top_k]):
-                card_id = doc.metadata.get('card_id')
+            for card_id, score in fused[:top_k]:
+                # 카드 위치 (카드 상세는 응답 생성 시 저장소에서 조회)
+                pos = self.card_store.position(card_id)
                 
-                # 원본 카드 데이터 가져오기
-                card_data = self.cards_df[self.cards_df['card_id'] == card_id]
-                
-                if not card_data.empty:
-                    card_dict = card_data.iloc[0].to_dict()
-                    
+                if pos is not None:
                     # 개인화된 추천 이유 생성
                     recommendation_reason = self._generate_recommendation_reason(
-                        card_dict, query, user_profile, spending_insights
+                        self._reason_fields(pos), query, user_profile, spending_insights
                     )
                     
-                    results.append({
-                        'card_id': card_id,
-                        'similarity_score': 1.0 - (i * 0.05),  # 유사도 점수 근사화 (1.0에서 시작하여 0.05씩 감소)
-                        'recommendation_reason': recommendation_reason,
-                        'details': card_dict
-                    })
+                    results.append(RecommendationRecord(
+                        self.card_store, pos,
+                        similarity_score=score,
+                        recommendation_reason=recommendation_reason
+                    ))
             
             return results
             
@@ -542,6 +854,124 @@ class CardRecommendationRAG:
             print(f"의미론적 검색 중 오류 발생: {str(e)}")
             return []
     
+    def resolve_filters(self, query: str,
+                        filters: Optional[Dict[str, List[str]]] = None) -> Dict[str, List[str]]:
+        """
+        검색에 적용할 카드사/카드 타입 필터 결정
+        
+        Args:
+            query: 사용자 질문
+            filters: 요청에서 지정한 필터 (None 이면 query_filters 설정 시 질의에서 추출)
+            
+        Returns:
+            Dict: 속성 -> 허용 값 목록 (필터가 없으면 빈 딕셔너리)
+        """
+        if filters is not None:
+            return filters
+        if not self.query_filters or self.card_filters is None:
+            return {}
+        return extract_filters_from_query(query, self.card_filters.values)
+    
+    def _contextualize_query(self, query: str, user_profile: Dict[str, Any],
+                             spending_insights: Dict[str, Any] = None) -> str:
+        """
+        FAISS 검색용으로 사용자 프로필과 주요 소비 카테고리를 붙인 질의
+        
+        Args:
+            query: 검색 쿼리
+            user_profile: 사용자 프로필
+            spending_insights: 소비 인사이트
+            
+        Returns:
+            str: 맥락화된 질의
+        """
+        # 사용자 프로필 정보를 쿼리에 추가하여 맥락화
+        contextualized_query = query
+        if user_profile:
+            user_context = f"사용자는 {user_profile.get('연령대', '')} {user_profile.get('성별', '')}이고, "
+            user_context += f"{user_profile.get('직업', '')}이며, {user_profile.get('소비 패턴', '')}입니다. "
+            contextualized_query = user_context + query
+        
+        # 소비인사이트가 있으면 추가
+        if spending_insights and spending_insights.get("주요 카테고리"):
+            top_categories = spending_insights["주요 카테고리"]
+            categories_context = "주요 소비 카테고리: "
+            for cat_name, cat_data in top_categories.items():
+                categories_context += f"{cat_name}({cat_data['비율']}%), "
+            contextualized_query += " " + categories_context
+        
+        return contextualized_query
+    
+    def _dense_search(self, query: str, user_profile: Dict[str, Any],
+                      spending_insights: Dict[str, Any] = None,
+                      mask=None) -> Dict[str, float]:
+        """
+        사용자 맥락을 더한 질의로 FAISS 검색
+        
+        Args:
+            query: 검색 쿼리
+            user_profile: 사용자 프로필
+            spending_insights: 소비 인사이트
+            mask: 검색 대상 카드 비트맵 (CardFilterIndex.mask, None 이면 전체)
+            
+        Returns:
+            Dict: 카드 ID -> 유사도 (1 / (1 + L2 거리), 검색기가 없으면 빈 딕셔너리)
+        """
+        try:
+            # 검색기가 없으면 빈 결과 반환
+            if not self.retriever:
+                print("retriever가 초기화되지 않았습니다. 모델 기반 추천으로 대체합니다.")
+                return {}
+            
+            # 사용자 프로필/소비 인사이트를 쿼리에 추가하여 맥락화
+            contextualized_query = self._contextualize_query(query, user_profile, spending_insights)
+            
+            # 쿼리 임베딩 후 FAISS 검색 (검색기와 동일한 결과, 단계별 측정을 위해 분리)
+            with trace_span("embedding"):
+                query_embedding = self.embedding_model.embed_query(contextualized_query)
+            
+            with trace_span("faiss_search") as span:
+                k = self.retriever.search_kwargs.get("k", 10)
+                if self.index_granularity == GRANULARITY_CHUNK:
+                    # 청크를 넉넉히 검색한 뒤 카드별 점수로 집계 (문서 조회 없이 배열 연산)
+                    card_positions, distances = self.card_filters.search_positions(
+                        self.vector_store, query_embedding, k * self.chunk_oversample, mask
+                    )
+                    positions, scores = aggregate_chunk_scores(
+                        card_positions, 1.0 / (1.0 + distances), len(self.card_filters.card_ids),
+                        k, self.chunk_aggregation
+                    )
+                    span.set_attribute("chunks", len(card_positions))
+                    span.set_attribute("hits", len(positions))
+                    return {
+                        self.card_filters.card_ids[pos]: float(score)
+                        for pos, score in zip(positions, scores)
+                    }
+                if mask is not None:
+                    # 필터 조건에 맞는 카드만 대상으로 검색 (IDSelectorBitmap)
+                    relevant_docs = self.card_filters.search(self.vector_store, query_embedding, k, mask)
+                    span.set_attribute("filtered", True)
+                else:
+                    relevant_docs = self.vector_store.similarity_search_with_score_by_vector(query_embedding, k=k)
+                span.set_attribute("hits", len(relevant_docs))
+            
+            return {
+                doc.metadata.get('card_id'): 1.0 / (1.0 + float(distance))
+                for doc, distance in relevant_docs
+            }
+            
+        except Exception as e:
+            # 어휘 검색 결과는 그대로 사용할 수 있도록 밀집 검색 실패만 처리
+            print(f"FAISS 검색 중 오류 발생: {str(e)}")
+            return {}
+    
+    def _reason_fields(self, pos: int) -> Dict[str, Any]:
+        """추천 이유 생성에 필요한 카드 필드 (카드 행 전체를 복사하지 않음)"""
+        return {
+            'card_name': self.card_store.value(pos, 'card_name', '이 카드'),
+            'benefits': self.card_store.value(pos, 'benefits'),
+        }
+    
     def _generate_recommendation_reason(self, card_details: Dict[str, Any], 
                                       query: str, 
                                       user_profile: Dict[str, Any],
@@ -593,7 +1023,12 @@ class CardRecommendationRAG:
         
         return reason
     
-    def get_top_n_recommendations(self, user_id: str, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+    @pinned_catalog
+    def get_top_n_recommendations(self, user_id: str, query: str, limit: int = 5,
+                                  filters: Optional[Dict[str, List[str]]] = None,
+                                  user_profile: Optional[Dict[str, Any]] = None,
+                                  spending_insights: Optional[Dict[str, Any]] = None,
+                                  model_recommendations: Optional[List[RecommendationRecord]] = None) -> List[RecommendationRecord]:
         """
         딥러닝 추천 시스템 결과와 의미론적 검색을 결합한 최종 추천
         
@@ -601,25 +1036,48 @@ class CardRecommendationRAG:
             user_id: 사용자 ID
             query: 사용자 질의
             limit: 최대 추천 수
+            filters: 카드사/카드 타입 필터 (None 이면 query_filters 설정 시 질의에서 추출)
+            user_profile: 이미 조회한 사용자 프로필 (None 이면 조회)
+            spending_insights: 이미 조회한 소비 인사이트 (None 이면 조회)
+            model_recommendations: 이미 조회한 모델 추천 (None 이면 조회, 세션 재사용 시 복사해서 사용)
             
         Returns:
-            List: 추천 카드 정보 목록
+            List: 추천 카드 목록 (RecommendationRecord)
         """
         try:
             # 사용자 프로필 조회
-            user_profile = self.get_user_profile(user_id)
+            if user_profile is None:
+                with trace_span("user_profile"):
+                    user_profile = self.get_user_profile(user_id)
             
             # 소비인사이트 추출 (새로운 트랜잭션 데이터 형식)
-            spending_insights = self.extract_spending_insights(user_id) if len(user_id) > 20 else {}
+            if spending_insights is None:
+                with trace_span("spending_insights"):
+                    spending_insights = self.extract_spending_insights(user_id) if len(user_id) > 20 else {}
+            
+            # 딥러닝 모델 기반 Top-N 카드 가져오기 (병합 시 점수가 바뀌므로 고정된 결과는 복사)
+            if model_recommendations is None:
+                with trace_span("model_recommendations"):
+                    model_recommended_cards = self.get_model_recommendations(user_id)
+            else:
+                model_recommended_cards = [rec.copy() for rec in model_recommendations]
             
-            # 딥러닝 모델 기반 Top-N 카드 가져오기
-            model_recommended_cards = self.get_model_recommendations(user_id)
+            # 카드사/카드 타입 필터는 모델 추천에도 적용
+            filters = self.resolve_filters(query, filters)
+            mask = self.card_filters.mask(filters) if self.card_filters else None
+            if mask is not None:
+                allowed = self.card_filters.allowed_card_ids(mask)
+                model_recommended_cards = [rec for rec in model_recommended_cards if rec['card_id'] in allowed]
             
             # 의미론적 검색 수행
-            semantic_results = self.semantic_search(query, user_profile, spending_insights, top_k=10)
+            with trace_span("semantic_search"):
+                semantic_results = self.semantic_search(
+                    query, user_profile, spending_insights, top_k=10, filters=filters
+                )
             
             # 두 결과 병합 및 재정렬
-            combined_results = self.merge_recommendations(model_recommended_cards, semantic_results)
+            with trace_span("merge"):
+                combined_results = self.merge_recommendations(model_recommended_cards, semantic_results)
             
             # 상위 N개 결과 반환
             return combined_results[:limit]
@@ -628,7 +1086,236 @@ class CardRecommendationRAG:
             print(f"추천 생성 중 오류 발생: {str(e)}")
             return []
     
-    def get_model_recommendations(self, user_id: str) -> List[Dict[str, Any]]:
+    @pinned_catalog
+    def recommend_batch(self, user_ids: List[str], query: str, limit: int = 5,
+                        filters: Optional[Dict[str, List[str]]] = None) -> Dict[str, List[RecommendationRecord]]:
+        """
+        여러 트랜잭션 사용자의 LLM 제외 추천(검색 + 결합) 일괄 계산 (야간 대량 추천 작업용)
+        
+        get_top_n_recommendations 와 같은 방식으로 추천하되, 프로필과 모델 추천은 IN 쿼리 한 번,
+        질의 임베딩과 FAISS 검색은 배치 한 번으로 처리합니다. 질의가 모든 사용자에게 같으므로
+        필터와 어휘 검색은 한 번만 계산합니다.
+        
+        Args:
+            user_ids: 트랜잭션 사용자 ID(seq_id) 목록
+            query: 모든 사용자에게 적용할 추천 질의
+            limit: 사용자별 최대 추천 수
+            filters: 카드사/카드 타입 필터 (None 이면 query_filters 설정 시 질의에서 추출)
+            
+        Returns:
+            Dict: 사용자 ID -> 추천 카드 목록 (프로필이 없는 사용자는 제외)
+            
+        Raises:
+            Exception: DB 조회/임베딩/FAISS 검색 실패 (호출자가 배치 전체를 실패로 처리)
+        """
+        try:
+            # 프로필/소비 인사이트 및 모델 추천 일괄 조회
+            with trace_span("user_profile", users=len(user_ids)):
+                profiles, insights = self.get_user_profiles_batch(user_ids)
+            user_ids = [user_id for user_id in user_ids if user_id in profiles]
+            if not user_ids:
+                return {}
+            with trace_span("model_recommendations", users=len(user_ids)):
+                model_recs = self.get_model_recommendations_batch(user_ids, self.card_store)
+            
+            # 카드사/카드 타입 필터 (모든 사용자 공통)
+            mask = self.card_filters.mask(self.resolve_filters(query, filters)) if self.card_filters else None
+            if mask is not None:
+                allowed = self.card_filters.allowed_card_ids(mask)
+                model_recs = {
+                    user_id: [rec for rec in recs if rec['card_id'] in allowed]
+                    for user_id, recs in model_recs.items()
+                }
+            
+            # 어휘 검색 (질의 원문 기준이므로 한 번만 계산)
+            lexical_scores = {}
+            if self.retrieval_mode != RETRIEVAL_DENSE and self.lexical_index is not None:
+                lexical_scores = dict(self.lexical_index.search(query, top_k=10, mask=mask))
+            lexical_only = bool(lexical_scores) and (
+                self.retrieval_mode == RETRIEVAL_LEXICAL
+                or (self.retrieval_mode == RETRIEVAL_HYBRID and is_keyword_query(query))
+            )
+            
+            # 사용자별로 맥락화한 질의를 한 번에 임베딩/검색
+            if lexical_only or (mask is not None and not mask.any()):
+                dense_scores = [{} for _ in user_ids]
+            else:
+                dense_scores = self._dense_search_batch(
+                    [self._contextualize_query(query, profiles[user_id], insights.get(user_id))
+                     for user_id in user_ids],
+                    mask
+                )
+            
+            # 사용자별 점수 결합 및 모델 추천과 병합
+            results = {}
+            with trace_span("merge", users=len(user_ids)):
+                for user_id, dense in zip(user_ids, dense_scores):
+                    semantic_results = []
+                    for card_id, score in fuse_scores(lexical_scores, dense, self.lexical_weight)[:10]:
+                        pos = self.card_store.position(card_id)
+                        if pos is None:
+                            continue
+                        semantic_results.append(RecommendationRecord(
+                            self.card_store, pos,
+                            similarity_score=score,
+                            recommendation_reason=self._generate_recommendation_reason(
+                                self._reason_fields(pos), query, profiles[user_id], insights.get(user_id)
+                            )
+                        ))
+                    combined = self.merge_recommendations(model_recs.get(user_id, []), semantic_results)
+                    results[user_id] = combined[:limit]
+            return results
+            
+        except Exception as e:
+            print(f"일괄 추천 생성 중 오류 발생: {str(e)}")
+            raise
+    
+    def get_user_profiles_batch(self, user_ids: List[str]) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+        """
+        여러 트랜잭션 사용자의 프로필/소비 인사이트 일괄 조회
+        
+        피처 스토어에 없는 사용자는 user_transactions 를 IN 조회 한 번으로 읽어
+        적재 시 프로필 캐시와 같은 방식(build_profile_cache_frame)으로 계산합니다.
+        
+        Args:
+            user_ids: 트랜잭션 사용자 ID(seq_id) 목록
+            
+        Returns:
+            Tuple: (사용자 ID -> 프로필, 사용자 ID -> 소비 인사이트) (없는 사용자는 제외)
+
+            
+        Raises:
+            Exception: user_transactions 조회 실패 (조회 실패와 프로필 없음을 구분하기 위해 전파)
+        """
+        profiles, insights = {}, {}
+        missing = []
+        for user_id in user_ids:
+            if self.feature_store is not None:
+                user_profile = self.feature_store.get_profile(user_id)
+                if user_profile:
+                    profiles[user_id] = user_profile
+                    insights[user_id] = self.feature_store.get_spending_insights(user_id)
+                    continue
+            missing.append(user_id)
+        
+        if not missing:
+            return profiles, insights
+        
+        try:
+            connection = self._get_connection()
+            try:
+                cursor = connection.cursor(dictionary=True)
+                
+                placeholders = ", ".join(["%s"] * len(missing))
+                with trace_span("db.user_transactions_batch", users=len(missing)):
+                    cursor.execute(USER_TRANSACTIONS_BATCH_QUERY.format(placeholders=placeholders), missing)
+                    transactions = pd.DataFrame(cursor.fetchall(), columns=SOURCE_COLUMNS)
+                
+                cursor.close()
+                mappings = get_code_mappings(connection)
+            finally:
+                connection.close()
+            
+            for row in build_profile_cache_frame(transactions, mappings).to_dict('records'):
+                profiles[row['user_id']] = profile_from_cache_row(row)
+                insights[row['user_id']] = insights_from_cache_row(row)
+            
+        except Exception as e:
+            print(f"사용자 프로필 일괄 조회 중 오류 발생: {str(e)}")
+            raise
+        
+        return profiles, insights
+    
+    def get_model_recommendations_batch(self, user_ids: List[str],
+                                        card_store: CardTextStore) -> Dict[str, List[RecommendationRecord]]:
+        """
+        여러 사용자의 딥러닝 모델 추천 일괄 조회
+        
+        Args:
+            user_ids: 사용자 ID 목록
+            card_store: 카드 텍스트 저장소 (카드 ID -> 카드 정보)
+            
+        Returns:
+            Dict: 사용자 ID -> 추천 카드 정보 (get_model_recommendations 와 같은 형식)
+            
+        Raises:
+            Exception: user_recommendations 조회 실패 (모델 추천 없이 저장되지 않도록 전파)
+        """
+        results = {user_id: [] for user_id in user_ids}
+        try:
+            connection = self._get_connection()
+            try:
+                cursor = connection.cursor(dictionary=True)
+                
+                placeholders = ", ".join(["%s"] * len(user_ids))
+                with trace_span("db.model_recommendations_batch", users=len(user_ids)):
+                    cursor.execute(MODEL_RECOMMENDATIONS_BATCH_QUERY.format(placeholders=placeholders), user_ids)
+                    recommendations = cursor.fetchall()
+                
+                cursor.close()
+            finally:
+                connection.close()
+            
+            # 사용자별 상위 MODEL_RECOMMENDATIONS_LIMIT 건 (랭킹 순으로 정렬되어 있음)
+            counts = {}
+            for rec in recommendations:
+                user_id = rec.get('user_id')
+                if user_id not in results or counts.get(user_id, 0) >= MODEL_RECOMMENDATIONS_LIMIT:
+                    continue
+                counts[user_id] = counts.get(user_id, 0) + 1
+                
+                pos = card_store.position(rec.get('card_id'))
+                if pos is not None:
+                    results[user_id].append(RecommendationRecord(
+                        card_store, pos,
+                        recommendation_score=rec.get('score', 0),
+                        recommendation_rank=rec.get('ranking', 999)
+                    ))
+            
+        except Exception as e:
+            print(f"모델 추천 일괄 조회 중 오류 발생: {str(e)}")
+            raise
+        
+        return results
+    
+    def _dense_search_batch(self, queries: List[str], mask=None) -> List[Dict[str, float]]:
+        """
+        맥락화된 여러 질의를 임베딩/FAISS 검색 각 한 번으로 처리
+        
+        Args:
+            queries: 맥락화된 질의 목록
+            mask: 검색 대상 카드 비트맵 (모든 질의에 공통, None 이면 전체)
+            
+        Returns:
+            List: 질의별 카드 ID -> 유사도 (1 / (1 + L2 거리))
+        """
+        if not self.retriever:
+            return [{} for _ in queries]
+        
+        with trace_span("embedding", batch=len(queries)):
+            embeddings = self.embedding_model.embed_documents(queries)
+        
+        with trace_span("faiss_search", batch=len(queries)):
+            k = self.retriever.search_kwargs.get("k", 10)
+            search_k = k * self.chunk_oversample if self.index_granularity == GRANULARITY_CHUNK else k
+            card_positions, distances = self.card_filters.search_positions_batch(
+                self.vector_store, embeddings, search_k, mask
+            )
+        
+        # 카드 단위 색인은 카드별 결과가 하나뿐이므로 같은 집계로 처리
+        card_ids = self.card_filters.card_ids
+        results = []
+        for row_positions, row_distances in zip(card_positions, distances):
+            found = row_positions >= 0
+            positions, scores = aggregate_chunk_scores(
+                row_positions[found], 1.0 / (1.0 + row_distances[found]), len(card_ids),
+                k, self.chunk_aggregation
+            )
+            results.append({card_ids[pos]: float(score) for pos, score in zip(positions, scores)})
+        return results
+    
+    @pinned_catalog
+    def get_model_recommendations(self, user_id: str) -> List[RecommendationRecord]:
         """
         딥러닝 모델 기반 추천 카드 조회
         
@@ -636,41 +1323,30 @@ class CardRecommendationRAG:
             user_id: 사용자 ID
             
         Returns:
-            List: 추천 카드 정보
+            List: 추천 카드 (RecommendationRecord)
         """
         try:
             # MySQL 연결
-            connection = mysql.connector.connect(**self.mysql_config)
+            connection = self._get_connection()
             cursor = connection.cursor(dictionary=True)
             
             # 추천 결과 쿼리 - ranking 컬럼 사용
-            query = """
-            SELECT r.card_id, r.score, r.ranking
-            FROM recommendations r
-            WHERE r.user_id = %s
-            ORDER BY r.ranking ASC
-            LIMIT 20
-            """
-            cursor.execute(query, (user_id,))
-            recommendations = cursor.fetchall()
+            with trace_span("db.model_recommendations"):
+                cursor.execute(MODEL_RECOMMENDATIONS_QUERY, (user_id,))
+                recommendations = cursor.fetchall()
             
             # 결과 포맷팅
             results = []
             for rec in recommendations:
-                card_id = rec.get('card_id')
-                
-                # 카드 상세 정보 조회
-                card_data = self.cards_df[self.cards_df['card_id'] == card_id]
+                # 카드 위치 조회 (카드 상세는 응답 생성 시 저장소에서 조회)
+                pos = self.card_store.position(rec.get('card_id'))
                 
-                if not card_data.empty:
-                    card_dict = card_data.iloc[0].to_dict()
-                    
-                    results.append({
-                        'card_id': card_id,
-                        'recommendation_score': rec.get('score', 0),
-                        'recommendation_rank': rec.get('ranking', 999),
-                        'details': card_dict
-                    })
+                if pos is not None:
+                    results.append(RecommendationRecord(
+                        self.card_store, pos,
+                        recommendation_score=rec.get('score', 0),
+                        recommendation_rank=rec.get('ranking', 999)
+                    ))
             
             # 연결 종료
             cursor.close()
@@ -682,7 +1358,8 @@ class CardRecommendationRAG:
             print(f"모델 추천 조회 중 오류 발생: {str(e)}")
             return []
     
-    def merge_recommendations(self, model_recs: List[Dict[str, Any]], semantic_recs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def merge_recommendations(self, model_recs: List[RecommendationRecord],
+                              semantic_recs: List[RecommendationRecord]) -> List[RecommendationRecord]:
         """
         모델 추천과 의미론적 검색 결과 병합
         
@@ -691,49 +1368,46 @@ class CardRecommendationRAG:
             semantic_recs: 의미론적 검색 결과
             
         Returns:
-            List: 병합된 추천 결과
+            List: 병합된 추천 결과 (recommendation_score 내림차순)
         """
         # 카드 ID로 매핑 생성
-        model_map = {rec['card_id']: rec for rec in model_recs}
-        semantic_map = {rec['card_id']: rec for rec in semantic_recs}
+        model_map = {rec.card_id: rec for rec in model_recs}
+        semantic_map = {rec.card_id: rec for rec in semantic_recs}
         
         all_card_ids = set(model_map.keys()) | set(semantic_map.keys())
         
         combined_results = []
         for card_id in all_card_ids:
-            model_rec = model_map.get(card_id, {})
-            semantic_rec = semantic_map.get(card_id, {})
+            model_rec = model_map.get(card_id)
+            semantic_rec = semantic_map.get(card_id)
             
             # 모델 추천과 의미론적 검색 모두에 있는 경우
-            if card_id in model_map and card_id in semantic_map:
+            if model_rec is not None and semantic_rec is not None:
                 # 점수 결합 (0.6 * 모델 점수 + 0.4 * 의미 점수)
-                model_score = model_rec.get('recommendation_score', 0)
-                semantic_score = semantic_rec.get('similarity_score', 0)
+                model_score = model_rec.recommendation_score or 0
+                semantic_score = semantic_rec.similarity_score or 0
                 
                 combined_score = 0.6 * model_score + 0.4 * semantic_score
                 
                 # 추천 이유는 의미론적 검색 결과에서 사용
-                reason = semantic_rec.get('recommendation_reason', '')
-                
-                combined_results.append({
-                    'card_id': card_id,
-                    'recommendation_score': combined_score,
-                    'recommendation_reason': reason,
-                    'details': model_rec.get('details', semantic_rec.get('details', {}))
-                })
+                combined_results.append(RecommendationRecord(
+                    model_rec.store, model_rec.card_pos,
+                    recommendation_score=combined_score,
+                    recommendation_reason=semantic_rec.recommendation_reason or ''
+                ))
             
             # 모델 추천에만 있는 경우
-            elif card_id in model_map:
-                model_rec['recommendation_score'] *= 0.6  # 가중치 적용
+            elif model_rec is not None:
+                model_rec.recommendation_score *= 0.6  # 가중치 적용
                 combined_results.append(model_rec)
             
             # 의미론적 검색에만 있는 경우
             else:
-                semantic_rec['recommendation_score'] = semantic_rec.get('similarity_score', 0) * 0.4  # 가중치 적용
+                semantic_rec.recommendation_score = (semantic_rec.similarity_score or 0) * 0.4  # 가중치 적용
                 combined_results.append(semantic_rec)
         
         # 최종 점수로 정렬
-        combined_results.sort(key=lambda x: x.get('recommendation_score', 0), reverse=True)
+        combined_results.sort(key=lambda x: x.recommendation_score or 0, reverse=True)
         
         return combined_results
     
@@ -787,74 +1461,103 @@ class CardRecommendationRAG:
     
     def prepare_context_for_llm(self, user_profile: Dict[str, Any], 
                               recommendations: List[Dict[str, Any]],
-                              spending_insights: Dict[str, Any] = None) -> Dict[str, Any]:
+                              spending_insights: Dict[str, Any] = None,
+                              user_query: str = "",
+                              span=None) -> str:
         """
-        LLM에 전달할 컨텍스트 정보 준비 (LangChain 형식)
+        LLM에 전달할 컨텍스트 정보 준비 (토큰 예산 내로 압축한 JSON 문자열)
+        
+        이미지 URL 등 응답에 필요 없는 필드는 제외하고, 혜택은 사용자의 주요 소비 카테고리와
+        질문에 관련된 항목부터 골라 담습니다.
         
         Args:
             user_profile: 사용자 프로필 정보
             recommendations: 추천 카드 목록
             spending_insights: 소비 인사이트
+            user_query: 사용자 질문 (혜택 관련도 계산용)
+            span: 토큰 수를 기록할 스팬 (선택)
             
         Returns:
-            Dict: LLM에 전달할 컨텍스트 정보
+            str: LLM에 전달할 컨텍스트 문자열
+        """
+        context, tokens = self.prompt_compactor.compact(
+            user_profile, recommendations, spending_insights, user_query
+        )
+        REGISTRY.inc("card_rec_context_tokens_total", tokens)
+        if span is not None:
+            span.set_attribute("context_tokens", tokens)
+        return context
+    
+    def build_llm_prompt(self, structured: bool = False) -> ChatPromptTemplate:
+        """
+        추천 응답 생성용 LangChain 채팅 프롬프트 템플릿 구성
+        
+        Args:
+            structured: True 이면 CardRecommendationResponse JSON 형식으로 답하도록 요청
+                        (format_instructions 변수 추가)
+        
+        Returns:
+            ChatPromptTemplate: query, context 변수를 받는 프롬프트 템플릿
         """
-        # 사용자 프로필 정보 구성
-        user_info = {}
-        for key, value in user_profile.items():
-            if key != 'user_id':  # user_id는 제외
-                user_info[key] = value
+        # 시스템 프롬프트 템플릿
+        system_template = """
+        당신은 신용카드 추천 전문가입니다. 사용자의 질문에 대해 제공된 카드 정보를 기반으로 
+        정확하고 친절하게 답변해 주세요. 카드의 혜택을 명확히 설명하고, 사용자에게 가장 적합한 
+        카드를 추천해 주세요. 카드 정보는 신뢰할 수 있는 데이터베이스에서 가져온 것입니다.
         
-        # 소비인사이트가 있으면 추가
-        if spending_insights:
-            user_info["주요 소비 카테고리"] = spending_insights.get("주요 카테고리", {})
-            user_info["총 지출액"] = spending_insights.get("총 지출", 0)
-        
-        # 추천 카드 정보 구성
-        rec_cards = []
-        for i, rec in enumerate(recommendations, 1):
-            details = rec.get('details', {})
-            
-            # 카드 기본 정보
-            card_name = details.get('card_name', '이름 없음')
-            corporate_name = details.get('corporate_name', '정보 없음')
-            card_type = details.get('card_type', '')
-            
-            # 혜택 정보 처리
-            benefits_str = details.get('benefits', '')
-            parsed_benefits = self.parse_benefits(benefits_str)
-            
-            benefits_list = []
-            for benefit in parsed_benefits:
-                category = benefit.get('category', '')
-                description = benefit.get('description', '')
-                if description:
-                    benefits_list.append(f"{category}: {description}")
-                else:
-                    benefits_list.append(f"{category}")
-            
-            # 카드 정보 구성
-            card_info = {
-                "번호": i,
-                "카드명": card_name,
-                "카드사": corporate_name,
-                "추천 점수": rec.get('recommendation_score', '정보 없음'),
-                "추천 이유": rec.get('recommendation_reason', '정보 없음'),
-                "카드 타입": card_type,
-                "주요 혜택": benefits_list,
-                "상세 혜택": details.get('detailed_benefits', ''),
-                "이미지 URL": details.get('image_url', '')
-            }
-            
-            rec_cards.append(card_info)
+        반드시 응답에 추천하는 카드의 이름, 카드사, 그리고 각 카드의 주요 혜택을 상세하게 포함시켜야 합니다.
+        혜택은 카테고리별로 구분하여 설명하고, 사용자의 소비 패턴과 관련된 혜택을 강조해 주세요.
         
-        # 전체 컨텍스트 정보
-        context = {
-            "사용자_프로필": user_info,
-            "추천_카드": rec_cards
-        }
+        사용자의 질문을 분석하여 가장 적합한 카드를 먼저 추천하고, 그 이유를 설명해 주세요.
+        각 카드의 혜택을 명확히 표시하고, 사용자가 이해하기 쉽도록 구체적인 예시를 들어 설명해 주세요.
+        """
         
-        return context
+        # 사용자 프롬프트 템플릿
+        human_template = """
+        다음은 사용자의 질문입니다:
+        {query}
+        
+        다음은 사용자 정보와 추천 카드에 대한 정보입니다:
+        {context}
+        
+        응답 형식:
+        1. 사용자의 소비 패턴 요약
+        2. 추천 카드 목록 (각 카드마다):
+           - 카드명: [카드 이름]
+           - 카드사: [카드사 이름]
+           - 추천 이유: [사용자 특성에 맞는 추천 이유]
+           - 주요 혜택:
+             * [혜택 카테고리1]: [혜택 설명1]
+             * [혜택 카테고리2]: [혜택 설명2]
+             * [혜택 카테고리3]: [혜택 설명3]
+        3. 종합 추천 의견
+        
+        위 정보를 바탕으로 사용자의 질문에 자연스럽게 답변해주세요.
+        답변은 친절하고 자연스러운 대화체로 작성해주세요.
+        """
+        
+        # 구조화 응답용 사용자 프롬프트 템플릿 (API 응답용)
+        if structured:
+            human_template = """
+        다음은 사용자의 질문입니다:
+        {query}
+        
+        다음은 사용자 정보와 추천 카드에 대한 정보입니다:
+        {context}
+        
+        위 정보를 바탕으로 사용자 소비 패턴 요약, 추천 카드 목록(카드명, 카드사, 추천 이유, 주요 혜택),
+        종합 추천 의견을 작성해주세요. 설명은 친절한 대화체로 작성하되, 반드시 아래 형식을 지켜주세요.
+        {format_instructions}
+        """
+        
+        # 메시지 템플릿 생성 
+        system_message_prompt = SystemMessagePromptTemplate.from_template(system_template)
+        human_message_prompt = HumanMessagePromptTemplate.from_template(human_template)
+        
+        return ChatPromptTemplate.from_messages([
+            system_message_prompt, 
+            human_message_prompt
+        ])
     
     def generate_response_with_llm(self, user_query: str, user_profile: Dict[str, Any], 
                                  recommendations: List[Dict[str, Any]],
@@ -869,61 +1572,23 @@ class CardRecommendationRAG:
             spending_insights: 소비 인사이트
             
         Returns:
-            str: LLM 응답 문자열
+            str: LLM 응답 문자열 (LLM 호출 실패 시 템플릿 응답)
         """
         try:
-            # 컨텍스트 준비 (LangChain 형식)
-            context = self.prepare_context_for_llm(user_profile, recommendations, spending_insights)
-            
-            # 시스템 프롬프트 템플릿
-            system_template = """
-            당신은 신용카드 추천 전문가입니다. 사용자의 질문에 대해 제공된 카드 정보를 기반으로 
-            정확하고 친절하게 답변해 주세요. 카드의 혜택을 명확히 설명하고, 사용자에게 가장 적합한 
-            카드를 추천해 주세요. 카드 정보는 신뢰할 수 있는 데이터베이스에서 가져온 것입니다.
-            
-            반드시 응답에 추천하는 카드의 이름, 카드사, 그리고 각 카드의 주요 혜택을 상세하게 포함시켜야 합니다.
-            혜택은 카테고리별로 구분하여 설명하고, 사용자의 소비 패턴과 관련된 혜택을 강조해 주세요.
-            
-            사용자의 질문을 분석하여 가장 적합한 카드를 먼저 추천하고, 그 이유를 설명해 주세요.
-            각 카드의 혜택을 명확히 표시하고, 사용자가 이해하기 쉽도록 구체적인 예시를 들어 설명해 주세요.
-            """
-            
-            # 사용자 프롬프트 템플릿
-            human_template = """
-            다음은 사용자의 질문입니다:
-            {query}
-            
-            다음은 사용자 정보와 추천 카드에 대한 정보입니다:
-            {context}
-            
-            응답 형식:
-            1. 사용자의 소비 패턴 요약
-            2. 추천 카드 목록 (각 카드마다):
-               - 카드명: [카드 이름]
-               - 카드사: [카드사 이름]
-               - 추천 이유: [사용자 특성에 맞는 추천 이유]
-               - 주요 혜택:
-                 * [혜택 카테고리1]: [혜택 설명1]
-                 * [혜택 카테고리2]: [혜택 설명2]
-                 * [혜택 카테고리3]: [혜택 설명3]
-            3. 종합 추천 의견
-            
-            위 정보를 바탕으로 사용자의 질문에 자연스럽게 답변해주세요.
-            답변은 친절하고 자연스러운 대화체로 작성해주세요.
-            """
-            
-            # 메시지 템플릿 생성 
-            system_message_prompt = SystemMessagePromptTemplate.from_template(system_template)
-            human_message_prompt = HumanMessagePromptTemplate.from_template(human_template)
-            
-            chat_prompt = ChatPromptTemplate.from_messages([
-                system_message_prompt, 
-                human_message_prompt
-            ])
+            with trace_span("prompt_build") as span:
+                # 컨텍스트 준비 (토큰 예산 내로 압축)
+                context = self.prepare_context_for_llm(
+                    user_profile, recommendations, spending_insights, user_query, span
+                )
+                
+                # 프롬프트 템플릿 구성
+                chat_prompt = self.build_llm_prompt()
             
             # 파이프라인 방식 사용
             chain = chat_prompt | self.llm
-            response = chain.invoke({"query": user_query, "context": context})
+            with trace_span("llm") as span:
+                response = self.llm_guard.call(chain.invoke, {"query": user_query, "context": context})
+                self._record_token_usage(response, span)
             
             # 응답 내용 추출
             response_text = response.content if hasattr(response, 'content') else str(response)
@@ -932,44 +1597,338 @@ class CardRecommendationRAG:
             
         except Exception as e:
             print(f"LLM 응답 생성 중 오류 발생: {str(e)}")
-            return f"죄송합니다. 응답 생성 중 오류가 발생했습니다. 다시 질문해 주세요."
+            return self.degraded_response_text(e, user_query, user_profile, recommendations, spending_insights)
+    
+    def degraded_response_text(self, error: Exception, user_query: str, user_profile: Dict[str, Any],
+                               recommendations: List[Dict[str, Any]],
+                               spending_insights: Dict[str, Any] = None) -> str:
+        """
+        LLM 호출 실패 시 대체 응답 (템플릿 응답, 템플릿 생성도 실패하면 오류 메시지)
+        
+        Args:
+            error: LLM 호출 중 발생한 예외
+            user_query: 사용자 질문
+            user_profile: 사용자 프로필 정보
+            recommendations: 추천 카드 목록
+            spending_insights: 소비 인사이트
             
-    def process_user_query(self, user_id: str, user_query: str) -> str:
+        Returns:
+            str: 대체 응답 문자열
+        """
+        try:
+            return format_response_text(self.degraded_response(
+                error, user_query, user_profile, recommendations, spending_insights
+            ))
+        except Exception as e:
+            print(f"템플릿 응답 생성 중 오류 발생: {str(e)}")
+            return LLM_ERROR_MESSAGE
+    
+    def degraded_response(self, error: Exception, user_query: str, user_profile: Dict[str, Any],
+                          recommendations: List[Dict[str, Any]],
+                          spending_insights: Dict[str, Any] = None) -> CardRecommendationResponse:
+        """
+        LLM 호출 실패 시 템플릿 구조화 응답 생성 (실패 원인별 메트릭 기록)
+        
+        Args:
+            error: LLM 호출 중 발생한 예외
+            user_query: 사용자 질문
+            user_profile: 사용자 프로필 정보
+            recommendations: 추천 카드 목록
+            spending_insights: 소비 인사이트
+            
+        Returns:
+            CardRecommendationResponse: 템플릿 구조화 응답
+        """
+        if isinstance(error, CircuitOpenError):
+            reason = "circuit_open"
+        elif isinstance(error, LLMPoolExhausted):
+            reason = "pool_exhausted"
+        elif isinstance(error, LLMDeadlineExceeded):
+            reason = "deadline"
+        else:
+            reason = "error"
+        REGISTRY.inc("card_rec_llm_fallback_total", labels={"reason": reason})
+        return self.generate_templated_response(user_query, user_profile, recommendations, spending_insights)
+    
+    async def agenerate_structured_response(self, user_query: str, user_profile: Dict[str, Any],
+                                            recommendations: List[Dict[str, Any]],
+                                            spending_insights: Dict[str, Any] = None) -> CardRecommendationResponse:
+        """
+        LLM 비동기 호출로 CardRecommendationResponse 형식의 구조화 응답 생성 (API 서버용)
+        
+        Args:
+            user_query: 사용자 질문
+            user_profile: 사용자 프로필 정보
+            recommendations: 추천 카드 목록
+            spending_insights: 소비 인사이트
+            
+        Returns:
+            CardRecommendationResponse: 구조화된 추천 응답 (파싱 실패 시 예외 발생)
+        """
+        with trace_span("prompt_build") as span:
+            context = self.prepare_context_for_llm(
+                user_profile, recommendations, spending_insights, user_query, span
+            )
+            chat_prompt = self.build_llm_prompt(structured=True)
+            parser = PydanticOutputParser(pydantic_object=CardRecommendationResponse)
+        
+        with trace_span("llm") as span:
+            response = await self.llm_guard.acall((chat_prompt | self.llm).ainvoke, {
+                "query": user_query,
+                "context": context,
+                "format_instructions": parser.get_format_instructions()
+            })
+            self._record_token_usage(response, span)
+        
+        return parser.parse(response.content)
+    
+    async def astream_response(self, user_query: str, user_profile: Dict[str, Any],
+                               recommendations: List[Dict[str, Any]],
+                               spending_insights: Dict[str, Any] = None):
+        """
+        LLM 응답을 비동기 스트리밍으로 생성 (API 서버 스트리밍 응답용)
+        
+        Args:
+            user_query: 사용자 질문
+            user_profile: 사용자 프로필 정보
+            recommendations: 추천 카드 목록
+            spending_insights: 소비 인사이트
+            
+        Yields:
+            str: 응답 텍스트 조각
+        """
+        with trace_span("prompt_build") as span:
+            context = self.prepare_context_for_llm(
+                user_profile, recommendations, spending_insights, user_query, span
+            )
+            chat_prompt = self.build_llm_prompt()
+        
+        with trace_span("llm_stream"):
+            async for chunk in self.llm_guard.astream(
+                (chat_prompt | self.llm).astream, {"query": user_query, "context": context}
+            ):
+                if chunk.content:
+                    yield chunk.content
+            
+    def generate_templated_response(self, user_query: str, user_profile: Dict[str, Any],
+                                    recommendations: List[Dict[str, Any]],
+                                    spending_insights: Dict[str, Any] = None) -> CardRecommendationResponse:
+        """
+        LLM 호출 없이 추천 결과, 파싱된 혜택, 소비 인사이트로 구조화 응답 생성
+        
+        Args:
+            user_query: 사용자 질문 (혜택 관련도 계산용)
+            user_profile: 사용자 프로필 정보
+            recommendations: 추천 카드 목록
+            spending_insights: 소비 인사이트
+            
+        Returns:
+            CardRecommendationResponse: 구조화된 추천 응답
+        """
+        with trace_span("template_render"):
+            keywords = self.prompt_compactor.relevance_keywords(user_profile, spending_insights, user_query)
+            return render_templated_response(
+                user_profile, recommendations, spending_insights, self.parse_benefits, keywords
+            )
+    
+    def admit_llm(self, response_mode: Optional[str] = None) -> bool:
+        """
+        이번 요청에서 LLM 을 호출할지 결정
+        
+        True 를 반환하면 LLM 호출 슬롯을 획득한 상태이므로, 호출 구간을
+        반드시 self.llm_admission.slot() 으로 감싸 슬롯을 반환해야 합니다.
+        
+        Args:
+            response_mode: 요청별 응답 모드 (None 이면 기본 응답 모드)
+            
+        Returns:
+            bool: LLM 호출 여부 (False 이면 템플릿 응답 사용)
+        """
+        mode = response_mode or self.response_mode
+        if mode not in RESPONSE_MODES:
+            raise ValueError(f"지원하지 않는 응답 모드: {mode}")
+        
+        if mode == RESPONSE_MODE_TEMPLATE:
+            admitted = False
+        elif mode == RESPONSE_MODE_LLM:
+            self.llm_admission.acquire()
+            admitted = True
+        else:
+            admitted = self.llm_admission.try_acquire()
+        
+        REGISTRY.inc("card_rec_response_mode_total", labels={
+            "requested": mode, "served": RESPONSE_MODE_LLM if admitted else RESPONSE_MODE_TEMPLATE
+        })
+        return admitted
+    
+    def _record_token_usage(self, response, span):
+        """LLM 응답의 토큰 사용량을 메트릭과 스팬 속성에 기록"""
+        usage = getattr(response, 'usage_metadata', None) or {}
+        for kind, key in (("prompt", "input_tokens"), ("completion", "output_tokens")):
+            tokens = usage.get(key)
+            if tokens:
+                REGISTRY.inc("card_rec_llm_tokens_total", tokens, {"kind": kind})
+                span.set_attribute(f"{kind}_tokens", tokens)
+    
+    @pinned_catalog
+    def process_user_query(self, user_id: str, user_query: str, response_mode: Optional[str] = None,
+                           session: Optional[UserSession] = None) -> str:
         """
         사용자 질문 처리 및 추천 응답 생성
         
         Args:
             user_id: 사용자 ID
             user_query: 사용자 질문
+            response_mode: 요청별 응답 모드 (llm, template, auto / None 이면 기본 응답 모드)
+            session: 대화형 세션 (open_session, 있으면 질의와 무관한 조회 생략)
             
         Returns:
             str: 추천 응답 문자열
         """
-        try:
-            # 사용자 프로필 조회
-            user_profile = self.get_user_profile(user_id)
+        mode = response_mode or self.response_mode
+        with trace_request(), trace_span("process_user_query"):
+            REGISTRY.inc("card_rec_requests_total")
+            # 같은 요청이 처리 중이면 새로 계산하지 않고 그 결과를 함께 받음
+            return self._query_flight.do(
+                request_key(user_id, user_query) + (mode,), self._process_user_query,
+                user_id, user_query, mode, session
+            )
+    
+    @pinned_catalog
+    def open_session(self, user_id: str) -> Optional[UserSession]:
+        """
+        대화형 세션 조회 또는 생성 (프로필, 소비인사이트, 모델 추천을 한 번 조회해 고정)
+        
+        Args:
+            user_id: 사용자 ID
             
-            if not user_profile:
-                return "사용자 정보를 찾을 수 없습니다. 올바른 사용자 ID를 입력해주세요."
+        Returns:
+            UserSession: 세션 (사용자가 없으면 None)
+        """
+        session = self.sessions.get(user_id)
+        if session is not None:
+            return session
+        
+        with trace_span("user_profile"):
+            user_profile = self.get_user_profile(user_id)
+        if not user_profile:
+            return None
+        
+        with trace_span("spending_insights"):
+            spending_insights = self.extract_spending_insights(user_id) if len(user_id) > 20 else {}
+        with trace_span("model_recommendations"):
+            model_recommendations = self.get_model_recommendations(user_id)
+        
+        session = UserSession(user_id, user_profile, spending_insights, model_recommendations)
+        self.sessions.put(session)
+        return session
+    
+    @pinned_catalog
+    def prepare_recommendation_inputs(self, user_id: str, user_query: str, limit: int = 5,
+                                      filters: Optional[Dict[str, List[str]]] = None,
+                                      session: Optional[UserSession] = None) -> Dict[str, Any]:
+        """
+        LLM 호출 이전 단계 실행 (사용자 프로필, 소비인사이트, 추천 카드 조회)
+        
+        Args:
+            user_id: 사용자 ID
+            user_query: 사용자 질문
+            limit: 최대 추천 수
+            filters: 카드사/카드 타입 필터 (None 이면 query_filters 설정 시 질의에서 추출)
+            session: 대화형 세션 (있으면 고정된 프로필/소비인사이트/모델 추천 사용)
             
-            # 소비인사이트 추출 (새로운 트랜잭션 데이터 형식)
+        Returns:
+            Dict: user_profile, spending_insights, recommendations
+                  (사용자가 없으면 user_profile 이 빈 딕셔너리)
+        """
+        key = request_key(user_id, user_query) + (limit, filters_key(filters))
+        return self._inputs_flight.do(
+            key, self._prepare_recommendation_inputs, user_id, user_query, limit, filters, session
+        )
+    
+    def _prepare_recommendation_inputs(self, user_id: str, user_query: str, limit: int,
+                                       filters: Optional[Dict[str, List[str]]],
+                                       session: Optional[UserSession] = None) -> Dict[str, Any]:
+        """prepare_recommendation_inputs 본문 (동일 요청 병합 후 한 번만 실행)"""
+        if session is not None:
+            # 세션에 고정된 조회 결과 사용 (같은 질문이면 직전 추천 후보도 재사용)
+            session.turns += 1
+            key = request_key(user_id, user_query) + (limit, filters_key(filters))
+            recommendations = session.cached_recommendations(key)
+            if recommendations is None:
+                recommendations = self.get_top_n_recommendations(
+                    user_id, user_query, limit=limit, filters=filters,
+                    user_profile=session.user_profile,
+                    spending_insights=session.spending_insights,
+                    model_recommendations=session.model_recommendations
+                )
+                if not recommendations and not self.retriever:
+                    print("의미론적 검색 실패, 모델 기반 추천만 사용")
+                    recommendations = [rec.copy() for rec in session.model_recommendations[:limit]]
+                if recommendations:
+                    session.remember(key, recommendations)
+            return {
+                "user_profile": session.user_profile,
+                "spending_insights": session.spending_insights,
+                "recommendations": recommendations
+            }
+        
+        # 사용자 프로필 조회
+        with trace_span("user_profile"):
+            user_profile = self.get_user_profile(user_id)
+        
+        if not user_profile:
+            return {"user_profile": {}, "spending_insights": {}, "recommendations": []}
+        
+        # 소비인사이트 추출 (새로운 트랜잭션 데이터 형식)
+        with trace_span("spending_insights"):
             spending_insights = self.extract_spending_insights(user_id) if len(user_id) > 20 else {}
+        
+        # 추천 카드 조회 (이미 조회한 프로필/소비인사이트 전달)
+        recommendations = self.get_top_n_recommendations(
+            user_id, user_query, limit=limit, filters=filters,
+            user_profile=user_profile, spending_insights=spending_insights
+        )
+        
+        # 의미론적 검색 실패 시 모델 기반 추천만 사용
+        if not recommendations and not self.retriever:
+            print("의미론적 검색 실패, 모델 기반 추천만 사용")
+            recommendations = self.get_model_recommendations(user_id)[:limit]
+        
+        return {
+            "user_profile": user_profile,
+            "spending_insights": spending_insights,
+            "recommendations": recommendations
+        }
+    
+    def _process_user_query(self, user_id: str, user_query: str, response_mode: str,
+                            session: Optional[UserSession] = None) -> str:
+        """process_user_query 본문 (요청 단위 트레이스 내부에서 실행, 동일 요청 병합 후 한 번만 실행)"""
+        try:
+            # LLM 이전 단계 (프로필, 소비인사이트, 추천 카드)
+            inputs = self.prepare_recommendation_inputs(user_id, user_query, session=session)
             
-            # 추천 카드 조회 (최대 5개)
-            recommendations = self.get_top_n_recommendations(user_id, user_query, limit=5)
+            if not inputs["user_profile"]:
+                return USER_NOT_FOUND_MESSAGE
             
-            if not recommendations:
-                # 의미론적 검색 실패 시 모델 기반 추천만 사용
-                if not self.retriever:
-                    print("의미론적 검색 실패, 모델 기반 추천만 사용")
-                    recommendations = self.get_model_recommendations(user_id)[:5]
-                
-                # 그래도 추천 카드가 없는 경우
-                if not recommendations:
-                    return "죄송합니다. 조건에 맞는 추천 카드를 찾을 수 없습니다. 다른 조건으로 다시 시도해주세요."
+            if not inputs["recommendations"]:
+                return NO_RECOMMENDATION_MESSAGE
+            
+            # 제공할 추천 결과를 저장 큐에 추가 (응답 지연 없음)
+            if self.recommendation_writer:
+                self.recommendation_writer.submit(user_id, inputs["recommendations"])
+            
+            # LLM 호출이 허용되지 않으면 (template 모드, auto 모드의 동시 호출/지연시간 초과) 템플릿 응답
+            if not self.admit_llm(response_mode):
+                return format_response_text(self.generate_templated_response(
+                    user_query, inputs["user_profile"], inputs["recommendations"], inputs["spending_insights"]
+                ))
             
             # LangChain LLM을 사용한 응답 생성
-            response = self.generate_response_with_llm(user_query, user_profile, recommendations, spending_insights)
+            with self.llm_admission.slot():
+                response = self.generate_response_with_llm(
+                    user_query, inputs["user_profile"], inputs["recommendations"], inputs["spending_insights"]
+                )
             
             return response
             
@@ -990,12 +1949,13 @@ class CardRecommendationRAG:
                 print("서비스를 종료합니다. 감사합니다.")
                 break
             
-            # 사용자 ID 확인
-            profile = self.get_user_profile(user_id)
-            if not profile:
+            # 사용자 ID 확인 (프로필, 소비인사이트, 모델 추천을 세션에 고정)
+            session = self.open_session(user_id)
+            if session is None:
                 print("존재하지 않는 사용자 ID입니다. 다시 시도해주세요.")
                 continue
             
+            profile = session.user_profile
             print(f"\n{profile.get('성별', '')} {profile.get('연령대', '')} 사용자님, 어떤 카드를 찾고 계신가요?")
             
             while True:
@@ -1004,8 +1964,9 @@ class CardRecommendationRAG:
                 if user_query.lower() == 'back':
                     break
                 
-                # 추천 응답 생성
-                response = self.process_user_query(user_id, user_query)
+                # 추천 응답 생성 (세션이 만료되었으면 다시 조회)
+                session = self.open_session(user_id) or session
+                response = self.process_user_query(user_id, user_query, session=session)
                 
                 print("\n=== 추천 결과 ===")
                 print(response)
@@ -1015,35 +1976,33 @@ class CardRecommendationRAG:
         """
         추천 결과를 데이터베이스에 저장
         
+        write-behind 저장기가 설정되어 있으면 큐에 추가만 하고 즉시 반환합니다.
+        
         Args:
             user_id: 사용자 ID
             recommendations: 추천 카드 목록
             
         Returns:
-            bool: 저장 성공 여부
+            bool: 저장 성공 여부 (write-behind 사용 시 큐 추가 성공 여부)
         """
+        if self.recommendation_writer:
+            return self.recommendation_writer.submit(user_id, recommendations)
+        
         try:
             # MySQL 연결
-            connection = mysql.connector.connect(**self.mysql_config)
+            connection = self._get_connection()
             cursor = connection.cursor()
             
             # 이전 추천 데이터 삭제
-            delete_query = "DELETE FROM user_recommendations WHERE user_id = %s"
-            cursor.execute(delete_query, (user_id,))
+            cursor.execute(DELETE_USER_RECOMMENDATIONS_QUERY, (user_id,))
             
             # 추천 데이터 저장
-            insert_query = """
-            INSERT INTO user_recommendations 
-            (user_id, card_id, recommendation_score, recommendation_reason, created_at) 
-            VALUES (%s, %s, %s, %s, NOW())
-            """
-            
             for rec in recommendations:
                 card_id = rec.get('card_id', '')
                 score = rec.get('recommendation_score', 0)
                 reason = rec.get('recommendation_reason', '')
                 
-                cursor.execute(insert_query, (user_id, card_id, score, reason))
+                cursor.execute(INSERT_USER_RECOMMENDATION_QUERY, (user_id, card_id, score, reason))
             
             # 변경사항 저장
             connection.commit()
@@ -1058,6 +2017,7 @@ class CardRecommendationRAG:
             print(f"추천 결과 저장 중 오류 발생: {str(e)}")
             return False
     
+    @pinned_catalog
     def get_card_details(self, card_id: str) -> Dict[str, Any]:
         """
         특정 카드의 상세 정보 조회
@@ -1069,17 +2029,20 @@ class CardRecommendationRAG:
             Dict: 카드 상세 정보
         """
         try:
-            # 카드 데이터에서 검색
-            card_data = self.cards_df[self.cards_df['card_id'] == card_id]
-            
-            if not card_data.empty:
-                return card_data.iloc[0].to_dict()
-            else:
-                return {}
+            # 카드 텍스트 저장소에서 조회
+            return self.card_store.details(card_id) or {}
                 
         except Exception as e:
             print(f"카드 상세 정보 조회 중 오류 발생: {str(e)}")
             return {}
+    
+    def close(self):
+        """백그라운드 작업 종료 (카탈로그 갱신 중지, 저장 대기 중인 추천 결과 플러시)"""
+        if self.catalog_refresher:
+            self.catalog_refresher.close()
+        if self.recommendation_writer:
+            self.recommendation_writer.close()
+        self.llm_guard.close()
 
 
 # 메인 실행 코드
@@ -1094,8 +2057,44 @@ if __name__ == "__main__":
 }
 
     
+    # 관측 설정: 메트릭 엔드포인트 / JSON 트레이스 로그 (환경 변수로 선택)
+    if os.getenv("CARD_REC_METRICS_PORT"):
+        start_metrics_server(int(os.getenv("CARD_REC_METRICS_PORT")))
+    configure_trace_log(os.getenv("CARD_REC_TRACE_LOG"))
+    
+    # 제공된 추천 결과 write-behind 저장기
+    recommendation_writer = RecommendationWriteBehind(mysql_config)
+    
+    # 사용자 피처 스토어 (로더가 생성한 경우에만 사용)
+    feature_store_dir = os.getenv("CARD_REC_FEATURE_STORE_DIR")
+    feature_store = UserFeatureStore(feature_store_dir) if feature_store_dir else None
+    
     # 추천 시스템 초기화
-    recommendation_system = CardRecommendationRAG(mysql_config)
+    recommendation_system = CardRecommendationRAG(
+        mysql_config,
+        recommendation_writer=recommendation_writer,
+        feature_store=feature_store,
+        context_token_budget=int(os.getenv("CARD_REC_CONTEXT_TOKEN_BUDGET", DEFAULT_CONTEXT_TOKEN_BUDGET)),
+        response_mode=os.getenv("CARD_REC_RESPONSE_MODE", RESPONSE_MODE_AUTO),
+        llm_guard=LLMGuard(deadline=float(os.getenv("CARD_REC_LLM_DEADLINE", DEFAULT_LLM_DEADLINE))),
+        retrieval_mode=os.getenv("CARD_REC_RETRIEVAL_MODE", RETRIEVAL_HYBRID),
+        query_filters=os.getenv("CARD_REC_QUERY_FILTERS", "0") == "1",
+        index_reduction=os.getenv("CARD_REC_INDEX_REDUCTION", REDUCTION_NONE),
+        index_dim=int(os.getenv("CARD_REC_INDEX_DIM", DEFAULT_REDUCED_DIM)),
+        index_type=os.getenv("CARD_REC_INDEX_TYPE", INDEX_FLAT),
+        index_granularity=os.getenv("CARD_REC_INDEX_GRANULARITY", GRANULARITY_CARD),
+        chunk_aggregation=os.getenv("CARD_REC_CHUNK_AGGREGATION", AGGREGATE_MAX),
+        session_ttl=float(os.getenv("CARD_REC_SESSION_TTL", DEFAULT_SESSION_TTL)),
+        catalog_refresh_interval=float(os.getenv("CARD_REC_CATALOG_REFRESH", DEFAULT_CATALOG_REFRESH_INTERVAL)),
+        index_params={
+            key: int(os.environ[env])
+            for key, env in (("nprobe", "CARD_REC_INDEX_NPROBE"), ("ef_search", "CARD_REC_INDEX_EF_SEARCH"))
+            if env in os.environ
+        }
+    )
     
-    # CLI 서비스 실행
-    recommendation_system.run_recommendation_service()
\ No newline at end of file
+    try:
+        # CLI 서비스 실행
+        recommendation_system.run_recommendation_service()
+    finally:
+        recommendation_system.close()
\ No newline at end of file
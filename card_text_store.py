@@ -0,0 +1,137 @@
+"""
+카드 텍스트 단일 저장소 모듈.
+
+카드 혜택/상세 혜택 텍스트는 카드고릴라 크롤링 데이터라 길고, 이전에는 cards_df, 카드
+Document 의 page_content(이어 붙인 새 문자열), 메타데이터, FAISS docstore(캐시 pickle 로드 시
+별도 사본)에 여러 번 저장되어 워커 메모리의 대부분을 차지했습니다.
+
+- CardTextStore: cards_df 의 열을 참조만 하는 카드 위치 기준 저장소. 카드 ID -> 위치 조회,
+  카드 상세(dict), 검색용 텍스트와 Document 를 필요할 때 생성합니다 (텍스트 사본을 보관하지 않음).
+- build_id_vector_store: 텍스트를 배치로 임베딩하고 docstore 에는 빈 본문과 카드 ID(및 청크
+  번호)만 저장하는 FAISS 벡터 저장소. 검색 결과는 카드 ID 로 저장소에서 조회합니다.
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+from langchain.schema import Document
+from langchain_community.vectorstores import FAISS
+
+# docstore 저장 방식 (인덱스 설정 파일에 기록, 본문을 저장하던 이전 캐시는 다시 생성)
+DOCSTORE_IDS_ONLY = "ids"
+
+# 벡터 저장소 생성 시 한 번에 임베딩할 텍스트 수
+DEFAULT_EMBED_BATCH_SIZE = 256
+
+# 카드 메타데이터 필드
+METADATA_FIELDS = ("card_id", "card_name", "corporate_name", "card_type",
+                   "benefits", "detailed_benefits", "image_url")
+
+
+class CardTextStore:
+    def __init__(self, cards_df: pd.DataFrame):
+        """
+        카드 위치(cards_df 행 순서) 기준 카드 텍스트 저장소
+
+        Args:
+            cards_df: 카드 데이터 (열 값은 복사하지 않고 참조)
+        """
+        self.frame = cards_df
+        self.columns = list(cards_df.columns)
+        # 열별 값 목록 (object 열의 문자열은 cards_df 와 같은 객체를 참조)
+        self._values = {column: cards_df[column].tolist() for column in self.columns}
+        self.card_ids = self._values.get('card_id', [])
+        self._positions = {card_id: pos for pos, card_id in enumerate(self.card_ids)}
+
+    def __len__(self) -> int:
+        return len(self.card_ids)
+
+    def __iter__(self) -> Iterator[Document]:
+        """카드 Document 를 하나씩 생성 (청크 문서 생성 등 일회성 순회용)"""
+        for pos in range(len(self)):
+            yield self.document(pos)
+
+    def position(self, card_id: Any) -> Optional[int]:
+        """카드 ID 의 위치 (없으면 None)"""
+        return self._positions.get(card_id)
+
+    def details(self, card_id: Any) -> Optional[Dict[str, Any]]:
+        """
+        카드 상세 정보 (cards_df 의 한 행)
+
+        Args:
+            card_id: 카드 ID
+
+        Returns:
+            Dict: 열 이름 -> 값 (호출마다 새 dict, 카드가 없으면 None)
+        """
+        pos = self._positions.get(card_id)
+        if pos is None:
+            return None
+        return self.row(pos)
+
+    def row(self, pos: int) -> Dict[str, Any]:
+        """카드 위치의 상세 정보 (호출마다 새 dict)"""
+        return {column: values[pos] for column, values in self._values.items()}
+
+    def value(self, pos: int, column: str, default: Any = '') -> Any:
+        """카드 위치의 열 값 하나 (dict 생성 없이 조회)"""
+        values = self._values.get(column)
+        return values[pos] if values is not None else default
+
+    def metadata(self, pos: int) -> Dict[str, Any]:
+        """카드 메타데이터 (필터/청크 생성용, 호출마다 생성)"""
+        return {field: self.value(pos, field) for field in METADATA_FIELDS}
+
+    def page_content(self, pos: int) -> str:
+        """카드 검색용 텍스트 (임베딩/BM25 색인 시에만 생성)"""
+        card_text = f"카드명: {self.value(pos, 'card_name')}\n"
+        card_text += f"카드사: {self.value(pos, 'corporate_name')}\n"
+        card_text += f"카드 타입: {self.value(pos, 'card_type')}\n"
+        card_text += f"혜택: {self.value(pos, 'benefits')}\n"
+
+        # 카드고릴라 상세 정보가 있으면 추가
+        detailed_benefits = self.value(pos, 'detailed_benefits')
+        if detailed_benefits:
+            card_text += f"상세 혜택: {detailed_benefits}\n"
+        return card_text
+
+    def iter_texts(self) -> Iterator[str]:
+        """카드 순서대로 검색용 텍스트 생성"""
+        for pos in range(len(self)):
+            yield self.page_content(pos)
+
+    def document(self, pos: int) -> Document:
+        """카드 LangChain Document (호출마다 생성)"""
+        return Document(page_content=self.page_content(pos), metadata=self.metadata(pos))
+
+
+def build_id_vector_store(texts: Iterable[str], metadatas: List[Dict[str, Any]], embedding,
+                          batch_size: int = DEFAULT_EMBED_BATCH_SIZE) -> FAISS:
+    """
+    텍스트를 배치로 임베딩해 본문 없이 ID 메타데이터만 저장하는 FAISS 벡터 저장소 생성
+
+    Args:
+        texts: 임베딩할 텍스트 (metadatas 와 같은 순서, 배치 단위로만 메모리에 유지)
+        metadatas: 문서별 메타데이터 (card_id, 청크 색인은 chunk_no)
+        embedding: LangChain 임베딩 모델
+        batch_size: 한 번에 임베딩할 텍스트 수
+
+    Returns:
+        FAISS: 벡터 저장소 (docstore 문서의 page_content 는 빈 문자열)
+    """
+    embeddings = []
+    batch = []
+    for text in texts:
+        batch.append(text)
+        if len(batch) >= batch_size:
+            embeddings.extend(embedding.embed_documents(batch))
+            batch = []
+    if batch:
+        embeddings.extend(embedding.embed_documents(batch))
+
+    return FAISS.from_embeddings(
+        text_embeddings=[("", vector) for vector in embeddings],
+        embedding=embedding,
+        metadatas=metadatas
+    )
@@ -0,0 +1,95 @@
+"""
+카드 카탈로그 스냅샷 및 백그라운드 갱신 모듈.
+
+카드 데이터(cards_df), 카드 텍스트 저장소, BM25 어휘 색인, 카드사/카드 타입 필터,
+FAISS 벡터 저장소를 하나의 CatalogSnapshot 으로 묶습니다. 카탈로그가 바뀌면 새 스냅샷을
+요청 경로 밖(백그라운드 스레드)에서 모두 만든 뒤 참조 하나만 바꿔 교체(더블 버퍼링)하므로,
+처리 중인 요청은 시작할 때 고정한 이전 스냅샷으로 끝까지 일관된 결과를 계산합니다.
+
+cards / card_gorilla_data 테이블에는 수정 시각 컬럼이 없으므로 변경 감지는 카탈로그 내용
+지문(catalog_fingerprint: 행 해시의 순서 무관 SHA-1)으로 합니다.
+"""
+
+import hashlib
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from recommendation_metrics import REGISTRY
+
+# 카탈로그 변경 확인 주기 (초, 0 이하이면 백그라운드 갱신 사용 안 함)
+DEFAULT_CATALOG_REFRESH_INTERVAL = 0.0
+
+
+def catalog_fingerprint(cards_df: pd.DataFrame) -> str:
+    """
+    카탈로그 내용 지문 (행 순서와 무관)
+
+    Args:
+        cards_df: 카드 데이터 (cards + card_gorilla_data 병합 결과)
+
+    Returns:
+        str: SHA-1 16진수 문자열 (빈 카탈로그도 고정된 값)
+    """
+    digest = hashlib.sha1()
+    digest.update("\x1f".join(map(str, cards_df.columns)).encode("utf-8"))
+    if not cards_df.empty:
+        row_hashes = np.sort(pd.util.hash_pandas_object(cards_df.astype(str), index=False).to_numpy())
+        digest.update(row_hashes.tobytes())
+    return digest.hexdigest()
+
+
+class CatalogSnapshot:
+    __slots__ = ("cards_df", "card_store", "card_ids", "lexical_index",
+                 "card_filters", "vector_store", "retriever", "fingerprint", "loaded_at")
+
+    def __init__(self, cards_df: Optional[pd.DataFrame] = None, fingerprint: Optional[str] = None):
+        """
+        한 시점의 카드 카탈로그와 검색 색인 묶음 (교체 후에는 수정하지 않음)
+
+        Args:
+            cards_df: 카드 데이터
+            fingerprint: 카탈로그 내용 지문 (catalog_fingerprint)
+        """
+        self.cards_df = cards_df if cards_df is not None else pd.DataFrame()
+        self.card_store = None
+        self.card_ids: List[Any] = []
+        self.lexical_index = None
+        self.card_filters = None
+        self.vector_store = None
+        self.retriever = None
+        self.fingerprint = fingerprint
+        self.loaded_at = time.time()
+
+
+class CatalogRefresher:
+    def __init__(self, refresh: Callable[[], bool], interval: float):
+        """
+        카탈로그 변경 확인 및 스냅샷 교체 백그라운드 스레드
+
+        Args:
+            refresh: 변경 확인 및 교체 함수 (CardRecommendationRAG.reload_catalog, 교체하면 True)
+            interval: 확인 주기 (초)
+        """
+        self.refresh = refresh
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="catalog-refresher", daemon=True)
+        self._thread.start()
+
+    def close(self, timeout: float = 30.0):
+        """갱신 스레드 종료 (진행 중인 재생성은 끝날 때까지 최대 timeout 초 대기)"""
+        self._stop_event.set()
+        self._thread.join(timeout)
+
+    def _run(self):
+        """주기적 변경 확인 루프"""
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                REGISTRY.inc("card_rec_catalog_reloads_total", labels={"result": "failed"})
+                print(f"카드 카탈로그 갱신 중 오류 발생: {str(e)}")
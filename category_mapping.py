@@ -2,6 +2,8 @@ import os
 import pymysql
 from dotenv import load_dotenv
 
+from code_mappings import DEFAULT_CODE_LABELS, TRANSACTION_CODE_COLUMNS, category_id_offset
+
 # 환경 변수 로드
 load_dotenv()
 
@@ -48,94 +50,10 @@ def execute_many_query(connection, query, data_list):
     finally:
         cursor.close()  # 커서 닫기
 
-# 인코딩된 카테고리 값들에 대한 매핑 정의
+# 인코딩된 카테고리 값들에 대한 매핑 정의 (적재/추천과 같은 code_mappings.DEFAULT_CODE_LABELS)
 def create_category_mappings():
-    # TOP_SPENDING_CATEGORY_encoded 매핑
-    spending_category_mapping = {
-        1: "식품/마트",
-        2: "쇼핑",
-        3: "자동차",
-        4: "주유",
-        5: "공과금",
-        6: "통신비",
-        7: "의료/건강",
-        8: "여행/교통",
-        9: "문화/오락", 
-        10: "교육",
-        11: "카페/식당",
-        12: "유흥/오락",
-        13: "보험",
-        14: "금융",
-        15: "기타",
-        16: "가전/가구",
-        17: "뷰티/미용"
-    }
-    
-    # 연령대 매핑 (AGE_encoded)
-    age_mapping = {
-        0: "20대",
-        1: "30대",
-        2: "40대",
-        3: "50대",
-        4: "60대",
-        5: "70대 이상"
-    }
-    
-    # 성별 매핑 (SEX_CD_encoded)
-    gender_mapping = {
-        0: "여성",
-        1: "남성"
-    }
-    
-    # 회원등급 매핑 (MBR_RK_encoded)
-    member_rank_mapping = {
-        0: "최우수",
-        1: "우수",
-        2: "상위",
-        3: "중간",
-        4: "일반"
-    }
-    
-    # 생애주기 매핑 (LIFE_STAGE_encoded)
-    life_stage_mapping = {
-        8: "자영업",
-        9: "학생",
-        10: "직장인",
-        11: "주부",
-        12: "은퇴자"
-    }
-    
-    # 지역 매핑 (HOUS_SIDO_NM_encoded)
-    region_mapping = {
-        1: "서울",
-        2: "경기",
-        3: "인천",
-        4: "강원",
-        5: "충북",
-        6: "충남",
-        7: "대전",
-        8: "경북",
-        9: "경남",
-        10: "대구",
-        11: "울산",
-        12: "부산",
-        13: "전북",
-        14: "전남",
-        15: "광주",
-        16: "제주"
-    }
-    
-    # 모든 매핑을 하나의 딕셔너리로 통합
-    all_mappings = {
-        "소비카테고리": spending_category_mapping,
-        "연령대": age_mapping,
-        "성별": gender_mapping,
-        "회원등급": member_rank_mapping,
-        "생애주기": life_stage_mapping,
-        "지역": region_mapping
-    }
-    
-    return all_mappings
+    # 매핑 유형(소비카테고리, 연령대, 성별, 회원등급, 생애주기, 지역) -> 코드 -> 이름
+    return {mapping_type: dict(labels) for mapping_type, labels in DEFAULT_CODE_LABELS.items()}
 
 # 매핑 정보를 데이터베이스에 저장
 def save_category_mappings(connection, mappings):
@@ -153,66 +71,94 @@ def save_category_mappings(connection, mappings):
     
     # 각 매핑 유형별로 처리
     for mapping_type, mapping_values in mappings.items():
+        # 매핑 유형에 따라 카테고리 ID 프리픽스 추가 (겹치지 않게, 소비 카테고리는 원래 코드 사용)
+        offset = category_id_offset(mapping_type)
         for code, name in mapping_values.items():
-            # 매핑 유형에 따라 카테고리 ID 프리픽스 추가 (겹치지 않게)
-            if mapping_type == "소비카테고리":
-                category_id = code  # 소비 카테고리는 원래 코드 사용
-            elif mapping_type == "연령대":
-                category_id = 100 + code  # 100대 코드 사용
-            elif mapping_type == "성별":
-                category_id = 200 + code  # 200대 코드 사용
-            elif mapping_type == "회원등급":
-                category_id = 300 + code  # 300대 코드 사용
-            elif mapping_type == "생애주기":
-                category_id = 400 + code  # 400대 코드 사용
-            elif mapping_type == "지역":
-                category_id = 500 + code  # 500대 코드 사용
-            else:
-                category_id = 900 + code  # 기타는 900대 코드 사용
-            
-            mapping_data.append((category_id, name, mapping_type))
+            mapping_data.append((offset + code, name, mapping_type))
     
     # 매핑 데이터 일괄 삽입
     execute_many_query(connection, insert_query, mapping_data)
     print(f"카테고리 매핑 저장 완료: {len(mapping_data)}개 항목")
 
-# 트랜잭션 데이터의 카테고리 코드 검증
-def validate_category_codes(connection):
+# 코드 컬럼 검증 쿼리 (컬럼마다 category_mappings 와 LEFT JOIN 안티 조인, 테이블은 한 번만 스캔)
+def build_code_validation_query(sample_size=5):
+    select_parts = ["COUNT(*) AS total_rows"]
+    join_parts = []
+    params = []
+    for idx, (column, mapping_type) in enumerate(TRANSACTION_CODE_COLUMNS.items()):
+        alias = f"m{idx}"
+        # 매핑이 없는 코드 조건 (NULL 은 별도 집계)
+        missing = f"t.{column} IS NOT NULL AND {alias}.category_id IS NULL"
+        select_parts.extend([
+            f"SUM(t.{column} IS NULL)",
+            f"SUM({missing})",
+            f"GROUP_CONCAT(DISTINCT CASE WHEN {missing} THEN t.{column} END)",
+            f"SUBSTRING_INDEX(GROUP_CONCAT(CASE WHEN {missing} THEN t.seq_id END), ',', {int(sample_size)})",
+        ])
+        # category_id 가 기본 키라 행이 늘어나지 않음
+        join_parts.append(
+            f"LEFT JOIN category_mappings {alias} "
+            f"ON {alias}.category_type = %s AND {alias}.category_id = t.{column} + %s"
+        )
+        params.extend([mapping_type, category_id_offset(mapping_type)])
+    
+    select_clause = ",\n        ".join(select_parts)
+    join_clause = "\n    ".join(join_parts)
+    query = f"""
+    SELECT
+        {select_clause}
+    FROM user_transactions t
+    {join_clause}
+    """
+    return query, params
+
+# 트랜잭션 데이터의 카테고리 코드 검증 (모든 코드 컬럼을 한 번의 쿼리로 검증)
+def validate_category_codes(connection, sample_size=5):
     try:
-        # TOP_SPENDING_CATEGORY_encoded 값 확인
-        query = """
-        SELECT DISTINCT top_spending_category 
-        FROM user_transactions 
-        ORDER BY top_spending_category
-        """
-        
         cursor = connection.cursor()
-        cursor.execute(query)
-        categories = cursor.fetchall()
-        cursor.close()
         
-        print("\n트랜잭션 데이터에서 발견된 카테고리 코드:")
-        for cat in categories:
-            print(f"- 카테고리 코드: {cat[0]}")
+        # 매핑이 없으면 모든 코드가 매핑 없음으로 집계되므로 먼저 확인
+        cursor.execute("SELECT COUNT(*) FROM category_mappings")
+        if not cursor.fetchall()[0][0]:
+            cursor.close()
+            print("category_mappings 테이블이 비어 있습니다. 카테고리 매핑을 먼저 저장해주세요.")
+            return None
         
-        # 연령대 값 확인
-        query = """
-        SELECT DISTINCT age_group 
-        FROM user_transactions 
-        ORDER BY age_group
-        """
-        
-        cursor = connection.cursor()
-        cursor.execute(query)
-        ages = cursor.fetchall()
+        query, params = build_code_validation_query(sample_size)
+        cursor.execute(query, params)
+        row = cursor.fetchall()[0]
         cursor.close()
         
-        print("\n트랜잭션 데이터에서 발견된 연령대 코드:")
-        for age in ages:
-            print(f"- 연령대 코드: {age[0]}")
+        # 결과 한 행: 전체 행 수 + 컬럼별 (NULL 행, 매핑 없는 행, 매핑 없는 코드, 예시 seq_id)
+        total_rows = int(row[0] or 0)
+        results = []
+        for idx, (column, mapping_type) in enumerate(TRANSACTION_CODE_COLUMNS.items()):
+            null_rows, invalid_rows, invalid_codes, sample_seq_ids = row[1 + idx * 4:5 + idx * 4]
+            results.append({
+                "column": column,
+                "mapping_type": mapping_type,
+                "total_rows": total_rows,
+                "null_rows": int(null_rows or 0),
+                "invalid_rows": int(invalid_rows or 0),
+                "invalid_codes": sorted(invalid_codes.split(','), key=lambda code: float(code)) if invalid_codes else [],
+                "sample_seq_ids": sample_seq_ids.split(',') if sample_seq_ids else [],
+            })
+        
+        print("\n트랜잭션 데이터 코드 검증 결과 (category_mappings 기준):")
+        for result in results:
+            print(f"- {result['column']} ({result['mapping_type']}): 전체 {result['total_rows']}행, "
+                  f"매핑 없는 코드 {result['invalid_rows']}행, NULL {result['null_rows']}행")
+            if result["invalid_rows"]:
+                print(f"  매핑 없는 코드: {', '.join(result['invalid_codes'])}")
+                print(f"  예시 seq_id: {', '.join(result['sample_seq_ids'])}")
+        
+        invalid_total = sum(result["invalid_rows"] for result in results)
+        print(f"코드 검증 완료: 매핑 없는 코드 {invalid_total}건")
+        return results
         
     except Exception as e:
         print(f"카테고리 코드 검증 중 오류 발생: {str(e)}")
+        return None
 
 # 메인 함수
 def main():
@@ -221,9 +167,6 @@ def main():
     
     if connection:
         try:
-            # 카테고리 코드 검증 (옵션)
-            validate_category_codes(connection)
-            
             # 매핑 정의 가져오기
             mappings = create_category_mappings()
             
@@ -232,6 +175,9 @@ def main():
             
             print("카테고리 매핑 생성 및 저장 완료!")
             
+            # 저장한 매핑 기준으로 트랜잭션 데이터의 코드 검증
+            validate_category_codes(connection)
+            
         except Exception as e:
             print(f"매핑 처리 중 오류 발생: {str(e)}")
         finally:
@@ -0,0 +1,112 @@
+"""
+카드 혜택 청크 색인 모듈.
+
+카드당 문서 1개 방식은 카드명, 카드사, 혜택, 상세 혜택을 하나의 텍스트로 이어 붙여 임베딩하므로
+혜택이 많은 카드일수록 임베딩이 여러 혜택의 평균이 되어 특정 혜택 질의와의 유사도가 낮아집니다.
+청크 색인은 parse_benefits 로 나눈 혜택 항목마다 "카드명 + 카드사 + 혜택 1개" 문서를 만들어
+모두 색인하고, 검색 시 청크 결과를 카드 단위 점수로 집계합니다.
+
+- build_chunk_documents: 카드 Document 목록 -> 혜택별 청크 Document 목록 (metadata 에 card_id)
+- aggregate_chunk_scores: 청크 검색 결과(카드 위치, 유사도 배열)를 카드별 최대값(max) 또는
+  합계(sum)로 집계. 청크를 top_k 의 몇 배로 넉넉히 검색(oversample)해도 요청당 파이썬 반복 없이
+  numpy 배열 연산(ufunc.at / bincount / argpartition)만 사용합니다.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+import numpy as np
+from langchain.schema import Document
+
+# 청크 점수 집계 방식 (max: 가장 잘 맞는 혜택 1개, sum: 맞는 혜택이 많을수록 높은 점수)
+AGGREGATE_MAX = "max"
+AGGREGATE_SUM = "sum"
+CHUNK_AGGREGATIONS = (AGGREGATE_MAX, AGGREGATE_SUM)
+
+# 카드 top_k 대비 검색할 청크 수 배율
+DEFAULT_CHUNK_OVERSAMPLE = 5
+
+# 청크 텍스트에 함께 넣는 카드 식별 정보
+_HEADER_FIELDS = (("카드명", "card_name"), ("카드사", "corporate_name"), ("카드 타입", "card_type"))
+
+
+def benefit_chunks(metadata: Dict[str, Any],
+                   parse_benefits: Callable[[str], List[Dict[str, str]]]) -> List[str]:
+    """
+    카드 한 장의 혜택별 청크 텍스트
+
+    Args:
+        metadata: 카드 Document 메타데이터 (card_name, corporate_name, benefits, detailed_benefits 등)
+        parse_benefits: 혜택 문자열 파서 (CardRecommendationRAG.parse_benefits)
+
+    Returns:
+        List: 청크 텍스트 목록 (중복 혜택 제외, 혜택이 없으면 빈 목록)
+    """
+    header = "".join(f"{label}: {metadata.get(field, '')}\n" for label, field in _HEADER_FIELDS)
+
+    chunks = []
+    seen = set()
+    for field in ("benefits", "detailed_benefits"):
+        for benefit in parse_benefits(str(metadata.get(field, '') or '')):
+            category = benefit.get("category", "").strip()
+            description = benefit.get("description", "").strip()
+            text = f"{category}: {description}" if description else category
+            if text and text not in seen:
+                seen.add(text)
+                chunks.append(f"{header}혜택: {text}\n")
+    return chunks
+
+
+def build_chunk_documents(card_documents: Iterable[Document],
+                          parse_benefits: Callable[[str], List[Dict[str, str]]]) -> List[Document]:
+    """
+    카드 Document 목록을 혜택별 청크 Document 목록으로 변환
+
+    Args:
+        card_documents: 카드 Document 목록 (CardTextStore 를 순회해 하나씩 생성)
+        parse_benefits: 혜택 문자열 파서
+
+    Returns:
+        List: 청크 Document 목록 (혜택이 없는 카드는 카드 전체 텍스트 1개)
+    """
+    chunk_documents = []
+    for doc in card_documents:
+        chunks = benefit_chunks(doc.metadata, parse_benefits) or [doc.page_content]
+        for chunk_no, text in enumerate(chunks):
+            # 카드 ID 와 청크 번호만 유지 (카드 정보는 카드 텍스트 저장소에서 조회)
+            metadata = {'card_id': doc.metadata.get('card_id'), 'chunk_no': chunk_no}
+            chunk_documents.append(Document(page_content=text, metadata=metadata))
+    return chunk_documents
+
+
+def aggregate_chunk_scores(card_positions: np.ndarray, similarities: np.ndarray, n_cards: int,
+                           top_k: int, method: str = AGGREGATE_MAX) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    청크 검색 결과를 카드별 점수로 집계
+
+    Args:
+        card_positions: 청크가 속한 카드 위치 배열 (CardFilterIndex.search_positions 결과)
+        similarities: 청크 유사도 배열 (클수록 유사)
+        n_cards: 전체 카드 수
+        top_k: 반환할 최대 카드 수
+        method: 집계 방식 (max, sum)
+
+    Returns:
+        Tuple: (카드 위치 배열, 카드 점수 배열) (점수 내림차순, 최대 top_k 개)
+    """
+    if method not in CHUNK_AGGREGATIONS:
+        raise ValueError(f"지원하지 않는 청크 집계 방식: {method}")
+    if len(card_positions) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+    similarities = np.asarray(similarities, dtype=np.float64)
+    if method == AGGREGATE_SUM:
+        scores = np.bincount(card_positions, weights=similarities, minlength=n_cards)
+    else:
+        scores = np.zeros(n_cards, dtype=np.float64)
+        np.maximum.at(scores, card_positions, similarities)
+
+    hits = np.unique(card_positions)
+    if len(hits) > top_k:
+        hits = hits[np.argpartition(-scores[hits], top_k - 1)[:top_k]]
+    hits = hits[np.argsort(-scores[hits], kind="stable")]
+    return hits, scores[hits]
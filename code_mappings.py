@@ -0,0 +1,237 @@
+"""
+인코딩된 코드 -> 라벨 매핑 모듈.
+
+트랜잭션 데이터의 코드 값(연령대, 성별, 회원등급, 생애주기, 지역, 최고 지출 카테고리)을
+사람이 읽을 수 있는 값으로 바꾸는 매핑을 한 곳에서 정의하고, 적재(transaction_data_loader.py)와
+추천(profile_features.py, card_recommendation.py)이 같은 조회 테이블을 사용합니다.
+
+- DEFAULT_CODE_LABELS: category_mappings 테이블의 기본 내용 (category_mapping.py 가 저장)
+- 프로필 규칙 테이블: 연령대 -> 나이(프로필의 "N대"), 회원등급 -> 소득 수준, 생애주기 -> 직업
+- CodeTable: 코드를 배열 위치로 쓰는 조회 테이블. 행마다 dict 를 조회하지 않고 열 전체를
+  numpy take 한 번으로 변환하며, 범위 밖 코드/결측값은 마지막 칸의 기본값으로 변환합니다.
+- get_code_mappings: category_mappings 테이블을 프로세스당 한 번만 읽어 조회 테이블로 캐싱
+  (테이블이 없거나 비어 있으면 기본 매핑 사용)
+"""
+
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+# 소비 카테고리 (TOP_SPENDING_CATEGORY_encoded)
+SPENDING_CATEGORY = "소비카테고리"
+# 연령대 (AGE_encoded)
+AGE_GROUP = "연령대"
+# 성별 (SEX_CD_encoded)
+GENDER = "성별"
+# 회원등급 (MBR_RK_encoded)
+MEMBER_RANK = "회원등급"
+# 생애주기 (LIFE_STAGE_encoded)
+LIFE_STAGE = "생애주기"
+# 지역 (HOUS_SIDO_NM_encoded)
+REGION = "지역"
+
+# user_transactions 코드 컬럼 -> 매핑 유형 (category_mapping.validate_category_codes 검증 대상)
+TRANSACTION_CODE_COLUMNS = {
+    "age_group": AGE_GROUP,
+    "gender": GENDER,
+    "member_rank": MEMBER_RANK,
+    "region_code": REGION,
+    "life_stage": LIFE_STAGE,
+    "top_spending_category": SPENDING_CATEGORY,
+}
+
+# 매핑 유형별 category_mappings.category_id 프리픽스 (유형 간 코드가 겹치지 않게)
+CATEGORY_ID_OFFSETS = {
+    SPENDING_CATEGORY: 0,
+    AGE_GROUP: 100,
+    GENDER: 200,
+    MEMBER_RANK: 300,
+    LIFE_STAGE: 400,
+    REGION: 500,
+}
+# 그 외 유형의 프리픽스
+OTHER_CATEGORY_ID_OFFSET = 900
+
+# category_mappings 테이블 기본 내용
+DEFAULT_CODE_LABELS = {
+    SPENDING_CATEGORY: {
+        1: "식품/마트", 2: "쇼핑", 3: "자동차", 4: "주유", 5: "공과금",
+        6: "통신비", 7: "의료/건강", 8: "여행/교통", 9: "문화/오락",
+        10: "교육", 11: "카페/식당", 12: "유흥/오락", 13: "보험",
+        14: "금융", 15: "기타", 16: "가전/가구", 17: "뷰티/미용",
+    },
+    AGE_GROUP: {0: "20대", 1: "30대", 2: "40대", 3: "50대", 4: "60대", 5: "70대 이상"},
+    GENDER: {0: "여성", 1: "남성"},
+    MEMBER_RANK: {0: "최우수", 1: "우수", 2: "상위", 3: "중간", 4: "일반"},
+    LIFE_STAGE: {8: "자영업", 9: "학생", 10: "직장인", 11: "주부", 12: "은퇴자"},
+    REGION: {
+        1: "서울", 2: "경기", 3: "인천", 4: "강원", 5: "충북", 6: "충남", 7: "대전", 8: "경북",
+        9: "경남", 10: "대구", 11: "울산", 12: "부산", 13: "전북", 14: "전남", 15: "광주", 16: "제주",
+    },
+}
+
+# 매핑 유형별 없는 코드의 라벨
+DEFAULT_CODE_LABEL = {
+    SPENDING_CATEGORY: "기타",
+    GENDER: "여성",
+}
+
+# 연령대 코드 -> 나이 (매핑에 없으면 기본값)
+AGE_GROUP_TO_AGE = {0: 20, 1: 30, 2: 40, 3: 50, 4: 60, 5: 70}
+DEFAULT_AGE = 35
+
+# 회원등급 코드 -> 소득 수준 (0~2 상위, 3 중간, 그 외 낮음)
+MEMBER_RANK_TO_INCOME_LEVEL = {0: "상위", 1: "상위", 2: "상위", 3: "중간"}
+DEFAULT_INCOME_LEVEL = "낮음"
+
+# 생애주기 코드 -> 직업 (users 테이블 job_category)
+LIFE_STAGE_TO_JOB_CATEGORY = {8: "자영업", 9: "학생", 10: "직장인"}
+DEFAULT_LIFE_STAGE_JOB = "기타"
+
+# category_mappings 조회 쿼리
+CATEGORY_MAPPINGS_QUERY = """
+SELECT category_id, category_name, category_type
+FROM category_mappings
+"""
+
+
+class CodeTable:
+    def __init__(self, labels: Dict[int, Any], default: Any):
+        """
+        코드를 배열 위치로 쓰는 조회 테이블
+
+        Args:
+            labels: 코드(0 이상 정수) -> 값
+            default: 매핑에 없는 코드/결측값의 값
+        """
+        self.labels = dict(labels)
+        self.default = default
+        self.size = max(self.labels) + 1 if self.labels else 0
+
+        # 마지막 칸은 기본값 (범위 밖 코드를 이 위치로 보냄)
+        values = [default] * (self.size + 1)
+        for code, label in self.labels.items():
+            values[code] = label
+        numeric = all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in values)
+        self.values = np.array(values) if numeric else np.array(values, dtype=object)
+
+    def get(self, code: Any, default: Any = None) -> Any:
+        """코드 하나 변환 (온라인 경로의 단일 사용자 조회용)"""
+        if default is None:
+            default = self.default
+        try:
+            number = float(code)
+        except (TypeError, ValueError):
+            return default
+        return self.labels.get(int(number), default) if number.is_integer() else default
+
+    def positions(self, codes: Iterable[Any]) -> np.ndarray:
+        """코드 열 -> 조회 배열 위치 (범위 밖/결측값은 기본값 위치)"""
+        numbers = pd.to_numeric(pd.Series(codes), errors="coerce").to_numpy(dtype=float)
+        valid = (numbers >= 0) & (numbers < self.size) & (numbers == np.floor(numbers))
+        return np.where(valid, numbers, self.size).astype(np.intp)
+
+    def decode(self, codes: Iterable[Any]) -> np.ndarray:
+        """
+        코드 열 전체를 한 번에 변환
+
+        Args:
+            codes: 코드 값 (Series/배열/목록, 문자열 숫자와 NaN/None 허용)
+
+        Returns:
+            np.ndarray: 변환된 값 (codes 와 같은 길이)
+        """
+        return self.values.take(self.positions(codes))
+
+
+class CodeMappings:
+    def __init__(self, code_labels: Optional[Dict[str, Dict[int, str]]] = None):
+        """
+        매핑 유형별 조회 테이블 묶음
+
+        Args:
+            code_labels: 매핑 유형 -> (코드 -> 라벨) (기본값: DEFAULT_CODE_LABELS)
+        """
+        self.code_labels = code_labels or DEFAULT_CODE_LABELS
+        self.tables = {
+            mapping_type: CodeTable(labels, DEFAULT_CODE_LABEL.get(mapping_type))
+            for mapping_type, labels in self.code_labels.items()
+        }
+        for mapping_type, labels in DEFAULT_CODE_LABELS.items():
+            if mapping_type not in self.tables:
+                self.tables[mapping_type] = CodeTable(labels, DEFAULT_CODE_LABEL.get(mapping_type))
+
+        # 프로필 규칙 테이블 (category_mappings 에 없는 파생 값)
+        self.age = CodeTable(AGE_GROUP_TO_AGE, DEFAULT_AGE)
+        self.age_label = CodeTable({code: f"{age}대" for code, age in AGE_GROUP_TO_AGE.items()},
+                                   f"{DEFAULT_AGE}대")
+        self.income_level = CodeTable(MEMBER_RANK_TO_INCOME_LEVEL, DEFAULT_INCOME_LEVEL)
+        self.job_category = CodeTable(LIFE_STAGE_TO_JOB_CATEGORY, DEFAULT_LIFE_STAGE_JOB)
+
+    @property
+    def spending_category(self) -> CodeTable:
+        return self.tables[SPENDING_CATEGORY]
+
+    @property
+    def gender(self) -> CodeTable:
+        return self.tables[GENDER]
+
+
+def category_id_offset(mapping_type: str) -> int:
+    """매핑 유형의 category_id 프리픽스"""
+    return CATEGORY_ID_OFFSETS.get(mapping_type, OTHER_CATEGORY_ID_OFFSET)
+
+
+def load_code_mappings(connection) -> Optional[CodeMappings]:
+    """
+    category_mappings 테이블로 조회 테이블 생성
+
+    Args:
+        connection: MySQL 연결 (pymysql / mysql.connector)
+
+    Returns:
+        CodeMappings: 조회 테이블 (테이블이 비어 있으면 None)
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute(CATEGORY_MAPPINGS_QUERY)
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+
+    code_labels: Dict[str, Dict[int, str]] = {}
+    for category_id, category_name, category_type in rows:
+        code = int(category_id) - category_id_offset(category_type)
+        code_labels.setdefault(category_type, {})[code] = category_name
+    return CodeMappings(code_labels) if code_labels else None
+
+
+_default_mappings = CodeMappings()
+_loaded_mappings: Optional[CodeMappings] = None
+_load_lock = threading.Lock()
+
+
+def get_code_mappings(connection=None) -> CodeMappings:
+    """
+    프로세스 공용 조회 테이블 (연결이 주어진 첫 호출에서 category_mappings 를 한 번만 로드)
+
+    Args:
+        connection: MySQL 연결 (없으면 이미 로드한 매핑 또는 기본 매핑)
+
+    Returns:
+        CodeMappings: 조회 테이블 (로드 실패/빈 테이블이면 기본 매핑)
+    """
+    global _loaded_mappings
+    if _loaded_mappings is not None or connection is None:
+        return _loaded_mappings or _default_mappings
+
+    with _load_lock:
+        if _loaded_mappings is None:
+            try:
+                _loaded_mappings = load_code_mappings(connection) or _default_mappings
+            except Exception as e:
+                print(f"카테고리 매핑 로드 중 오류 발생: {str(e)}")
+                _loaded_mappings = _default_mappings
+    return _loaded_mappings
@@ -0,0 +1,224 @@
+"""
+사용자 소비 데이터 인메모리 컬럼형 피처 스토어.
+
+user_transactions 를 적재할 때 사용자별 금액/비율 컬럼을 연속된 NumPy 배열로 저장하고,
+온라인 경로는 MySQL 조회 없이 메모리 맵 파일에서 바로 프로필/소비 인사이트를 읽습니다.
+파일은 mmap 으로 열기 때문에 같은 서버의 여러 워커 프로세스가 OS 페이지 캐시를 공유합니다.
+
+디렉터리 구조:
+    {store_dir}/CURRENT              # 현재 버전 디렉터리 이름 (원자적으로 교체)
+    {store_dir}/v{타임스탬프}/
+        manifest.json                # 행 수, 컬럼 순서, 문자열 사전
+        user_ids.npy                 # 정렬된 seq_id (고정 길이 바이트) -> 행 위치
+        values.npy                   # float64 (행 수, 금액/비율 컬럼 수)
+        codes.npy                    # int32 (행 수, 문자열 컬럼 수), 사전 인덱스
+
+seq_id -> 행 위치 조회는 정렬된 키 배열에 대한 이진 탐색(np.searchsorted)으로 처리합니다.
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from profile_features import (
+    PROFILE_CACHE_COLUMNS,
+    profile_from_cache_row,
+    insights_from_cache_row,
+)
+
+# 문자열 컬럼 (사전 인코딩)과 숫자 컬럼 (float64)
+CODE_COLUMNS = ["age_label", "gender", "income_level", "job_category", "spending_pattern"]
+VALUE_COLUMNS = [col for col in PROFILE_CACHE_COLUMNS if col not in CODE_COLUMNS and col != "user_id"]
+
+# seq_id 최대 길이 (user_transactions.seq_id VARCHAR(50))
+USER_ID_BYTES = 50
+
+FORMAT_VERSION = 1
+CURRENT_FILE = "CURRENT"
+
+
+def write_feature_store(cache: pd.DataFrame, store_dir: str, keep_versions: int = 2) -> str:
+    """
+    프로필 캐시 DataFrame 을 새 버전의 피처 스토어로 저장하고 CURRENT 를 교체
+
+    Args:
+        cache: profile_features.build_profile_cache_frame 결과
+        store_dir: 피처 스토어 디렉터리
+        keep_versions: 남겨둘 이전 버전 수 (실행 중인 프로세스가 열고 있을 수 있음)
+
+    Returns:
+        str: 새 버전 디렉터리 경로
+    """
+    os.makedirs(store_dir, exist_ok=True)
+
+    # 정렬된 사용자 ID 순서로 배열 구성 (중복 ID는 마지막 행 사용)
+    cache = cache.drop_duplicates("user_id", keep="last")
+    user_ids = cache["user_id"].astype(str).str.encode("utf-8").to_numpy(dtype=f"S{USER_ID_BYTES}")
+    order = np.argsort(user_ids, kind="stable")
+
+    values = cache[VALUE_COLUMNS].to_numpy(dtype=np.float64)[order]
+    codes = np.empty((len(cache), len(CODE_COLUMNS)), dtype=np.int32)
+    vocabularies = {}
+    for i, col in enumerate(CODE_COLUMNS):
+        column_codes, vocabulary = pd.factorize(cache[col].fillna(""))
+        codes[:, i] = column_codes[order]
+        vocabularies[col] = [str(v) for v in vocabulary]
+
+    version = f"v{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+    tmp_dir = os.path.join(store_dir, f".{version}.tmp")
+    os.makedirs(tmp_dir)
+
+    np.save(os.path.join(tmp_dir, "user_ids.npy"), user_ids[order])
+    np.save(os.path.join(tmp_dir, "values.npy"), np.ascontiguousarray(values))
+    np.save(os.path.join(tmp_dir, "codes.npy"), codes)
+    with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "format_version": FORMAT_VERSION,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "rows": int(len(cache)),
+            "value_columns": VALUE_COLUMNS,
+            "code_columns": CODE_COLUMNS,
+            "vocabularies": vocabularies,
+        }, f, ensure_ascii=False)
+
+    # 버전 디렉터리 완성 후 CURRENT 를 원자적으로 교체
+    version_dir = os.path.join(store_dir, version)
+    os.rename(tmp_dir, version_dir)
+    pointer_tmp = os.path.join(store_dir, f".{CURRENT_FILE}.tmp")
+    with open(pointer_tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(pointer_tmp, os.path.join(store_dir, CURRENT_FILE))
+
+    # 오래된 버전 정리
+    versions = sorted(name for name in os.listdir(store_dir) if name.startswith("v"))
+    for name in versions[:-(keep_versions + 1)]:
+        shutil.rmtree(os.path.join(store_dir, name), ignore_errors=True)
+
+    return version_dir
+
+
+class _FeatureStoreVersion:
+    """메모리 맵으로 연 피처 스토어 버전 하나 (읽기 전용)"""
+
+    def __init__(self, version_dir: str):
+        with open(os.path.join(version_dir, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest["format_version"] != FORMAT_VERSION:
+            raise ValueError(f"지원하지 않는 피처 스토어 형식: {manifest['format_version']}")
+
+        self.name = os.path.basename(version_dir)
+        self.rows = manifest["rows"]
+        self.user_ids = np.load(os.path.join(version_dir, "user_ids.npy"), mmap_mode="r")
+        self.values = np.load(os.path.join(version_dir, "values.npy"), mmap_mode="r")
+        self.codes = np.load(os.path.join(version_dir, "codes.npy"), mmap_mode="r")
+        self.value_index = {col: i for i, col in enumerate(manifest["value_columns"])}
+        self.code_index = {col: i for i, col in enumerate(manifest["code_columns"])}
+        self.vocabularies = manifest["vocabularies"]
+
+    def find(self, user_id: str) -> int:
+        """seq_id 의 행 위치 (없으면 -1)"""
+        key = user_id.encode("utf-8")
+        if len(key) > USER_ID_BYTES:
+            return -1
+        pos = int(np.searchsorted(self.user_ids, key))
+        if pos < self.rows and self.user_ids[pos] == key:
+            return pos
+        return -1
+
+    def row(self, pos: int) -> Dict[str, Any]:
+        """행 위치의 값을 user_profile_cache 행 형식의 딕셔너리로 변환 (NaN -> None)"""
+        values = self.values[pos].tolist()
+        codes = self.codes[pos].tolist()
+        row = {"user_id": self.user_ids[pos].decode("utf-8")}
+        for col, i in self.value_index.items():
+            row[col] = None if values[i] != values[i] else values[i]
+        for col, i in self.code_index.items():
+            row[col] = self.vocabularies[col][codes[i]]
+        return row
+
+
+class UserFeatureStore:
+    def __init__(self, store_dir: str, check_interval: float = 5.0):
+        """
+        피처 스토어 읽기 전용 핸들 초기화
+
+        Args:
+            store_dir: 피처 스토어 디렉터리 (로더가 write_feature_store 로 갱신)
+            check_interval: 새 버전 확인 주기 (초)
+        """
+        self.store_dir = store_dir
+        self.check_interval = check_interval
+        self._version: Optional[_FeatureStoreVersion] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self) -> bool:
+        """
+        CURRENT 가 가리키는 버전이 바뀌었으면 새 버전을 열기
+
+        Returns:
+            bool: 새 버전으로 교체했는지 여부
+        """
+        with self._lock:
+            self._next_check = time.monotonic() + self.check_interval
+            try:
+                with open(os.path.join(self.store_dir, CURRENT_FILE), encoding="utf-8") as f:
+                    name = f.read().strip()
+            except FileNotFoundError:
+                return False
+
+            if self._version is not None and self._version.name == name:
+                return False
+
+            try:
+                # 읽는 중인 요청은 이전 버전 객체를 계속 사용 (참조 교체만 수행)
+                self._version = _FeatureStoreVersion(os.path.join(self.store_dir, name))
+                print(f"피처 스토어 로드 완료: {name} ({self._version.rows}명)")
+                return True
+            except Exception as e:
+                print(f"피처 스토어 로드 중 오류 발생: {str(e)}")
+                return False
+
+    def _current(self) -> Optional[_FeatureStoreVersion]:
+        if time.monotonic() >= self._next_check:
+            self.refresh()
+        return self._version
+
+    def get_row(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        사용자 행 조회
+
+        Args:
+            user_id: 사용자 seq_id
+
+        Returns:
+            Dict: user_profile_cache 행 형식 (없으면 None)
+        """
+        version = self._current()
+        if version is None:
+            return None
+        pos = version.find(user_id)
+        return version.row(pos) if pos >= 0 else None
+
+    def get_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """사용자 프로필 조회 (get_user_profile 결과 형식, 없으면 None)"""
+        row = self.get_row(user_id)
+        return profile_from_cache_row(row) if row is not None else None
+
+    def get_spending_insights(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """사용자 소비 인사이트 조회 (extract_spending_insights 결과 형식, 없으면 None)"""
+        row = self.get_row(user_id)
+        return insights_from_cache_row(row) if row is not None else None
+
+    @property
+    def rows(self) -> int:
+        """현재 버전의 사용자 수"""
+        return self._version.rows if self._version is not None else 0
@@ -0,0 +1,183 @@
+"""
+카드 텍스트 어휘(lexical) 검색 모듈.
+
+카드 혜택 텍스트는 "스타벅스", "GS25" 같은 가맹점 이름이 많은 한국어 문장이라
+영어 위주의 임베딩 모델(MiniLM)로는 잘 구분되지 않습니다. 카드 로드 시 카드 텍스트를
+단어 + 한글 글자 2-gram 단위로 나눈 BM25 역색인을 메모리에 만들어 두고,
+질의 임베딩 없이 가맹점/키워드 질의를 검색합니다.
+
+- 단어 토큰: 영문/숫자 단어(GS25, CGV)는 그대로, 한글 단어는 단어 전체와 글자 2-gram
+  ("스타벅스에서" -> 스타벅스에서, 스타, 타벅, 벅스, 스에, 에서)으로 색인해 조사가 붙어도 일치
+- BM25 가중치는 질의와 무관하므로 색인 시 용어별로 미리 계산하고, 검색은 가중치 합산만 수행
+- fuse_scores: 어휘 점수와 밀집(FAISS) 점수를 각각 최고점 1로 정규화한 뒤 가중 합산
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple, Iterable
+
+import numpy as np
+
+# 단어 토큰 (한글 / 영문·숫자 연속 구간)
+_WORD = re.compile(r"[가-힣]+|[0-9A-Za-z]+")
+_HANGUL = re.compile(r"[가-힣]")
+
+# 키워드형 질의로 판단하는 최대 단어 수 (예: "스타벅스", "GS25 편의점")
+KEYWORD_QUERY_MAX_WORDS = 2
+
+# 검색 방식
+RETRIEVAL_DENSE = "dense"
+RETRIEVAL_HYBRID = "hybrid"
+RETRIEVAL_LEXICAL = "lexical"
+RETRIEVAL_MODES = (RETRIEVAL_DENSE, RETRIEVAL_HYBRID, RETRIEVAL_LEXICAL)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    색인/검색용 용어 목록 (단어 + 한글 글자 2-gram, 영문은 소문자)
+
+    Args:
+        text: 대상 텍스트
+
+    Returns:
+        List: 용어 목록 (중복 포함)
+    """
+    terms = []
+    for word in _WORD.findall(text or ""):
+        if _HANGUL.match(word):
+            terms.append(word)
+            if len(word) > 2:
+                terms.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            terms.append(word.lower())
+    return terms
+
+
+def is_keyword_query(query: str) -> bool:
+    """
+    가맹점/키워드형 질의 여부 (어휘 검색만으로 충분한 짧은 질의)
+
+    Args:
+        query: 사용자 질문
+
+    Returns:
+        bool: 단어 수가 KEYWORD_QUERY_MAX_WORDS 이하이면 True
+    """
+    words = _WORD.findall(query or "")
+    return 0 < len(words) <= KEYWORD_QUERY_MAX_WORDS
+
+
+class LexicalIndex:
+    def __init__(self, doc_ids: List[str], texts: List[str], k1: float = 1.2, b: float = 0.75):
+        """
+        BM25 역색인 생성
+
+        Args:
+            doc_ids: 문서 ID 목록 (카드 ID)
+            texts: 문서 텍스트 목록 (doc_ids 와 같은 순서)
+            k1: BM25 용어 빈도 포화 계수
+            b: BM25 문서 길이 정규화 계수
+        """
+        self.doc_ids = list(doc_ids)
+        doc_terms = [Counter(tokenize(text)) for text in texts]
+        lengths = np.array([sum(counts.values()) for counts in doc_terms], dtype=np.float64)
+        avg_length = lengths.mean() if len(lengths) and lengths.mean() > 0 else 1.0
+        n_docs = len(doc_terms)
+
+        postings = defaultdict(lambda: ([], []))
+        for pos, counts in enumerate(doc_terms):
+            for term, tf in counts.items():
+                docs, tfs = postings[term]
+                docs.append(pos)
+                tfs.append(tf)
+
+        # 용어 -> (문서 위치 배열, BM25 가중치 배열)
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for term, (docs, tfs) in postings.items():
+            docs = np.array(docs, dtype=np.int32)
+            tfs = np.array(tfs, dtype=np.float64)
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = k1 * (1 - b + b * lengths[docs] / avg_length)
+            self.postings[term] = (docs, idf * tfs * (k1 + 1) / (tfs + norm))
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def search(self, query: str, top_k: int = 10,
+               mask: Optional[np.ndarray] = None) -> List[Tuple[str, float]]:
+        """
+        BM25 검색
+
+        Args:
+            query: 검색 질의
+            top_k: 반환할 최대 문서 수
+            mask: 검색 대상 문서 bool 배열 (문서 순서, None 이면 전체)
+
+        Returns:
+            List: (문서 ID, BM25 점수) 목록 (점수 내림차순, 점수 0 인 문서 제외)
+        """
+        scores = np.zeros(len(self.doc_ids), dtype=np.float64)
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is not None:
+                scores[posting[0]] += posting[1]
+        if mask is not None:
+            scores[~mask] = 0.0
+
+        hits = np.flatnonzero(scores)
+        if len(hits) > top_k:
+            hits = hits[np.argpartition(-scores[hits], top_k - 1)[:top_k]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [(self.doc_ids[pos], float(scores[pos])) for pos in hits]
+
+
+def _normalize(scores: Dict[str, float]) -> Dict[str, float]:
+    top = max(scores.values(), default=0)
+    return {key: value / top for key, value in scores.items()} if top > 0 else {}
+
+
+def fuse_scores(lexical: Dict[str, float], dense: Dict[str, float],
+                lexical_weight: float = 0.5) -> List[Tuple[str, float]]:
+    """
+    어휘 점수와 밀집 점수 가중 합산
+
+    Args:
+        lexical: 문서 ID -> BM25 점수
+        dense: 문서 ID -> 밀집 유사도 (클수록 유사)
+        lexical_weight: 어휘 점수 가중치 (밀집 점수는 1 - lexical_weight)
+
+    Returns:
+        List: (문서 ID, 0~1 결합 점수) 목록 (점수 내림차순)
+    """
+    lexical = _normalize(lexical)
+    dense = _normalize(dense)
+    if not lexical:
+        lexical_weight = 0.0
+    elif not dense:
+        lexical_weight = 1.0
+
+    fused = {
+        key: lexical_weight * lexical.get(key, 0.0) + (1 - lexical_weight) * dense.get(key, 0.0)
+        for key in set(lexical) | set(dense)
+    }
+    return sorted(fused.items(), key=lambda x: (-x[1], str(x[0])))
+
+
+def build_lexical_index(documents: Iterable) -> LexicalIndex:
+    """
+    LangChain Document 목록으로 어휘 색인 생성 (metadata 의 card_id 를 문서 ID 로 사용)
+
+    Args:
+        documents: 카드 Document 목록 (CardTextStore 이면 텍스트를 하나씩 생성해 색인)
+
+    Returns:
+        LexicalIndex: BM25 역색인
+    """
+    if hasattr(documents, "iter_texts"):
+        return LexicalIndex(documents.card_ids, documents.iter_texts())
+    documents = list(documents)
+    return LexicalIndex(
+        [doc.metadata.get('card_id') for doc in documents],
+        [doc.page_content for doc in documents]
+    )
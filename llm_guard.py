@@ -0,0 +1,429 @@
+"""
+LLM 호출 보호 모듈 (호출 제한 시간, 헤지 요청, 서킷 브레이커).
+
+- 호출 제한 시간(deadline): 제한 시간 안에 응답이 없으면 LLMDeadlineExceeded 를 발생시켜
+  워커가 느린 업스트림을 무한정 기다리지 않도록 합니다.
+- 헤지 요청(hedging): 첫 요청이 최근 지연시간의 분위수(예: p95)를 넘도록 끝나지 않으면
+  같은 요청을 한 번 더 보내고 먼저 끝난 결과를 사용합니다 (비용이 늘어나므로 기본 비활성).
+- 서킷 브레이커: 연속 실패(제한 시간 초과, 오류, 느린 호출)가 기준을 넘으면 일정 시간 동안
+  LLM 호출을 즉시 거절(CircuitOpenError)해 호출자가 템플릿 응답으로 대신하도록 합니다.
+  대기 시간이 지나면 시험 호출 한 건으로 회복 여부를 확인합니다.
+- 동기 호출 스레드 풀: 제한 시간 초과로 포기한 호출이 모든 스레드를 점유하고 있으면 큐에서
+  기다리지 않고 즉시 LLMPoolExhausted 를 발생시킵니다 (대기 시간이 제한 시간에 포함되어
+  서킷 브레이커 실패로 계산되지 않도록).
+
+모든 동작은 card_rec_llm_* 메트릭으로 기록됩니다.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Optional
+
+from recommendation_metrics import REGISTRY
+
+# 서킷 브레이커 상태
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+# 기본 호출 제한 시간 (초)
+DEFAULT_LLM_DEADLINE = 30.0
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    """LLM 호출이 제한 시간 안에 끝나지 않음"""
+
+
+class CircuitOpenError(RuntimeError):
+    """서킷 브레이커가 열려 LLM 호출을 거절함"""
+
+
+class LLMPoolExhausted(RuntimeError):
+    """동기 호출 스레드가 모두 사용 중이라 LLM 호출을 거절함"""
+
+
+class LatencyWindow:
+    def __init__(self, size: int = 200):
+        """
+        최근 성공 호출 지연시간 기록 (헤지 기준 분위수 계산용)
+
+        Args:
+            size: 보관할 최근 지연시간 수
+        """
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, latency: float):
+        with self._lock:
+            self._samples.append(latency)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        지연시간 분위수
+
+        Args:
+            q: 분위수 (0~1)
+
+        Returns:
+            float: 분위수 지연시간 (기록이 없으면 None)
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5,
+                 slow_call_threshold: Optional[float] = None,
+                 reset_timeout: float = 30.0):
+        """
+        LLM 호출 서킷 브레이커 초기화
+
+        Args:
+            failure_threshold: 서킷을 여는 연속 실패 수
+            slow_call_threshold: 이 시간(초)보다 오래 걸린 성공 호출도 실패로 계산 (None 이면 미사용)
+            reset_timeout: 서킷을 연 뒤 시험 호출을 허용하기까지의 시간 (초)
+        """
+        self.failure_threshold = failure_threshold
+        self.slow_call_threshold = slow_call_threshold
+        self.reset_timeout = reset_timeout
+
+        self.state = CIRCUIT_CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def _transition(self, state: str):
+        if self.state != state:
+            self.state = state
+            REGISTRY.inc("card_rec_llm_circuit_transitions_total", labels={"state": state})
+            print(f"LLM 서킷 브레이커 상태 변경: {state}")
+
+    def allow(self) -> bool:
+        """
+        LLM 호출 허용 여부 (half-open 상태에서는 시험 호출 한 건만 허용)
+
+        Returns:
+            bool: 호출 허용 여부 (허용 시 record_success/record_failure 중 하나를 호출해야 함)
+        """
+        with self._lock:
+            if self.state == CIRCUIT_OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._transition(CIRCUIT_HALF_OPEN)
+
+            if self.state == CIRCUIT_HALF_OPEN:
+                if self._probe_in_flight:
+                    return False
+                self._probe_in_flight = True
+            return True
+
+    def record_success(self, latency: float):
+        """
+        성공 호출 기록 (slow_call_threshold 를 넘으면 실패로 계산)
+
+        Args:
+            latency: 호출 지연시간 (초)
+        """
+        if self.slow_call_threshold is not None and latency > self.slow_call_threshold:
+            REGISTRY.inc("card_rec_llm_slow_calls_total")
+            self.record_failure()
+            return
+
+        with self._lock:
+            self._probe_in_flight = False
+            self.consecutive_failures = 0
+            self._transition(CIRCUIT_CLOSED)
+
+    def abandon(self):
+        """결과를 알 수 없이 끝난 호출 (호출자 취소 등): 기록 없이 시험 호출 슬롯만 반환"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        """실패 호출 기록 (연속 실패가 기준을 넘거나 시험 호출이 실패하면 서킷을 엶)"""
+        with self._lock:
+            self._probe_in_flight = False
+            self.consecutive_failures += 1
+            if self.state == CIRCUIT_HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._transition(CIRCUIT_OPEN)
+
+
+class LLMGuard:
+    def __init__(self, deadline: float = DEFAULT_LLM_DEADLINE,
+                 hedge_quantile: Optional[float] = None,
+                 hedge_min_samples: int = 20,
+                 breaker: Optional[CircuitBreaker] = None,
+                 max_workers: int = 8):
+        """
+        LLM 호출 보호기 초기화
+
+        Args:
+            deadline: 호출 제한 시간 (초, 헤지 요청 포함 전체)
+            hedge_quantile: 첫 요청이 최근 지연시간의 이 분위수를 넘으면 헤지 요청 전송
+                            (예: 0.95, None 이면 헤지 요청 없음)
+            hedge_min_samples: 헤지 기준을 계산하기 위한 최소 지연시간 기록 수
+            breaker: 서킷 브레이커 (기본값: CircuitBreaker())
+            max_workers: 동기 호출을 실행할 스레드 수 (제한 시간 초과로 포기한 호출도 끝날 때까지 점유)
+        """
+        self.deadline = deadline
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = breaker or CircuitBreaker()
+        self.latencies = LatencyWindow()
+        self._executor = None
+        self._max_workers = max_workers
+        self._lock = threading.Lock()
+        # 실행 중인 동기 호출 수 제한 (포기한 호출도 끝날 때까지 슬롯 점유)
+        self._worker_slots = threading.BoundedSemaphore(max_workers)
+
+    def _hedge_delay(self) -> Optional[float]:
+        """헤지 요청을 보내기까지 기다릴 시간 (헤지 비활성 또는 기록 부족 시 None)"""
+        if self.hedge_quantile is None or len(self.latencies) < self.hedge_min_samples:
+            return None
+        return self.latencies.quantile(self.hedge_quantile)
+
+    def _admit(self):
+        if not self.breaker.allow():
+            REGISTRY.inc("card_rec_llm_circuit_rejected_total")
+            raise CircuitOpenError("LLM 서킷 브레이커가 열려 있습니다.")
+
+    def _succeeded(self, start: float):
+        latency = time.perf_counter() - start
+        self.latencies.add(latency)
+        self.breaker.record_success(latency)
+
+    def _failed(self, timed_out: bool = False):
+        REGISTRY.inc("card_rec_llm_timeouts_total" if timed_out else "card_rec_llm_errors_total")
+        self.breaker.record_failure()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers, thread_name_prefix="llm-call"
+                )
+            return self._executor
+
+    def _release_slot(self, future: Future):
+        """호출이 끝나거나 취소되면 스레드 슬롯 반환"""
+        self._worker_slots.release()
+
+    def _submit(self, executor: ThreadPoolExecutor, fn: Callable, *args, **kwargs) -> Optional[Future]:
+        """
+        빈 스레드가 있을 때만 호출 제출 (큐에서 기다리지 않으므로 제출 즉시 실행 시작)
+
+        Returns:
+            Future: 제출한 호출 (빈 스레드가 없으면 None)
+        """
+        if not self._worker_slots.acquire(blocking=False):
+            return None
+        try:
+            future = executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._worker_slots.release()
+            raise
+        future.add_done_callback(self._release_slot)
+        return future
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """
+        동기 LLM 호출 (제한 시간, 헤지 요청, 서킷 브레이커 적용)
+
+        Args:
+            fn: 호출할 함수 (예: chain.invoke)
+            *args, **kwargs: fn 인자
+
+        Returns:
+            fn 반환값 (헤지 요청 시 먼저 성공한 결과)
+
+        Raises:
+            CircuitOpenError: 서킷 브레이커가 열려 있음
+            LLMPoolExhausted: 동기 호출 스레드가 모두 사용 중
+            LLMDeadlineExceeded: 제한 시간 초과
+        """
+        self._admit()
+        futures = []
+        last_error = None
+        try:
+            executor = self._get_executor()
+            future = self._submit(executor, fn, *args, **kwargs)
+            if future is None:
+                REGISTRY.inc("card_rec_llm_pool_rejected_total")
+                raise LLMPoolExhausted(f"LLM 호출 스레드 {self._max_workers}개가 모두 사용 중입니다.")
+
+            # 제한 시간은 호출이 실제로 시작된 시점부터 계산
+            start = time.perf_counter()
+            end = start + self.deadline
+            futures.append(future)
+            hedge_delay = self._hedge_delay()
+            hedged = hedge_delay is None
+
+            while futures:
+                remaining = end - time.perf_counter()
+                if remaining <= 0:
+                    break
+                timeout = remaining if hedged else min(remaining, hedge_delay)
+                done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    futures.remove(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        last_error = e
+                        continue
+                    self._succeeded(start)
+                    return result
+
+                if not hedged and not done:
+                    # 첫 요청이 기준 분위수보다 오래 걸리면 같은 요청을 한 번 더 보냄 (빈 스레드가 있을 때만)
+                    hedged = True
+                    hedge = self._submit(executor, fn, *args, **kwargs)
+                    if hedge is not None:
+                        REGISTRY.inc("card_rec_llm_hedged_total")
+                        futures.append(hedge)
+                elif not hedged:
+                    hedged = True
+        except BaseException:
+            self.breaker.abandon()
+            raise
+        finally:
+            for future in futures:
+                future.cancel()
+
+        if futures or last_error is None:
+            self._failed(timed_out=True)
+            raise LLMDeadlineExceeded(f"LLM 호출이 {self.deadline}초 안에 끝나지 않았습니다.")
+
+        self._failed()
+        raise last_error
+
+    async def acall(self, coro_fn: Callable, *args, **kwargs):
+        """
+        비동기 LLM 호출 (제한 시간, 헤지 요청, 서킷 브레이커 적용)
+
+        Args:
+            coro_fn: 코루틴을 반환하는 함수 (예: chain.ainvoke)
+            *args, **kwargs: coro_fn 인자
+
+        Returns:
+            코루틴 결과 (헤지 요청 시 먼저 성공한 결과, 나머지 요청은 취소)
+
+        Raises:
+            CircuitOpenError: 서킷 브레이커가 열려 있음
+            LLMDeadlineExceeded: 제한 시간 초과
+        """
+        self._admit()
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        end = loop.time() + self.deadline
+
+        tasks = {asyncio.ensure_future(coro_fn(*args, **kwargs))}
+        hedge_delay = self._hedge_delay()
+        hedged = hedge_delay is None
+
+        last_error = None
+        try:
+            while tasks:
+                remaining = end - loop.time()
+                if remaining <= 0:
+                    break
+                timeout = remaining if hedged else min(remaining, hedge_delay)
+                done, tasks = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        continue
+                    self._succeeded(start)
+                    return task.result()
+
+                if not hedged and not done:
+                    hedged = True
+                    REGISTRY.inc("card_rec_llm_hedged_total")
+                    tasks.add(asyncio.ensure_future(coro_fn(*args, **kwargs)))
+                elif not hedged:
+                    hedged = True
+        except BaseException:
+            self.breaker.abandon()
+            raise
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        if tasks or last_error is None:
+            self._failed(timed_out=True)
+            raise LLMDeadlineExceeded(f"LLM 호출이 {self.deadline}초 안에 끝나지 않았습니다.")
+
+        self._failed()
+        raise last_error
+
+    async def astream(self, agen_fn: Callable, *args, **kwargs):
+        """
+        비동기 LLM 스트리밍 (서킷 브레이커, 첫 조각과 조각 간 간격에 제한 시간 적용)
+
+        스트리밍은 응답 길이에 따라 전체 시간이 달라지므로 첫 조각까지의 시간을 지연시간으로 기록하며,
+        이미 전송을 시작한 응답은 다시 보낼 수 없어 헤지 요청은 사용하지 않습니다.
+
+        Args:
+            agen_fn: 비동기 제너레이터를 반환하는 함수 (예: chain.astream)
+            *args, **kwargs: agen_fn 인자
+
+        Yields:
+            스트림 조각
+
+        Raises:
+            CircuitOpenError: 서킷 브레이커가 열려 있음
+            LLMDeadlineExceeded: 첫 조각 또는 다음 조각이 제한 시간 안에 오지 않음
+        """
+        self._admit()
+        start = time.perf_counter()
+        stream = agen_fn(*args, **kwargs).__aiter__()
+        first = True
+        finished = False
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), timeout=self.deadline)
+                except StopAsyncIteration:
+                    if first:
+                        self._succeeded(start)
+                    finished = True
+                    return
+                except asyncio.TimeoutError:
+                    finished = True
+                    self._failed(timed_out=True)
+                    raise LLMDeadlineExceeded(f"LLM 스트림이 {self.deadline}초 동안 응답하지 않았습니다.")
+                except Exception:
+                    finished = True
+                    self._failed()
+                    raise
+
+                if first:
+                    first = False
+                    self._succeeded(start)
+                yield chunk
+        finally:
+            if first and not finished:
+                self.breaker.abandon()
+            aclose = getattr(stream, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    def close(self):
+        """동기 호출 스레드 풀 종료 (진행 중인 호출은 기다리지 않음)"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
@@ -0,0 +1,21 @@
+-- 001: 온라인 추천 경로의 핫 쿼리용 복합(커버링) 인덱스 추가
+--
+-- create_tables.sql 에는 이미 포함되어 있으므로, 이 마이그레이션은
+-- 인덱스 추가 이전에 생성된 기존 데이터베이스에만 한 번 적용합니다.
+--   docker exec -i mysql-card-rec mysql -u${MYSQL_USER} -p${MYSQL_PASSWORD} ${MYSQL_DATABASE} < migrations/001_add_hot_query_indexes.sql
+-- 적용 후 scripts/check_query_plans.py 로 실행 계획을 확인하세요.
+
+-- get_model_recommendations: WHERE user_id = ? ORDER BY ranking LIMIT 20
+-- (card_id, score 까지 포함해 테이블 접근 없이 인덱스만으로 처리)
+ALTER TABLE recommendations
+  ADD INDEX idx_recommendations_user_ranking (user_id, ranking, card_id, score);
+
+-- get_user_profile: WHERE user_id = ? ORDER BY amount DESC
+ALTER TABLE consumption_patterns
+  ADD INDEX idx_consumption_patterns_user_amount (user_id, amount, category, frequency);
+
+-- save_recommendations_to_db: DELETE ... WHERE user_id = ?
+ALTER TABLE user_recommendations
+  ADD INDEX idx_user_recommendations_user_card (user_id, card_id);
+
+ANALYZE TABLE recommendations, consumption_patterns, user_recommendations;
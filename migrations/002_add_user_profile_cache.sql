@@ -0,0 +1,35 @@
+-- 002: 사용자 프로필 캐시 테이블 추가
+--
+-- get_user_profile / extract_spending_insights 가 요청마다 user_transactions 원시 행에서
+-- 계산하던 프로필 필드와 카테고리별 지출 금액/비율을 적재 시점에 미리 계산해 저장합니다.
+-- create_tables.sql 에는 이미 포함되어 있으므로 기존 데이터베이스에만 한 번 적용합니다.
+--   docker exec -i mysql-card-rec mysql -u${MYSQL_USER} -p${MYSQL_PASSWORD} ${MYSQL_DATABASE} < migrations/002_add_user_profile_cache.sql
+-- 적용 후 transaction_data_loader.py --profile-cache-only 로 캐시를 채우세요.
+-- (캐시 행이 없는 사용자는 온라인 경로가 기존 계산 방식으로 처리합니다)
+
+CREATE TABLE IF NOT EXISTS user_profile_cache (
+  user_id VARCHAR(50) PRIMARY KEY,
+  age_label VARCHAR(10),
+  gender VARCHAR(10),
+  income_level VARCHAR(20),
+  job_category VARCHAR(50),
+  spending_pattern VARCHAR(255),
+  total_usage_amount DECIMAL(10,2),
+  restaurant_amount DECIMAL(12,2),
+  restaurant_ratio DECIMAL(6,1),
+  clothing_amount DECIMAL(12,2),
+  clothing_ratio DECIMAL(6,1),
+  travel_amount DECIMAL(12,2),
+  travel_ratio DECIMAL(6,1),
+  grocery_amount DECIMAL(12,2),
+  grocery_ratio DECIMAL(6,1),
+  auto_amount DECIMAL(12,2),
+  auto_ratio DECIMAL(6,1),
+  hotel_amount DECIMAL(12,2),
+  hotel_ratio DECIMAL(6,1),
+  culture_amount DECIMAL(12,2),
+  culture_ratio DECIMAL(6,1),
+  home_amount DECIMAL(12,2),
+  home_ratio DECIMAL(6,1),
+  updated_at DATETIME
+);
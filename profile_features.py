@@ -0,0 +1,178 @@
+"""
+트랜잭션 데이터 기반 사용자 프로필/소비 인사이트 계산 모듈.
+
+user_transactions 원시 행을 사람이 읽을 수 있는 프로필 필드(연령대, 성별, 소득 수준,
+소비 패턴)와 8개 카테고리 지출 금액/비율로 변환합니다.
+
+- build_profile_cache_frame: 적재 시점에 전체 사용자를 pandas 로 한 번에 계산
+  (transaction_data_loader.py 가 user_profile_cache 테이블로 저장)
+- profile_from_cache_row / insights_from_cache_row: 온라인 경로에서 캐시 행 하나를
+  get_user_profile / extract_spending_insights 결과 형식으로 변환
+"""
+
+from typing import Dict, Any, List
+
+import numpy as np
+import pandas as pd
+
+from code_mappings import AGE_GROUP_TO_AGE, DEFAULT_AGE, CodeMappings, get_code_mappings
+
+# 트랜잭션 데이터에는 직업 정보가 없어 기본값 사용
+DEFAULT_JOB_CATEGORY = "직장인"
+
+# 유의미한 소비 카테고리가 없을 때의 소비 패턴
+DEFAULT_SPENDING_PATTERN = "일반적인 소비 습관"
+
+# 소비 인사이트 카테고리: (표시 이름, 캐시 컬럼 접두어, 원본 금액 컬럼)
+INSIGHT_CATEGORIES = [
+    ("외식/카페", "restaurant", ["restaurant_amount"]),
+    ("쇼핑/의류", "clothing", ["clothing_amount", "clothing_general_amount"]),
+    ("여행/교통", "travel", ["travel_amount", "travel_general_amount"]),
+    ("식료품", "grocery", ["grocery_amount"]),
+    ("자동차", "auto", ["auto_amount", "automaint_amount", "autosl_amount"]),
+    ("숙박", "hotel", ["hotel_amount"]),
+    ("문화/여가", "culture", ["culture_amount"]),
+    ("가정/인테리어", "home", ["interior_amount", "furniture_amount"]),
+]
+
+# 캐시 계산에 필요한 user_transactions 컬럼
+SOURCE_COLUMNS = [
+    "seq_id", "age_group", "gender", "member_rank", "total_usage_amount",
+    "restaurant_amount", "clothing_amount", "clothing_general_amount",
+    "travel_amount", "travel_general_amount", "grocery_amount",
+    "auto_amount", "automaint_amount", "autosl_amount", "hotel_amount",
+    "culture_amount", "interior_amount", "furniture_amount", "appliance_amount",
+]
+
+# user_profile_cache 테이블 컬럼 (저장 순서)
+PROFILE_CACHE_COLUMNS = [
+    "user_id", "age_label", "gender", "income_level", "job_category",
+    "spending_pattern", "total_usage_amount",
+] + [f"{key}_{kind}" for _, key, _ in INSIGHT_CATEGORIES for kind in ("amount", "ratio")]
+
+
+def build_profile_cache_frame(transactions: pd.DataFrame, mappings: CodeMappings = None) -> pd.DataFrame:
+    """
+    user_transactions 행을 user_profile_cache 행으로 일괄 변환
+
+    Args:
+        transactions: SOURCE_COLUMNS 를 포함하는 트랜잭션 DataFrame
+        mappings: 코드 조회 테이블 (기본값: get_code_mappings())
+
+    Returns:
+        pd.DataFrame: PROFILE_CACHE_COLUMNS 순서의 캐시 DataFrame
+    """
+    df = transactions
+    mappings = mappings or get_code_mappings()
+    amount = lambda col: pd.to_numeric(df[col], errors="coerce").astype(float)
+
+    cache = pd.DataFrame({"user_id": df["seq_id"].astype(str)})
+
+    # 인코딩된 값을 사람이 읽을 수 있는 형식으로 매핑 (열 단위 배열 조회)
+    cache["age_label"] = mappings.age_label.decode(df["age_group"])
+    cache["gender"] = mappings.gender.decode(df["gender"])
+    cache["income_level"] = mappings.income_level.decode(df["member_rank"])
+    cache["job_category"] = DEFAULT_JOB_CATEGORY
+
+    # 소비 패턴 분류 (USER_SPENDING_PATTERN_QUERY 의 CASE 3개와 동일한 규칙)
+    restaurant = amount("restaurant_amount")
+    clothing = amount("clothing_amount") + amount("clothing_general_amount")
+    home_goods = amount("furniture_amount") + amount("appliance_amount")
+    travel = amount("travel_amount") + amount("travel_general_amount")
+    auto = amount("auto_amount") + amount("automaint_amount")
+
+    parts = (
+        pd.Series(np.select([restaurant > 50, restaurant > 20], ["외식, ", "카페, "], default=""), index=df.index)
+        + np.select([clothing > 50, home_goods > 50], ["의류쇼핑, ", "가전/가구, "], default="")
+        + np.select([travel > 30, auto > 30], ["여행, ", "자동차, "], default="")
+    )
+    joined = parts.str[:-2]
+    cache["spending_pattern"] = np.where(
+        joined.str.len() > 0, joined + "을 중심으로 하는 소비 습관", DEFAULT_SPENDING_PATTERN
+    )
+
+    # 카테고리별 지출 금액과 총 지출 대비 비율 (총 지출이 0이면 1로 나눔)
+    total = amount("total_usage_amount")
+    cache["total_usage_amount"] = total
+    divisor = total.fillna(0).replace(0, 1)
+    for _, key, columns in INSIGHT_CATEGORIES:
+        category_amount = sum(amount(col).fillna(0) for col in columns)
+        cache[f"{key}_amount"] = category_amount.round(2)
+        cache[f"{key}_ratio"] = (category_amount / divisor * 100).round(1)
+
+    return cache[PROFILE_CACHE_COLUMNS]
+
+
+def cache_frame_to_rows(cache: pd.DataFrame) -> List[tuple]:
+    """캐시 DataFrame 을 DB 저장용 튜플 목록으로 변환 (NaN -> None, numpy 타입 -> 파이썬 타입)"""
+    values = cache.astype(object).where(cache.notna(), None)
+    return list(values.itertuples(index=False, name=None))
+
+
+def profile_from_cache_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    user_profile_cache 행을 get_user_profile 결과 형식으로 변환
+
+    Args:
+        row: user_profile_cache 행 (딕셔너리)
+
+    Returns:
+        Dict: 사용자 프로필 정보
+    """
+    return {
+        "user_id": row["user_id"],
+        "연령대": row["age_label"],
+        "성별": row["gender"],
+        "소득 수준": row["income_level"],
+        "직업": row["job_category"],
+        "소비 패턴": row["spending_pattern"],
+        "총 지출액": row["total_usage_amount"]
+    }
+
+
+def build_spending_insights(total, amounts: Dict[str, Any],
+                            ratios: Dict[str, Any] = None) -> Dict[str, Any]:
+    """
+    카테고리별 지출 금액으로 소비 인사이트 구성
+
+    Args:
+        total: 총 지출 (0으로 나누기 방지를 위해 0이면 1로 대체)
+        amounts: 캐시 컬럼 접두어 -> 지출 금액
+        ratios: 캐시 컬럼 접두어 -> 미리 계산된 비율 (없으면 계산)
+
+    Returns:
+        Dict: 총 지출, 주요 카테고리(상위 3개), 모든 카테고리
+    """
+    total = total or 1
+    insights = {}
+    for label, key, _ in INSIGHT_CATEGORIES:
+        insights[label] = {
+            "금액": amounts[key],
+            "비율": ratios[key] if ratios is not None else round(amounts[key] / total * 100, 1)
+        }
+
+    # 금액으로 정렬하고 상위 3개 카테고리 가져오기
+    top_categories = sorted(insights.items(), key=lambda x: x[1]["금액"], reverse=True)[:3]
+
+    return {
+        "총 지출": total,
+        "주요 카테고리": dict(top_categories),
+        "모든 카테고리": insights
+    }
+
+
+def insights_from_cache_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    user_profile_cache 행을 extract_spending_insights 결과 형식으로 변환
+
+    Args:
+        row: user_profile_cache 행 (딕셔너리)
+
+    Returns:
+        Dict: 소비 인사이트
+    """
+    return build_spending_insights(
+        row["total_usage_amount"],
+        {key: row[f"{key}_amount"] for _, key, _ in INSIGHT_CATEGORIES},
+        {key: row[f"{key}_ratio"] for _, key, _ in INSIGHT_CATEGORIES}
+    )
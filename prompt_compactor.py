@@ -0,0 +1,242 @@
+"""
+LLM 컨텍스트 압축 모듈.
+
+추천 카드 정보를 LLM 프롬프트에 넣기 전에
+- 응답에 필요 없는 필드(이미지 URL, 내부 점수 등)를 제외하고
+- 혜택/상세 혜택을 사용자의 주요 소비 카테고리와 질문과의 관련도 순으로 골라 자르고
+- 공백 없는 JSON 으로 직렬화한 뒤
+- 모델 토크나이저로 토큰 수를 세어 설정한 예산 안에 들어올 때까지 단계적으로 줄입니다.
+
+프롬프트 토큰 수가 곧 LLM 지연시간과 비용이므로 컨텍스트 크기를 일정하게 유지하는 것이 목적입니다.
+"""
+
+import json
+import re
+from typing import Dict, Any, List, Callable, Optional, Tuple
+
+# 기본 컨텍스트 토큰 예산 (프롬프트 템플릿 제외)
+DEFAULT_CONTEXT_TOKEN_BUDGET = 1200
+
+# 예산 초과 시 차례로 적용하는 압축 단계: (카드당 혜택 수, 상세 혜택 수, 항목당 최대 글자 수)
+COMPACTION_LEVELS = [
+    (5, 2, 80),
+    (4, 1, 60),
+    (3, 1, 40),
+    (2, 0, 30),
+    (1, 0, 20),
+]
+
+# 상세 혜택 문단 분리 기준
+_DETAIL_SPLIT = re.compile(r"[;\n]|(?<=[.다])\s+")
+
+# 질문 키워드 (2글자 이상 단어)와 단어 끝에서 제거할 조사
+_QUERY_TOKEN = re.compile(r"[0-9A-Za-z가-힣]{2,}")
+_JOSA_SUFFIXES = ("에서", "으로", "에게", "과", "와", "을", "를", "이", "가", "은", "는", "로", "에", "의", "도")
+
+# 모든 혜택에 공통으로 나타나 관련도 구분에 도움이 되지 않는 질문 단어
+_QUERY_STOPWORDS = {
+    "카드", "혜택", "추천", "추천해주세요", "추천해", "알려주세요", "알려줘", "좋은", "유용한",
+    "있나요", "사용할", "이용할", "할인", "할때", "때",
+}
+
+
+class TokenCounter:
+    def __init__(self, model_name: str = "gpt-3.5-turbo"):
+        """
+        모델 토크나이저 기반 토큰 수 계산기
+
+        tiktoken 을 사용할 수 없는 환경(미설치, 인코딩 파일 다운로드 불가)에서는
+        한글 1글자 ≈ 1토큰, 그 외 4글자 ≈ 1토큰으로 보수적으로 추정합니다.
+
+        Args:
+            model_name: 토크나이저를 선택할 모델 이름
+        """
+        self.model_name = model_name
+        self._encoding = None
+        try:
+            import tiktoken
+            try:
+                self._encoding = tiktoken.encoding_for_model(model_name)
+            except KeyError:
+                self._encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            print(f"토크나이저 로드 실패, 글자 수 기반 추정 사용: {str(e)}")
+
+    @property
+    def exact(self) -> bool:
+        """실제 토크나이저 사용 여부"""
+        return self._encoding is not None
+
+    def count(self, text: str) -> int:
+        """
+        텍스트 토큰 수 계산
+
+        Args:
+            text: 대상 텍스트
+
+        Returns:
+            int: 토큰 수 (추정 모드에서는 근사값)
+        """
+        if self._encoding is not None:
+            return len(self._encoding.encode(text))
+        non_ascii = sum(1 for ch in text if ord(ch) > 127)
+        return non_ascii + (len(text) - non_ascii + 3) // 4
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    """최대 글자 수로 자르기 (잘린 경우 말줄임표 추가)"""
+    text = " ".join(text.split())
+    return text if len(text) <= max_chars else text[:max_chars - 1] + "…"
+
+
+def _relevance(text: str, keywords: List[str]) -> int:
+    """텍스트에 포함된 관련 키워드 수"""
+    return sum(1 for keyword in keywords if keyword in text)
+
+
+def _top_relevant(items: List[str], keywords: List[str], limit: int) -> List[str]:
+    """관련도가 높은 순(같으면 원래 순서)으로 상위 항목 선택"""
+    if limit <= 0:
+        return []
+    ranked = sorted(enumerate(items), key=lambda x: (-_relevance(x[1], keywords), x[0]))
+    return [item for _, item in ranked[:limit]]
+
+
+class PromptCompactor:
+    def __init__(self, parse_benefits: Callable[[str], List[Dict[str, str]]],
+                 token_budget: int = DEFAULT_CONTEXT_TOKEN_BUDGET,
+                 model_name: str = "gpt-3.5-turbo",
+                 token_counter: Optional[TokenCounter] = None):
+        """
+        LLM 컨텍스트 압축기 초기화
+
+        Args:
+            parse_benefits: 혜택 문자열 파서 (CardRecommendationRAG.parse_benefits)
+            token_budget: 컨텍스트 최대 토큰 수
+            model_name: 토크나이저를 선택할 모델 이름
+            token_counter: 토큰 수 계산기 (기본값: model_name 기준으로 생성)
+        """
+        self.parse_benefits = parse_benefits
+        self.token_budget = token_budget
+        self.token_counter = token_counter or TokenCounter(model_name)
+
+    def relevance_keywords(self, user_profile: Dict[str, Any],
+                           spending_insights: Dict[str, Any] = None,
+                           user_query: str = "") -> List[str]:
+        """
+        혜택 관련도 계산용 키워드 (주요 소비 카테고리, 소비 패턴, 질문 단어)
+
+        Args:
+            user_profile: 사용자 프로필 정보
+            spending_insights: 소비 인사이트
+            user_query: 사용자 질문
+
+        Returns:
+            List: 중복 없는 키워드 목록
+        """
+        keywords = []
+        for category in (spending_insights or {}).get("주요 카테고리", {}):
+            keywords.extend(part for part in category.split("/") if part)
+
+        pattern = str(user_profile.get("소비 패턴", "")).replace("을 중심으로 하는 소비 습관", "")
+        for part in pattern.split(","):
+            part = re.sub(r"\(.*?\)", "", part).strip()
+            if part and part != "일반적인 소비 습관":
+                keywords.extend(p for p in part.split("/") if p)
+
+        for word in _QUERY_TOKEN.findall(user_query or ""):
+            for suffix in _JOSA_SUFFIXES:
+                if word.endswith(suffix) and len(word) - len(suffix) >= 2:
+                    word = word[:-len(suffix)]
+                    break
+            if word not in _QUERY_STOPWORDS:
+                keywords.append(word)
+        return list(dict.fromkeys(keywords))
+
+    def _user_info(self, user_profile: Dict[str, Any],
+                   spending_insights: Dict[str, Any] = None) -> Dict[str, Any]:
+        """사용자 프로필 요약 (user_id 제외, 금액은 소수 첫째 자리까지, 주요 카테고리는 비율만)"""
+        user_info = {
+            key: round(value, 1) if isinstance(value, float) else value
+            for key, value in user_profile.items() if key != 'user_id'
+        }
+        if spending_insights:
+            user_info["주요 소비 카테고리"] = {
+                category: f"{values.get('비율', 0)}%"
+                for category, values in spending_insights.get("주요 카테고리", {}).items()
+            }
+            total = spending_insights.get("총 지출", 0)
+            user_info["총 지출액"] = round(total, 1) if isinstance(total, float) else total
+        return user_info
+
+    def _card_info(self, rec: Dict[str, Any], keywords: List[str],
+                   max_benefits: int, max_details: int, max_chars: int) -> Dict[str, Any]:
+        """추천 카드 하나를 응답 작성에 필요한 필드만으로 요약"""
+        details = rec.get('details', {})
+
+        benefits = []
+        for benefit in self.parse_benefits(details.get('benefits', '')):
+            category = benefit.get('category', '')
+            description = benefit.get('description', '')
+            benefits.append(f"{category}: {description}" if description else category)
+
+        detail_segments = [
+            segment.strip() for segment in _DETAIL_SPLIT.split(details.get('detailed_benefits', '') or '')
+            if segment and segment.strip()
+        ]
+
+        card_info = {
+            "카드명": details.get('card_name', '이름 없음'),
+            "카드사": details.get('corporate_name', '정보 없음'),
+            "카드 타입": details.get('card_type', ''),
+            "추천 이유": _truncate(rec.get('recommendation_reason', ''), max_chars * 2),
+            "주요 혜택": [
+                _truncate(benefit, max_chars) for benefit in _top_relevant(benefits, keywords, max_benefits)
+            ],
+        }
+        selected_details = _top_relevant(detail_segments, keywords, max_details)
+        if selected_details:
+            card_info["상세 혜택"] = [_truncate(segment, max_chars) for segment in selected_details]
+        return card_info
+
+    def compact(self, user_profile: Dict[str, Any],
+                recommendations: List[Dict[str, Any]],
+                spending_insights: Dict[str, Any] = None,
+                user_query: str = "") -> Tuple[str, int]:
+        """
+        토큰 예산 안에 들어오는 LLM 컨텍스트 문자열 생성
+
+        압축 단계를 차례로 적용하고, 마지막 단계에서도 예산을 넘으면
+        순위가 낮은 카드부터 제외합니다 (최소 1장 유지).
+
+        Args:
+            user_profile: 사용자 프로필 정보
+            recommendations: 추천 카드 목록 (순위 순)
+            spending_insights: 소비 인사이트
+            user_query: 사용자 질문
+
+        Returns:
+            Tuple: (컨텍스트 JSON 문자열, 토큰 수)
+        """
+        keywords = self.relevance_keywords(user_profile, spending_insights, user_query)
+        user_info = self._user_info(user_profile, spending_insights)
+
+        def serialize(cards):
+            context = {"사용자_프로필": user_info, "추천_카드": cards}
+            text = json.dumps(context, ensure_ascii=False, separators=(",", ":"), default=str)
+            return text, self.token_counter.count(text)
+
+        for max_benefits, max_details, max_chars in COMPACTION_LEVELS:
+            cards = [
+                self._card_info(rec, keywords, max_benefits, max_details, max_chars)
+                for rec in recommendations
+            ]
+            text, tokens = serialize(cards)
+            if tokens <= self.token_budget:
+                return text, tokens
+
+        while len(cards) > 1 and tokens > self.token_budget:
+            cards = cards[:-1]
+            text, tokens = serialize(cards)
+
+        return text, tokens
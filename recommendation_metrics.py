@@ -0,0 +1,359 @@
+"""
+추천 경로 관측(트레이싱/메트릭) 모듈.
+
+- trace_span: 단계별 소요 시간을 히스토그램으로 기록하는 컨텍스트 매니저
+- MetricsRegistry: 카운터/히스토그램 저장소 및 Prometheus 텍스트 형식 출력
+- start_metrics_server: /metrics 엔드포인트를 제공하는 백그라운드 HTTP 서버
+- configure_trace_log: 스팬을 JSON 라인으로 기록하는 트레이스 로그 설정 (선택)
+- collect_spans: 블록 안에서 끝난 스팬의 단계별 소요 시간 수집 (벤치마크용)
+"""
+
+import json
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Tuple
+
+# 기본 지연시간 히스토그램 버킷 (초)
+DEFAULT_LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+# 단계별 소요 시간 히스토그램 이름
+STAGE_DURATION_METRIC = "card_rec_stage_duration_seconds"
+
+# 메트릭 설명 (Prometheus HELP)
+METRIC_HELP = {
+    STAGE_DURATION_METRIC: "추천 경로 단계별 소요 시간",
+    "card_rec_llm_tokens_total": "LLM 호출 토큰 수",
+    "card_rec_context_tokens_total": "압축 후 LLM 컨텍스트 토큰 수 (토크나이저 기준)",
+    "card_rec_requests_total": "사용자 질의 처리 요청 수",
+    "card_rec_http_rejected_total": "혼잡으로 거절된 HTTP 요청 수",
+    "card_rec_coalesced_total": "진행 중인 동일 요청의 결과를 공유한 요청 수",
+    "card_rec_llm_timeouts_total": "제한 시간 안에 끝나지 않은 LLM 호출 수",
+    "card_rec_llm_errors_total": "오류로 실패한 LLM 호출 수",
+    "card_rec_llm_slow_calls_total": "느린 호출 기준을 넘어 실패로 계산된 LLM 호출 수",
+    "card_rec_llm_hedged_total": "지연시간 분위수를 넘어 헤지 요청을 보낸 LLM 호출 수",
+    "card_rec_llm_circuit_rejected_total": "서킷 브레이커가 열려 거절된 LLM 호출 수",
+    "card_rec_llm_pool_rejected_total": "동기 호출 스레드가 모두 사용 중이라 거절된 LLM 호출 수",
+    "card_rec_llm_circuit_transitions_total": "LLM 서킷 브레이커 상태 변경 수",
+    "card_rec_llm_fallback_total": "LLM 실패로 템플릿 응답을 대신 제공한 수 (원인별)",
+    "card_rec_response_mode_total": "요청한 응답 모드(requested)별 실제 응답 방식(served: llm/template) 수",
+    "card_rec_writer_rows_total": "write-behind 저장기가 저장한 추천 행 수",
+    "card_rec_writer_dropped_total": "큐가 가득 차 버려진 추천 결과 수",
+    "card_rec_writer_failed_batches_total": "재시도/분할 후에도 저장하지 못한 추천 배치 수",
+}
+
+# 현재 요청의 트레이스 ID
+_current_trace_id: ContextVar[Optional[str]] = ContextVar("card_rec_trace_id", default=None)
+
+# 스팬 수집 목록 (collect_spans 블록 안에서만 설정)
+_span_collector: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("card_rec_span_collector", default=None)
+
+
+def _label_key(labels: Optional[Dict[str, Any]]) -> Tuple:
+    """라벨 딕셔너리를 정렬된 튜플 키로 변환"""
+    if not labels:
+        return ()
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape_label_value(value: str) -> str:
+    """Prometheus 라벨 값 이스케이프"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(label_key: Tuple, extra: Tuple = ()) -> str:
+    """Prometheus 라벨 문자열 생성"""
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label_value(v)}"' for k, v in pairs) + "}"
+
+
+class _Histogram:
+    """고정 버킷 히스토그램 (라벨 조합 하나에 대응)"""
+
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    def __init__(self, latency_buckets=DEFAULT_LATENCY_BUCKETS):
+        """
+        프로세스 내 메트릭 저장소 초기화
+
+        Args:
+            latency_buckets: 히스토그램 버킷 상한값 목록 (초)
+        """
+        self.latency_buckets = tuple(sorted(latency_buckets))
+        self._counters: Dict[str, Dict[Tuple, float]] = {}
+        self._histograms: Dict[str, Dict[Tuple, _Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, amount: float = 1, labels: Optional[Dict[str, Any]] = None):
+        """카운터 증가"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None):
+        """히스토그램에 관측값 기록"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(self.latency_buckets)
+            histogram.observe(value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        현재 메트릭 값을 JSON 직렬화 가능한 딕셔너리로 반환
+
+        Returns:
+            Dict: {"counters": {...}, "histograms": {...}}
+        """
+        with self._lock:
+            counters = {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in self._counters.items()
+            }
+            histograms = {
+                name: [
+                    {
+                        "labels": dict(key),
+                        "count": hist.count,
+                        "sum": hist.total,
+                        "buckets": dict(zip(map(str, hist.buckets), hist.counts)),
+                    }
+                    for key, hist in series.items()
+                ]
+                for name, series in self._histograms.items()
+            }
+        return {"counters": counters, "histograms": histograms}
+
+    def render_prometheus(self) -> str:
+        """Prometheus 텍스트 노출 형식으로 메트릭 출력"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, hist in series.items():
+                    cumulative = 0
+                    for upper, count in zip(hist.buckets, hist.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(key, (('le', str(upper)),))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(key, (('le', '+Inf'),))} {hist.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {hist.total}")
+                    lines.append(f"{name}_count{_format_labels(key)} {hist.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """모든 메트릭 초기화"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+# 프로세스 기본 메트릭 저장소
+REGISTRY = MetricsRegistry()
+
+
+class JsonTraceLogger:
+    """스팬을 JSON 라인 형식으로 파일에 기록"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def emit(self, record: Dict[str, Any]):
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+# 트레이스 로그 (설정하지 않으면 기록하지 않음)
+_trace_logger: Optional[JsonTraceLogger] = None
+
+
+def configure_trace_log(path: Optional[str]):
+    """
+    JSON 트레이스 로그 설정
+
+    Args:
+        path: 로그 파일 경로 (None 이면 트레이스 로그 비활성화)
+    """
+    global _trace_logger
+    if _trace_logger is not None:
+        _trace_logger.close()
+    _trace_logger = JsonTraceLogger(path) if path else None
+
+
+class Span:
+    """진행 중인 스팬 (속성 추가 및 상태 지정용)"""
+
+    __slots__ = ("name", "attributes", "status")
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.name = name
+        self.attributes = attributes
+        self.status = "ok"
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_status(self, status: str):
+        self.status = status
+
+
+@contextmanager
+def trace_request(trace_id: Optional[str] = None):
+    """
+    요청 단위 트레이스 ID 설정 (내부의 모든 스팬이 같은 ID로 기록됨)
+
+    Args:
+        trace_id: 사용할 트레이스 ID (기본값: 새로 생성)
+    """
+    token = _current_trace_id.set(trace_id or uuid.uuid4().hex[:16])
+    try:
+        yield _current_trace_id.get()
+    finally:
+        _current_trace_id.reset(token)
+
+
+@contextmanager
+def collect_spans():
+    """
+    블록 안에서 끝난 스팬을 (단계 이름, 소요 시간(초)) 목록으로 수집
+
+    같은 스레드(컨텍스트)에서 끝난 스팬만 수집하며, 메트릭/트레이스 로그 기록은 그대로 수행합니다.
+
+    Yields:
+        List: 끝난 순서대로의 (단계 이름, 소요 시간) 목록
+    """
+    spans: List[Tuple[str, float]] = []
+    token = _span_collector.set(spans)
+    try:
+        yield spans
+    finally:
+        _span_collector.reset(token)
+
+
+@contextmanager
+def trace_span(stage: str, registry: MetricsRegistry = None, **attributes):
+    """
+    단계 소요 시간 측정 스팬
+
+    종료 시 card_rec_stage_duration_seconds{stage, status} 히스토그램에 기록하고,
+    트레이스 로그가 설정되어 있으면 JSON 라인으로도 기록합니다.
+    블록에서 예외가 발생하면 status="error" 로 기록한 뒤 예외를 다시 발생시킵니다.
+
+    Args:
+        stage: 단계 이름 (예: db.user_profile, embedding, faiss_search, llm)
+        registry: 메트릭 저장소 (기본값: REGISTRY)
+        **attributes: 트레이스 로그에 함께 기록할 속성
+    """
+    registry = registry or REGISTRY
+    span = Span(stage, dict(attributes))
+    start = time.perf_counter()
+    try:
+        yield span
+    except BaseException:
+        span.status = "error"
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        registry.observe(STAGE_DURATION_METRIC, duration, {"stage": stage, "status": span.status})
+
+        collector = _span_collector.get()
+        if collector is not None:
+            collector.append((stage, duration))
+
+        if _trace_logger is not None:
+            _trace_logger.emit({
+                "ts": time.time(),
+                "trace_id": _current_trace_id.get(),
+                "span": stage,
+                "status": span.status,
+                "duration_ms": round(duration * 1000, 3),
+                **span.attributes,
+            })
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?")[0] == "/metrics":
+            body = self.registry.render_prometheus().encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        elif self.path.split("?")[0] == "/metrics.json":
+            body = json.dumps(self.registry.snapshot(), ensure_ascii=False).encode("utf-8")
+            content_type = "application/json; charset=utf-8"
+        else:
+            self.send_error(404)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 스크랩 요청마다 로그를 남기지 않음
+        pass
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0",
+                         registry: MetricsRegistry = None) -> ThreadingHTTPServer:
+    """
+    /metrics (Prometheus 텍스트), /metrics.json 엔드포인트를 제공하는 HTTP 서버 시작
+
+    Args:
+        port: 포트 번호
+        host: 바인드 주소
+        registry: 노출할 메트릭 저장소 (기본값: REGISTRY)
+
+    Returns:
+        ThreadingHTTPServer: 실행 중인 서버 (shutdown() 으로 종료)
+    """
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry or REGISTRY})
+    server = ThreadingHTTPServer((host, port), handler)
+    thread = threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True)
+    thread.start()
+    print(f"메트릭 서버 시작: http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,152 @@
+"""
+추천 시스템의 온라인 경로(요청마다 실행되는) SQL 쿼리 모음.
+
+card_recommendation.py 와 scripts/check_query_plans.py 가 같은 쿼리 문자열을
+공유하도록 분리해 두었습니다. 쿼리를 수정하면 실행 계획 점검 도구도 자동으로
+수정된 쿼리를 검사합니다.
+"""
+
+from profile_features import SOURCE_COLUMNS
+
+# 적재 시 미리 계산된 사용자 프로필/소비 인사이트 (user_profile_cache PK 조회)
+USER_PROFILE_CACHE_QUERY = """
+SELECT
+    user_id, age_label, gender, income_level, job_category, spending_pattern,
+    total_usage_amount,
+    restaurant_amount, restaurant_ratio, clothing_amount, clothing_ratio,
+    travel_amount, travel_ratio, grocery_amount, grocery_ratio,
+    auto_amount, auto_ratio, hotel_amount, hotel_ratio,
+    culture_amount, culture_ratio, home_amount, home_ratio
+FROM user_profile_cache
+WHERE user_id = %s
+"""
+
+# 트랜잭션 데이터 형식 사용자 프로필 (seq_id PK 조회, 캐시에 없는 사용자용)
+USER_TRANSACTION_PROFILE_QUERY = """
+SELECT
+    t.seq_id as user_id,
+    t.age_group as age,
+    t.gender,
+    t.member_rank,
+    t.life_stage,
+    t.region_code,
+    t.total_usage_amount,
+    t.card_sales_amount,
+    t.restaurant_amount,
+    t.clothing_amount + t.clothing_general_amount as shopping_amount,
+    t.travel_amount + t.travel_general_amount as travel_amount,
+    t.top_spending_category
+FROM user_transactions t
+WHERE t.seq_id = %s
+"""
+
+# 트랜잭션 데이터 기반 소비 패턴 분류 (seq_id PK 조회)
+USER_SPENDING_PATTERN_QUERY = """
+SELECT
+    CASE
+        WHEN restaurant_amount > 50 THEN '외식'
+        WHEN restaurant_amount > 20 THEN '카페'
+        ELSE NULL
+    END as category1,
+    CASE
+        WHEN clothing_amount + clothing_general_amount > 50 THEN '의류쇼핑'
+        WHEN furniture_amount + appliance_amount > 50 THEN '가전/가구'
+        ELSE NULL
+    END as category2,
+    CASE
+        WHEN travel_amount + travel_general_amount > 30 THEN '여행'
+        WHEN auto_amount + automaint_amount > 30 THEN '자동차'
+        ELSE NULL
+    END as category3
+FROM user_transactions
+WHERE seq_id = %s
+"""
+
+# 기존 사용자 데이터 형식 기본 정보 (user_id PK 조회)
+USER_BASIC_QUERY = """
+SELECT u.user_id, u.age, u.gender, u.income_level, u.job_category
+FROM users u
+WHERE u.user_id = %s
+"""
+
+# 사용자 소비 패턴 조회 (idx_consumption_patterns_user_amount 사용)
+USER_CONSUMPTION_PATTERNS_QUERY = """
+SELECT cp.category, cp.amount, cp.frequency
+FROM consumption_patterns cp
+WHERE cp.user_id = %s
+ORDER BY cp.amount DESC
+"""
+
+# 카테고리별 지출 조회 (seq_id PK 조회)
+USER_SPENDING_INSIGHTS_QUERY = """
+SELECT
+    restaurant_amount,
+    clothing_amount + clothing_general_amount as clothing_total,
+    travel_amount + travel_general_amount as travel_total,
+    grocery_amount,
+    auto_amount + automaint_amount + autosl_amount as auto_total,
+    hotel_amount,
+    culture_amount,
+    interior_amount + furniture_amount as home_total,
+    total_usage_amount
+FROM user_transactions
+WHERE seq_id = %s
+"""
+
+# 딥러닝 모델 추천 결과 조회 (idx_recommendations_user_ranking 사용)
+MODEL_RECOMMENDATIONS_QUERY = """
+SELECT r.card_id, r.score, r.ranking
+FROM recommendations r
+WHERE r.user_id = %s
+ORDER BY r.ranking ASC
+LIMIT 20
+"""
+
+# 이전 추천 결과 삭제 (idx_user_recommendations_user_card 사용)
+DELETE_USER_RECOMMENDATIONS_QUERY = "DELETE FROM user_recommendations WHERE user_id = %s"
+
+# 추천 결과 저장
+INSERT_USER_RECOMMENDATION_QUERY = """
+INSERT INTO user_recommendations
+(user_id, card_id, recommendation_score, recommendation_reason, created_at)
+VALUES (%s, %s, %s, %s, NOW())
+"""
+
+# 추천 결과 일괄 삭제 (write-behind 배치 플러시용, IN 목록은 배치 크기만큼 생성)
+DELETE_USER_RECOMMENDATIONS_BATCH_QUERY = "DELETE FROM user_recommendations WHERE user_id IN ({placeholders})"
+
+# 추천 결과 일괄 저장 (created_at 은 제공 시점 기준으로 전달)
+INSERT_USER_RECOMMENDATION_BATCH_QUERY = """
+INSERT INTO user_recommendations
+(user_id, card_id, recommendation_score, recommendation_reason, created_at)
+VALUES (%s, %s, %s, %s, %s)
+"""
+
+# 대량 추천 작업용 사용자 트랜잭션 일괄 조회 (seq_id PK IN 조회, 프로필 캐시 계산 컬럼)
+USER_TRANSACTIONS_BATCH_QUERY = (
+    f"SELECT {', '.join(SOURCE_COLUMNS)} FROM user_transactions WHERE seq_id IN ({{placeholders}})"
+)
+
+# 대량 추천 작업용 딥러닝 모델 추천 일괄 조회 (사용자별 상위 건수는 호출 측에서 제한)
+MODEL_RECOMMENDATIONS_BATCH_QUERY = """
+SELECT r.user_id, r.card_id, r.score, r.ranking
+FROM recommendations r
+WHERE r.user_id IN ({placeholders})
+ORDER BY r.user_id, r.ranking ASC
+"""
+
+# 사용자별 모델 추천 최대 건수 (MODEL_RECOMMENDATIONS_QUERY 의 LIMIT)
+MODEL_RECOMMENDATIONS_LIMIT = 20
+
+# 실행 계획 점검 대상 쿼리: 이름 -> (쿼리, 파라미터 종류)
+# 파라미터 종류는 'seq_id'(트랜잭션 사용자) 또는 'user_id'(users 테이블 사용자)
+HOT_QUERIES = {
+    "user_profile_cache": (USER_PROFILE_CACHE_QUERY, "seq_id"),
+    "user_transaction_profile": (USER_TRANSACTION_PROFILE_QUERY, "seq_id"),
+    "user_spending_pattern": (USER_SPENDING_PATTERN_QUERY, "seq_id"),
+    "user_basic": (USER_BASIC_QUERY, "user_id"),
+    "user_consumption_patterns": (USER_CONSUMPTION_PATTERNS_QUERY, "user_id"),
+    "user_spending_insights": (USER_SPENDING_INSIGHTS_QUERY, "seq_id"),
+    "model_recommendations": (MODEL_RECOMMENDATIONS_QUERY, "user_id"),
+    "delete_user_recommendations": (DELETE_USER_RECOMMENDATIONS_QUERY, "user_id"),
+}
@@ -0,0 +1,88 @@
+"""
+추천 결과 레코드 모듈.
+
+검색/모델 추천 결과마다 카드 행 전체를 dict 로 복사해 'details' 에 넣고 병합/세션 복사 때마다
+다시 복사하던 방식 대신, 카드 위치와 점수/순위/추천 이유만 가진 __slots__ 레코드를 사용합니다.
+카드 상세(details)는 LLM 컨텍스트나 API 응답을 만들 때 카드 텍스트 저장소에서 조회합니다.
+
+기존 소비 코드(prompt_compactor, response_renderer, recommendation_writer, 서버 응답)가 쓰던
+rec.get('card_id') / rec['details'] 형태의 조회를 그대로 지원합니다.
+"""
+
+from typing import Any, Dict, Optional
+
+# dict 형태로 조회할 수 있는 키
+RECORD_KEYS = ("card_id", "recommendation_score", "similarity_score",
+               "recommendation_rank", "recommendation_reason", "details")
+
+
+class RecommendationRecord:
+    __slots__ = ("store", "card_pos", "recommendation_score", "similarity_score",
+                 "recommendation_rank", "recommendation_reason")
+
+    def __init__(self, store, card_pos: int,
+                 recommendation_score: Optional[float] = None,
+                 similarity_score: Optional[float] = None,
+                 recommendation_rank: Optional[int] = None,
+                 recommendation_reason: Optional[str] = None):
+        """
+        추천 카드 하나 (값이 None 인 필드는 dict 조회 시 없는 키로 취급)
+
+        Args:
+            store: 카드 텍스트 저장소 (CardTextStore, 요청에 고정된 카탈로그 스냅샷의 저장소)
+            card_pos: 저장소의 카드 위치
+            recommendation_score: 추천 점수 (모델 점수 또는 병합 후 최종 점수)
+            similarity_score: 검색 점수
+            recommendation_rank: 모델 추천 순위
+            recommendation_reason: 추천 이유
+        """
+        self.store = store
+        self.card_pos = card_pos
+        self.recommendation_score = recommendation_score
+        self.similarity_score = similarity_score
+        self.recommendation_rank = recommendation_rank
+        self.recommendation_reason = recommendation_reason
+
+    @property
+    def card_id(self) -> Any:
+        return self.store.card_ids[self.card_pos]
+
+    @property
+    def details(self) -> Dict[str, Any]:
+        """카드 상세 정보 (조회할 때마다 저장소에서 새 dict 생성)"""
+        return self.store.row(self.card_pos)
+
+    def __repr__(self) -> str:
+        return (f"RecommendationRecord(card_id={self.card_id!r}, "
+                f"recommendation_score={self.recommendation_score!r}, "
+                f"similarity_score={self.similarity_score!r})")
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """dict.get 과 같은 조회 (details 는 이때 생성)"""
+        value = getattr(self, key) if key in RECORD_KEYS else None
+        return default if value is None else value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def copy(self) -> "RecommendationRecord":
+        """점수를 바꿔도 원본에 영향이 없는 복사본 (세션에 고정된 모델 추천 재사용 시)"""
+        return RecommendationRecord(
+            self.store, self.card_pos, self.recommendation_score, self.similarity_score,
+            self.recommendation_rank, self.recommendation_reason
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """값이 있는 필드와 카드 상세를 담은 dict (이전 결과 형식)"""
+        result = {}
+        for key in RECORD_KEYS:
+            value = self.get(key)
+            if value is not None:
+                result[key] = value
+        return result
@@ -0,0 +1,476 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+CardRecommendationRAG 비동기 HTTP 서버 (aiohttp).
+
+하나의 프로세스에서 공유 CardRecommendationRAG 인스턴스로 동시 사용자 요청을 처리합니다.
+
+- POST /recommend : {"user_id": ..., "query": ..., "stream": false, "mode": "auto"}
+    - stream=false: CardRecommendationResponse JSON 반환
+    - stream=true : NDJSON 스트리밍 (recommendations → delta... → done)
+    - filters     : {"corporate_name": [...], "card_type": [...]} (생략 시 필터 없음, --query-filters 이면 질의에서 추출)
+    - mode        : llm / template / auto (생략 시 서버 기본 응답 모드)
+                    template 응답은 LLM 없이 즉시 생성되며, 실제 사용한 모드는
+                    X-Response-Mode 헤더로 알려줍니다.
+- GET /health     : 상태 및 대기/처리 중 요청 수
+- GET /metrics    : Prometheus 형식 메트릭
+
+DB 조회와 CPU 위주의 쿼리 임베딩/FAISS 검색은 크기가 제한된 스레드 풀에서 실행하고,
+LLM 호출은 이벤트 루프에서 비동기(ainvoke/astream)로 실행합니다. 동시 처리 수는
+세마포어로 제한하며, 대기 중인 요청이 max_pending 을 넘으면 503 으로 즉시 거절합니다.
+같은 사용자/질의의 동시 요청은 하나의 계산 결과를 공유합니다 (스트리밍은 검색 단계만 공유).
+--catalog-refresh 를 지정하면 카드 카탈로그 변경 시 색인을 백그라운드에서 다시 만들어 교체합니다.
+
+    python recommendation_server.py --port 8000 --max-concurrency 16
+"""
+
+import os
+import json
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any
+
+from aiohttp import web
+from dotenv import load_dotenv
+
+from card_recommendation import (
+    CardRecommendationRAG,
+    USER_NOT_FOUND_MESSAGE,
+    NO_RECOMMENDATION_MESSAGE,
+)
+from response_renderer import (
+    RESPONSE_MODES,
+    RESPONSE_MODE_AUTO,
+    RESPONSE_MODE_LLM,
+    RESPONSE_MODE_TEMPLATE,
+    format_response_text,
+)
+from recommendation_metrics import REGISTRY, trace_request, trace_span
+from recommendation_writer import RecommendationWriteBehind
+from feature_store import UserFeatureStore
+from prompt_compactor import DEFAULT_CONTEXT_TOKEN_BUDGET
+from request_coalescing import AsyncSingleFlight, request_key
+from llm_guard import LLMGuard, CircuitBreaker, DEFAULT_LLM_DEADLINE
+from lexical_index import RETRIEVAL_MODES, RETRIEVAL_HYBRID
+from vector_index import (
+    FILTER_ATTRIBUTES,
+    filters_key,
+    REDUCTION_METHODS,
+    REDUCTION_NONE,
+    DEFAULT_REDUCED_DIM,
+    INDEX_TYPES,
+    INDEX_FLAT,
+    DEFAULT_INDEX_PARAMS,
+    INDEX_GRANULARITIES,
+    GRANULARITY_CARD,
+)
+from chunk_index import CHUNK_AGGREGATIONS, AGGREGATE_MAX, DEFAULT_CHUNK_OVERSAMPLE
+from catalog_snapshot import DEFAULT_CATALOG_REFRESH_INTERVAL
+
+# 환경 변수 로드
+load_dotenv()
+
+# 애플리케이션 키
+SERVICE_KEY = web.AppKey("recommendation_service", object)
+
+
+def _dumps(obj) -> str:
+    """한글을 이스케이프하지 않는 JSON 직렬화"""
+    return json.dumps(obj, ensure_ascii=False, default=str)
+
+
+def _json_response(data, status: int = 200, headers: Dict[str, str] = None) -> web.Response:
+    return web.json_response(data, status=status, headers=headers, dumps=_dumps)
+
+
+def _parse_filters(value):
+    """
+    요청 본문의 filters 검증 및 정규화 (값은 문자열 또는 문자열 목록)
+
+    Returns:
+        Dict: 속성 -> 값 목록 (생략 시 None)
+
+    Raises:
+        ValueError: 형식이 잘못되었거나 지원하지 않는 속성
+    """
+    if value is None:
+        return None
+    if not isinstance(value, dict):
+        raise ValueError("filters 는 객체여야 합니다.")
+
+    filters = {}
+    for attribute, values in value.items():
+        if attribute not in FILTER_ATTRIBUTES:
+            raise ValueError(f"filters 는 {', '.join(FILTER_ATTRIBUTES)} 만 지원합니다.")
+        values = [values] if isinstance(values, str) else values
+        if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+            raise ValueError("filters 값은 문자열 또는 문자열 목록이어야 합니다.")
+        filters[attribute] = values
+    return filters
+
+
+def _card_summary(rec: Dict[str, Any]) -> Dict[str, Any]:
+    """스트리밍 응답 첫 줄에 포함할 추천 카드 요약"""
+    details = rec.get('details', {})
+    return {
+        "card_id": rec.get('card_id'),
+        "card_name": details.get('card_name', ''),
+        "corporate_name": details.get('corporate_name', ''),
+        "recommendation_score": rec.get('recommendation_score', 0),
+        "recommendation_reason": rec.get('recommendation_reason', ''),
+    }
+
+
+class RecommendationService:
+    def __init__(self, rag: CardRecommendationRAG,
+                 max_concurrency: int = 8,
+                 max_pending: int = 64,
+                 executor_workers: int = 4,
+                 queue_timeout: float = 10.0):
+        """
+        HTTP 요청 처리 서비스 초기화
+
+        Args:
+            rag: 모든 요청이 공유하는 추천 시스템 인스턴스
+            max_concurrency: 동시에 처리하는 최대 요청 수
+            max_pending: 처리 중 + 대기 중 요청의 최대 수 (초과 시 503)
+            executor_workers: 검색 단계(DB/임베딩/FAISS)를 실행할 스레드 수
+            queue_timeout: 처리 슬롯을 기다리는 최대 시간 (초, 초과 시 503)
+        """
+        self.rag = rag
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self.executor = ThreadPoolExecutor(max_workers=executor_workers, thread_name_prefix="rag-retrieval")
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._flight = AsyncSingleFlight("http_recommend")
+        self.pending = 0
+        self.in_flight = 0
+
+    async def _retrieve(self, user_id: str, query: str, filters=None) -> Dict[str, Any]:
+        """LLM 이전 단계를 스레드 풀에서 실행"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, self.rag.prepare_recommendation_inputs, user_id, query, 5, filters
+        )
+
+    def _overloaded_response(self) -> web.Response:
+        REGISTRY.inc("card_rec_http_rejected_total")
+        return _json_response(
+            {"error": "서버가 혼잡합니다. 잠시 후 다시 시도해주세요."},
+            status=503,
+            headers={"Retry-After": "1"}
+        )
+
+    async def handle_recommend(self, request: web.Request) -> web.StreamResponse:
+        try:
+            body = await request.json()
+        except Exception:
+            return _json_response({"error": "JSON 본문이 필요합니다."}, status=400)
+
+        user_id = str(body.get("user_id", "")).strip()
+        query = str(body.get("query", "")).strip()
+        if not user_id or not query:
+            return _json_response({"error": "user_id 와 query 는 필수입니다."}, status=400)
+        mode = body.get("mode") or self.rag.response_mode
+        if mode not in RESPONSE_MODES:
+            return _json_response({"error": f"mode 는 {', '.join(RESPONSE_MODES)} 중 하나여야 합니다."}, status=400)
+        try:
+            filters = _parse_filters(body.get("filters"))
+        except ValueError as e:
+            return _json_response({"error": str(e)}, status=400)
+
+        # 백프레셔: 대기열이 가득 차면 즉시 거절
+        if self.pending >= self.max_pending:
+            return self._overloaded_response()
+
+        self.pending += 1
+        try:
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                return self._overloaded_response()
+
+            self.in_flight += 1
+            try:
+                with trace_request(), trace_span("http_recommend"):
+                    REGISTRY.inc("card_rec_requests_total")
+                    return await self._recommend(request, user_id, query, bool(body.get("stream")), mode, filters)
+            finally:
+                self.in_flight -= 1
+                self._semaphore.release()
+        finally:
+            self.pending -= 1
+
+    async def _recommend(self, request: web.Request, user_id: str, query: str,
+                         stream: bool, mode: str, filters=None) -> web.StreamResponse:
+        if stream:
+            inputs = await self._retrieve(user_id, query, filters)
+            error = self._check_inputs(user_id, inputs)
+            if error:
+                return _json_response(*error)
+            return await self._stream_response(request, query, inputs, mode)
+
+        # 같은 요청이 처리 중이면 그 결과(본문, 상태 코드, 사용한 모드)를 함께 받음
+        body, status, served = await self._flight.do(
+            request_key(user_id, query) + (mode, filters_key(filters)),
+            self._compute_structured, user_id, query, mode, filters
+        )
+        return _json_response(body, status=status, headers={"X-Response-Mode": served} if served else None)
+
+    def _check_inputs(self, user_id: str, inputs: Dict[str, Any]):
+        """검색 결과 확인 후 제공할 추천 결과를 저장 큐에 추가 (오류 시 (본문, 상태 코드) 반환)"""
+        if not inputs["user_profile"]:
+            return {"error": USER_NOT_FOUND_MESSAGE}, 404
+        if not inputs["recommendations"]:
+            return {"error": NO_RECOMMENDATION_MESSAGE}, 404
+
+        # 제공할 추천 결과를 저장 큐에 추가 (응답 지연 없음)
+        if self.rag.recommendation_writer:
+            self.rag.recommendation_writer.submit(user_id, inputs["recommendations"])
+        return None
+
+    async def _compute_structured(self, user_id: str, query: str, mode: str, filters=None):
+        """검색 + 구조화 응답 생성 (동일 요청 병합 단위, (본문, 상태 코드, 사용한 모드) 반환)"""
+        inputs = await self._retrieve(user_id, query, filters)
+        error = self._check_inputs(user_id, inputs)
+        if error:
+            return error + (None,)
+
+        args = (query, inputs["user_profile"], inputs["recommendations"], inputs["spending_insights"])
+        if not self.rag.admit_llm(mode):
+            # 템플릿 응답은 CPU 작업만 하므로 이벤트 루프에서 바로 생성
+            return self.rag.generate_templated_response(*args).model_dump(), 200, RESPONSE_MODE_TEMPLATE
+
+        try:
+            with self.rag.llm_admission.slot():
+                response = await self.rag.agenerate_structured_response(*args)
+        except Exception as e:
+            # 제한 시간 초과, 서킷 브레이커 개방, 파싱 실패 시 템플릿 응답으로 대체
+            print(f"구조화 응답 생성 중 오류 발생: {str(e)}")
+            try:
+                response = self.rag.degraded_response(e, *args)
+            except Exception as e:
+                print(f"템플릿 응답 생성 중 오류 발생: {str(e)}")
+                return {"error": "응답 생성 중 오류가 발생했습니다."}, 502, RESPONSE_MODE_LLM
+            return response.model_dump(), 200, RESPONSE_MODE_TEMPLATE
+
+        return response.model_dump(), 200, RESPONSE_MODE_LLM
+
+    async def _stream_response(self, request: web.Request, query: str,
+                               inputs: Dict[str, Any], mode: str) -> web.StreamResponse:
+        """추천 카드 목록을 먼저 보내고 LLM 응답을 조각 단위로 스트리밍 (NDJSON)"""
+        use_llm = self.rag.admit_llm(mode)
+        # slot() 이 넘겨받기 전까지 획득한 슬롯은 이 함수가 반환 (연결 끊김, 카드 요약 실패 등)
+        slot_pending = use_llm
+        try:
+            response = web.StreamResponse(headers={
+                "Content-Type": "application/x-ndjson; charset=utf-8",
+                "X-Response-Mode": RESPONSE_MODE_LLM if use_llm else RESPONSE_MODE_TEMPLATE
+            })
+            await response.prepare(request)
+
+            async def send(event: Dict[str, Any]):
+                line = _dumps(event) + "\n"
+                await response.write(line.encode("utf-8"))
+
+            await send({
+                "type": "recommendations",
+                "cards": [_card_summary(rec) for rec in inputs["recommendations"]]
+            })
+            args = (query, inputs["user_profile"], inputs["recommendations"], inputs["spending_insights"])
+            sent = False
+            try:
+                if use_llm:
+                    slot_pending = False
+                    with self.rag.llm_admission.slot():
+                        async for text in self.rag.astream_response(*args):
+                            await send({"type": "delta", "text": text})
+                            sent = True
+                else:
+                    # 템플릿 응답은 한 번에 전송
+                    templated = self.rag.generate_templated_response(*args)
+                    await send({"type": "delta", "text": format_response_text(templated)})
+                await send({"type": "done"})
+            except Exception as e:
+                print(f"스트리밍 응답 생성 중 오류 발생: {str(e)}")
+                if sent:
+                    # 이미 일부를 보낸 응답은 이어서 대체할 수 없음
+                    await send({"type": "error", "error": "응답 생성 중 오류가 발생했습니다."})
+                else:
+                    # 첫 조각 전에 실패하면 (제한 시간 초과, 서킷 브레이커 개방) 템플릿 응답으로 대체
+                    await send({"type": "delta", "text": self.rag.degraded_response_text(e, *args), "degraded": True})
+                    await send({"type": "done"})
+
+            await response.write_eof()
+            return response
+        finally:
+            if slot_pending:
+                self.rag.llm_admission.release()
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        return _json_response({
+            "status": "ok",
+            "in_flight": self.in_flight,
+            "pending": self.pending,
+            "max_concurrency": self.max_concurrency,
+            "max_pending": self.max_pending,
+        })
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=REGISTRY.render_prometheus(), content_type="text/plain")
+
+    def close(self):
+        """스레드 풀 및 추천 시스템 백그라운드 작업 종료"""
+        self.executor.shutdown(wait=True)
+        self.rag.close()
+
+
+def create_app(rag: CardRecommendationRAG, **service_kwargs) -> web.Application:
+    """
+    추천 API aiohttp 애플리케이션 생성
+
+    Args:
+        rag: 공유 추천 시스템 인스턴스
+        **service_kwargs: RecommendationService 설정 (max_concurrency 등)
+
+    Returns:
+        web.Application: 실행 가능한 애플리케이션
+    """
+    app = web.Application()
+    service = RecommendationService(rag, **service_kwargs)
+    app[SERVICE_KEY] = service
+
+    app.router.add_post("/recommend", service.handle_recommend)
+    app.router.add_get("/health", service.handle_health)
+    app.router.add_get("/metrics", service.handle_metrics)
+
+    async def on_cleanup(app):
+        service.close()
+
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='카드 추천 비동기 HTTP 서버')
+    parser.add_argument('--host', default='0.0.0.0', help='바인드 주소 (기본값: 0.0.0.0)')
+    parser.add_argument('--port', type=int, default=8000, help='포트 번호 (기본값: 8000)')
+    parser.add_argument('--max-concurrency', type=int, default=8, help='동시 처리 요청 수 (기본값: 8)')
+    parser.add_argument('--max-pending', type=int, default=64, help='최대 대기 요청 수 (기본값: 64)')
+    parser.add_argument('--executor-workers', type=int, default=4, help='검색 단계 스레드 수 (기본값: 4)')
+    parser.add_argument('--queue-timeout', type=float, default=10.0, help='처리 슬롯 대기 시간 초 (기본값: 10)')
+    parser.add_argument('--context-token-budget', type=int, default=DEFAULT_CONTEXT_TOKEN_BUDGET,
+                        help=f'LLM 컨텍스트 최대 토큰 수 (기본값: {DEFAULT_CONTEXT_TOKEN_BUDGET})')
+    parser.add_argument('--retrieval-mode', choices=RETRIEVAL_MODES, default=RETRIEVAL_HYBRID,
+                        help='카드 검색 방식 (dense: FAISS, hybrid: BM25 + FAISS, lexical: BM25 / 기본값: hybrid)')
+    parser.add_argument('--lexical-weight', type=float, default=0.5,
+                        help='hybrid 검색의 BM25 점수 가중치 (기본값: 0.5)')
+    parser.add_argument('--query-filters', action='store_true',
+                        help='filters 가 없는 요청은 질의의 카드사/카드 타입 표현을 필터로 적용')
+    parser.add_argument('--index-reduction', choices=REDUCTION_METHODS, default=REDUCTION_NONE,
+                        help='FAISS 인덱스 임베딩 차원 축소 방식 (기본값: none)')
+    parser.add_argument('--index-dim', type=int, default=DEFAULT_REDUCED_DIM,
+                        help=f'차원 축소 후 차원 (기본값: {DEFAULT_REDUCED_DIM})')
+    parser.add_argument('--index-type', choices=INDEX_TYPES, default=INDEX_FLAT,
+                        help='FAISS 인덱스 종류 (flat: 정확 검색, ivf_flat / hnsw / ivf_pq: 근사 검색 / 기본값: flat)')
+    parser.add_argument('--index-nlist', type=int, default=DEFAULT_INDEX_PARAMS["nlist"],
+                        help=f'IVF 클러스터 수 (기본값: {DEFAULT_INDEX_PARAMS["nlist"]}, 카드 수에 맞게 자동 축소)')
+    parser.add_argument('--index-nprobe', type=int, default=DEFAULT_INDEX_PARAMS["nprobe"],
+                        help=f'IVF 검색 시 탐색할 클러스터 수 (기본값: {DEFAULT_INDEX_PARAMS["nprobe"]})')
+    parser.add_argument('--index-hnsw-m', type=int, default=DEFAULT_INDEX_PARAMS["hnsw_m"],
+                        help=f'HNSW 노드당 이웃 수 (기본값: {DEFAULT_INDEX_PARAMS["hnsw_m"]})')
+    parser.add_argument('--index-ef-search', type=int, default=DEFAULT_INDEX_PARAMS["ef_search"],
+                        help=f'HNSW 검색 후보 수 (기본값: {DEFAULT_INDEX_PARAMS["ef_search"]})')
+    parser.add_argument('--index-pq-m', type=int, default=DEFAULT_INDEX_PARAMS["pq_m"],
+                        help=f'IVF-PQ 서브 양자화기 수 (기본값: {DEFAULT_INDEX_PARAMS["pq_m"]})')
+    parser.add_argument('--index-granularity', choices=INDEX_GRANULARITIES, default=GRANULARITY_CARD,
+                        help='FAISS 색인 단위 (card: 카드당 문서 1개, chunk: 혜택별 청크 / 기본값: card)')
+    parser.add_argument('--chunk-aggregation', choices=CHUNK_AGGREGATIONS, default=AGGREGATE_MAX,
+                        help='chunk 색인의 카드 점수 집계 방식 (기본값: max)')
+    parser.add_argument('--chunk-oversample', type=int, default=DEFAULT_CHUNK_OVERSAMPLE,
+                        help=f'chunk 색인에서 카드 수 대비 검색할 청크 수 배율 (기본값: {DEFAULT_CHUNK_OVERSAMPLE})')
+    parser.add_argument('--catalog-refresh', type=float, default=DEFAULT_CATALOG_REFRESH_INTERVAL,
+                        help='카드 카탈로그 변경 확인 주기 초 (변경 시 백그라운드에서 색인 재생성 후 교체, 0 이면 사용 안 함)')
+    parser.add_argument('--response-mode', choices=RESPONSE_MODES, default=RESPONSE_MODE_AUTO,
+                        help='기본 응답 모드 (기본값: auto)')
+    parser.add_argument('--llm-max-concurrency', type=int, default=None,
+                        help='auto 모드에서 동시에 진행할 최대 LLM 호출 수 (초과 시 템플릿 응답)')
+    parser.add_argument('--llm-latency-budget', type=float, default=None,
+                        help='auto 모드의 LLM 지연시간 예산 초 (최근 평균이 넘으면 템플릿 응답)')
+    parser.add_argument('--llm-deadline', type=float, default=DEFAULT_LLM_DEADLINE,
+                        help=f'LLM 호출 제한 시간 초 (기본값: {DEFAULT_LLM_DEADLINE})')
+    parser.add_argument('--llm-hedge-quantile', type=float, default=None,
+                        help='첫 LLM 요청이 최근 지연시간의 이 분위수를 넘으면 헤지 요청 전송 (예: 0.95)')
+    parser.add_argument('--llm-failure-threshold', type=int, default=5,
+                        help='서킷 브레이커를 여는 연속 LLM 실패 수 (기본값: 5)')
+    parser.add_argument('--llm-slow-call', type=float, default=None,
+                        help='이 시간(초)보다 오래 걸린 LLM 호출을 실패로 계산')
+    parser.add_argument('--llm-reset-timeout', type=float, default=30.0,
+                        help='서킷 브레이커가 열린 뒤 시험 호출까지의 시간 초 (기본값: 30)')
+    args = parser.parse_args()
+
+    # MySQL 설정
+    mysql_config = {
+        "host": os.getenv("MYSQL_HOST", "127.0.0.1"),
+        "port": int(os.getenv("MYSQL_PORT", "3307")),
+        "user": os.getenv("MYSQL_USER", "recommendation_team"),
+        "password": os.getenv("MYSQL_PASSWORD", ""),
+        "database": os.getenv("MYSQL_DATABASE", "card_recommendation")
+    }
+
+    # 사용자 피처 스토어 (로더가 생성한 경우에만 사용, 워커 프로세스 간 페이지 캐시 공유)
+    feature_store_dir = os.getenv("CARD_REC_FEATURE_STORE_DIR")
+    feature_store = UserFeatureStore(feature_store_dir) if feature_store_dir else None
+    
+    # 추천 시스템 초기화 (모든 요청이 공유)
+    rag = CardRecommendationRAG(
+        mysql_config,
+        recommendation_writer=RecommendationWriteBehind(mysql_config),
+        feature_store=feature_store,
+        context_token_budget=args.context_token_budget,
+        response_mode=args.response_mode,
+        llm_max_concurrency=args.llm_max_concurrency,
+        llm_latency_budget=args.llm_latency_budget,
+        retrieval_mode=args.retrieval_mode,
+        lexical_weight=args.lexical_weight,
+        query_filters=args.query_filters,
+        index_reduction=args.index_reduction,
+        index_dim=args.index_dim,
+        index_type=args.index_type,
+        index_params={
+            "nlist": args.index_nlist,
+            "nprobe": args.index_nprobe,
+            "hnsw_m": args.index_hnsw_m,
+            "ef_search": args.index_ef_search,
+            "pq_m": args.index_pq_m,
+        },
+        index_granularity=args.index_granularity,
+        chunk_aggregation=args.chunk_aggregation,
+        chunk_oversample=args.chunk_oversample,
+        catalog_refresh_interval=args.catalog_refresh,
+        llm_guard=LLMGuard(
+            deadline=args.llm_deadline,
+            hedge_quantile=args.llm_hedge_quantile,
+            breaker=CircuitBreaker(
+                failure_threshold=args.llm_failure_threshold,
+                slow_call_threshold=args.llm_slow_call,
+                reset_timeout=args.llm_reset_timeout
+            )
+        )
+    )
+
+    app = create_app(
+        rag,
+        max_concurrency=args.max_concurrency,
+        max_pending=args.max_pending,
+        executor_workers=args.executor_workers,
+        queue_timeout=args.queue_timeout
+    )
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+제공된 추천 결과를 비동기(write-behind)로 저장하는 모듈.
+
+요청 처리 스레드는 추천 결과를 큐에 넣기만 하고, 백그라운드 스레드가
+일정 개수 또는 일정 시간마다 모아서 user_recommendations 테이블에
+일괄(executemany) 저장합니다. 종료 시에는 큐에 남은 결과를 모두 저장합니다.
+
+연결 끊김/교착 상태 같은 일시적 오류는 배치를 지수 백오프로 다시 시도하고, 특정 행 때문에
+실패하는 배치는 절반씩 나눠 저장해 문제가 되는 사용자만 제외합니다.
+"""
+
+import atexit
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Any, Tuple
+
+import mysql.connector
+from mysql.connector import errorcode, errors
+
+from recommendation_queries import (
+    DELETE_USER_RECOMMENDATIONS_BATCH_QUERY,
+    INSERT_USER_RECOMMENDATION_BATCH_QUERY,
+)
+from recommendation_metrics import REGISTRY, trace_span
+
+# 다시 시도하면 성공할 수 있는 MySQL 오류 코드 (교착 상태, 잠금 대기 시간 초과)
+RETRYABLE_ERRNOS = {errorcode.ER_LOCK_DEADLOCK, errorcode.ER_LOCK_WAIT_TIMEOUT}
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """연결 오류/교착 상태처럼 같은 배치를 다시 시도할 만한 오류인지 확인"""
+    if isinstance(error, (errors.OperationalError, errors.InterfaceError)):
+        return True
+    if isinstance(error, errors.Error):
+        return getattr(error, "errno", None) in RETRYABLE_ERRNOS
+    # MySQL 오류가 아닌 소켓/OS 오류는 연결 문제로 간주
+    return isinstance(error, OSError)
+
+
+def build_recommendation_rows(user_id: str, recommendations: List[Dict[str, Any]],
+                              created_at: datetime = None) -> List[Tuple]:
+    """
+    추천 결과를 user_recommendations 삽입용 튜플 목록으로 변환
+
+    Args:
+        user_id: 사용자 ID
+        recommendations: 추천 카드 목록
+        created_at: 추천 제공 시각 (기본값: 현재 시각)
+
+    Returns:
+        List: (user_id, card_id, score, reason, created_at) 튜플 목록
+    """
+    created_at = created_at or datetime.now()
+    return [
+        (
+            user_id,
+            rec.get('card_id', ''),
+            rec.get('recommendation_score', 0),
+            rec.get('recommendation_reason', ''),
+            created_at
+        )
+        for rec in recommendations
+    ]
+
+
+def write_recommendation_batch(connection, user_rows: Dict[str, List[Tuple]]) -> int:
+    """
+    여러 사용자의 추천 결과를 하나의 트랜잭션으로 교체 저장
+
+    Args:
+        connection: MySQL 연결
+        user_rows: 사용자 ID -> 삽입용 튜플 목록
+
+    Returns:
+        int: 저장한 행 수
+    """
+    if not user_rows:
+        return 0
+
+    user_ids = list(user_rows.keys())
+    rows = [row for rows in user_rows.values() for row in rows]
+
+    cursor = connection.cursor()
+    try:
+        # 이전 추천 데이터 일괄 삭제
+        placeholders = ", ".join(["%s"] * len(user_ids))
+        cursor.execute(DELETE_USER_RECOMMENDATIONS_BATCH_QUERY.format(placeholders=placeholders), user_ids)
+
+        # 추천 데이터 일괄 저장 (다중 행 INSERT 로 변환됨)
+        if rows:
+            cursor.executemany(INSERT_USER_RECOMMENDATION_BATCH_QUERY, rows)
+
+        connection.commit()
+        return len(rows)
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+class RecommendationWriteBehind:
+    def __init__(self, mysql_config: Dict[str, Any],
+                 max_queue_size: int = 10000,
+                 batch_size: int = 500,
+                 flush_interval: float = 1.0,
+                 enqueue_timeout: float = 0.0,
+                 max_retries: int = 3,
+                 retry_backoff: float = 0.5):
+        """
+        추천 결과 write-behind 저장기 초기화
+
+        Args:
+            mysql_config: MySQL 연결 설정
+            max_queue_size: 큐 최대 크기 (가득 차면 submit 이 실패)
+            batch_size: 한 번에 저장할 최대 사용자 수
+            flush_interval: 배치가 차지 않아도 저장하는 주기 (초)
+            enqueue_timeout: 큐가 가득 찼을 때 대기할 최대 시간 (초, 0이면 대기하지 않음)
+            max_retries: 일시적 오류로 실패한 배치의 재시도 횟수
+            retry_backoff: 첫 재시도 대기 시간 (초, 재시도마다 두 배)
+        """
+        self.mysql_config = mysql_config
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._stop_event = threading.Event()
+        self._closed = False
+
+        # 통계
+        self.written_rows = 0
+        self.dropped_count = 0
+        self.failed_batches = 0
+        self.failed_users = 0
+
+        self._thread = threading.Thread(target=self._run, name="recommendation-writer", daemon=True)
+        self._thread.start()
+
+        # 프로세스 종료 시 남은 결과 저장
+        atexit.register(self.close)
+
+    def submit(self, user_id: str, recommendations: List[Dict[str, Any]]) -> bool:
+        """
+        추천 결과를 저장 큐에 추가 (호출 스레드에서 DB 작업 없음)
+
+        Args:
+            user_id: 사용자 ID
+            recommendations: 추천 카드 목록
+
+        Returns:
+            bool: 큐 추가 성공 여부
+        """
+        if self._closed:
+            return False
+
+        item = (user_id, build_recommendation_rows(user_id, recommendations))
+        try:
+            if self.enqueue_timeout > 0:
+                self._queue.put(item, timeout=self.enqueue_timeout)
+            else:
+                self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            self.dropped_count += 1
+            REGISTRY.inc("card_rec_writer_dropped_total")
+            print(f"추천 저장 큐가 가득 차 결과를 버립니다 (누적 {self.dropped_count}건)")
+            return False
+
+    def pending_count(self) -> int:
+        """저장 대기 중인 항목 수"""
+        return self._queue.qsize()
+
+    def close(self, timeout: float = 30.0):
+        """
+        백그라운드 스레드를 멈추고 큐에 남은 결과를 모두 저장
+
+        Args:
+            timeout: 저장 완료를 기다릴 최대 시간 (초)
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._stop_event.set()
+        self._thread.join(timeout)
+
+        if self._thread.is_alive():
+            print(f"추천 저장 종료 대기 시간 초과: {self.pending_count()}건 미저장")
+
+    def _collect_batch(self) -> Dict[str, List[Tuple]]:
+        """큐에서 배치 크기 또는 플러시 주기까지 항목 수집 (같은 사용자는 마지막 결과만 유지)"""
+        batch = {}
+        deadline = time.monotonic() + self.flush_interval
+
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                # 종료 요청 후에는 대기 없이 남은 항목만 수집
+                if self._stop_event.is_set():
+                    user_id, rows = self._queue.get_nowait()
+                else:
+                    user_id, rows = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch[user_id] = rows
+
+        return batch
+
+    def _write(self, batch: Dict[str, List[Tuple]]) -> int:
+        """배치 하나를 새 연결로 저장 (실패 시 예외 전파)"""
+        connection = None
+        try:
+            with trace_span("db.write_recommendations_batch", users=len(batch)):
+                connection = mysql.connector.connect(**self.mysql_config)
+                return write_recommendation_batch(connection, batch)
+        finally:
+            if connection is not None:
+                connection.close()
+
+    def _write_with_retry(self, batch: Dict[str, List[Tuple]]) -> int:
+        """일시적 오류는 지수 백오프로 max_retries 번까지 다시 시도 (그 외 오류는 바로 전파)"""
+        delay = self.retry_backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self._write(batch)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable_error(e):
+                    raise
+                print(f"추천 결과 일괄 저장 재시도 ({attempt + 1}/{self.max_retries}, {len(batch)}명): {str(e)}")
+                time.sleep(delay)
+                delay *= 2
+
+    def _flush(self, batch: Dict[str, List[Tuple]]):
+        """
+        수집한 배치 저장
+
+        일시적 오류는 재시도하고, 재시도할 수 없는 오류(잘못된 행 등)는 배치를 절반씩 나눠
+        다시 저장해 실패하는 사용자만 제외합니다.
+        """
+        if not batch:
+            return
+
+        try:
+            written = self._write_with_retry(batch)
+            self.written_rows += written
+            REGISTRY.inc("card_rec_writer_rows_total", written)
+            return
+        except Exception as e:
+            error = e
+
+        if len(batch) > 1 and not is_retryable_error(error):
+            user_ids = list(batch)
+            middle = len(user_ids) // 2
+            self._flush({user_id: batch[user_id] for user_id in user_ids[:middle]})
+            self._flush({user_id: batch[user_id] for user_id in user_ids[middle:]})
+            return
+
+        self.failed_batches += 1
+        self.failed_users += len(batch)
+        REGISTRY.inc("card_rec_writer_failed_batches_total")
+        print(f"추천 결과 일괄 저장 중 오류 발생 ({len(batch)}명): {str(error)}")
+
+    def _run(self):
+        """백그라운드 저장 루프"""
+        while not self._stop_event.is_set():
+            self._flush(self._collect_batch())
+
+        # 종료 시 남은 항목 모두 저장
+        while not self._queue.empty():
+            self._flush(self._collect_batch())
@@ -0,0 +1,137 @@
+"""
+동일한 동시 요청 병합(single-flight) 모듈.
+
+같은 키(사용자 ID + 정규화된 질의)로 동시에 들어온 요청은 먼저 들어온 요청(리더)만
+실제로 계산하고, 나머지는 그 결과를 기다렸다가 함께 받습니다. 마케팅 푸시처럼
+같은 질문이 한꺼번에 몰릴 때 DB 조회, FAISS 검색, LLM 호출이 중복 실행되지 않습니다.
+완료된 결과는 캐시하지 않으므로 이후 요청은 다시 계산합니다.
+"""
+
+import asyncio
+import re
+import threading
+import unicodedata
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from recommendation_metrics import REGISTRY
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """질의 정규화 (유니코드 NFC, 공백 정리, 소문자화)"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", query or "")).strip().lower()
+
+
+def request_key(user_id: str, query: str) -> Tuple[str, str]:
+    """요청 병합 키 생성"""
+    return (str(user_id).strip(), normalize_query(query))
+
+
+class _Call:
+    """진행 중인 계산 (리더가 결과를 채우고 이벤트로 알림)"""
+
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        """
+        스레드 기반 요청 병합 그룹
+
+        Args:
+            name: 메트릭 라벨로 사용할 그룹 이름
+        """
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        """
+        같은 키의 계산이 진행 중이면 그 결과를 기다리고, 없으면 직접 계산
+
+        Args:
+            key: 요청 병합 키
+            fn: 실행할 함수
+            *args, **kwargs: 함수 인자
+
+        Returns:
+            Any: 함수 결과 (리더에서 예외가 발생하면 모든 대기자에게 같은 예외 발생)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            REGISTRY.inc("card_rec_coalesced_total", labels={"group": self.name})
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def in_flight(self) -> int:
+        """진행 중인 계산 수"""
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    def __init__(self, name: str):
+        """
+        asyncio 기반 요청 병합 그룹 (이벤트 루프 하나에서 사용)
+
+        Args:
+            name: 메트릭 라벨로 사용할 그룹 이름
+        """
+        self.name = name
+        self._tasks: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, coro_fn: Callable, *args, **kwargs) -> Any:
+        """
+        같은 키의 코루틴이 진행 중이면 그 결과를 기다리고, 없으면 새로 실행
+
+        대기 중인 요청 하나가 취소되어도 공유 계산은 취소되지 않습니다.
+
+        Args:
+            key: 요청 병합 키
+            coro_fn: 코루틴 함수
+            *args, **kwargs: 코루틴 함수 인자
+
+        Returns:
+            Any: 코루틴 결과
+        """
+        task = self._tasks.get(key)
+        if task is not None:
+            REGISTRY.inc("card_rec_coalesced_total", labels={"group": self.name})
+        else:
+            task = asyncio.ensure_future(coro_fn(*args, **kwargs))
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+
+        return await asyncio.shield(task)
+
+    def in_flight(self) -> int:
+        """진행 중인 계산 수"""
+        return len(self._tasks)
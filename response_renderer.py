@@ -0,0 +1,229 @@
+"""
+LLM 없이 추천 응답을 만드는 템플릿 렌더러와 LLM 호출 허용 여부 판단 모듈.
+
+- render_templated_response: 병합된 추천 결과, 파싱된 혜택, 소비 인사이트로
+  CardRecommendationResponse 를 결정적으로 구성 (LLM 호출 없음)
+- format_response_text: 구조화 응답을 CLI/텍스트 응답 형식으로 변환
+- LLMAdmission: 응답 모드가 auto 일 때 LLM 동시 호출 수 상한과 지연시간 예산(EWMA)을
+  기준으로 LLM 을 호출할지 템플릿 응답으로 대신할지 결정
+
+부하가 높을 때 OpenAI 대기열 뒤에서 기다리는 대신 빠른 구조화 응답을 돌려주기 위한 용도입니다.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Callable, Optional
+
+from pydantic import BaseModel, Field
+
+# 응답 모드
+RESPONSE_MODE_LLM = "llm"
+RESPONSE_MODE_TEMPLATE = "template"
+RESPONSE_MODE_AUTO = "auto"
+RESPONSE_MODES = (RESPONSE_MODE_LLM, RESPONSE_MODE_TEMPLATE, RESPONSE_MODE_AUTO)
+
+
+class CardRecommendation(BaseModel):
+    """카드 추천 결과를 위한 Pydantic 모델"""
+    card_name: str = Field(description="추천 카드 이름")
+    corporate_name: str = Field(description="카드사 이름")
+    recommendation_reason: str = Field(description="추천 이유")
+    benefits: List[Dict[str, str]] = Field(description="카드 혜택 목록")
+
+
+class CardRecommendationResponse(BaseModel):
+    """최종 추천 응답을 위한 Pydantic 모델"""
+    user_summary: str = Field(description="사용자 소비 패턴 요약")
+    recommendations: List[CardRecommendation] = Field(description="추천 카드 목록")
+    summary_opinion: str = Field(description="종합 추천 의견")
+
+
+def _relevance(benefit: Dict[str, str], keywords: List[str]) -> int:
+    text = f"{benefit.get('category', '')} {benefit.get('description', '')}"
+    return sum(1 for keyword in keywords if keyword in text)
+
+
+def build_user_summary(user_profile: Dict[str, Any], spending_insights: Dict[str, Any] = None) -> str:
+    """
+    사용자 소비 패턴 요약 문장 생성
+
+    Args:
+        user_profile: 사용자 프로필 정보
+        spending_insights: 소비 인사이트
+
+    Returns:
+        str: 요약 문장
+    """
+    age = user_profile.get("연령대", "")
+    gender = user_profile.get("성별", "")
+    subject = f"{age} {gender} 고객님".strip() if age or gender else "고객님"
+    summary = f"{subject}은 {user_profile.get('소비 패턴', '일반적인 소비 습관')}을 가지고 계십니다."
+
+    top_categories = (spending_insights or {}).get("주요 카테고리", {})
+    if top_categories:
+        shares = ", ".join(f"{category}({values.get('비율', 0)}%)" for category, values in top_categories.items())
+        summary += f" 지출 비중은 {shares} 순으로 높습니다."
+    return summary
+
+
+def render_templated_response(user_profile: Dict[str, Any],
+                              recommendations: List[Dict[str, Any]],
+                              spending_insights: Dict[str, Any],
+                              parse_benefits: Callable[[str], List[Dict[str, str]]],
+                              keywords: List[str] = None,
+                              max_benefits: int = 3) -> CardRecommendationResponse:
+    """
+    LLM 호출 없이 CardRecommendationResponse 구성
+
+    Args:
+        user_profile: 사용자 프로필 정보
+        recommendations: 병합된 추천 카드 목록 (순위 순)
+        spending_insights: 소비 인사이트
+        parse_benefits: 혜택 문자열 파서 (CardRecommendationRAG.parse_benefits)
+        keywords: 혜택 관련도 계산용 키워드 (관련 혜택을 먼저 표시)
+        max_benefits: 카드당 표시할 최대 혜택 수
+
+    Returns:
+        CardRecommendationResponse: 구조화된 추천 응답
+    """
+    keywords = keywords or []
+    cards = []
+    matched_categories = []
+
+    for rec in recommendations:
+        details = rec.get('details', {})
+        benefits = [
+            {"category": b.get('category', ''), "description": b.get('description', '')}
+            for b in parse_benefits(details.get('benefits', ''))
+        ]
+        # 관련도가 높은 혜택부터 (같으면 원래 순서)
+        ranked = sorted(enumerate(benefits), key=lambda x: (-_relevance(x[1], keywords), x[0]))
+        selected = [benefit for _, benefit in ranked[:max_benefits]]
+        if selected and _relevance(selected[0], keywords) > 0:
+            matched_categories.append(selected[0]["category"])
+
+        cards.append(CardRecommendation(
+            card_name=details.get('card_name', '이름 없음'),
+            corporate_name=details.get('corporate_name', '정보 없음'),
+            recommendation_reason=rec.get('recommendation_reason', ''),
+            benefits=selected
+        ))
+
+    if cards:
+        opinion = f"소비 패턴과 질문을 종합하면 {cards[0].corporate_name}의 {cards[0].card_name}가 가장 적합합니다."
+        if matched_categories:
+            categories = ", ".join(dict.fromkeys(matched_categories))
+            opinion += f" 추천 카드들은 {categories} 혜택이 고객님의 주요 소비와 잘 맞습니다."
+        opinion += " 카드별 전월 실적 조건과 할인 한도를 확인하신 뒤 선택하시길 권해드립니다."
+    else:
+        opinion = "조건에 맞는 추천 카드를 찾지 못했습니다."
+
+    return CardRecommendationResponse(
+        user_summary=build_user_summary(user_profile, spending_insights),
+        recommendations=cards,
+        summary_opinion=opinion
+    )
+
+
+def format_response_text(response: CardRecommendationResponse) -> str:
+    """
+    구조화 응답을 LLM 텍스트 응답과 같은 번호 목록 형식으로 변환
+
+    Args:
+        response: 구조화된 추천 응답
+
+    Returns:
+        str: 응답 문자열
+    """
+    lines = ["1. 사용자의 소비 패턴 요약", response.user_summary, "", "2. 추천 카드 목록"]
+    for card in response.recommendations:
+        lines.append(f"- 카드명: {card.card_name}")
+        lines.append(f"- 카드사: {card.corporate_name}")
+        lines.append(f"- 추천 이유: {card.recommendation_reason}")
+        lines.append("- 주요 혜택:")
+        for benefit in card.benefits:
+            description = benefit.get('description', '')
+            lines.append(f"  * {benefit.get('category', '')}: {description}" if description
+                         else f"  * {benefit.get('category', '')}")
+        lines.append("")
+    lines.extend(["3. 종합 추천 의견", response.summary_opinion])
+    return "\n".join(lines)
+
+
+class LLMAdmission:
+    def __init__(self, max_concurrency: Optional[int] = None,
+                 latency_budget: Optional[float] = None,
+                 ewma_alpha: float = 0.2,
+                 probe_interval: float = 5.0):
+        """
+        LLM 호출 허용 여부 판단기 (응답 모드 auto 용)
+
+        Args:
+            max_concurrency: 동시에 진행할 최대 LLM 호출 수 (None 이면 제한 없음)
+            latency_budget: LLM 지연시간 예산 (초, 최근 지연시간 EWMA 가 넘으면 템플릿 응답, None 이면 제한 없음)
+            ewma_alpha: 지연시간 EWMA 가중치
+            probe_interval: 예산 초과 상태에서 지연시간 회복을 확인하기 위해 LLM 호출을 허용하는 주기 (초)
+        """
+        self.max_concurrency = max_concurrency
+        self.latency_budget = latency_budget
+        self.ewma_alpha = ewma_alpha
+        self.probe_interval = probe_interval
+
+        self.in_flight = 0
+        self.ewma_latency: Optional[float] = None
+        self._last_probe = 0.0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        """
+        LLM 호출 슬롯 획득 시도 (auto 모드)
+
+        Returns:
+            bool: 획득 성공 여부 (실패 시 템플릿 응답 사용, 성공 시 release 호출 필요)
+        """
+        with self._lock:
+            if self.max_concurrency is not None and self.in_flight >= self.max_concurrency:
+                return False
+
+            if (self.latency_budget is not None and self.ewma_latency is not None
+                    and self.ewma_latency > self.latency_budget):
+                # 예산 초과 상태에서는 주기적으로 한 건만 허용해 지연시간 회복 여부를 측정
+                now = time.monotonic()
+                if now - self._last_probe < self.probe_interval:
+                    return False
+                self._last_probe = now
+
+            self.in_flight += 1
+            return True
+
+    def acquire(self):
+        """LLM 호출 슬롯을 조건 없이 획득 (llm 모드, 동시 호출 수와 지연시간 측정용)"""
+        with self._lock:
+            self.in_flight += 1
+
+    def release(self, latency: Optional[float] = None):
+        """
+        LLM 호출 슬롯 반환
+
+        Args:
+            latency: 이번 호출 지연시간 (초, 실패한 호출은 None)
+        """
+        with self._lock:
+            self.in_flight -= 1
+            if latency is not None:
+                if self.ewma_latency is None:
+                    self.ewma_latency = latency
+                else:
+                    self.ewma_latency = self.ewma_alpha * latency + (1 - self.ewma_alpha) * self.ewma_latency
+
+    @contextmanager
+    def slot(self):
+        """이미 획득한 슬롯을 사용하는 LLM 호출 구간 (종료 시 지연시간 기록 후 반환)"""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.release()
+            raise
+        self.release(time.perf_counter() - start)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+전체 고객 대량 추천 배치 작업.
+
+LLM 응답을 제외한 추천 단계(get_top_n_recommendations 의 프로필 조회, 모델 추천, 질의 임베딩,
+FAISS 검색, 점수 결합)를 user_transactions 의 모든 seq_id 에 대해 미리 계산해
+user_recommendations 테이블에 일괄 저장합니다.
+
+- seq_id 를 --shard-size 명씩 샤드로 나눠 프로세스 풀에서 처리합니다.
+- 각 워커는 자신의 임베딩 모델과 FAISS 인덱스를 가집니다. 인덱스는 부모 프로세스가 먼저
+  생성/캐싱해 두므로 워커는 캐시 파일을 읽기만 합니다.
+- 워커는 --batch-size 명씩 프로필/모델 추천 IN 조회, 임베딩 배치, FAISS 배치 검색, 점수 결합,
+  일괄 저장(executemany)을 수행합니다 (CardRecommendationRAG.recommend_batch).
+- 워커 수 x 워커당 스레드 수가 코어 수를 넘지 않도록 FAISS/torch 스레드 수를 제한합니다.
+
+    python scripts/bulk_recommend.py --workers 32 --threads-per-worker 1
+"""
+
+import os
+import sys
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, Any, List
+
+from dotenv import load_dotenv
+
+# 프로젝트 루트 모듈 임포트를 위한 경로 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from card_recommendation import CardRecommendationRAG
+from recommendation_writer import build_recommendation_rows, write_recommendation_batch
+from lexical_index import RETRIEVAL_HYBRID
+from vector_index import REDUCTION_NONE, DEFAULT_REDUCED_DIM, INDEX_FLAT, GRANULARITY_CARD
+from chunk_index import AGGREGATE_MAX
+
+# 환경 변수 로드
+load_dotenv()
+
+# 기본 추천 질의 (사용자 프로필/소비 인사이트로 맥락화되어 검색됨)
+DEFAULT_BULK_QUERY = "내 소비 패턴에 맞는 혜택이 많은 카드 추천"
+
+# 워커 프로세스별 추천 시스템 (워커 초기화 시 생성)
+_worker_rag = None
+
+
+def create_rag(mysql_config: Dict[str, Any], rag_options: Dict[str, Any]) -> CardRecommendationRAG:
+    """추천 시스템 생성 (부모 프로세스의 인덱스 캐시 생성과 워커 초기화에서 사용)"""
+    return CardRecommendationRAG(mysql_config, **rag_options)
+
+
+def rag_options_from_env() -> Dict[str, Any]:
+    """서비스와 같은 검색/인덱스 설정 (card_recommendation.py 와 같은 환경 변수 사용)"""
+    return {
+        "retrieval_mode": os.getenv("CARD_REC_RETRIEVAL_MODE", RETRIEVAL_HYBRID),
+        "index_reduction": os.getenv("CARD_REC_INDEX_REDUCTION", REDUCTION_NONE),
+        "index_dim": int(os.getenv("CARD_REC_INDEX_DIM", DEFAULT_REDUCED_DIM)),
+        "index_type": os.getenv("CARD_REC_INDEX_TYPE", INDEX_FLAT),
+        "index_granularity": os.getenv("CARD_REC_INDEX_GRANULARITY", GRANULARITY_CARD),
+        "chunk_aggregation": os.getenv("CARD_REC_CHUNK_AGGREGATION", AGGREGATE_MAX),
+    }
+
+
+def limit_threads(threads: int):
+    """워커 프로세스의 FAISS(OpenMP) / torch 스레드 수 제한"""
+    import faiss
+    faiss.omp_set_num_threads(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def _init_worker(mysql_config: Dict[str, Any], rag_options: Dict[str, Any], threads: int):
+    """워커 초기화: 스레드 수 제한 후 임베딩 모델과 FAISS 인덱스(캐시) 로드"""
+    global _worker_rag
+    limit_threads(threads)
+    _worker_rag = create_rag(mysql_config, rag_options)
+
+
+def process_shard(shard_no: int, user_ids: List[str], query: str, limit: int,
+                  batch_size: int) -> Dict[str, Any]:
+    """
+    샤드 하나의 추천 계산 및 저장 (워커 프로세스에서 실행)
+
+    Args:
+        shard_no: 샤드 번호
+        user_ids: 샤드의 seq_id 목록
+        query: 추천 질의
+        limit: 사용자별 최대 추천 수
+        batch_size: 한 번에 계산/저장할 사용자 수
+
+    Returns:
+        Dict: 샤드 처리 결과 (저장 사용자 수, 저장 행 수, 추천 없는 사용자 수,
+              계산/저장 실패 사용자 수, 처리 시간)
+    """
+    start = time.perf_counter()
+    stats = {"shard": shard_no, "users": 0, "rows": 0, "skipped": 0, "failed": 0}
+
+    connection = _worker_rag._get_connection()
+    try:
+        for offset in range(0, len(user_ids), batch_size):
+            batch = user_ids[offset:offset + batch_size]
+            
+            # 조회/검색 실패는 추천 없음(skipped)과 구분해 배치 전체를 실패로 집계
+            try:
+                recommendations = _worker_rag.recommend_batch(batch, query, limit)
+            except Exception as e:
+                stats["failed"] += len(batch)
+                print(f"샤드 {shard_no} 추천 계산 중 오류 발생: {str(e)}")
+                continue
+
+            # 추천 결과가 없는 사용자는 기존 추천을 유지
+            created_at = datetime.now()
+            user_rows = {
+                user_id: build_recommendation_rows(user_id, recs, created_at)
+                for user_id, recs in recommendations.items() if recs
+            }
+            stats["skipped"] += len(batch) - len(user_rows)
+
+            try:
+                stats["rows"] += write_recommendation_batch(connection, user_rows)
+                stats["users"] += len(user_rows)
+            except Exception as e:
+                stats["failed"] += len(user_rows)
+                print(f"샤드 {shard_no} 추천 저장 중 오류 발생: {str(e)}")
+    finally:
+        connection.close()
+
+    stats["seconds"] = round(time.perf_counter() - start, 2)
+    return stats
+
+
+def fetch_user_ids(rag: CardRecommendationRAG, max_users: int = None) -> List[str]:
+    """추천 대상 seq_id 목록 조회"""
+    connection = rag._get_connection()
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT seq_id FROM user_transactions ORDER BY seq_id")
+        user_ids = [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+        connection.close()
+    return user_ids[:max_users] if max_users else user_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description='전체 고객 대량 추천 배치 작업')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='워커 프로세스 수 (기본값: CPU 코어 수)')
+    parser.add_argument('--threads-per-worker', type=int, default=1,
+                        help='워커당 FAISS/torch 스레드 수 (기본값: 1)')
+    parser.add_argument('--shard-size', type=int, default=5000, help='샤드당 사용자 수 (기본값: 5000)')
+    parser.add_argument('--batch-size', type=int, default=256,
+                        help='한 번에 계산/저장할 사용자 수 (기본값: 256)')
+    parser.add_argument('--query', default=DEFAULT_BULK_QUERY, help='추천 질의')
+    parser.add_argument('--limit', type=int, default=5, help='사용자별 최대 추천 수 (기본값: 5)')
+    parser.add_argument('--max-users', type=int, default=None, help='처리할 최대 사용자 수 (점검용)')
+    parser.add_argument('--start-method', choices=['spawn', 'forkserver', 'fork'], default='spawn',
+                        help='워커 프로세스 시작 방식 (기본값: spawn)')
+    args = parser.parse_args()
+
+    # MySQL 설정
+    mysql_config = {
+        "host": os.getenv("MYSQL_HOST", "127.0.0.1"),
+        "port": int(os.getenv("MYSQL_PORT", "3307")),
+        "user": os.getenv("MYSQL_USER", "recommendation_team"),
+        "password": os.getenv("MYSQL_PASSWORD", ""),
+        "database": os.getenv("MYSQL_DATABASE", "card_recommendation")
+    }
+    rag_options = rag_options_from_env()
+
+    # 인덱스를 한 번만 생성/캐싱 (워커는 캐시를 읽기만 함) 및 대상 사용자 조회
+    rag = create_rag(mysql_config, rag_options)
+    user_ids = fetch_user_ids(rag, args.max_users)
+    rag.close()
+    del rag
+
+    shards = [user_ids[i:i + args.shard_size] for i in range(0, len(user_ids), args.shard_size)]
+    print(f"대량 추천 시작: 사용자 {len(user_ids)}명, 샤드 {len(shards)}개, 워커 {args.workers}개")
+
+    start = time.perf_counter()
+    totals = {"users": 0, "rows": 0, "skipped": 0, "failed": 0}
+    failed_shards = 0
+
+    context = multiprocessing.get_context(args.start_method)
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=context,
+                             initializer=_init_worker,
+                             initargs=(mysql_config, rag_options, args.threads_per_worker)) as pool:
+        futures = {
+            pool.submit(process_shard, shard_no, shard, args.query, args.limit, args.batch_size): shard_no
+            for shard_no, shard in enumerate(shards)
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                stats = future.result()
+            except Exception as e:
+                failed_shards += 1
+                totals["failed"] += len(shards[futures[future]])
+                print(f"샤드 {futures[future]} 처리 중 오류 발생: {str(e)}")
+                continue
+
+            for key in totals:
+                totals[key] += stats[key]
+            elapsed = time.perf_counter() - start
+            print(f"샤드 완료 {done}/{len(shards)}: 사용자 {stats['users']}명 ({stats['seconds']}초), "
+                  f"누적 {totals['users']}명, {totals['users'] / elapsed:.1f}명/초")
+
+    elapsed = time.perf_counter() - start
+    print(f"\n==== 대량 추천 완료: {elapsed:.1f}초 ====")
+    print(f"저장 사용자 {totals['users']}명, 저장 행 {totals['rows']}개, "
+          f"추천 없음 {totals['skipped']}명, 실패 {totals['failed']}명 (실패 샤드 {failed_shards}개)")
+    return 1 if totals["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
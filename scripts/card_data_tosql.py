@@ -2,11 +2,21 @@ import pandas as pd
 import numpy as np
 import pymysql
 import os
+import glob
+import time
+import hashlib
+import argparse
 from dotenv import load_dotenv
 
 # 환경 변수 로드
 load_dotenv()
 
+# 파싱한 엑셀 시트를 저장하는 Parquet 캐시 디렉터리
+DEFAULT_EXCEL_CACHE_DIR = os.getenv("CARD_DATA_CACHE_DIR", "data/.cache")
+
+# 스트리밍 모드에서 한 번에 읽고 적재할 행 수
+DEFAULT_STREAM_CHUNK_SIZE = 10000
+
 # MySQL 연결 설정
 def create_db_connection():
     connection = None
@@ -39,6 +49,23 @@ def execute_query(connection, query, data=None):
     finally:
         cursor.close()  # 커서 닫기
 
+# 여러 쿼리를 하나의 트랜잭션으로 일괄 실행하는 함수 (쿼리별 executemany, 실패 시 전체 롤백)
+def execute_many_in_transaction(connection, statements):
+    cursor = connection.cursor()
+    try:
+        row_count = 0
+        for query, data_list in statements:
+            if data_list:
+                cursor.executemany(query, data_list)  # 다중 행 INSERT 로 변환되어 한 번에 전송
+                row_count += len(data_list)
+        connection.commit()  # 배치 전체를 한 번만 커밋
+        return row_count
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()  # 커서 닫기
+
 # 조회 쿼리 실행 함수
 def read_query(connection, query):
     cursor = connection.cursor()
@@ -53,16 +80,157 @@ def read_query(connection, query):
     finally:
         cursor.close()  # 커서 닫기
 
-# 엑셀 파일 읽기
-def read_excel_data(file_path):
+# 엑셀 파일 내용 해시 (캐시 키, 파싱보다 훨씬 빠름)
+def file_sha1(file_path):
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+# 엑셀 파일의 Parquet 캐시 경로 (파일 내용이 바뀌면 다른 경로)
+def excel_cache_path(file_path, cache_dir):
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(cache_dir, f"{stem}-{file_sha1(file_path)[:16]}.parquet")
+
+# 같은 엑셀 파일의 이전 내용 캐시 삭제
+def remove_stale_caches(cache_path):
+    stem = os.path.basename(cache_path).rsplit('-', 1)[0]
+    for path in glob.glob(os.path.join(os.path.dirname(cache_path), f"{stem}-*.parquet")):
+        if path != cache_path:
+            os.remove(path)
+
+# 시트 값을 문자열로 통일 (빈 칸은 None, 캐시 유무/스트리밍 여부와 관계없이 같은 값)
+def normalize_sheet(df):
+    return df.astype(object).where(df.notna(), None).apply(
+        lambda column: column.map(lambda value: value if value is None else str(value))
+    )
+
+# 파싱한 시트를 Parquet 캐시로 저장 (임시 파일에 쓴 뒤 교체)
+def write_excel_cache(df, cache_path):
+    try:
+        os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+        tmp_path = f"{cache_path}.tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, cache_path)
+        remove_stale_caches(cache_path)
+        print(f"엑셀 캐시 저장 완료: {cache_path}")
+    except Exception as e:
+        print(f"엑셀 캐시 저장 중 오류 발생: {str(e)}")
+
+# 엑셀 파일 읽기 (내용이 같으면 Parquet 캐시에서 읽음, cache_dir 가 None 이면 캐시 사용 안 함)
+def read_excel_data(file_path, cache_dir=DEFAULT_EXCEL_CACHE_DIR):
     try:
-        df = pd.read_excel(file_path)  # 엑셀 파일 읽기
-        print(f"엑셀 파일에서 {len(df)} 행 읽기 성공")
+        start_time = time.perf_counter()
+        cache_path = excel_cache_path(file_path, cache_dir) if cache_dir else None
+        
+        if cache_path and os.path.exists(cache_path):
+            try:
+                df = pd.read_parquet(cache_path)
+                print(f"엑셀 캐시에서 {len(df)} 행 읽기 성공 ({time.perf_counter() - start_time:.2f}초)")
+                return df
+            except Exception as e:
+                print(f"엑셀 캐시 읽기 중 오류 발생: {str(e)}")
+        
+        df = normalize_sheet(pd.read_excel(file_path))  # 엑셀 파일 읽기
+        print(f"엑셀 파일에서 {len(df)} 행 읽기 성공 ({time.perf_counter() - start_time:.2f}초)")
+        
+        if cache_path:
+            write_excel_cache(df, cache_path)
         return df
     except Exception as e:
         print(f"엑셀 파일 읽기 오류: {str(e)}")
         return None
 
+# 엑셀 시트를 읽기 전용 모드로 한 행씩 읽어 chunk_size 행 단위로 반환 (시트 전체를 메모리에 올리지 않음)
+def stream_excel_rows(file_path, chunk_size):
+    from openpyxl import load_workbook
+    
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        # 이름 없는 열은 pandas.read_excel 과 같은 이름 사용
+        columns = [f"Unnamed: {i}" if name is None else str(name) for i, name in enumerate(header)]
+        
+        width = len(columns)
+        chunk = []
+        blank_rows = []
+        for row in rows:
+            row = tuple(row[:width]) + (None,) * (width - len(row))
+            # 빈 행은 뒤에 값이 있는 행이 나올 때만 추가 (pandas.read_excel 처럼 시트 끝의 빈 행은 제외)
+            if all(value is None for value in row):
+                blank_rows.append(row)
+                continue
+            chunk.extend(blank_rows)
+            blank_rows = []
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield columns, chunk
+                chunk = []
+        if chunk:
+            yield columns, chunk
+    finally:
+        workbook.close()
+
+# 엑셀 파일을 DataFrame 청크로 순차 읽기 (스트리밍 모드, 인덱스는 시트 전체 기준 행 번호)
+def iter_excel_chunks(file_path, chunk_size=DEFAULT_STREAM_CHUNK_SIZE, cache_dir=DEFAULT_EXCEL_CACHE_DIR):
+    cache_path = excel_cache_path(file_path, cache_dir) if cache_dir else None
+    
+    # 캐시가 있으면 Parquet 행 그룹을 배치로 읽음
+    if cache_path and os.path.exists(cache_path):
+        import pyarrow.parquet as pq
+        
+        offset = 0
+        for batch in pq.ParquetFile(cache_path).iter_batches(batch_size=chunk_size):
+            chunk = batch.to_pandas()
+            chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+            offset += len(chunk)
+            yield chunk
+        print(f"엑셀 캐시에서 {offset} 행 스트리밍 읽기 완료")
+        return
+    
+    writer = None
+    tmp_path = f"{cache_path}.tmp" if cache_path else None
+    completed = False
+    offset = 0
+    try:
+        for columns, rows in stream_excel_rows(file_path, chunk_size):
+            chunk = normalize_sheet(pd.DataFrame(rows, columns=columns))
+            chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+            offset += len(chunk)
+            
+            # 읽은 청크를 캐시에 이어서 기록 (모든 열을 문자열 스키마로 고정)
+            if cache_path and writer is None:
+                try:
+                    import pyarrow as pa
+                    import pyarrow.parquet as pq
+                    
+                    os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+                    schema = pa.schema([(column, pa.string()) for column in columns])
+                    writer = pq.ParquetWriter(tmp_path, schema)
+                except Exception as e:
+                    print(f"엑셀 캐시 저장 중 오류 발생: {str(e)}")
+                    cache_path = None
+            if writer is not None:
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            
+            yield chunk
+        completed = True
+        print(f"엑셀 파일에서 {offset} 행 스트리밍 읽기 완료")
+    finally:
+        if writer is not None:
+            writer.close()
+            # 시트를 끝까지 읽은 경우에만 캐시로 사용
+            if completed:
+                os.replace(tmp_path, cache_path)
+                remove_stale_caches(cache_path)
+                print(f"엑셀 캐시 저장 완료: {cache_path}")
+            elif os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
 # 혜택 파싱 함수
 def parse_benefits(benefits_text):
     if not benefits_text or pd.isna(benefits_text):
@@ -84,72 +252,147 @@ def parse_benefits(benefits_text):
     
     return detailed_benefits
 
-# 카드 데이터 삽입
-def insert_card_data(connection, df):
+# 벡터화된 혜택 파싱 (parse_benefits 와 같은 결과를 열 단위 문자열 연산으로 계산)
+def parse_benefits_column(benefits):
+    benefits = benefits.reset_index(drop=True)
+    
+    # 세미콜론(;)으로 분리한 혜택 항목을 한 행씩 펼침 (인덱스는 원래 카드 위치)
+    items = benefits.str.split(';').explode().str.strip()
+    
+    # 빈 항목과 유의사항은 제외하고 카드별로 다시 이어 붙임
+    items = items[(items != '') & ~items.str.contains("유의사항", regex=False, na=False)]
+    detailed = (items + "; ").groupby(level=0, sort=False).agg(''.join)
+    return detailed.reindex(benefits.index, fill_value='')
+
+# 엑셀 열 (없으면 기본값으로 채운 열)
+def excel_column(df, column, default):
+    if column in df.columns:
+        return df[column]
+    return pd.Series(default, index=df.index, dtype=object)
+
+# 카드 데이터 -> cards / card_gorilla_data 삽입 행 (행 단위 반복 없이 열 단위로 생성)
+def build_card_rows(df):
+    # 고유 ID 생성 (일련번호 기반)
+    card_ids = "CARD" + pd.Series(df.index + 1, index=df.index).astype(str).str.zfill(3)
+    
+    # 카드명이 없는 경우 기본값 설정
+    card_names = excel_column(df, 'Card Name', '')
+    card_names = card_names.where(card_names.notna(), "Unknown Card " + pd.Series(df.index, index=df.index).astype(str))
+    
+    # 카드사명이 없는 경우 기본값 설정
+    corporate_names = excel_column(df, 'Corporate Name', '').fillna("기타")
+    
+    # 혜택/이미지 URL 이 없는 경우 빈 문자열 처리
+    benefits = excel_column(df, 'Benefits', '').fillna('')
+    image_urls = excel_column(df, 'Image URLs', '').fillna('')
+    
+    # 카드 타입이 없는 경우 기본값 설정
+    card_types = excel_column(df, 'Card Type', '신용카드').fillna('신용카드')
+    
+    # 상세 혜택 파싱
+    detailed_benefits = parse_benefits_column(benefits.astype(str))
+    
+    # tolist() 로 numpy 스칼라를 파이썬 값으로 변환 (pymysql 파라미터 바인딩용)
+    card_id_list = card_ids.tolist()
+    card_rows = list(zip(
+        card_id_list, card_names.tolist(), corporate_names.tolist(),
+        benefits.tolist(), image_urls.tolist(), card_types.tolist()
+    ))
+    gorilla_rows = list(zip(card_id_list, detailed_benefits.tolist()))
+    return card_rows, gorilla_rows
+
+# 카드 데이터 일괄 삽입 (배치마다 cards / card_gorilla_data 를 한 트랜잭션으로 업서트)
+def insert_card_data(connection, df, batch_size=1000):
     try:
-        # cards 테이블 삽입 쿼리
-        insert_card_query = """
+        # cards 테이블 업서트 쿼리 (다시 적재하면 기존 카드 정보를 갱신)
+        upsert_card_query = """
         INSERT INTO cards (card_id, card_name, corporate_name, benefits, image_url, card_type)
         VALUES (%s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            card_name = VALUES(card_name),
+            corporate_name = VALUES(corporate_name),
+            benefits = VALUES(benefits),
+            image_url = VALUES(image_url),
+            card_type = VALUES(card_type)
         """
         
-        # card_gorilla_data 테이블 삽입 쿼리
-        insert_gorilla_query = """
+        # card_gorilla_data 테이블 업서트 쿼리
+        upsert_gorilla_query = """
         INSERT INTO card_gorilla_data (card_id, detailed_benefits)
         VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE
+            detailed_benefits = VALUES(detailed_benefits)
         """
         
-        # 각 행 처리
-        for index, row in df.iterrows():
-            card_name = row.get('Card Name', '') 
-            if pd.isna(card_name):
-                card_name = f"Unknown Card {index}"  # 카드명이 없는 경우 기본값 설정
-                
-            corporate_name = row.get('Corporate Name', '')
-            if pd.isna(corporate_name):
-                corporate_name = "기타"  # 카드사명이 없는 경우 기본값 설정
-                
-            # 고유 ID 생성 (일련번호 기반)
-            card_id = f"CARD{str(index+1).zfill(3)}"
-            
-            # 혜택 정보
-            benefits = row.get('Benefits', '')
-            if pd.isna(benefits):
-                benefits = ''  # 혜택이 없는 경우 빈 문자열 처리
-                
-            # 이미지 URL
-            image_url = row.get('Image URLs', '')
-            if pd.isna(image_url):
-                image_url = ''  # 이미지 URL이 없는 경우 빈 문자열 처리
-            
-            # 카드 타입
-            card_type = row.get('Card Type', '신용카드')
-            if pd.isna(card_type):
-                card_type = '신용카드'  # 카드 타입이 없는 경우 기본값 설정
-                
-            # 상세 혜택 파싱
-            detailed_benefits = parse_benefits(benefits)
-            
-            # cards 테이블 데이터 삽입
-            card_data = (card_id, card_name, corporate_name, benefits, image_url, card_type)
-            execute_query(connection, insert_card_query, card_data)
-            
-            # card_gorilla_data 테이블 데이터 삽입
-            gorilla_data = (card_id, detailed_benefits)
-            execute_query(connection, insert_gorilla_query, gorilla_data)
+        start_time = time.perf_counter()
+        card_rows, gorilla_rows = build_card_rows(df)
+        build_seconds = time.perf_counter() - start_time
+        print(f"삽입 행 생성 완료: {len(card_rows)}개 카드 ({build_seconds:.2f}초)")
+        
+        total_cards = len(card_rows)
+        batches = (total_cards + batch_size - 1) // batch_size
+        inserted_cards = 0
+        
+        for batch_idx in range(batches):
+            start_idx = batch_idx * batch_size
+            end_idx = min(start_idx + batch_size, total_cards)
             
-        print("카드 데이터 삽입 완료")
+            # cards 를 먼저 저장해야 card_gorilla_data 외래 키가 성립
+            try:
+                execute_many_in_transaction(connection, [
+                    (upsert_card_query, card_rows[start_idx:end_idx]),
+                    (upsert_gorilla_query, gorilla_rows[start_idx:end_idx]),
+                ])
+                inserted_cards += end_idx - start_idx
+                print(f"카드 데이터 배치 저장: {end_idx - start_idx}개 ({batch_idx+1}/{batches})")
+            except Exception as e:
+                print(f"카드 데이터 배치 저장 오류 ({batch_idx+1}/{batches}): {str(e)}")
+        
+        elapsed = time.perf_counter() - start_time
+        print(f"카드 데이터 삽입 완료: {inserted_cards}/{total_cards}개 카드, {elapsed:.2f}초 "
+              f"(초당 {inserted_cards / max(elapsed, 1e-9):.0f}개 카드)")
+        return inserted_cards
                 
     except Exception as e:
         print(f"카드 데이터 삽입 오류: {str(e)}")
+        return 0
+
+# 엑셀 파일을 청크 단위로 읽으면서 카드 데이터 적재 (스트리밍 모드)
+def insert_card_data_streaming(connection, file_path, chunk_size=DEFAULT_STREAM_CHUNK_SIZE,
+                               cache_dir=DEFAULT_EXCEL_CACHE_DIR, batch_size=1000):
+    try:
+        start_time = time.perf_counter()
+        inserted_cards = 0
+        chunk_count = 0
+        for chunk in iter_excel_chunks(file_path, chunk_size, cache_dir):
+            inserted_cards += insert_card_data(connection, chunk, batch_size=batch_size)
+            chunk_count += 1
+        
+        elapsed = time.perf_counter() - start_time
+        print(f"스트리밍 적재 완료: {chunk_count}개 청크, {inserted_cards}개 카드, {elapsed:.2f}초 "
+              f"(초당 {inserted_cards / max(elapsed, 1e-9):.0f}개 카드)")
+        return True
+    except Exception as e:
+        print(f"엑셀 파일 스트리밍 적재 오류: {str(e)}")
+        return False
 
 # 테스트 사용자 추가
 def insert_test_users(connection):
     try:
-        # 사용자 테이블 삽입 쿼리
-        insert_user_query = """
+        # 사용자 테이블 업서트 쿼리
+        upsert_user_query = """
         INSERT INTO users (user_id, age, gender, income_level, job_category)
         VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            age = VALUES(age),
+            gender = VALUES(gender),
+            income_level = VALUES(income_level),
+            job_category = VALUES(job_category)
+        """
+        
+        # 소비 패턴은 자연 키가 없으므로 테스트 사용자의 기존 패턴을 지우고 다시 삽입
+        delete_consumption_query = """
+        DELETE FROM consumption_patterns WHERE user_id IN ({placeholders})
         """
         
         # 소비 패턴 테이블 삽입 쿼리
@@ -189,13 +432,15 @@ def insert_test_users(connection):
             ("user4", "편의점", 80000, "주 3회")
         ]
         
-        # 사용자 데이터 삽입
-        for user in test_users:
-            execute_query(connection, insert_user_query, user)
-            
-        # 소비 패턴 데이터 삽입
-        for pattern in test_consumption_patterns:
-            execute_query(connection, insert_consumption_query, pattern)
+        user_ids = [user[0] for user in test_users]
+        placeholders = ", ".join(["%s"] * len(user_ids))
+        
+        # 사용자 / 소비 패턴 데이터를 하나의 트랜잭션으로 삽입
+        execute_many_in_transaction(connection, [
+            (upsert_user_query, test_users),
+            (delete_consumption_query.format(placeholders=placeholders), [tuple(user_ids)]),
+            (insert_consumption_query, test_consumption_patterns),
+        ])
             
         print("테스트 사용자 및 소비 패턴 데이터 삽입 완료")
                 
@@ -215,6 +460,11 @@ def insert_test_recommendations(connection):
             
         card_ids = [result[0] for result in results]
         
+        # 테스트 사용자의 이전 추천 삭제 쿼리 (다시 실행해도 사용자별 5개 유지)
+        delete_rec_query = """
+        DELETE FROM recommendations WHERE user_id IN ({placeholders})
+        """
+        
         # 추천 테이블 삽입 쿼리
         insert_rec_query = """
         INSERT INTO recommendations (user_id, card_id, score, ranking)
@@ -223,6 +473,7 @@ def insert_test_recommendations(connection):
         
         # 테스트 사용자 ID
         user_ids = ["user1", "user2", "user3", "user4"]
+        rec_rows = []
         
         # 각 사용자별 5개의 카드 추천 생성
         for user_id in user_ids:
@@ -234,9 +485,14 @@ def insert_test_recommendations(connection):
                 # 점수는 0.7~0.95 사이 무작위 값 (순위가 높을수록 높은 점수)
                 score = round(np.random.uniform(0.7, 0.95), 2)
                 
-                # 추천 데이터 삽입
-                rec_data = (user_id, card_id, score, rank)
-                execute_query(connection, insert_rec_query, rec_data)
+                rec_rows.append((user_id, card_id, float(score), rank))
+        
+        # 추천 데이터를 하나의 트랜잭션으로 교체 삽입
+        placeholders = ", ".join(["%s"] * len(user_ids))
+        execute_many_in_transaction(connection, [
+            (delete_rec_query.format(placeholders=placeholders), [tuple(user_ids)]),
+            (insert_rec_query, rec_rows),
+        ])
                 
         print("테스트 추천 데이터 삽입 완료")
                 
@@ -245,20 +501,55 @@ def insert_test_recommendations(connection):
 
 # 메인 함수
 def main():
+    # 명령줄 인수 파서 설정
+    parser = argparse.ArgumentParser(description='카드 데이터 로더')
+    parser.add_argument('file_path', nargs='?', default='data/card_data_updated.xlsx',
+                        help='카드 데이터 엑셀 파일 경로 (기본값: data/card_data_updated.xlsx)')
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help='카드 배치(트랜잭션)당 행 수 (기본값: 1000)')
+    parser.add_argument('--cache-dir', default=DEFAULT_EXCEL_CACHE_DIR,
+                        help=f'파싱한 엑셀 시트의 Parquet 캐시 디렉터리 (기본값: {DEFAULT_EXCEL_CACHE_DIR})')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Parquet 캐시를 읽거나 만들지 않고 엑셀 파일을 직접 파싱')
+    parser.add_argument('--convert-only', action='store_true',
+                        help='엑셀 파일을 Parquet 캐시로 변환만 하고 DB 적재는 하지 않음')
+    parser.add_argument('--streaming', action='store_true',
+                        help='대용량 시트를 읽기 전용 모드로 청크 단위로 읽어 적재')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_STREAM_CHUNK_SIZE,
+                        help=f'스트리밍 모드의 청크당 행 수 (기본값: {DEFAULT_STREAM_CHUNK_SIZE})')
+    args = parser.parse_args()
+    
     # 엑셀 파일 경로
-    excel_file = "data/card_data_updated.xlsx"
+    excel_file = args.file_path
+    cache_dir = None if args.no_cache else args.cache_dir
+    
+    # 캐시 변환만 수행
+    if args.convert_only:
+        if args.streaming:
+            for _ in iter_excel_chunks(excel_file, args.chunk_size, cache_dir):
+                pass
+        else:
+            read_excel_data(excel_file, cache_dir)
+        return
     
     # DB 연결
     connection = create_db_connection()
     
     if connection:
-        # 엑셀 데이터 읽기
-        df = read_excel_data(excel_file)
-        
-        if df is not None:
-            # 카드 데이터 삽입
-            insert_card_data(connection, df)
+        if args.streaming:
+            # 청크 단위로 읽고 바로 적재 (전체 시트를 메모리에 올리지 않음)
+            loaded = insert_card_data_streaming(connection, excel_file, chunk_size=args.chunk_size,
+                                                cache_dir=cache_dir, batch_size=args.batch_size)
+        else:
+            # 엑셀 데이터 읽기
+            df = read_excel_data(excel_file, cache_dir)
+            loaded = df is not None
             
+            if loaded:
+                # 카드 데이터 삽입
+                insert_card_data(connection, df, batch_size=args.batch_size)
+        
+        if loaded:
             # 테스트 사용자 데이터 삽입
             insert_test_users(connection)
             
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+온라인 추천 경로 핫 쿼리 실행 계획 점검 도구.
+
+recommendation_queries.HOT_QUERIES 의 각 쿼리에 대해 EXPLAIN 을 실행하고,
+전체 테이블 스캔(type=ALL) 또는 전체 인덱스 스캔(type=index)이 있으면
+실패(종료 코드 1)합니다. docker-compose MySQL 에 대해 실행합니다.
+
+    python scripts/check_query_plans.py
+    python scripts/check_query_plans.py --user-id user1 --seq-id 0003UZ715F1AVTCFVTLJ
+"""
+
+import os
+import sys
+import argparse
+import mysql.connector
+from dotenv import load_dotenv
+
+# 프로젝트 루트 모듈(recommendation_queries) 임포트를 위한 경로 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommendation_queries import HOT_QUERIES
+
+# 환경 변수 로드
+load_dotenv()
+
+# 전체 스캔으로 간주하는 EXPLAIN access type
+FULL_SCAN_TYPES = {"ALL", "index"}
+
+
+# 점검에 사용할 샘플 ID 조회 (테이블이 비어 있으면 더미 값 사용)
+def fetch_sample_ids(cursor):
+    sample_ids = {"seq_id": "0003UZ715F1AVTCFVTLJ", "user_id": "user1"}
+
+    cursor.execute("SELECT seq_id FROM user_transactions LIMIT 1")
+    row = cursor.fetchone()
+    if row:
+        sample_ids["seq_id"] = row["seq_id"]
+
+    cursor.execute("SELECT user_id FROM users LIMIT 1")
+    row = cursor.fetchone()
+    if row:
+        sample_ids["user_id"] = row["user_id"]
+
+    return sample_ids
+
+
+# 단일 쿼리 실행 계획 점검
+def check_query_plan(cursor, name, query, param):
+    """
+    EXPLAIN 결과에서 전체 스캔 여부 확인
+
+    Args:
+        cursor: dictionary 커서
+        name: 쿼리 이름
+        query: 점검할 쿼리
+        param: 쿼리 파라미터 값
+
+    Returns:
+        List: 발견된 문제 목록 (없으면 빈 리스트)
+    """
+    cursor.execute("EXPLAIN " + query.strip(), (param,))
+    plan_rows = cursor.fetchall()
+
+    problems = []
+    print(f"\n[{name}]")
+    for row in plan_rows:
+        access_type = row.get("type")
+        extra = row.get("Extra") or ""
+        print(f"  table={row.get('table')} type={access_type} key={row.get('key')} "
+              f"rows={row.get('rows')} extra={extra}")
+
+        if access_type in FULL_SCAN_TYPES:
+            problems.append(f"{name}: {row.get('table')} 테이블 전체 스캔 (type={access_type})")
+        if "filesort" in extra:
+            print("  경고: filesort 발생 - 정렬 컬럼이 인덱스에 포함되어 있는지 확인하세요.")
+
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='핫 쿼리 실행 계획 점검 도구')
+    parser.add_argument('--user-id', help='users 테이블 사용자 ID (기본값: 테이블의 첫 사용자)')
+    parser.add_argument('--seq-id', help='user_transactions 사용자 ID (기본값: 테이블의 첫 사용자)')
+    args = parser.parse_args()
+
+    # MySQL 설정
+    mysql_config = {
+        "host": os.getenv("MYSQL_HOST", "127.0.0.1"),
+        "port": int(os.getenv("MYSQL_PORT", "3307")),
+        "user": os.getenv("MYSQL_USER", "recommendation_team"),
+        "password": os.getenv("MYSQL_PASSWORD", ""),
+        "database": os.getenv("MYSQL_DATABASE", "card_recommendation")
+    }
+
+    connection = mysql.connector.connect(**mysql_config)
+    cursor = connection.cursor(dictionary=True)
+
+    try:
+        sample_ids = fetch_sample_ids(cursor)
+        if args.user_id:
+            sample_ids["user_id"] = args.user_id
+        if args.seq_id:
+            sample_ids["seq_id"] = args.seq_id
+
+        problems = []
+        for name, (query, param_key) in HOT_QUERIES.items():
+            problems.extend(check_query_plan(cursor, name, query, sample_ids[param_key]))
+    finally:
+        cursor.close()
+        connection.close()
+
+    if problems:
+        print("\n==== 실행 계획 점검 실패 ====")
+        for problem in problems:
+            print(f"- {problem}")
+        print("migrations/001_add_hot_query_indexes.sql 적용 여부를 확인하세요.")
+        return 1
+
+    print(f"\n==== 실행 계획 점검 통과: {len(HOT_QUERIES)}개 쿼리 ====")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
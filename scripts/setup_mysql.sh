@@ -36,6 +36,7 @@ CREATE TABLE IF NOT EXISTS consumption_patterns (
   category VARCHAR(50),
   amount DECIMAL(10,2),
   frequency VARCHAR(20),
+  INDEX idx_consumption_patterns_user_amount (user_id, amount, category, frequency),
   FOREIGN KEY (user_id) REFERENCES users(user_id)
 );
 -- 카드 테이블
@@ -60,6 +61,7 @@ CREATE TABLE IF NOT EXISTS recommendations (
   card_id VARCHAR(50),
   score FLOAT,
   ranking INT,
+  INDEX idx_recommendations_user_ranking (user_id, ranking, card_id, score),
   FOREIGN KEY (user_id) REFERENCES users(user_id),
   FOREIGN KEY (card_id) REFERENCES cards(card_id)
 );
@@ -71,6 +73,7 @@ CREATE TABLE IF NOT EXISTS user_recommendations (
   recommendation_score FLOAT,
   recommendation_reason TEXT,
   created_at DATETIME,
+  INDEX idx_user_recommendations_user_card (user_id, card_id),
   FOREIGN KEY (user_id) REFERENCES users(user_id),
   FOREIGN KEY (card_id) REFERENCES cards(card_id)
 );
@@ -134,6 +137,33 @@ CREATE TABLE IF NOT EXISTS user_transactions (
   month_diff INT,
   top_spending_category INT
 );
+-- 신규: 사용자 프로필 캐시 테이블 (transaction_data_loader.py 가 적재 시 갱신)
+CREATE TABLE IF NOT EXISTS user_profile_cache (
+  user_id VARCHAR(50) PRIMARY KEY,
+  age_label VARCHAR(10),
+  gender VARCHAR(10),
+  income_level VARCHAR(20),
+  job_category VARCHAR(50),
+  spending_pattern VARCHAR(255),
+  total_usage_amount DECIMAL(10,2),
+  restaurant_amount DECIMAL(12,2),
+  restaurant_ratio DECIMAL(6,1),
+  clothing_amount DECIMAL(12,2),
+  clothing_ratio DECIMAL(6,1),
+  travel_amount DECIMAL(12,2),
+  travel_ratio DECIMAL(6,1),
+  grocery_amount DECIMAL(12,2),
+  grocery_ratio DECIMAL(6,1),
+  auto_amount DECIMAL(12,2),
+  auto_ratio DECIMAL(6,1),
+  hotel_amount DECIMAL(12,2),
+  hotel_ratio DECIMAL(6,1),
+  culture_amount DECIMAL(12,2),
+  culture_ratio DECIMAL(6,1),
+  home_amount DECIMAL(12,2),
+  home_ratio DECIMAL(6,1),
+  updated_at DATETIME
+);
 -- 신규: 카테고리 매핑 테이블
 CREATE TABLE IF NOT EXISTS category_mappings (
   category_id INT PRIMARY KEY,
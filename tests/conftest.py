@@ -0,0 +1,10 @@
+"""
+단위 테스트 공용 설정.
+
+프로젝트 루트의 모듈(llm_guard.py 등)을 패키지 설치 없이 임포트할 수 있도록 경로를 추가합니다.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,98 @@
+"""혜택 청크 생성 및 카드별 점수 집계 테스트"""
+
+import numpy as np
+import pytest
+from langchain.schema import Document
+
+from chunk_index import (
+    AGGREGATE_MAX,
+    AGGREGATE_SUM,
+    aggregate_chunk_scores,
+    benefit_chunks,
+    build_chunk_documents,
+)
+
+
+def _parse_benefits(text):
+    """'카테고리:설명' 을 '/' 로 구분한 가짜 혜택 파서"""
+    benefits = []
+    for item in filter(None, (part.strip() for part in text.split("/"))):
+        category, _, description = item.partition(":")
+        benefits.append({"category": category, "description": description})
+    return benefits
+
+
+def _reference(card_positions, similarities, method):
+    """카드별 점수를 파이썬 반복으로 직접 집계"""
+    scores = {}
+    for pos, sim in zip(card_positions.tolist(), similarities.tolist()):
+        if method == AGGREGATE_SUM:
+            scores[pos] = scores.get(pos, 0.0) + sim
+        else:
+            scores[pos] = max(scores.get(pos, sim), sim)
+    return scores
+
+
+@pytest.mark.parametrize("method", [AGGREGATE_MAX, AGGREGATE_SUM])
+def test_aggregate_matches_reference(method):
+    rng = np.random.default_rng(0)
+    n_cards, top_k = 40, 10
+    card_positions = rng.integers(0, n_cards, 200)
+    similarities = rng.random(200)
+
+    positions, scores = aggregate_chunk_scores(card_positions, similarities, n_cards, top_k, method)
+
+    reference = _reference(card_positions, similarities, method)
+    expected = sorted(reference.values(), reverse=True)[:top_k]
+    assert len(positions) == top_k
+    assert scores.tolist() == pytest.approx(expected)
+    for pos, score in zip(positions.tolist(), scores.tolist()):
+        assert reference[pos] == pytest.approx(score)
+
+
+def test_max_prefers_single_best_chunk_and_sum_prefers_many_matches():
+    # 카드 0: 아주 잘 맞는 혜택 1개, 카드 1: 적당히 맞는 혜택 3개
+    card_positions = np.array([0, 1, 1, 1])
+    similarities = np.array([0.9, 0.5, 0.5, 0.5])
+
+    positions, _ = aggregate_chunk_scores(card_positions, similarities, 2, 2, AGGREGATE_MAX)
+    assert positions.tolist() == [0, 1]
+    positions, scores = aggregate_chunk_scores(card_positions, similarities, 2, 2, AGGREGATE_SUM)
+    assert positions.tolist() == [1, 0]
+    assert scores.tolist() == pytest.approx([1.5, 0.9])
+
+
+def test_aggregate_returns_fewer_cards_than_top_k():
+    positions, scores = aggregate_chunk_scores(np.array([3, 3]), np.array([0.2, 0.4]), 5, 10)
+    assert positions.tolist() == [3]
+    assert scores.tolist() == pytest.approx([0.4])
+
+
+def test_aggregate_empty_and_invalid_method():
+    positions, scores = aggregate_chunk_scores(np.array([], dtype=np.int64), np.array([]), 5, 3)
+    assert len(positions) == 0 and len(scores) == 0
+    with pytest.raises(ValueError):
+        aggregate_chunk_scores(np.array([0]), np.array([1.0]), 1, 1, "mean")
+
+
+def test_benefit_chunks_include_header_and_skip_duplicates():
+    metadata = {
+        "card_name": "테스트카드", "corporate_name": "신한카드", "card_type": "신용카드",
+        "benefits": "카페:스타벅스 50% 할인/주유:리터당 100원",
+        "detailed_benefits": "카페:스타벅스 50% 할인/영화",
+    }
+    chunks = benefit_chunks(metadata, _parse_benefits)
+    assert len(chunks) == 3
+    assert all(chunk.startswith("카드명: 테스트카드\n카드사: 신한카드\n카드 타입: 신용카드\n") for chunk in chunks)
+    assert chunks[0].endswith("혜택: 카페: 스타벅스 50% 할인\n")
+    assert chunks[2].endswith("혜택: 영화\n")
+
+
+def test_build_chunk_documents_falls_back_to_card_text():
+    cards = [
+        Document(page_content="카드 A", metadata={"card_id": "A", "benefits": "카페:할인/주유:적립"}),
+        Document(page_content="카드 B 전체 텍스트", metadata={"card_id": "B", "benefits": ""}),
+    ]
+    chunks = build_chunk_documents(cards, _parse_benefits)
+    assert [(doc.metadata["card_id"], doc.metadata["chunk_no"]) for doc in chunks] == [("A", 0), ("A", 1), ("B", 0)]
+    assert chunks[2].page_content == "카드 B 전체 텍스트"
@@ -0,0 +1,93 @@
+"""코드 -> 라벨 조회 테이블 테스트"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from code_mappings import (
+    AGE_GROUP,
+    DEFAULT_AGE,
+    DEFAULT_CODE_LABELS,
+    GENDER,
+    SPENDING_CATEGORY,
+    CodeMappings,
+    CodeTable,
+    category_id_offset,
+    load_code_mappings,
+)
+
+
+def test_decode_matches_scalar_get():
+    table = CodeTable({0: "여성", 1: "남성", 5: "기타"}, "미상")
+    codes = [0, 1, "1", 2.0, 5, 6, -1, 1.5, None, np.nan, "abc", "5"]
+    decoded = table.decode(codes)
+    assert decoded.tolist() == [table.get(code) for code in codes]
+    assert decoded.tolist() == ["여성", "남성", "남성", "미상", "기타", "미상", "미상", "미상",
+                                "미상", "미상", "미상", "기타"]
+
+
+def test_decode_accepts_series_and_keeps_numeric_dtype():
+    table = CodeTable({0: 20, 1: 30}, DEFAULT_AGE)
+    decoded = table.decode(pd.Series([1, 0, 7, None]))
+    assert decoded.dtype.kind in "if"
+    assert decoded.tolist() == [30, 20, DEFAULT_AGE, DEFAULT_AGE]
+
+
+def test_empty_table_returns_default():
+    table = CodeTable({}, "기본")
+    assert table.decode([0, 3]).tolist() == ["기본", "기본"]
+    assert table.get(0) == "기본"
+
+
+def test_get_with_explicit_default():
+    table = CodeTable({0: "a"}, "x")
+    assert table.get(9, "y") == "y"
+
+
+def test_mappings_fill_missing_types_from_defaults():
+    mappings = CodeMappings({GENDER: {0: "F", 1: "M"}})
+    assert mappings.gender.decode([1, 0]).tolist() == ["M", "F"]
+    assert mappings.spending_category.labels == DEFAULT_CODE_LABELS[SPENDING_CATEGORY]
+    assert mappings.age_label.decode([0, 9]).tolist() == ["20대", f"{DEFAULT_AGE}대"]
+    assert mappings.income_level.decode([0, 3, 4]).tolist() == ["상위", "중간", "낮음"]
+
+
+class _Cursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def execute(self, query):
+        pass
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class _Connection:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def cursor(self):
+        return _Cursor(self.rows)
+
+
+def test_load_code_mappings_removes_category_id_offsets():
+    rows = [
+        (category_id_offset(AGE_GROUP) + 0, "20대", AGE_GROUP),
+        (category_id_offset(AGE_GROUP) + 1, "30대", AGE_GROUP),
+        (category_id_offset(SPENDING_CATEGORY) + 11, "카페/식당", SPENDING_CATEGORY),
+    ]
+    mappings = load_code_mappings(_Connection(rows))
+    assert mappings.tables[AGE_GROUP].labels == {0: "20대", 1: "30대"}
+    assert mappings.spending_category.decode([11, 1]).tolist() == ["카페/식당", "기타"]
+    assert load_code_mappings(_Connection([])) is None
+
+
+@pytest.mark.parametrize("mapping_type", list(DEFAULT_CODE_LABELS))
+def test_default_tables_decode_every_code(mapping_type):
+    labels = DEFAULT_CODE_LABELS[mapping_type]
+    table = CodeMappings().tables[mapping_type]
+    assert table.decode(list(labels)).tolist() == list(labels.values())
@@ -0,0 +1,89 @@
+"""UserFeatureStore 조회 테스트 (프로필 캐시 계산 결과와 같은 행을 반환하는지)"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from code_mappings import CodeMappings
+from feature_store import CURRENT_FILE, UserFeatureStore, write_feature_store
+from profile_features import (
+    PROFILE_CACHE_COLUMNS,
+    SOURCE_COLUMNS,
+    build_profile_cache_frame,
+    cache_frame_to_rows,
+    insights_from_cache_row,
+    profile_from_cache_row,
+)
+
+
+def _transactions(count: int, seed: int = 0) -> pd.DataFrame:
+    """가짜 user_transactions 행 (결측 금액 포함)"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        col: rng.integers(0, 500000, count).astype(float) for col in SOURCE_COLUMNS
+    })
+    df["seq_id"] = [f"SEQ{seed:02d}{i:020d}" for i in range(count)]
+    df["age_group"] = rng.integers(0, 7, count)
+    df["gender"] = rng.integers(0, 2, count)
+    df["member_rank"] = rng.integers(0, 6, count)
+    df.loc[df.index[::7], "hotel_amount"] = np.nan
+    df.loc[df.index[::11], "total_usage_amount"] = np.nan
+    return df
+
+
+@pytest.fixture
+def cache():
+    # 섞인 순서로 저장해도 정렬 후 이진 탐색으로 찾아야 함
+    return build_profile_cache_frame(_transactions(300), CodeMappings()).sample(frac=1, random_state=1)
+
+
+def test_rows_match_profile_cache(tmp_path, cache):
+    write_feature_store(cache, str(tmp_path))
+    store = UserFeatureStore(str(tmp_path))
+    assert store.rows == len(cache)
+
+    for expected in cache_frame_to_rows(cache):
+        expected = dict(zip(PROFILE_CACHE_COLUMNS, expected))
+        row = store.get_row(expected["user_id"])
+        assert row == pytest.approx(expected)
+        assert store.get_profile(expected["user_id"]) == profile_from_cache_row(row)
+        assert store.get_spending_insights(expected["user_id"]) == insights_from_cache_row(row)
+
+
+def test_missing_and_oversized_ids_return_none(tmp_path, cache):
+    write_feature_store(cache, str(tmp_path))
+    store = UserFeatureStore(str(tmp_path))
+
+    assert store.get_row("SEQ_UNKNOWN") is None
+    assert store.get_profile("") is None
+    assert store.get_row("X" * 200) is None
+
+
+def test_empty_directory_has_no_rows(tmp_path):
+    store = UserFeatureStore(str(tmp_path))
+    assert store.rows == 0
+    assert store.get_row("SEQ00") is None
+
+
+def test_refresh_switches_to_new_version_and_prunes_old(tmp_path, cache):
+    store_dir = str(tmp_path)
+    write_feature_store(cache, store_dir)
+    store = UserFeatureStore(store_dir, check_interval=0)
+    old_user = cache["user_id"].iloc[0]
+
+    newer = build_profile_cache_frame(_transactions(50, seed=1), CodeMappings())
+    for _ in range(3):
+        write_feature_store(newer, store_dir, keep_versions=1)
+
+    new_user = newer["user_id"].iloc[0]
+    assert store.get_row(new_user)["user_id"] == new_user
+    assert store.get_row(old_user) is None
+    assert store.rows == len(newer)
+
+    with open(os.path.join(store_dir, CURRENT_FILE), encoding="utf-8") as f:
+        current = f.read().strip()
+    versions = sorted(name for name in os.listdir(store_dir) if name.startswith("v"))
+    assert len(versions) == 2
+    assert versions[-1] == current
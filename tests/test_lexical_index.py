@@ -0,0 +1,100 @@
+"""BM25 어휘 검색 및 점수 결합 테스트"""
+
+import math
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from lexical_index import LexicalIndex, fuse_scores, is_keyword_query, tokenize
+
+CARD_TEXTS = {
+    "c1": "스타벅스에서 결제 시 50% 할인, 커피 전문점 적립",
+    "c2": "GS25 편의점 10% 할인 및 CU 5% 할인",
+    "c3": "대중교통 할인과 해외 결제 수수료 면제",
+    "c4": "스타벅스 사이렌오더 적립 및 영화관 CGV 할인",
+    "c5": "주유소 리터당 100원 할인",
+}
+
+
+@pytest.fixture
+def index():
+    return LexicalIndex(list(CARD_TEXTS), list(CARD_TEXTS.values()))
+
+
+def _bm25_reference(texts, query, k1=1.2, b=0.75):
+    """문서마다 직접 계산한 BM25 점수 (색인 결과 검증용)"""
+    docs = [Counter(tokenize(text)) for text in texts]
+    avg_length = sum(sum(d.values()) for d in docs) / len(docs)
+    scores = []
+    for doc in docs:
+        length = sum(doc.values())
+        score = 0.0
+        for term in set(tokenize(query)):
+            df = sum(1 for d in docs if term in d)
+            if term not in doc:
+                continue
+            idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+            tf = doc[term]
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg_length))
+        scores.append(score)
+    return scores
+
+
+def test_tokenize_words_and_hangul_bigrams():
+    assert tokenize("스타벅스에서 GS25") == ["스타벅스에서", "스타", "타벅", "벅스", "스에", "에서", "gs25"]
+    assert tokenize("") == []
+
+
+def test_is_keyword_query():
+    assert is_keyword_query("스타벅스")
+    assert is_keyword_query("GS25 편의점")
+    assert not is_keyword_query("해외여행 많이 가는 직장인에게 맞는 카드")
+    assert not is_keyword_query("   ")
+
+
+def test_merchant_query_matches_with_particles(index):
+    ids = [doc_id for doc_id, _ in index.search("스타벅스")]
+    assert set(ids[:2]) == {"c1", "c4"}
+    assert [doc_id for doc_id, _ in index.search("gs25")] == ["c2"]
+
+
+@pytest.mark.parametrize("query", ["스타벅스 할인", "편의점 적립", "해외 결제", "영화 CGV"])
+def test_scores_match_reference_bm25(index, query):
+    expected = _bm25_reference(list(CARD_TEXTS.values()), query)
+    found = dict(index.search(query, top_k=len(CARD_TEXTS)))
+    for doc_id, score in zip(CARD_TEXTS, expected):
+        assert found.get(doc_id, 0.0) == pytest.approx(score)
+
+
+def test_search_respects_mask_and_top_k(index):
+    mask = np.array([False, True, True, True, True])
+    ids = [doc_id for doc_id, _ in index.search("스타벅스 할인", mask=mask)]
+    assert "c1" not in ids
+    assert ids[0] == "c4"
+
+    top = index.search("할인", top_k=2)
+    assert len(top) == 2
+    assert top[0][1] >= top[1][1]
+    assert index.search("존재하지않는단어") == []
+
+
+def test_fuse_scores_weights_normalized_scores():
+    lexical = {"a": 10.0, "b": 5.0}
+    dense = {"b": 0.8, "c": 0.4}
+    fused = dict(fuse_scores(lexical, dense, lexical_weight=0.5))
+    assert fused["a"] == pytest.approx(0.5)
+    assert fused["b"] == pytest.approx(0.5 * 0.5 + 0.5 * 1.0)
+    assert fused["c"] == pytest.approx(0.5 * 0.5)
+    assert [key for key, _ in fuse_scores(lexical, dense, 0.5)] == ["b", "a", "c"]
+
+
+def test_fuse_scores_falls_back_to_available_side():
+    # 한쪽 점수가 없으면 다른 쪽 점수만으로 0~1 정규화
+    assert fuse_scores({}, {"a": 0.2, "b": 0.4}, 0.7) == [("b", 1.0), ("a", 0.5)]
+    assert fuse_scores({"a": 3.0}, {}, 0.2) == [("a", 1.0)]
+    assert fuse_scores({}, {}, 0.5) == []
+
+
+def test_fuse_scores_ties_are_ordered_by_id():
+    assert [key for key, _ in fuse_scores({"b": 1.0, "a": 1.0}, {}, 0.5)] == ["a", "b"]
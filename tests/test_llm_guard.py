@@ -0,0 +1,160 @@
+"""LLMGuard / CircuitBreaker 동작 테스트"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from llm_guard import (
+    CIRCUIT_CLOSED,
+    CIRCUIT_HALF_OPEN,
+    CIRCUIT_OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    LLMDeadlineExceeded,
+    LLMGuard,
+    LLMPoolExhausted,
+)
+
+
+@pytest.fixture
+def release():
+    """멈춰 있는 가짜 LLM 호출을 테스트 종료 시 풀어 주는 이벤트"""
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def test_call_returns_result_and_closes_circuit():
+    guard = LLMGuard(deadline=1.0)
+    try:
+        assert guard.call(lambda x: x * 2, 21) == 42
+        assert guard.breaker.state == CIRCUIT_CLOSED
+        assert guard.breaker.consecutive_failures == 0
+    finally:
+        guard.close()
+
+
+def test_call_deadline_counts_failure(release):
+    guard = LLMGuard(deadline=0.05, breaker=CircuitBreaker(failure_threshold=5))
+    try:
+        with pytest.raises(LLMDeadlineExceeded):
+            guard.call(release.wait)
+        assert guard.breaker.consecutive_failures == 1
+    finally:
+        guard.close()
+
+
+def test_call_error_is_reraised_and_counted():
+    guard = LLMGuard(deadline=1.0)
+
+    def fail():
+        raise ValueError("upstream")
+
+    try:
+        with pytest.raises(ValueError):
+            guard.call(fail)
+        assert guard.breaker.consecutive_failures == 1
+    finally:
+        guard.close()
+
+
+def test_circuit_opens_and_rejects():
+    guard = LLMGuard(deadline=1.0, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+
+    def fail():
+        raise RuntimeError("upstream")
+
+    try:
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                guard.call(fail)
+        assert guard.breaker.state == CIRCUIT_OPEN
+        with pytest.raises(CircuitOpenError):
+            guard.call(lambda: "ok")
+    finally:
+        guard.close()
+
+
+def test_pool_exhausted_rejects_without_tripping_breaker(release):
+    guard = LLMGuard(deadline=0.05, max_workers=1, breaker=CircuitBreaker(failure_threshold=2))
+    try:
+        # 포기한 호출이 유일한 스레드를 점유
+        with pytest.raises(LLMDeadlineExceeded):
+            guard.call(release.wait)
+
+        # 큐에서 기다리며 제한 시간을 소모하지 않고 즉시 거절, 실패로 계산하지 않음
+        start = time.perf_counter()
+        with pytest.raises(LLMPoolExhausted):
+            guard.call(lambda: "ok")
+        assert time.perf_counter() - start < 0.05
+        assert guard.breaker.consecutive_failures == 1
+        assert guard.breaker.state == CIRCUIT_CLOSED
+
+        # 점유한 호출이 끝나면 슬롯이 반환됨
+        release.set()
+        deadline = time.monotonic() + 1.0
+        while time.monotonic() < deadline:
+            try:
+                assert guard.call(lambda: "ok") == "ok"
+                break
+            except LLMPoolExhausted:
+                time.sleep(0.01)
+        else:
+            pytest.fail("스레드 슬롯이 반환되지 않았습니다.")
+    finally:
+        guard.close()
+
+
+def test_half_open_probe_released_when_submit_fails():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    guard = LLMGuard(deadline=1.0, breaker=breaker)
+    breaker.record_failure()
+    assert breaker.state == CIRCUIT_OPEN
+
+    class BrokenExecutor:
+        def submit(self, *args, **kwargs):
+            raise RuntimeError("cannot schedule new futures after shutdown")
+
+    guard._get_executor = lambda: BrokenExecutor()
+    with pytest.raises(RuntimeError):
+        guard.call(lambda: "ok")
+
+    # 시험 호출 슬롯이 반환되어 다음 호출이 시험 호출로 허용됨
+    assert breaker.state == CIRCUIT_HALF_OPEN
+    assert breaker.allow()
+
+
+def test_hedged_request_returns_first_success(release):
+    guard = LLMGuard(deadline=1.0, hedge_quantile=0.5, hedge_min_samples=1)
+    guard.latencies.add(0.01)
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait()
+            return "slow"
+        return "hedged"
+
+    try:
+        assert guard.call(fn) == "hedged"
+        assert len(calls) == 2
+    finally:
+        guard.close()
+
+
+def test_acall_deadline_and_success():
+    guard = LLMGuard(deadline=0.05)
+
+    async def slow():
+        await asyncio.sleep(1.0)
+
+    async def fast():
+        return "ok"
+
+    with pytest.raises(LLMDeadlineExceeded):
+        asyncio.run(guard.acall(slow))
+    assert asyncio.run(guard.acall(fast)) == "ok"
+    assert guard.breaker.consecutive_failures == 0
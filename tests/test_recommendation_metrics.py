@@ -0,0 +1,52 @@
+"""트레이스 스팬 수집 테스트"""
+
+import threading
+
+import pytest
+
+from recommendation_metrics import MetricsRegistry, collect_spans, trace_span
+
+
+def test_collect_spans_records_nested_spans_in_finish_order():
+    registry = MetricsRegistry()
+    with collect_spans() as spans:
+        with trace_span("process_user_query", registry):
+            with trace_span("user_profile", registry):
+                pass
+            with trace_span("db.connect", registry):
+                pass
+            with trace_span("db.connect", registry):
+                pass
+
+    assert [name for name, _ in spans] == ["user_profile", "db.connect", "db.connect", "process_user_query"]
+    total = dict(spans)["process_user_query"]
+    assert all(0 <= duration <= total for _, duration in spans)
+
+
+def test_collect_spans_records_failed_spans_and_stops_after_block():
+    registry = MetricsRegistry()
+    with collect_spans() as spans:
+        with pytest.raises(ValueError):
+            with trace_span("llm", registry):
+                raise ValueError("upstream")
+    with trace_span("after", registry):
+        pass
+
+    assert [name for name, _ in spans] == ["llm"]
+
+
+def test_collect_spans_ignores_other_threads():
+    registry = MetricsRegistry()
+
+    def other():
+        with trace_span("other_thread", registry):
+            pass
+
+    with collect_spans() as spans:
+        thread = threading.Thread(target=other)
+        thread.start()
+        thread.join()
+        with trace_span("mine", registry):
+            pass
+
+    assert [name for name, _ in spans] == ["mine"]
@@ -0,0 +1,111 @@
+"""추천 결과 write-behind 저장기 재시도/분할 저장 테스트 (가짜 MySQL 연결 사용)"""
+
+import pytest
+from mysql.connector import errorcode, errors
+
+import recommendation_writer
+from recommendation_metrics import REGISTRY
+from recommendation_writer import RecommendationWriteBehind, is_retryable_error
+
+
+class _FakeDatabase:
+    """user_recommendations 대신 사용자별 행을 저장하는 가짜 DB"""
+
+    def __init__(self, connect_failures=0, bad_users=()):
+        self.connect_failures = connect_failures
+        self.bad_users = set(bad_users)
+        self.connects = 0
+        self.rows = {}
+
+    def connect(self, **config):
+        self.connects += 1
+        if self.connects <= self.connect_failures:
+            raise errors.InterfaceError("connection refused")
+        return _FakeConnection(self)
+
+
+class _FakeConnection:
+    def __init__(self, database):
+        self.database = database
+        self.pending = {}
+
+    def cursor(self):
+        return _FakeCursor(self)
+
+    def commit(self):
+        self.database.rows.update(self.pending)
+
+    def rollback(self):
+        self.pending = {}
+
+    def close(self):
+        pass
+
+
+class _FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, query, params=None):
+        pass
+
+    def executemany(self, query, rows):
+        if any(row[0] in self.connection.database.bad_users for row in rows):
+            raise errors.DataError("Data too long for column 'recommendation_reason'")
+        for row in rows:
+            self.connection.pending.setdefault(row[0], []).append(row)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def database(monkeypatch):
+    def install(**kwargs):
+        db = _FakeDatabase(**kwargs)
+        monkeypatch.setattr(recommendation_writer.mysql.connector, "connect", db.connect)
+        return db
+    return install
+
+
+def _write(users, **options):
+    writer = RecommendationWriteBehind({}, flush_interval=0.05, retry_backoff=0.001, **options)
+    for user_id in users:
+        writer.submit(user_id, [{"card_id": 1, "recommendation_score": 0.5}])
+    writer.close()
+    return writer
+
+
+def test_transient_errors_are_retried(database):
+    db = database(connect_failures=2)
+    writer = _write(["a", "b", "c"])
+    assert set(db.rows) == {"a", "b", "c"}
+    assert writer.failed_batches == 0
+
+
+def test_bad_row_only_drops_its_user(database):
+    REGISTRY.reset()
+    db = database(bad_users={"c"})
+    writer = _write(["a", "b", "c", "d", "e"])
+    assert set(db.rows) == {"a", "b", "d", "e"}
+    assert writer.failed_batches == 1
+    assert writer.failed_users == 1
+    assert "card_rec_writer_failed_batches_total 1" in REGISTRY.render_prometheus()
+
+
+def test_batch_fails_after_retries_are_exhausted(database):
+    db = database(connect_failures=100)
+    writer = _write(["a", "b"], max_retries=2)
+    assert db.rows == {}
+    assert db.connects == 3
+    assert writer.failed_batches == 1
+    assert writer.failed_users == 2
+
+
+def test_retryable_error_classification():
+    assert is_retryable_error(errors.OperationalError("lost connection"))
+    assert is_retryable_error(errors.DatabaseError("deadlock", errno=errorcode.ER_LOCK_DEADLOCK))
+    assert is_retryable_error(ConnectionResetError())
+    assert not is_retryable_error(errors.DataError("too long"))
+    assert not is_retryable_error(errors.IntegrityError("duplicate", errno=errorcode.ER_DUP_ENTRY))
+    assert not is_retryable_error(ValueError("bad"))
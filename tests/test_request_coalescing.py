@@ -0,0 +1,120 @@
+"""SingleFlight / AsyncSingleFlight 요청 병합 테스트"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from request_coalescing import AsyncSingleFlight, SingleFlight, request_key
+
+
+def test_request_key_normalizes_query():
+    assert request_key(" user1 ", "  카페   혜택 CARD ") == request_key("user1", "카페 혜택 card")
+    assert request_key("user1", "카페") != request_key("user2", "카페")
+
+
+def _run_concurrently(flight, key, fn, count):
+    """같은 키로 count 개 스레드가 동시에 do 호출 (리더가 계산 중일 때 모두 합류)"""
+    results, errors = [], []
+
+    def worker():
+        try:
+            results.append(flight.do(key, fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def _wait_for_waiters(flight, key, count, timeout=5.0):
+    """리더의 계산에 대기자 count 명이 합류할 때까지 대기"""
+    deadline = time.monotonic() + timeout
+    while flight._calls[key].waiters < count:
+        assert time.monotonic() < deadline, "대기자가 합류하지 않았습니다."
+        time.sleep(0.001)
+
+
+def test_concurrent_calls_share_one_computation():
+    flight = SingleFlight("test")
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"cards": [1, 2]}
+
+    leader, leader_results, _ = _run_concurrently(flight, "k", compute, 1)
+    assert started.wait(5)
+    followers, follower_results, _ = _run_concurrently(flight, "k", compute, 4)
+
+    # 대기자가 모두 합류한 뒤 리더 완료
+    _wait_for_waiters(flight, "k", 4)
+    release.set()
+    for thread in leader + followers:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert leader_results + follower_results == [{"cards": [1, 2]}] * 5
+    assert flight.in_flight() == 0
+
+
+def test_leader_error_propagates_to_waiters_and_is_not_cached():
+    flight = SingleFlight("test")
+    started, release = threading.Event(), threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise ValueError("db down")
+
+    leader, _, leader_errors = _run_concurrently(flight, "k", fail, 1)
+    assert started.wait(5)
+    followers, _, follower_errors = _run_concurrently(flight, "k", fail, 2)
+    _wait_for_waiters(flight, "k", 2)
+    release.set()
+    for thread in leader + followers:
+        thread.join(5)
+
+    assert [type(e) for e in leader_errors + follower_errors] == [ValueError] * 3
+    # 완료된 결과는 캐시하지 않으므로 다음 요청은 다시 계산
+    assert flight.do("k", lambda: "ok") == "ok"
+
+
+def test_different_keys_are_not_coalesced():
+    flight = SingleFlight("test")
+    assert flight.do("a", lambda: 1) == 1
+    assert flight.do("b", lambda: 2) == 2
+
+
+def test_async_single_flight_shares_task_and_survives_waiter_cancel():
+    async def scenario():
+        flight = AsyncSingleFlight("test")
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "result"
+
+        first = asyncio.ensure_future(flight.do("k", compute))
+        second = asyncio.ensure_future(flight.do("k", compute))
+        third = asyncio.ensure_future(flight.do("k", compute))
+        await asyncio.sleep(0)
+
+        # 대기자 하나가 취소되어도 공유 계산은 계속됨
+        second.cancel()
+        results = await asyncio.gather(first, third)
+        with pytest.raises(asyncio.CancelledError):
+            await second
+
+        assert results == ["result", "result"]
+        assert len(calls) == 1
+        assert flight.in_flight() == 0
+
+    asyncio.run(scenario())
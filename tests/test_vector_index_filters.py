@@ -0,0 +1,43 @@
+"""질의 기반 카드사/카드 타입 필터 추출 테스트"""
+
+import pytest
+
+from vector_index import extract_filters_from_query, value_aliases
+
+FILTER_VALUES = {
+    "corporate_name": ["현대카드", "롯데카드", "삼성카드", "KB국민카드", "하나카드", "우리카드", "BC카드"],
+    "card_type": ["신용카드", "체크카드"],
+}
+
+
+@pytest.mark.parametrize("query", [
+    "현대백화점 할인 카드",
+    "롯데마트 장보기 혜택",
+    "삼성전자 가전 할인",
+    "신용 점수 낮아도 되는 카드",
+    "우리 가족이 쓰기 좋은 카드",
+    "하나만 추천해줘",
+])
+def test_merchant_and_common_words_are_not_filters(query):
+    assert extract_filters_from_query(query, FILTER_VALUES) == {}
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("국민카드로 카페 혜택", {"corporate_name": ["KB국민카드"]}),
+    ("KB국민카드 체크카드 추천", {"corporate_name": ["KB국민카드"], "card_type": ["체크카드"]}),
+    ("하나카드는 어때?", {"corporate_name": ["하나카드"]}),
+    ("(현대카드) 신용카드 중에", {"corporate_name": ["현대카드"], "card_type": ["신용카드"]}),
+])
+def test_full_names_are_filters(query, expected):
+    assert extract_filters_from_query(query, FILTER_VALUES) == expected
+
+
+def test_name_inside_another_word_is_not_matched():
+    assert extract_filters_from_query("비씨카드", {"corporate_name": ["BC카드"]}) == {}
+    assert extract_filters_from_query("롯데현대카드몰", {"corporate_name": ["현대카드"]}) == {}
+
+
+def test_value_aliases_keep_card_suffix():
+    assert value_aliases("KB국민카드") == ["KB국민카드", "국민카드"]
+    assert value_aliases("BC카드") == ["BC카드"]
+    assert value_aliases("체크카드") == ["체크카드"]
@@ -5,6 +5,16 @@ import os
 from dotenv import load_dotenv
 import csv
 
+from profile_features import (
+    SOURCE_COLUMNS,
+    PROFILE_CACHE_COLUMNS,
+    build_profile_cache_frame,
+    cache_frame_to_rows,
+)
+from code_mappings import get_code_mappings
+from category_mapping import validate_category_codes
+from feature_store import write_feature_store
+
 # 환경 변수 로드
 load_dotenv()
 
@@ -344,40 +354,138 @@ def insert_transaction_data(connection, df, batch_size=1000):
         import traceback
         traceback.print_exc()
 
+# 적재된 트랜잭션으로 전체 사용자 프로필/소비 인사이트를 한 번에 계산
+def build_profile_cache(connection):
+    cursor = connection.cursor()
+    cursor.execute(f"SELECT {', '.join(SOURCE_COLUMNS)} FROM user_transactions")
+    transactions = pd.DataFrame(list(cursor.fetchall()), columns=SOURCE_COLUMNS)
+    cursor.close()
+    
+    if transactions.empty:
+        print("user_transactions 테이블에서 데이터를 찾을 수 없습니다.")
+        return None
+    
+    return build_profile_cache_frame(transactions)
+
+# 사용자 프로필 캐시 생성 (온라인 경로가 요청마다 하던 프로필/소비 인사이트 계산을 적재 시 한 번 수행)
+def materialize_user_profile_cache(connection, cache=None, batch_size=1000):
+    try:
+        if cache is None:
+            cache = build_profile_cache(connection)
+        if cache is None:
+            return
+        
+        cache_rows = cache_frame_to_rows(cache)
+        
+        update_columns = ",\n            ".join(
+            f"{col} = VALUES({col})" for col in PROFILE_CACHE_COLUMNS[1:]
+        )
+        upsert_query = f"""
+        INSERT INTO user_profile_cache ({', '.join(PROFILE_CACHE_COLUMNS)}, updated_at)
+        VALUES ({', '.join(['%s'] * len(PROFILE_CACHE_COLUMNS))}, NOW())
+        ON DUPLICATE KEY UPDATE
+            {update_columns},
+            updated_at = NOW()
+        """
+        
+        total_rows = len(cache_rows)
+        batches = (total_rows + batch_size - 1) // batch_size
+        
+        for batch_idx in range(batches):
+            batch_rows = cache_rows[batch_idx * batch_size:(batch_idx + 1) * batch_size]
+            
+            cursor = connection.cursor()
+            try:
+                cursor.executemany(upsert_query, batch_rows)
+                connection.commit()
+                print(f"사용자 프로필 캐시 배치 저장: {len(batch_rows)}명 ({batch_idx+1}/{batches})")
+            except Exception as e:
+                connection.rollback()
+                print(f"사용자 프로필 캐시 배치 저장 오류: {str(e)}")
+            finally:
+                cursor.close()
+        
+        print(f"사용자 프로필 캐시 생성/업데이트 완료: {total_rows}명")
+        
+    except Exception as e:
+        print(f"사용자 프로필 캐시 생성 중 오류 발생: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+# 온라인 경로용 메모리 맵 피처 스토어 갱신 (실행 중인 서버는 새 버전을 자동으로 다시 읽음)
+def refresh_feature_store(connection, store_dir, cache=None):
+    try:
+        if cache is None:
+            cache = build_profile_cache(connection)
+        if cache is None:
+            return
+        
+        version_dir = write_feature_store(cache, store_dir)
+        print(f"피처 스토어 갱신 완료: {version_dir} ({len(cache)}명)")
+        
+    except Exception as e:
+        print(f"피처 스토어 갱신 중 오류 발생: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+# 사용자 프로필 캐시와 피처 스토어 갱신 (계산은 한 번만 수행)
+def refresh_profile_features(connection, batch_size=1000, skip_profile_cache=False, feature_store_dir=None):
+    if skip_profile_cache and not feature_store_dir:
+        print("사용자 프로필 캐시 생성 단계 건너뛰기")
+        return
+    
+    try:
+        cache = build_profile_cache(connection)
+    except Exception as e:
+        print(f"사용자 프로필 계산 중 오류 발생: {str(e)}")
+        return
+    if cache is None:
+        return
+    
+    if not skip_profile_cache:
+        materialize_user_profile_cache(connection, cache=cache, batch_size=batch_size)
+    else:
+        print("사용자 프로필 캐시 생성 단계 건너뛰기")
+    
+    if feature_store_dir:
+        refresh_feature_store(connection, feature_store_dir, cache=cache)
+
 # 트랜잭션 데이터에서 사용자 프로필 생성
 def create_user_profiles_from_transactions(connection):
     try:
-        # 트랜잭션에서 고유 사용자 추출
+        # 트랜잭션에서 고유 사용자 추출 (코드 값은 조회 테이블로 한 번에 변환)
         query = """
         SELECT DISTINCT 
             seq_id as user_id,
-            age_group as age,
+            age_group,
             gender,
-            CASE 
-                WHEN member_rank <= 2 THEN '상위'
-                WHEN member_rank = 3 THEN '중간'
-                ELSE '낮음'
-            END as income_level,
-            CASE
-                WHEN life_stage = 10 THEN '직장인'
-                WHEN life_stage = 9 THEN '학생'
-                WHEN life_stage = 8 THEN '자영업'
-                ELSE '기타'
-            END as job_category
+            member_rank,
+            life_stage
         FROM user_transactions
         """
         
         cursor = connection.cursor()
         cursor.execute(query)
-        users = cursor.fetchall()
+        users = pd.DataFrame(list(cursor.fetchall()),
+                             columns=["user_id", "age_group", "gender", "member_rank", "life_stage"])
         cursor.close()
         
-        if not users:
+        if users.empty:
             print("user_transactions 테이블에서 데이터를 찾을 수 없습니다.")
             return
             
         print(f"트랜잭션에서 {len(users)}명의 사용자 프로필을 추출했습니다.")
         
+        # 연령대 -> 나이, 성별, 회원등급 -> 소득 수준, 생애주기 -> 직업 (행 단위 dict 조회 없이 열 단위 변환)
+        mappings = get_code_mappings(connection)
+        users = cache_frame_to_rows(pd.DataFrame({
+            "user_id": users["user_id"],
+            "age": mappings.age.decode(users["age_group"]),
+            "gender": mappings.gender.decode(users["gender"]),
+            "income_level": mappings.income_level.decode(users["member_rank"]),
+            "job_category": mappings.job_category.decode(users["life_stage"]),
+        }))
+        
         # 사용자를 users 테이블에 삽입
         insert_user_query = """
         INSERT INTO users (user_id, age, gender, income_level, job_category)
@@ -399,26 +507,12 @@ def create_user_profiles_from_transactions(connection):
             end_idx = min(start_idx + batch_size, total_users)
             batch_users = users[start_idx:end_idx]
             
-            # 처리할 사용자 데이터 배열
-            user_data_batch = []
-            
-            for user in batch_users:
-                # 성별 숫자를 텍스트로 변환
-                user_data = list(user)
-                user_data[2] = "남성" if user[2] == 1 else "여성"
-                
-                # 연령대 코드를 실제 나이로 변환
-                age_mapping = {0: 20, 1: 30, 2: 40, 3: 50, 4: 60, 5: 70}
-                user_data[1] = age_mapping.get(user[1], 35)  # 기본값 35
-                
-                user_data_batch.append(tuple(user_data))
-            
             # 배치 삽입
             cursor = connection.cursor()
             try:
-                cursor.executemany(insert_user_query, user_data_batch)
+                cursor.executemany(insert_user_query, batch_users)
                 connection.commit()
-                print(f"사용자 프로필 배치 삽입: {len(user_data_batch)}명 ({batch_idx+1}/{batches})")
+                print(f"사용자 프로필 배치 삽입: {len(batch_users)}명 ({batch_idx+1}/{batches})")
             except Exception as e:
                 print(f"사용자 프로필 배치 삽입 오류: {str(e)}")
             finally:
@@ -437,13 +531,8 @@ def create_user_profiles_from_transactions(connection):
 # 트랜잭션 데이터에서 소비 패턴 생성
 def create_consumption_patterns(connection):
     try:
-        # 카테고리 매핑 (소비 카테고리 코드 → 이름)
-        category_mapping = {
-            1: "식품/마트", 2: "쇼핑", 3: "자동차", 4: "주유", 5: "공과금",
-            6: "통신비", 7: "의료/건강", 8: "여행/교통", 9: "문화/오락", 
-            10: "교육", 11: "카페/식당", 12: "유흥/오락", 13: "보험", 
-            14: "금융", 15: "기타", 16: "가전/가구", 17: "뷰티/미용"
-        }
+        # 카테고리 매핑 (소비 카테고리 코드 → 이름, category_mappings 테이블 기준)
+        category_mapping = get_code_mappings(connection).spending_category
         
         # 기존 소비 패턴 데이터 삭제 (갱신 전)
         clear_query = "DELETE FROM consumption_patterns"
@@ -466,10 +555,11 @@ def create_consumption_patterns(connection):
         
         cursor = connection.cursor()
         cursor.execute(query)
-        patterns = cursor.fetchall()
+        patterns = pd.DataFrame(list(cursor.fetchall()),
+                                columns=["user_id", "top_spending_category", "total_usage_amount", "frequency"])
         cursor.close()
         
-        if not patterns:
+        if patterns.empty:
             print("소비 패턴을 생성할 트랜잭션 데이터가 없습니다.")
             return
             
@@ -481,28 +571,24 @@ def create_consumption_patterns(connection):
         VALUES (%s, %s, %s, %s)
         """
         
+        # NULL 값 제외 후 카테고리 코드를 열 단위로 변환
+        valid = patterns[patterns["user_id"].notna() & patterns["top_spending_category"].notna()]
+        pattern_rows = cache_frame_to_rows(pd.DataFrame({
+            "user_id": valid["user_id"],
+            "category": category_mapping.decode(valid["top_spending_category"]),
+            "amount": valid["total_usage_amount"],
+            "frequency": valid["frequency"],
+        }))
+        
         # 배치 처리 설정
         batch_size = 1000
-        total_patterns = len(patterns)
+        total_patterns = len(pattern_rows)
         batches = (total_patterns + batch_size - 1) // batch_size
         
         for batch_idx in range(batches):
             start_idx = batch_idx * batch_size
             end_idx = min(start_idx + batch_size, total_patterns)
-            batch_patterns = patterns[start_idx:end_idx]
-            
-            # 처리할 패턴 데이터 배열
-            pattern_data_batch = []
-            
-            for pattern in batch_patterns:
-                user_id, category_id, amount, frequency = pattern
-                
-                # NULL 값 확인 및 처리
-                if user_id is None or category_id is None:
-                    continue
-                    
-                category_name = category_mapping.get(category_id, "기타")
-                pattern_data_batch.append((user_id, category_name, amount, frequency))
+            pattern_data_batch = pattern_rows[start_idx:end_idx]
             
             # 배치 삽입
             if pattern_data_batch:
@@ -687,6 +773,14 @@ def main():
                         help='소비 패턴 생성 단계 건너뛰기')
     parser.add_argument('--skip-recommendations', action='store_true',
                         help='추천 생성 단계 건너뛰기')
+    parser.add_argument('--skip-profile-cache', action='store_true',
+                        help='사용자 프로필 캐시 생성 단계 건너뛰기')
+    parser.add_argument('--skip-validation', action='store_true',
+                        help='적재 후 코드 컬럼 검증(category_mappings 안티 조인) 단계 건너뛰기')
+    parser.add_argument('--profile-cache-only', action='store_true',
+                        help='이미 적재된 트랜잭션으로 사용자 프로필 캐시(및 피처 스토어)만 다시 생성')
+    parser.add_argument('--feature-store-dir', default=os.getenv("CARD_REC_FEATURE_STORE_DIR"),
+                        help='온라인 경로용 피처 스토어 디렉터리 (기본값: CARD_REC_FEATURE_STORE_DIR, 없으면 생성 안 함)')
     
     args = parser.parse_args()
     
@@ -701,6 +795,13 @@ def main():
     # DB 연결
     connection = create_db_connection()
     
+    if connection and args.profile_cache_only:
+        refresh_profile_features(connection, batch_size=args.batch_size,
+                                 feature_store_dir=args.feature_store_dir)
+        connection.close()
+        print("MySQL 연결 종료")
+        return
+    
     if connection:
         try:
             # 트랜잭션 데이터 읽기
@@ -710,6 +811,17 @@ def main():
                 # 트랜잭션 데이터 삽입
                 insert_transaction_data(connection, df, batch_size=args.batch_size)
                 
+                # 적재한 코드 값 검증 (매핑 없는 코드는 기본값으로 변환되므로 적재 직후 확인)
+                if not args.skip_validation:
+                    validate_category_codes(connection)
+                else:
+                    print("코드 검증 단계 건너뛰기")
+                
+                # 사용자 프로필 캐시 및 피처 스토어 생성
+                refresh_profile_features(connection, batch_size=args.batch_size,
+                                         skip_profile_cache=args.skip_profile_cache,
+                                         feature_store_dir=args.feature_store_dir)
+                
                 # 사용자 프로필 생성
                 if not args.skip_users:
                     create_user_profiles_from_transactions(connection)
@@ -0,0 +1,128 @@
+"""
+대화형 추천 세션 모듈.
+
+한 사용자가 여러 번 질문하는 동안 질의와 무관한 조회 결과(사용자 프로필, 소비 인사이트,
+딥러닝 모델 추천)를 세션에 고정해 두고, 후속 질문에서는 질의에 따라 달라지는
+단계(필터, 어휘/FAISS 검색, 결합, LLM 응답)만 다시 실행합니다. 같은 질문을 다시 하면
+직전 추천 후보도 그대로 사용합니다.
+
+세션은 마지막 사용 후 TTL(기본 15분)이 지나면 만료되어 다음 질문에서 다시 조회하므로
+프로필 변경은 최대 TTL 만큼 늦게 반영됩니다.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+from recommendation_metrics import REGISTRY
+
+# 세션 유지 시간 (초, 마지막 사용 기준)
+DEFAULT_SESSION_TTL = 900.0
+
+# 최대 동시 세션 수 (넘으면 가장 오래 사용하지 않은 세션부터 제거)
+DEFAULT_MAX_SESSIONS = 10000
+
+
+class UserSession:
+    __slots__ = ("user_id", "user_profile", "spending_insights", "model_recommendations",
+                 "last_key", "last_recommendations", "turns", "created_at", "last_used")
+
+    def __init__(self, user_id: str, user_profile: Dict[str, Any],
+                 spending_insights: Dict[str, Any],
+                 model_recommendations: List[Dict[str, Any]]):
+        """
+        사용자별 고정 조회 결과
+
+        Args:
+            user_id: 사용자 ID
+            user_profile: 사용자 프로필
+            spending_insights: 소비 인사이트
+            model_recommendations: 딥러닝 모델 추천 (RecommendationRecord 목록, 카드 상세는 조회 시 생성)
+        """
+        self.user_id = user_id
+        self.user_profile = user_profile
+        self.spending_insights = spending_insights
+        self.model_recommendations = model_recommendations
+
+        # 직전 질문의 추천 후보 (같은 질문/조건이면 재사용)
+        self.last_key: Optional[Hashable] = None
+        self.last_recommendations: List[Dict[str, Any]] = []
+
+        self.turns = 0
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+    def cached_recommendations(self, key: Hashable) -> Optional[List[Dict[str, Any]]]:
+        """같은 질문/조건의 직전 추천 후보 (없으면 None)"""
+        if self.last_key is not None and self.last_key == key:
+            return self.last_recommendations
+        return None
+
+    def remember(self, key: Hashable, recommendations: List[Dict[str, Any]]):
+        """직전 추천 후보 저장"""
+        self.last_key = key
+        self.last_recommendations = recommendations
+
+
+class SessionStore:
+    def __init__(self, ttl: float = DEFAULT_SESSION_TTL, max_sessions: int = DEFAULT_MAX_SESSIONS):
+        """
+        사용자 ID -> 세션 저장소 (스레드 안전)
+
+        Args:
+            ttl: 마지막 사용 후 세션 유지 시간 (초, 0 이하이면 세션 사용 안 함)
+            max_sessions: 최대 세션 수
+        """
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, UserSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, user_id: str) -> Optional[UserSession]:
+        """
+        만료되지 않은 세션 조회 (조회 시 사용 시각 갱신)
+
+        Args:
+            user_id: 사용자 ID
+
+        Returns:
+            UserSession: 세션 (없거나 만료되었으면 None)
+        """
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(user_id)
+            if session is not None and now - session.last_used > self.ttl:
+                del self._sessions[user_id]
+                session = None
+                REGISTRY.inc("card_rec_sessions_total", labels={"result": "expired"})
+            if session is None:
+                return None
+            session.last_used = now
+            self._sessions.move_to_end(user_id)
+        REGISTRY.inc("card_rec_sessions_total", labels={"result": "hit"})
+        return session
+
+    def put(self, session: UserSession):
+        """세션 저장 (최대 세션 수를 넘으면 가장 오래 사용하지 않은 세션 제거)"""
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._sessions[session.user_id] = session
+            self._sessions.move_to_end(session.user_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        REGISTRY.inc("card_rec_sessions_total", labels={"result": "created"})
+
+    def invalidate(self, user_id: str):
+        """세션 삭제 (프로필 변경 등으로 다시 조회해야 할 때)"""
+        with self._lock:
+            self._sessions.pop(user_id, None)
+
+    def clear(self):
+        """모든 세션 삭제 (카드 카탈로그 교체 등으로 고정된 조회 결과가 무효가 되었을 때)"""
+        with self._lock:
+            self._sessions.clear()
@@ -0,0 +1,535 @@
+"""
+카드 벡터 인덱스 구성 및 필터 검색 모듈.
+
+카드사(corporate_name), 카드 타입(card_type) 조건을 FAISS 검색 안에서 적용합니다.
+카드 로드 시 속성 값별 비트맵(카드 순서의 bool 배열)을 미리 만들어 두고, 요청 조건의
+비트맵을 AND/OR 로 결합한 뒤 faiss.IDSelectorBitmap 으로 검색 대상을 제한합니다.
+k 개를 먼저 검색한 뒤 걸러내는 방식과 달리 조건에 맞는 카드만 k 개까지 반환하므로
+추가 검색이나 과다 검색(over-fetch)이 필요 없습니다.
+
+- extract_filters_from_query: "국민카드", "체크카드" 같은 표현을 질의에서 찾아 필터로 변환
+  (전체 이름 또는 "<이름>카드" 단어만 일치시키며, 추천 시스템에서는 설정한 경우에만 사용)
+- build_index / rebuild_vector_store_index: 인덱스 종류(flat, ivf_flat, hnsw, ivf_pq)와
+  선택적인 PCA/랜덤 투영 차원 축소를 faiss.index_factory 문자열로 구성합니다. 변환 행렬과
+  IVF/PQ 코드북은 인덱스 생성 시 카드 임베딩으로 학습되어 인덱스 파일에 함께 저장되고,
+  설정(nlist, nprobe, efSearch 등)은 {캐시 이름}.json 에 함께 기록됩니다.
+- 색인 단위: 카드당 문서 1개(card) 또는 혜택별 청크(chunk, chunk_index 모듈)를 색인합니다.
+  CardFilterIndex 는 FAISS 위치를 카드 위치로 대응시키므로 두 단위 모두 같은 필터를 사용합니다.
+"""
+
+import json
+import re
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+
+import faiss
+import numpy as np
+
+# 임베딩 차원 축소 방식
+REDUCTION_NONE = "none"
+REDUCTION_PCA = "pca"
+REDUCTION_RANDOM = "random"
+REDUCTION_METHODS = (REDUCTION_NONE, REDUCTION_PCA, REDUCTION_RANDOM)
+DEFAULT_REDUCED_DIM = 128
+
+# 인덱스 종류 (flat: 정확 검색, 나머지: 근사 최근접 이웃 검색)
+INDEX_FLAT = "flat"
+INDEX_IVF_FLAT = "ivf_flat"
+INDEX_HNSW = "hnsw"
+INDEX_IVF_PQ = "ivf_pq"
+INDEX_TYPES = (INDEX_FLAT, INDEX_IVF_FLAT, INDEX_HNSW, INDEX_IVF_PQ)
+
+# 색인 단위 (card: 카드당 문서 1개, chunk: 혜택별 청크)
+GRANULARITY_CARD = "card"
+GRANULARITY_CHUNK = "chunk"
+INDEX_GRANULARITIES = (GRANULARITY_CARD, GRANULARITY_CHUNK)
+
+# 인덱스 파라미터 기본값
+DEFAULT_INDEX_PARAMS = {
+    "nlist": 1024,          # IVF 클러스터 수
+    "nprobe": 16,           # IVF 검색 클러스터 수
+    "hnsw_m": 32,           # HNSW 노드당 이웃 수
+    "ef_construction": 200,  # HNSW 생성 시 탐색 폭
+    "ef_search": 64,        # HNSW 검색 시 탐색 폭
+    "pq_m": 16,             # PQ 서브 양자화기 수
+    "pq_nbits": 8,          # PQ 서브 양자화기당 비트 수
+}
+
+# 인덱스를 다시 만들지 않고 바꿀 수 있는 검색 파라미터
+SEARCH_PARAM_KEYS = ("nprobe", "ef_search")
+
+# IVF 클러스터당 최소 학습 벡터 수 (faiss 권장값)
+IVF_MIN_POINTS_PER_LIST = 39
+
+# 필터를 지원하는 카드 속성
+FILTER_ATTRIBUTES = ("corporate_name", "card_type")
+
+# 카드사 이름 앞의 영문 약어 (KB국민카드 -> 국민카드, NH농협카드 -> 농협카드)
+_LATIN_PREFIX = re.compile(r"^[A-Za-z]+")
+
+# 질의 단어 경계 (앞에 한글/영문/숫자가 붙으면 다른 단어의 일부로 봄)
+_WORD_CHAR = "0-9A-Za-z가-힣"
+
+
+def value_aliases(value: str) -> List[str]:
+    """
+    질의에서 속성 값을 찾을 때 사용할 표현 목록 (긴 표현부터)
+
+    "현대백화점", "삼성전자", "신용 점수" 같은 일반 표현이 카드사/카드 타입으로 바뀌지 않도록
+    "카드"를 뺀 이름(현대, 삼성, 신용)은 사용하지 않습니다.
+
+    Args:
+        value: 속성 값 (예: KB국민카드, 체크카드)
+
+    Returns:
+        List: 표현 목록 (예: KB국민카드, 국민카드)
+    """
+    aliases = {value}
+    stripped = _LATIN_PREFIX.sub("", value)
+    if stripped != value and stripped.endswith("카드") and len(stripped) > 2:
+        aliases.add(stripped)
+    return sorted(aliases, key=len, reverse=True)
+
+
+def _alias_pattern(alias: str) -> re.Pattern:
+    """
+    표현이 질의의 한 단어로 쓰였는지 찾는 정규식
+
+    "<이름>카드" 표현은 뒤에 조사가 붙어도(국민카드로, 체크카드는) 일치시키고,
+    그 외 표현은 앞뒤가 모두 단어 경계여야 일치시킵니다.
+    """
+    suffix = "" if alias.endswith("카드") else f"(?![{_WORD_CHAR}])"
+    return re.compile(f"(?<![{_WORD_CHAR}]){re.escape(alias)}{suffix}")
+
+
+def extract_filters_from_query(query: str, values: Dict[str, Iterable[str]]) -> Dict[str, List[str]]:
+    """
+    질의에 언급된 카드사/카드 타입을 필터로 변환
+
+    Args:
+        query: 사용자 질문
+        values: 속성 -> 가능한 값 목록 (CardFilterIndex.values)
+
+    Returns:
+        Dict: 속성 -> 일치한 값 목록 (언급이 없는 속성은 제외)
+    """
+    query = query or ""
+    filters = {}
+    for attribute in FILTER_ATTRIBUTES:
+        matched = [
+            value for value in values.get(attribute, [])
+            if value and any(_alias_pattern(alias).search(query) for alias in value_aliases(value))
+        ]
+        if matched:
+            filters[attribute] = matched
+    return filters
+
+
+def index_cache_name(index_type: str = INDEX_FLAT, reduction: str = REDUCTION_NONE,
+                     reduced_dim: int = DEFAULT_REDUCED_DIM,
+                     granularity: str = GRANULARITY_CARD) -> str:
+    """
+    인덱스 설정별 캐시 파일 이름 (설정이 바뀌면 다른 캐시를 사용)
+
+    Args:
+        index_type: 인덱스 종류
+        reduction: 차원 축소 방식
+        reduced_dim: 축소 후 차원
+        granularity: 색인 단위 (card, chunk)
+
+    Returns:
+        str: 캐시 파일 이름 (확장자 제외, 기본 설정은 faiss_index)
+    """
+    parts = ["faiss_index"]
+    if granularity != GRANULARITY_CARD:
+        parts.append(granularity)
+    if index_type != INDEX_FLAT:
+        parts.append(index_type)
+    if reduction != REDUCTION_NONE:
+        parts.append(f"{reduction}{reduced_dim}")
+    return "_".join(parts)
+
+
+def index_factory_string(dim: int, n_vectors: int, index_type: str = INDEX_FLAT,
+                         reduction: str = REDUCTION_NONE, reduced_dim: int = DEFAULT_REDUCED_DIM,
+                         index_params: Optional[Dict[str, Any]] = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    인덱스 설정을 faiss.index_factory 문자열로 변환 (벡터 수에 맞게 파라미터 보정)
+
+    Args:
+        dim: 임베딩 차원
+        n_vectors: 학습/색인할 벡터 수
+        index_type: 인덱스 종류 (flat, ivf_flat, hnsw, ivf_pq)
+        reduction: 차원 축소 방식 (none, pca, random)
+        reduced_dim: 축소 후 차원
+        index_params: DEFAULT_INDEX_PARAMS 중 바꿀 값
+
+    Returns:
+        Tuple: (팩토리 문자열, 실제 사용한 파라미터)
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"지원하지 않는 인덱스 종류: {index_type}")
+    if reduction not in REDUCTION_METHODS:
+        raise ValueError(f"지원하지 않는 차원 축소 방식: {reduction}")
+
+    params = dict(DEFAULT_INDEX_PARAMS, **(index_params or {}))
+    parts = []
+
+    # 차원 축소 (PCA 는 축소 차원보다 벡터 수가 많아야 학습 가능, 부족하면 랜덤 투영 사용)
+    if reduction != REDUCTION_NONE and reduced_dim < dim:
+        if reduction == REDUCTION_PCA and n_vectors < reduced_dim:
+            print(f"PCA 학습 데이터 부족 ({n_vectors} < {reduced_dim}), 랜덤 투영 사용")
+            reduction = REDUCTION_RANDOM
+        parts.append(f"{'PCA' if reduction == REDUCTION_PCA else 'RR'}{reduced_dim}")
+        dim = reduced_dim
+
+    if index_type in (INDEX_IVF_FLAT, INDEX_IVF_PQ):
+        # 클러스터당 학습 벡터가 IVF_MIN_POINTS_PER_LIST 개 이상이 되도록 nlist 보정
+        nlist = max(1, min(params["nlist"], n_vectors // IVF_MIN_POINTS_PER_LIST))
+        if nlist != params["nlist"]:
+            print(f"벡터 수({n_vectors})에 맞춰 nlist 조정: {params['nlist']} -> {nlist}")
+        params["nlist"] = nlist
+        params["nprobe"] = min(params["nprobe"], nlist)
+
+    if index_type == INDEX_IVF_PQ and n_vectors < 2 ** params["pq_nbits"]:
+        # PQ 코드북 학습에는 2^nbits 개 이상의 벡터 필요
+        print(f"PQ 학습 데이터 부족 ({n_vectors} < {2 ** params['pq_nbits']}), IVF-Flat 사용")
+        index_type = INDEX_IVF_FLAT
+
+    if index_type == INDEX_FLAT:
+        parts.append("Flat")
+    elif index_type == INDEX_HNSW:
+        parts.append(f"HNSW{params['hnsw_m']}")
+    elif index_type == INDEX_IVF_FLAT:
+        parts.append(f"IVF{params['nlist']},Flat")
+    else:
+        # 서브 양자화기 수는 차원의 약수여야 함
+        pq_m = max(m for m in range(1, min(params["pq_m"], dim) + 1) if dim % m == 0)
+        params["pq_m"] = pq_m
+        parts.append(f"IVF{params['nlist']},PQ{pq_m}x{params['pq_nbits']}")
+
+    return ",".join(parts), params
+
+
+def _base_index(index: faiss.Index) -> faiss.Index:
+    """차원 축소 변환을 제외한 실제 검색 인덱스"""
+    if isinstance(index, faiss.IndexPreTransform):
+        return faiss.downcast_index(index.index)
+    return faiss.downcast_index(index)
+
+
+def set_search_params(index: faiss.Index, index_params: Optional[Dict[str, Any]] = None):
+    """
+    인덱스를 다시 만들지 않고 바꿀 수 있는 검색 파라미터 적용 (IVF nprobe, HNSW efSearch)
+
+    Args:
+        index: FAISS 인덱스
+        index_params: nprobe, ef_search 를 포함할 수 있는 파라미터
+    """
+    params = dict(DEFAULT_INDEX_PARAMS, **(index_params or {}))
+    base = _base_index(index)
+    if isinstance(base, faiss.IndexIVF):
+        base.nprobe = min(params["nprobe"], base.nlist)
+    elif isinstance(base, faiss.IndexHNSW):
+        base.hnsw.efSearch = params["ef_search"]
+
+
+def search_parameters(index: faiss.Index, selector) -> faiss.SearchParameters:
+    """
+    인덱스 종류에 맞는 검색 파라미터 (IVF/HNSW 는 전용 파라미터 타입 필요)
+
+    Args:
+        index: FAISS 인덱스
+        selector: 검색 대상 선택기 (IDSelector)
+
+    Returns:
+        faiss.SearchParameters: 선택기와 현재 nprobe/efSearch 를 담은 파라미터
+    """
+    base = _base_index(index)
+    if isinstance(base, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=base.nprobe)
+    if isinstance(base, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=base.hnsw.efSearch)
+    return faiss.SearchParameters(sel=selector)
+
+
+def build_index(vectors: np.ndarray, reduction: str = REDUCTION_NONE,
+                reduced_dim: int = DEFAULT_REDUCED_DIM, index_type: str = INDEX_FLAT,
+                index_params: Optional[Dict[str, Any]] = None) -> faiss.Index:
+    """
+    카드 임베딩으로 검색 인덱스 생성 (선택적으로 차원 축소, 근사 최근접 이웃 인덱스)
+
+    Args:
+        vectors: 카드 임베딩 (카드 수, 차원) float32
+        reduction: 차원 축소 방식 (none, pca, random)
+        reduced_dim: 축소 후 차원
+        index_type: 인덱스 종류 (flat, ivf_flat, hnsw, ivf_pq)
+        index_params: DEFAULT_INDEX_PARAMS 중 바꿀 값
+
+    Returns:
+        faiss.Index: 카드 임베딩이 추가된 인덱스 (추가 순서 = FAISS 위치)
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    factory, params = index_factory_string(
+        vectors.shape[1], len(vectors), index_type, reduction, reduced_dim, index_params
+    )
+
+    index = faiss.index_factory(vectors.shape[1], factory)
+    base = _base_index(index)
+    if isinstance(base, faiss.IndexHNSW):
+        base.hnsw.efConstruction = params["ef_construction"]
+
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    set_search_params(index, params)
+    return index
+
+
+def stored_dim(index: faiss.Index) -> int:
+    """인덱스에 저장된 벡터 차원 (차원 축소 인덱스는 축소 후 차원)"""
+    return _base_index(index).d
+
+
+def rebuild_vector_store_index(vector_store, reduction: str = REDUCTION_NONE,
+                               reduced_dim: int = DEFAULT_REDUCED_DIM, index_type: str = INDEX_FLAT,
+                               index_params: Optional[Dict[str, Any]] = None):
+    """
+    LangChain FAISS 벡터 저장소의 Flat 인덱스를 설정한 인덱스로 교체 (FAISS 위치와 문서 대응은 유지)
+
+    Args:
+        vector_store: 전체 차원 Flat 인덱스를 가진 LangChain FAISS 벡터 저장소
+        reduction: 차원 축소 방식
+        reduced_dim: 축소 후 차원
+        index_type: 인덱스 종류
+        index_params: DEFAULT_INDEX_PARAMS 중 바꿀 값
+    """
+    if index_type == INDEX_FLAT and reduction == REDUCTION_NONE:
+        return
+    vectors = vector_store.index.reconstruct_n(0, vector_store.index.ntotal)
+    factory, _ = index_factory_string(
+        vectors.shape[1], len(vectors), index_type, reduction, reduced_dim, index_params
+    )
+    vector_store.index = build_index(vectors, reduction, reduced_dim, index_type, index_params)
+    print(f"FAISS 인덱스 구성 완료: {factory} ({vectors.shape[1]} -> {stored_dim(vector_store.index)}차원)")
+
+
+def write_index_settings(path: str, settings: Dict[str, Any]):
+    """
+    인덱스 설정을 인덱스 파일 옆에 JSON 으로 저장
+
+    Args:
+        path: 설정 파일 경로 ({캐시 이름}.json)
+        settings: index_type, reduction, reduced_dim, index_params, granularity, catalog(카탈로그 내용 지문),
+                  docstore(docstore 저장 방식)
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(settings, f, ensure_ascii=False, indent=2)
+
+
+def read_index_settings(path: str) -> Optional[Dict[str, Any]]:
+    """인덱스 파일과 함께 저장된 설정 (없거나 읽을 수 없으면 None)"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def same_build_settings(saved: Optional[Dict[str, Any]], settings: Dict[str, Any]) -> bool:
+    """
+    저장된 인덱스를 그대로 사용할 수 있는지 (검색 파라미터 nprobe/efSearch 차이는 무시)
+
+    Args:
+        saved: 인덱스와 함께 저장된 설정 (None 이면 설정 파일이 없는 이전 캐시)
+        settings: 현재 설정
+
+    Returns:
+        bool: 인덱스 구성 설정과 카탈로그 지문이 같으면 True
+    """
+    if saved is None:
+        # 설정 파일이 없는 기본 Flat 캐시는 그대로 사용 (카탈로그 지문을 비교하는 경우 제외)
+        return (settings["index_type"] == INDEX_FLAT and settings["reduction"] == REDUCTION_NONE
+                and settings.get("granularity", GRANULARITY_CARD) == GRANULARITY_CARD
+                and settings.get("catalog") is None)
+
+    def build_only(value):
+        params = dict(DEFAULT_INDEX_PARAMS, **(value.get("index_params") or {}))
+        for key in SEARCH_PARAM_KEYS:
+            params.pop(key, None)
+        return (value.get("index_type"), value.get("reduction"), value.get("reduced_dim"),
+                value.get("granularity", GRANULARITY_CARD), value.get("catalog"), value.get("docstore"), params)
+
+    return build_only(saved) == build_only(settings)
+
+
+def filters_key(filters: Optional[Dict[str, List[str]]]):
+    """
+    필터를 요청 병합 키에 넣을 수 있는 형태로 변환
+
+    Args:
+        filters: 속성 -> 허용 값 목록 (None 이면 질의에서 추출)
+
+    Returns:
+        tuple: 정렬된 (속성, 값 튜플) 목록 (None 은 그대로)
+    """
+    if filters is None:
+        return None
+    return tuple(sorted((attribute, tuple(sorted(values))) for attribute, values in filters.items()))
+
+
+class CardFilterIndex:
+    def __init__(self, cards: List[Dict[str, Any]]):
+        """
+        카드 속성 값별 비트맵 생성
+
+        Args:
+            cards: 카드 메타데이터 목록 (card_id 와 FILTER_ATTRIBUTES 포함, 카드 문서 순서)
+        """
+        self.card_ids = [card.get('card_id') for card in cards]
+        self._positions = {card_id: pos for pos, card_id in enumerate(self.card_ids)}
+
+        # 속성 -> 값 -> 카드 순서 bool 배열
+        self.bitmaps: Dict[str, Dict[str, np.ndarray]] = {}
+        for attribute in FILTER_ATTRIBUTES:
+            column = np.array([str(card.get(attribute, '') or '') for card in cards], dtype=object)
+            self.bitmaps[attribute] = {
+                value: column == value for value in np.unique(column) if value
+            }
+
+        # FAISS 위치 -> 카드 순서 위치 (bind_vector_store 호출 후 사용)
+        self._faiss_positions: Optional[np.ndarray] = None
+
+    @property
+    def values(self) -> Dict[str, List[str]]:
+        """속성별 값 목록"""
+        return {attribute: list(bitmaps) for attribute, bitmaps in self.bitmaps.items()}
+
+    def bind_vector_store(self, vector_store):
+        """
+        FAISS 내부 위치와 카드 순서 대응 관계 계산 (캐시에서 읽은 인덱스는 순서가 다를 수 있음)
+
+        Args:
+            vector_store: LangChain FAISS 벡터 저장소
+        """
+        positions = np.full(vector_store.index.ntotal, -1, dtype=np.int64)
+        for faiss_pos, docstore_id in vector_store.index_to_docstore_id.items():
+            doc = vector_store.docstore.search(docstore_id)
+            card_id = doc.metadata.get('card_id') if hasattr(doc, 'metadata') else None
+            positions[faiss_pos] = self._positions.get(card_id, -1)
+        self._faiss_positions = positions
+
+    def mask(self, filters: Optional[Dict[str, List[str]]]) -> Optional[np.ndarray]:
+        """
+        필터 조건에 맞는 카드 비트맵 (속성 간 AND, 같은 속성의 값 간 OR)
+
+        Args:
+            filters: 속성 -> 허용 값 목록
+
+        Returns:
+            np.ndarray: 카드 순서 bool 배열 (필터가 없으면 None)
+        """
+        filters = {attr: vals for attr, vals in (filters or {}).items() if vals}
+        if not filters:
+            return None
+
+        mask = np.ones(len(self.card_ids), dtype=bool)
+        for attribute, allowed in filters.items():
+            if attribute not in self.bitmaps:
+                raise ValueError(f"지원하지 않는 필터 속성: {attribute}")
+            attribute_mask = np.zeros(len(self.card_ids), dtype=bool)
+            for value in allowed:
+                bitmap = self.bitmaps[attribute].get(value)
+                if bitmap is not None:
+                    attribute_mask |= bitmap
+            mask &= attribute_mask
+        return mask
+
+    def allowed_card_ids(self, mask: np.ndarray) -> set:
+        """비트맵에 해당하는 카드 ID 집합"""
+        return {self.card_ids[pos] for pos in np.flatnonzero(mask)}
+
+    def _search(self, index: faiss.Index, query_embeddings: np.ndarray, k: int,
+                mask: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """비트맵 조건으로 FAISS 검색 (질의별 L2 거리, FAISS 위치 2차원 배열, 결과가 없으면 열 0개)"""
+        if self._faiss_positions is None:
+            raise RuntimeError("bind_vector_store 가 호출되지 않았습니다.")
+
+        vectors = np.ascontiguousarray(query_embeddings, dtype=np.float32)
+        if mask is None:
+            return index.search(vectors, min(k, index.ntotal))
+
+        # 카드 순서 비트맵 -> FAISS 위치 비트맵 (IDSelectorBitmap 은 하위 비트부터 사용)
+        positions = self._faiss_positions
+        faiss_mask = np.zeros(len(positions), dtype=bool)
+        valid = positions >= 0
+        faiss_mask[valid] = mask[positions[valid]]
+
+        candidates = int(faiss_mask.sum())
+        if candidates == 0:
+            return (np.empty((len(vectors), 0), dtype=np.float32),
+                    np.empty((len(vectors), 0), dtype=np.int64))
+
+        packed = np.packbits(faiss_mask, bitorder="little")
+        selector = faiss.IDSelectorBitmap(len(faiss_mask), faiss.swig_ptr(packed))
+        params = search_parameters(index, selector)
+        return index.search(vectors, min(k, candidates), params=params)
+
+    def search_positions(self, vector_store, query_embedding: List[float], k: int,
+                         mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        FAISS 검색 결과를 문서 조회 없이 카드 위치 배열로 반환 (청크 색인의 카드별 점수 집계용)
+
+        Args:
+            vector_store: LangChain FAISS 벡터 저장소 (bind_vector_store 로 연결된 저장소)
+            query_embedding: 질의 임베딩
+            k: 검색할 최대 벡터(청크) 수
+            mask: 카드 순서 bool 배열 (None 이면 전체)
+
+        Returns:
+            Tuple: (카드 위치 배열, L2 거리 배열) (거리 오름차순, 같은 카드가 여러 번 나올 수 있음)
+        """
+        card_positions, distances = self.search_positions_batch(vector_store, [query_embedding], k, mask)
+        known = card_positions[0] >= 0
+        return card_positions[0][known], distances[0][known]
+
+    def search_positions_batch(self, vector_store, query_embeddings, k: int,
+                               mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        여러 질의를 FAISS 검색 한 번으로 처리해 카드 위치 2차원 배열로 반환 (대량 추천 작업용)
+
+        Args:
+            vector_store: LangChain FAISS 벡터 저장소 (bind_vector_store 로 연결된 저장소)
+            query_embeddings: 질의 임베딩 목록 (질의 수, 차원)
+            k: 질의별 검색할 최대 벡터(청크) 수
+            mask: 카드 순서 bool 배열 (모든 질의에 공통, None 이면 전체)
+
+        Returns:
+            Tuple: (카드 위치 배열, L2 거리 배열) (질의 수, k) 크기, 결과가 없는 칸의 카드 위치는 -1
+        """
+        distances, indices = self._search(vector_store.index, query_embeddings, k, mask)
+        card_positions = np.where(indices >= 0, self._faiss_positions[np.maximum(indices, 0)], -1)
+        return card_positions, distances
+
+    def search(self, vector_store, query_embedding: List[float], k: int,
+               mask: np.ndarray) -> List[Tuple[Any, float]]:
+        """
+        비트맵에 해당하는 카드만 대상으로 FAISS 검색
+
+        Args:
+            vector_store: LangChain FAISS 벡터 저장소 (bind_vector_store 로 연결된 저장소)
+            query_embedding: 질의 임베딩
+            k: 반환할 최대 카드 수
+            mask: 카드 순서 bool 배열
+
+        Returns:
+            List: (Document, L2 거리) 목록 (거리 오름차순)
+        """
+        distances, indices = self._search(vector_store.index, [query_embedding], k, mask)
+
+        results = []
+        for faiss_pos, distance in zip(indices[0], distances[0]):
+            if faiss_pos < 0:
+                continue
+            doc = vector_store.docstore.search(vector_store.index_to_docstore_id[int(faiss_pos)])
+            results.append((doc, float(distance)))
+        return results